@@ -0,0 +1,218 @@
+"""
+Birden çok proje için toplu rapor üretimi.
+
+Tüm projeler tek bir tarayıcı havuzunu paylaşır; LLM çağrıları sınırlı
+eşzamanlılıkla iş parçacıklarında, PDF render'ları aynı havuz üzerinde paralel
+çalışır. Görsel (base64) ve vector store önbellekleri süreç genelinde paylaşıldığı
+için aynı asset'ler ve değişmemiş PDF'ler projeler arasında yeniden işlenmez.
+
+"rerender" modunda LLM çağrılmaz: her projenin kayıtlı rapor HTML'i güncel
+asset'lerle yeniden PDF'e çevrilir (ör. logo veya şablon değişikliğinden sonra).
+
+Kullanım (backend dizininden):
+    python -m api.batch_reports
+    python -m api.batch_reports --projects "V Mall" "V Metroway" --user-input "..."
+    python -m api.batch_reports --mode rerender
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from api.data_storage import (
+    DEFAULT_PROJECTS,
+    get_all_projects,
+    get_project_data,
+    get_report_html,
+    save_generated_report,
+)
+from config import BATCH_LLM_CONCURRENCY, BATCH_MANIFEST_DIR
+from utils.browser_pool import BrowserPool
+from utils.render_workers import render_workers_enabled, shutdown_render_workers
+from utils.job_status import finish_job, start_job, update_job
+
+logger = logging.getLogger(__name__)
+
+# LLM'siz, kayıtlı HTML'den yeniden render modu
+RERENDER_MODE = "rerender"
+
+
+def plan_batch(project_names: Optional[List[str]] = None, mode: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Toplu üretim planını çıkarır; üretilemeyecek projeleri gerekçesiyle işaretler.
+
+    Args:
+        project_names: Üretilecek projeler (verilmezse tüm projeler)
+        mode: "rerender" ise kayıtlı HTML'i olmayan projeler atlanır
+
+    Returns:
+        Her proje için {"project_name", "report_id", "status", "error"} içeren liste
+    """
+    from utils.oai import slugify, ACTIVE_UPLOADS_PATH
+
+    if not project_names:
+        project_names = get_all_projects() or list(DEFAULT_PROJECTS)
+
+    plan = []
+    for project_name in project_names:
+        entry = {"project_name": project_name, "report_id": None, "status": "pending", "error": None}
+        project_data = get_project_data(project_name)
+        active_report = (project_data or {}).get("active_report")
+        pdf_folder = ACTIVE_UPLOADS_PATH / slugify(project_name) / "pdfs"
+
+        if not project_data:
+            entry.update(status="skipped", error="Project not found")
+        elif not active_report or not active_report.get("report_id"):
+            entry.update(status="skipped", error="No active report found for this project")
+        elif mode == RERENDER_MODE:
+            if active_report.get("report_content"):
+                entry["report_id"] = active_report["report_id"]
+            else:
+                entry.update(status="skipped", error="No stored report HTML to re-render")
+        elif not pdf_folder.exists() or not any(pdf_folder.glob("*.pdf")):
+            entry.update(status="skipped", error="No PDF files found")
+        else:
+            entry["report_id"] = active_report["report_id"]
+        plan.append(entry)
+    return plan
+
+
+async def _generate_one(entry: Dict[str, Any], user_input: Optional[str], mode: Optional[str],
+                        llm_semaphore: asyncio.Semaphore, pool: Optional[BrowserPool]) -> Dict[str, Any]:
+    """Tek bir projenin raporunu üretir ve süreleri entry üzerine yazar."""
+    from utils.oai import generate_report_html
+    from utils.pdf_utils import generate_pdf_with_playwright
+
+    project_name = entry["project_name"]
+    timings: Dict[str, float] = {}
+    entry["timings"] = timings
+    started = time.perf_counter()
+    stage = "llm"
+    start_job(project_name, entry["report_id"])
+
+    def on_progress(progress: Dict[str, Any]) -> None:
+        update_job(project_name, progress=progress, attempt=progress.get("attempt", 1))
+
+    try:
+        if mode == RERENDER_MODE:
+            html_content = get_report_html(project_name)["html"]
+        else:
+            async with llm_semaphore:
+                update_job(project_name, stage="generating_html")
+                stage_started = time.perf_counter()
+                html_content = await asyncio.to_thread(generate_report_html, project_name, user_input,
+                                                       mode=mode, on_progress=on_progress)
+                timings["llm_s"] = round(time.perf_counter() - stage_started, 3)
+
+        stage = "render"
+        update_job(project_name, stage="rendering_pdf")
+        stage_started = time.perf_counter()
+        pdf_path = await generate_pdf_with_playwright(html_content, project_name, entry["report_id"], pool=pool,
+                                                      wait_for_worker=True)
+        timings["render_s"] = round(time.perf_counter() - stage_started, 3)
+
+        stage = "save"
+        update_job(project_name, stage="saving")
+        save_generated_report(
+            project_name=project_name,
+            report_id=entry["report_id"],
+            report_content=html_content,
+            pdf_path=str(pdf_path),
+            pdf_file_name=pdf_path.name,
+            source=RERENDER_MODE if mode == RERENDER_MODE else "llm",
+        )
+        entry.update(status="completed", pdf_path=str(pdf_path), pdf_filename=pdf_path.name)
+        finish_job(project_name)
+        logger.info(f"[BATCH] {project_name} tamamlandı: {pdf_path.name}")
+    except Exception as e:
+        logger.error(f"[BATCH] {project_name} başarısız ({stage}): {str(e)}", exc_info=True)
+        entry.update(status="failed", failed_stage=stage, error=str(e))
+        finish_job(project_name, error=str(e))
+    finally:
+        timings["total_s"] = round(time.perf_counter() - started, 3)
+
+    return entry
+
+
+async def run_batch(project_names: Optional[List[str]] = None, user_input: Optional[str] = None,
+                    llm_concurrency: int = BATCH_LLM_CONCURRENCY, mode: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Planlanan tüm projeler için raporları üretir ve bir manifest döndürür.
+
+    Args:
+        project_names: Üretilecek projeler (verilmezse tüm projeler)
+        user_input: Tüm raporlara uygulanacak kullanıcı notu
+        llm_concurrency: Aynı anda çalışacak LLM çağrısı sayısı
+        mode: Üretim modu ("html" / "structured" / "sections"; verilmezse REPORT_GENERATION_MODE)
+            veya LLM'siz yeniden render için "rerender"
+
+    Returns:
+        Proje bazında durum ve sürelerini içeren manifest
+    """
+    started_at = datetime.datetime.now()
+    started = time.perf_counter()
+    plan = plan_batch(project_names, mode)
+    runnable = [entry for entry in plan if entry["status"] == "pending"]
+    logger.info(f"[BATCH] {len(runnable)}/{len(plan)} proje için rapor üretimi başlıyor")
+
+    llm_semaphore = asyncio.Semaphore(max(1, llm_concurrency))
+    if runnable:
+        # Render işçileri açıksa işler onlara gider; değilse projeler tek bir tarayıcıyı paylaşır
+        async with (contextlib.nullcontext() if render_workers_enabled() else BrowserPool()) as pool:
+            await asyncio.gather(*(
+                _generate_one(entry, user_input, mode, llm_semaphore, pool) for entry in runnable
+            ))
+
+    manifest = {
+        "batch_id": started_at.strftime("%Y%m%d_%H%M%S"),
+        "started_at": started_at.isoformat(),
+        "finished_at": datetime.datetime.now().isoformat(),
+        "total_s": round(time.perf_counter() - started, 3),
+        "llm_concurrency": llm_concurrency,
+        "mode": mode,
+        "summary": {
+            status: sum(1 for entry in plan if entry["status"] == status)
+            for status in ("completed", "failed", "skipped")
+        },
+        "projects": plan,
+    }
+    manifest["manifest_path"] = str(save_manifest(manifest))
+    return manifest
+
+
+def save_manifest(manifest: Dict[str, Any]):
+    """Manifesti data/reports/batch altına kaydeder."""
+    BATCH_MANIFEST_DIR.mkdir(parents=True, exist_ok=True)
+    manifest_path = BATCH_MANIFEST_DIR / f"batch_{manifest['batch_id']}.json"
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate investor reports for several projects at once")
+    parser.add_argument("--projects", nargs="+", help="Proje adları (varsayılan: tüm projeler)")
+    parser.add_argument("--user-input", default=None, help="Tüm raporlara eklenecek kullanıcı notu")
+    parser.add_argument("--llm-concurrency", type=int, default=BATCH_LLM_CONCURRENCY)
+    parser.add_argument("--mode", choices=["html", "structured", "sections", RERENDER_MODE], default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        manifest = asyncio.run(run_batch(args.projects, args.user_input, args.llm_concurrency, args.mode))
+    finally:
+        shutdown_render_workers()
+
+    for entry in manifest["projects"]:
+        total = entry.get("timings", {}).get("total_s")
+        duration = f"{total:.1f}s" if total is not None else "-"
+        print(f"{entry['project_name']:<16} {entry['status']:<10} {duration:>8}  {entry.get('error') or ''}")
+    print(f"Manifest: {manifest['manifest_path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,12 @@ Her proje için tek bir aktif rapor tutulur.
 import os
 import json
 import datetime
+import functools
+import hashlib
+import threading
 import time
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Callable, Dict, Any, Optional, List, TypeVar
 import shutil
 import uuid
 import logging
@@ -36,6 +39,13 @@ DEFAULT_PROJECTS = ["V Mall", "V Metroway", "V Statü", "V Yeşilada"]
 # Get a logger instance
 logger = logging.getLogger(__name__)
 
+# Aktif raporda tutulan en fazla render kaydı (hangi PDF hangi HTML revizyonundan üretildi)
+MAX_RENDER_HISTORY = 50
+
+# Proje JSON'unun okuma-değiştirme-yazma adımlarını dosya bazında sıralar
+_project_json_locks: Dict[Path, threading.RLock] = {}
+_project_json_locks_guard = threading.Lock()
+
 def initialize_projects():
     """
     Varsayılan projeleri oluşturur - eğer mevcut değilse
@@ -53,8 +63,8 @@ def initialize_projects():
             }
             
             # Verileri kaydet
-            with open(project_path, 'w', encoding='utf-8') as f:
-                json.dump(project_data, f, ensure_ascii=False, indent=2)
+            with project_json_lock(project_name):
+                write_project_json(project_path, project_data)
 
 def get_project_path(project_name: str) -> Path:
     """
@@ -70,6 +80,41 @@ def get_project_path(project_name: str) -> Path:
     safe_name = "".join(c if c.isalnum() or c in ['-', '_'] else '_' for c in project_name)
     return PROJECTS_DIR / f"{safe_name}.json"
 
+def project_json_lock(project_name: str) -> threading.RLock:
+    """
+    Proje JSON'u için süreç içi kilit. Dosya yoluna göre anahtarlanır; aynı
+    dosyaya çözülen adlar ("V Mall", "V_Mall") aynı kilidi paylaşır. Proje
+    JSON'unu değiştiren her yer okuma-değiştirme-yazma boyunca bu kilidi tutar.
+    """
+    project_path = get_project_path(project_name)
+    with _project_json_locks_guard:
+        return _project_json_locks.setdefault(project_path, threading.RLock())
+
+def write_project_json(project_path: Path, project_data: Dict[str, Any]) -> None:
+    """
+    Proje JSON'unu geçici dosyaya yazıp os.replace ile atomik olarak değiştirir;
+    okuyanlar yarım yazılmış dosya görmez. Çağıran project_json_lock'u tutar.
+    """
+    tmp_path = project_path.with_name(f"{project_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(project_data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, project_path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+def locked_project_json(fn: F) -> F:
+    """project_name alan bir fonksiyonu proje JSON kilidiyle çalıştırır."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        project_name = kwargs["project_name"] if "project_name" in kwargs else args[0]
+        with project_json_lock(project_name):
+            return fn(*args, **kwargs)
+    return wrapper  # type: ignore[return-value]
+
 # def get_report_id(project_name: str) -> str:
 #     """
 #     Proje adı ve o anki tarih kullanılarak rapor ID'si oluşturur
@@ -84,6 +129,7 @@ def get_project_path(project_name: str) -> Path:
 #     current_date = datetime.datetime.now().strftime("%Y%m%d")
 #     return f"{safe_project}_{current_date}"
 
+@locked_project_json
 def create_new_report(project_name: str, report_id: str) -> Dict[str, Any]:
     """
     Bir proje için yeni bir rapor oluşturur.
@@ -133,11 +179,11 @@ def create_new_report(project_name: str, report_id: str) -> Dict[str, Any]:
     project_data["last_updated"] = current_time
     
     # Verileri kaydet
-    with open(project_path, 'w', encoding='utf-8') as f:
-        json.dump(project_data, f, ensure_ascii=False, indent=2)
+    write_project_json(project_path, project_data)
     
     return new_report
 
+@locked_project_json
 def get_active_report(project_name: str) -> Optional[Dict[str, Any]]:
     """
     Projenin aktif raporunu getirir.
@@ -170,13 +216,13 @@ def get_active_report(project_name: str) -> Optional[Dict[str, Any]]:
         project_data.pop("reports", None)
         
         # Verileri kaydet
-        with open(project_path, 'w', encoding='utf-8') as f:
-            json.dump(project_data, f, ensure_ascii=False, indent=2)
+        write_project_json(project_path, project_data)
         
         return latest_report
     
     return None
 
+@locked_project_json
 def save_component_data(project_name: str, component_name: str, answers: Dict[str, Any]) -> Dict[str, Any]:
     """
     Bir bileşen için verilen cevapları kaydeder.
@@ -254,8 +300,7 @@ def save_component_data(project_name: str, component_name: str, answers: Dict[st
         active_report["components"][component_name]["last_updated"] = current_time
         
         # Save data
-        with open(project_path, 'w', encoding='utf-8') as f:
-            json.dump(project_data, f, ensure_ascii=False, indent=2)
+        write_project_json(project_path, project_data)
         
         return active_report
         
@@ -263,6 +308,7 @@ def save_component_data(project_name: str, component_name: str, answers: Dict[st
         print(f"Bileşen verileri kaydedilirken hata: {e}")
         raise e
 
+@locked_project_json
 def delete_report(project_name: str) -> bool:
     """
     Projenin aktif raporunu ve ilişkili PDF dosyasını siler.
@@ -285,43 +331,41 @@ def delete_report(project_name: str) -> bool:
         raise FileNotFoundError(f"Proje bulunamadı: {project_name}")
     
     try:
-        with open(project_path, 'r+', encoding='utf-8') as f:
+        with open(project_path, 'r', encoding='utf-8') as f:
             project_data = json.load(f)
             
-            active_report = project_data.get("active_report")
-            if not active_report:
-                logger.warning(f"[DATA_STORAGE] Silinecek aktif rapor bulunamadı: Proje={project_name}")
-                raise ValueError("Aktif bir rapor bulunamadı")
+        active_report = project_data.get("active_report")
+        if not active_report:
+            logger.warning(f"[DATA_STORAGE] Silinecek aktif rapor bulunamadı: Proje={project_name}")
+            raise ValueError("Aktif bir rapor bulunamadı")
             
-            # Get report ID to find the PDF
-            report_id = active_report.get("report_id")
+        # Get report ID to find the PDF
+        report_id = active_report.get("report_id")
             
-            # Attempt to delete the associated PDF file
-            if report_id:
-                logger.info(f"[DATA_STORAGE] İlişkili PDF dosyası siliniyor: Rapor ID={report_id}")
-                try:
-                    pdf_path_obj = get_report_path(project_name, report_id)
-                    pdf_path = str(pdf_path_obj)
-                    if os.path.exists(pdf_path):
-                        os.remove(pdf_path)
-                        logger.info(f"[DATA_STORAGE] PDF dosyası başarıyla silindi: {pdf_path}")
-                    else:
-                        logger.warning(f"[DATA_STORAGE] Silinecek PDF dosyası bulunamadı (zaten yok): {pdf_path}")
-                except Exception as e:
-                    # Log the error but continue to remove the metadata entry
-                    logger.error(f"[DATA_STORAGE] PDF dosyası ({pdf_path}) silinirken hata oluştu: {str(e)}", exc_info=True)
-            else:
-                logger.warning(f"[DATA_STORAGE] Aktif raporda report_id bulunamadığı için PDF silinemedi: Proje={project_name}")
-
-            # Remove active report from metadata
-            project_data["active_report"] = None
-            project_data["last_updated"] = datetime.datetime.now().isoformat()
+        # Attempt to delete the associated PDF file
+        if report_id:
+            logger.info(f"[DATA_STORAGE] İlişkili PDF dosyası siliniyor: Rapor ID={report_id}")
+            try:
+                pdf_path_obj = get_report_path(project_name, report_id)
+                pdf_path = str(pdf_path_obj)
+                if os.path.exists(pdf_path):
+                    os.remove(pdf_path)
+                    logger.info(f"[DATA_STORAGE] PDF dosyası başarıyla silindi: {pdf_path}")
+                else:
+                    logger.warning(f"[DATA_STORAGE] Silinecek PDF dosyası bulunamadı (zaten yok): {pdf_path}")
+            except Exception as e:
+                # Log the error but continue to remove the metadata entry
+                logger.error(f"[DATA_STORAGE] PDF dosyası ({pdf_path}) silinirken hata oluştu: {str(e)}", exc_info=True)
+            shutil.rmtree(get_revision_dir(project_name, report_id), ignore_errors=True)
+        else:
+            logger.warning(f"[DATA_STORAGE] Aktif raporda report_id bulunamadığı için PDF silinemedi: Proje={project_name}")
+
+        # Remove active report from metadata
+        project_data["active_report"] = None
+        project_data["last_updated"] = datetime.datetime.now().isoformat()
             
-            # Rewind file and save updated data
-            f.seek(0)
-            json.dump(project_data, f, ensure_ascii=False, indent=2)
-            f.truncate()
-            logger.info(f"[DATA_STORAGE] Aktif rapor meta verisi başarıyla silindi: Proje={project_name}")
+        write_project_json(project_path, project_data)
+        logger.info(f"[DATA_STORAGE] Aktif rapor meta verisi başarıyla silindi: Proje={project_name}")
         
         return True
         
@@ -364,6 +408,7 @@ def get_project_data(project_name: str) -> Optional[Dict[str, Any]]:
     with open(project_path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
+@locked_project_json
 def archive_project(project_name: str) -> bool:
     """
     Projeyi arşivler.
@@ -388,6 +433,7 @@ def archive_project(project_name: str) -> bool:
     
     return True
 
+@locked_project_json
 def delete_project_data(project_name: str) -> bool:
     """
     Projeyi tamamen siler.
@@ -409,15 +455,22 @@ def delete_project_data(project_name: str) -> bool:
     os.remove(project_path)
     return True
 
-def save_generated_report(project_name: str, report_id: str, report_content: str, pdf_path: str) -> Dict[str, Any]:
+@locked_project_json
+def save_generated_report(project_name: str, report_id: str, report_content: str, pdf_path: str,
+                          pdf_file_name: Optional[str] = None, source: str = "llm") -> Dict[str, Any]:
     """
     Oluşturulan raporun bilgilerini kaydeder.
     
+    HTML içeriği bir revizyon olarak da saklanır (aynı içerik yeni revizyon
+    açmaz) ve PDF'in hangi revizyondan üretildiği render geçmişine yazılır.
+    
     Args:
         project_name: Proje adı
         report_id: Rapor ID'si
         report_content: Oluşturulan rapor içeriği
         pdf_path: Oluşturulan PDF dosyasının yolu
+        pdf_file_name: PDF dosya adı (verilirse pdfFileName olarak kaydedilir)
+        source: HTML'in kaynağı ("llm", "rerender" veya "edit")
         
     Returns:
         Güncellenmiş rapor verisi
@@ -446,13 +499,107 @@ def save_generated_report(project_name: str, report_id: str, report_content: str
     active_report["pdf_path"] = pdf_path
     active_report["report_generated"] = True
     active_report["status"] = "completed"
+    if pdf_file_name:
+        active_report["pdfFileName"] = pdf_file_name
+    
+    revision = _record_html_revision(project_name, report_id, active_report, report_content, source)
+    _record_render(active_report, revision, pdf_path, source)
     
     # Verileri kaydet
-    with open(project_path, 'w', encoding='utf-8') as f:
-        json.dump(project_data, f, ensure_ascii=False, indent=2)
+    write_project_json(project_path, project_data)
     
     return active_report
 
+def get_revision_dir(project_name: str, report_id: str) -> Path:
+    """Raporun HTML revizyonlarının saklandığı dizin (data/reports/{proje}/revisions/{rapor_id})."""
+    return get_report_path(project_name, report_id).parent / "revisions" / report_id
+
+def _record_html_revision(project_name: str, report_id: str, active_report: Dict[str, Any],
+                          html: str, source: str) -> int:
+    """
+    HTML'i revizyon dosyası olarak yazar ve active_report["html_revisions"]'a ekler.
+    İçerik son revizyonlardan biriyle aynıysa o revizyonun numarasını döndürür.
+    """
+    revisions = active_report.setdefault("html_revisions", [])
+    digest = hashlib.sha256(html.encode("utf-8")).hexdigest()
+    existing = next((entry for entry in revisions if entry.get("sha256") == digest), None)
+    if existing is not None:
+        revision = existing["revision"]
+    else:
+        revision = max((entry["revision"] for entry in revisions), default=0) + 1
+        revision_dir = get_revision_dir(project_name, report_id)
+        revision_dir.mkdir(parents=True, exist_ok=True)
+        file_name = f"r{revision}.html"
+        tmp_path = revision_dir / f"{file_name}.tmp"
+        tmp_path.write_text(html, encoding="utf-8")
+        tmp_path.replace(revision_dir / file_name)
+        revisions.append({
+            "revision": revision,
+            "sha256": digest,
+            "source": source,
+            "created_at": datetime.datetime.now().isoformat(),
+            "file": file_name,
+            "size": len(html),
+        })
+        logger.info(f"[DATA_STORAGE] HTML revizyonu kaydedildi: Proje={project_name}, r{revision} ({source})")
+    active_report["html_revision"] = revision
+    return revision
+
+def _record_render(active_report: Dict[str, Any], revision: int, pdf_path: str, source: str) -> None:
+    """PDF'in hangi HTML revizyonundan üretildiğini kaydeder."""
+    pdf_sha256 = None
+    try:
+        with open(pdf_path, 'rb') as f:
+            pdf_sha256 = hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        logger.warning(f"[DATA_STORAGE] PDF okunamadı, özet kaydedilmedi: {pdf_path}")
+    active_report["pdf_html_revision"] = revision
+    renders = active_report.setdefault("renders", [])
+    renders.append({
+        "html_revision": revision,
+        "source": source,
+        "pdf_path": pdf_path,
+        "pdf_sha256": pdf_sha256,
+        "rendered_at": datetime.datetime.now().isoformat(),
+    })
+    del renders[:-MAX_RENDER_HISTORY]
+
+def get_report_html(project_name: str, revision: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Aktif raporun kayıtlı HTML'ini döndürür.
+    
+    Args:
+        project_name: Proje adı
+        revision: Revizyon numarası (verilmezse en son kaydedilen içerik)
+        
+    Returns:
+        {"report_id", "revision", "html"} (revizyon kaydı olmayan eski raporlarda revision None)
+        
+    Raises:
+        FileNotFoundError: Proje, kayıtlı HTML veya revizyon bulunamazsa
+        ValueError: Aktif rapor bulunamazsa
+    """
+    project_data = get_project_data(project_name)
+    if not project_data:
+        raise FileNotFoundError(f"Proje bulunamadı: {project_name}")
+    active_report = project_data.get("active_report")
+    if not active_report or not active_report.get("report_id"):
+        raise ValueError("Aktif bir rapor bulunamadı")
+    report_id = active_report["report_id"]
+    
+    if revision is None:
+        html = active_report.get("report_content")
+        if not html:
+            raise FileNotFoundError("Bu rapor için kaydedilmiş bir HTML bulunamadı")
+        return {"report_id": report_id, "revision": active_report.get("html_revision"), "html": html}
+    
+    entry = next((e for e in active_report.get("html_revisions", []) if e["revision"] == revision), None)
+    revision_path = get_revision_dir(project_name, report_id) / entry["file"] if entry else None
+    if revision_path is None or not revision_path.exists():
+        raise FileNotFoundError(f"HTML revizyonu bulunamadı: r{revision}")
+    return {"report_id": report_id, "revision": revision, "html": revision_path.read_text(encoding="utf-8")}
+
+@locked_project_json
 def finalize_report(project_name: str) -> Dict[str, Any]:
     """
     Raporu sonlandırır ve düzenlemeye kapatır.
@@ -487,11 +634,11 @@ def finalize_report(project_name: str) -> Dict[str, Any]:
     project_data["last_updated"] = datetime.datetime.now().isoformat()
     
     # Save updated project data
-    with open(project_path, 'w', encoding='utf-8') as f:
-        json.dump(project_data, f, ensure_ascii=False, indent=2)
+    write_project_json(project_path, project_data)
     
     return active_report
 
+@locked_project_json
 def reset_active_report_generation(project_name: str) -> Optional[Dict[str, Any]]:
     """
     Deletes the generated PDF file for the active report and resets its
@@ -516,50 +663,47 @@ def reset_active_report_generation(project_name: str) -> Optional[Dict[str, Any]
         raise FileNotFoundError(f"Proje veri dosyası bulunamadı: {project_path}")
 
     try:
-        with open(project_path, 'r+', encoding='utf-8') as f:
+        with open(project_path, 'r', encoding='utf-8') as f:
             project_data = json.load(f)
-            active_report = project_data.get("active_report")
-
-            if not active_report:
-                logger.warning(f"[DATA] Reset skipped: No active report found for project {project_name}")
-                return None # Indicate no active report was found
-
-            report_id = active_report.get("report_id")
-            if not report_id:
-                logger.error(f"[DATA] Reset failed: Active report for {project_name} is missing a report_id.")
-                raise ValueError("Aktif raporun ID bilgisi eksik, sıfırlanamıyor.")
-
-            # Construct the PDF path
-            pdf_path = get_report_path(project_name, report_id)
-            logger.info(f"[DATA] Attempting to delete PDF for report {report_id}: {pdf_path}")
+        active_report = project_data.get("active_report")
 
-            # Attempt to delete the PDF file, ignore if it doesn't exist
-            try:
-                if pdf_path.exists():
-                    os.remove(pdf_path)
-                    logger.info(f"[DATA] PDF file deleted successfully: {pdf_path}")
-                else:
-                    logger.info(f"[DATA] PDF file not found (already deleted or never generated): {pdf_path}")
-            except OSError as e:
-                # Log the OS error but continue to reset the state
-                logger.error(f"[DATA] OS error deleting PDF file {pdf_path}: {e}", exc_info=True)
-
-            # Always reset the generation status and update timestamp
-            logger.info(f"[DATA] Resetting report_generated flag to False for report {report_id}")
-            active_report["report_generated"] = False
-            active_report["pdf_path"] = None # Clear any potential old path
-            active_report["pdfFileName"] = None # Clear filename too
-            current_time = datetime.datetime.now().isoformat()
-            active_report["last_updated"] = current_time
-            project_data["last_updated"] = current_time
+        if not active_report:
+            logger.warning(f"[DATA] Reset skipped: No active report found for project {project_name}")
+            return None # Indicate no active report was found
+
+        report_id = active_report.get("report_id")
+        if not report_id:
+            logger.error(f"[DATA] Reset failed: Active report for {project_name} is missing a report_id.")
+            raise ValueError("Aktif raporun ID bilgisi eksik, sıfırlanamıyor.")
+
+        # Construct the PDF path
+        pdf_path = get_report_path(project_name, report_id)
+        logger.info(f"[DATA] Attempting to delete PDF for report {report_id}: {pdf_path}")
+
+        # Attempt to delete the PDF file, ignore if it doesn't exist
+        try:
+            if pdf_path.exists():
+                os.remove(pdf_path)
+                logger.info(f"[DATA] PDF file deleted successfully: {pdf_path}")
+            else:
+                logger.info(f"[DATA] PDF file not found (already deleted or never generated): {pdf_path}")
+        except OSError as e:
+            # Log the OS error but continue to reset the state
+            logger.error(f"[DATA] OS error deleting PDF file {pdf_path}: {e}", exc_info=True)
+
+        # Always reset the generation status and update timestamp
+        logger.info(f"[DATA] Resetting report_generated flag to False for report {report_id}")
+        active_report["report_generated"] = False
+        active_report["pdf_path"] = None # Clear any potential old path
+        active_report["pdfFileName"] = None # Clear filename too
+        current_time = datetime.datetime.now().isoformat()
+        active_report["last_updated"] = current_time
+        project_data["last_updated"] = current_time
 
-            # Go back to the beginning of the file to overwrite
-            f.seek(0)
-            json.dump(project_data, f, ensure_ascii=False, indent=2)
-            f.truncate() # Remove any trailing old data if the new data is shorter
-            logger.info(f"[DATA] Active report {report_id} generation status reset and project data saved.")
+        write_project_json(project_path, project_data)
+        logger.info(f"[DATA] Active report {report_id} generation status reset and project data saved.")
 
-            return active_report # Return the modified active report
+        return active_report # Return the modified active report
 
     except json.JSONDecodeError as e:
         logger.error(f"[DATA] Reset failed: Error decoding JSON from {project_path}: {e}", exc_info=True)
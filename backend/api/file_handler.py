@@ -1,5 +1,6 @@
 import os
-from api.data_storage import get_project_path
+from api.data_storage import get_project_path, project_json_lock, write_project_json
+import asyncio
 import json
 import shutil
 import logging
@@ -10,6 +11,9 @@ import uuid
 from pathlib import Path
 from fastapi import UploadFile
 
+from config import UPLOAD_WRITE_CONCURRENCY
+from utils.prestage import get_prestager
+
 # Logger setup 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -19,6 +23,9 @@ BASE_DIR = Path(__file__).parent.parent
 UPLOADS_DIR = BASE_DIR / "data" / "uploads"
 ACTIVE_REPORT_DIR = UPLOADS_DIR / "active_report"
 
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp')
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 def ensure_directory_structure(project_name: str) -> None:
     """
     Aktif rapor için gerekli dizin yapısını oluşturur.
@@ -96,7 +103,12 @@ async def save_uploaded_image(project_name: str, component_name: str,
                 "type": "image"
             }
             
-            add_file_entry_to_array(project_name, component_name, question_id, file_info)
+            if not add_file_entry_to_array(project_name, component_name, question_id, file_info):
+                file_path.unlink(missing_ok=True)
+                return False, "", "Project JSON could not be updated"
+
+        # Görsel analizi üretimi beklemeden arka planda yenilenir
+        get_prestager().notify_upload(project_name, "image", new_filename, component_name)
         
         return True, new_filename, ""
     
@@ -129,7 +141,11 @@ async def save_uploaded_pdf(project_name: str, component_name: str, file: Upload
             'path': relative_path,
             'type': 'pdf'
         }
-        add_file_entry_to_array(project_name, component_name, question_id, file_info)
+        if not add_file_entry_to_array(project_name, component_name, question_id, file_info):
+            file_path.unlink(missing_ok=True)
+            return False, '', 'Project JSON could not be updated'
+        # PDF, üretimi beklemeden arka planda projenin vector store'una eklenir
+        get_prestager().notify_upload(project_name, "pdf", new_filename, component_name)
         return True, new_filename, ''
     except Exception as e:
         logger.error(f'[FILE] PDF save error: {str(e)}', exc_info=True)
@@ -140,6 +156,119 @@ async def save_uploaded_pdf(project_name: str, component_name: str, file: Upload
         logger.error(f"[FILE] Bileşen metni kaydedilirken hata: {str(e)}", exc_info=True)
         return False, str(e)
 
+def upload_kind(upload: UploadFile) -> Optional[str]:
+    """Yüklenen dosyanın türü: "pdf", "image" veya desteklenmiyorsa None."""
+    file_ext = os.path.splitext(upload.filename or "")[1].lower()
+    content_type = upload.content_type or ""
+    if file_ext == ".pdf" or content_type == "application/pdf":
+        return "pdf"
+    if file_ext in IMAGE_EXTENSIONS or content_type.startswith("image/"):
+        return "image"
+    return None
+
+
+def _component_file_stem(component_name: str, kind: str) -> str:
+    """save_uploaded_pdf / save_uploaded_image ile aynı bileşen öneki."""
+    cleaned = component_name.lower().replace(" ", "_")
+    if kind == "image":
+        cleaned = cleaned.replace("ı", "i").replace("ğ", "g").replace("ü", "u").replace("ş", "s") \
+            .replace("ç", "c").replace("ö", "o")
+    return cleaned
+
+
+def _copy_upload(source, target: Path) -> None:
+    """Yüklemeyi parça parça diske yazar; dosya yalnızca tamamlanınca asıl adıyla görünür."""
+    part_path = target.with_name(target.name + ".part")
+    source.seek(0)
+    with open(part_path, "wb") as f:
+        shutil.copyfileobj(source, f, UPLOAD_CHUNK_SIZE)
+    os.replace(part_path, target)
+
+
+async def save_uploaded_files(project_name: str, component_name: str, question_id: str,
+                              files: List[UploadFile]) -> List[Dict[str, Any]]:
+    """
+    Bir soruya ait birden çok PDF/görseli tek istekte kaydeder.
+
+    Dosyalar UPLOAD_WRITE_CONCURRENCY eşzamanlılıkla diske akıtılır; proje JSON'u
+    tüm başarılı dosyalar için tek seferde güncellenir (add_file_entries_to_array).
+    JSON güncellenemezse (False dönerse veya hata fırlatırsa) diske yazılan
+    dosyalar geri silinir ve her dosya için hata döner.
+
+    Returns:
+    --------
+    List[Dict[str, Any]]
+        Her dosya için {"filename", "fileName", "filePath", "type", "success", "error"} (istek sırasıyla)
+    """
+    ensure_directory_structure(project_name)
+    project_dir = ACTIVE_REPORT_DIR / project_name.lower()
+    timestamp = int(time.time())
+    taken = set()
+    results, planned = [], []
+
+    for upload in files:
+        result = {"filename": upload.filename, "fileName": None, "filePath": None, "type": None,
+                  "success": False, "error": None}
+        results.append(result)
+        kind = upload_kind(upload)
+        if kind is None:
+            result["error"] = f"Unsupported file type: {upload.content_type or upload.filename}"
+            continue
+
+        # Aynı saniyede aynı bileşene ait dosyalar sıra ekiyle ayrılır
+        folder = "pdfs" if kind == "pdf" else "images"
+        file_ext = os.path.splitext(upload.filename or "")[1].lower() or (".pdf" if kind == "pdf" else "")
+        stem = f"{_component_file_stem(component_name, kind)}-{timestamp}"
+        new_filename, counter = f"{stem}{file_ext}", 1
+        while new_filename in taken or (project_dir / folder / new_filename).exists():
+            new_filename, counter = f"{stem}_{counter}{file_ext}", counter + 1
+        taken.add(new_filename)
+
+        result.update(type=kind, fileName=new_filename,
+                      filePath=f"active_report/{project_name.lower()}/{folder}/{new_filename}")
+        planned.append((result, upload, project_dir / folder / new_filename))
+
+    semaphore = asyncio.Semaphore(max(1, UPLOAD_WRITE_CONCURRENCY))
+
+    async def write(upload: UploadFile, file_path: Path) -> None:
+        async with semaphore:
+            await asyncio.to_thread(_copy_upload, upload.file, file_path)
+
+    outcomes = await asyncio.gather(*(write(upload, path) for _, upload, path in planned), return_exceptions=True)
+
+    written = []
+    for (result, upload, file_path), outcome in zip(planned, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"[FILE] {upload.filename} kaydedilemedi: {outcome}")
+            result["error"] = str(outcome)
+        else:
+            written.append((result, file_path))
+
+    entries = [
+        (component_name, question_id, {"filename": result["filename"], "path": result["filePath"],
+                                       "type": result["type"]})
+        for result, _ in written
+    ]
+    if entries:
+        try:
+            updated = await asyncio.to_thread(add_file_entries_to_array, project_name, entries)
+            error = None if updated else "Project JSON could not be updated"
+        except Exception as e:
+            logger.error(f"[FILE] Toplu yüklemede proje JSON'u güncellenemedi: {e}", exc_info=True)
+            error = f"Project JSON could not be updated: {e}"
+        if error:
+            # Referansı yazılamayan dosyalar diskte sahipsiz kalmasın
+            for result, file_path in written:
+                file_path.unlink(missing_ok=True)
+                result.update(fileName=None, filePath=None, error=error)
+            return results
+
+    for result, _ in written:
+        result["success"] = True
+        get_prestager().notify_upload(project_name, result["type"], result["fileName"], component_name)
+    logger.info(f"[FILE] Toplu yükleme: {len(written)}/{len(files)} dosya kaydedildi ({project_name})")
+    return results
+
 def get_active_report_images(project_name: str) -> List[str]:
     """
     Aktif rapor için yüklenen tüm görsellerin yollarını döndürür.
@@ -161,9 +290,8 @@ def get_active_report_images(project_name: str) -> List[str]:
         return []
     
     # Tüm görsel dosyaları bul
-    image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp')
     image_paths = [str(file) for file in image_dir.glob("*") 
-                  if file.suffix.lower() in image_extensions]
+                  if file.suffix.lower() in IMAGE_EXTENSIONS]
     
     logger.info(f"[FILE] {len(image_paths)} adet görsel bulundu: {project_name}")
     
@@ -192,6 +320,7 @@ def clean_active_report(project_name: str) -> bool:
     try:
         # Dizini tamamen kaldır
         shutil.rmtree(project_dir)
+        get_prestager().forget(project_name)
         logger.info(f"[FILE] Aktif rapor dizini başarıyla temizlendi: {project_dir}")
         return True
     
@@ -206,6 +335,18 @@ def add_file_entry_to_array(
     file_info: Dict[str, str]
 ) -> bool:
     """Always maintains files as arrays and adds an upload timestamp."""
+    return add_file_entries_to_array(project_name, [(component_name, question_id, file_info)])
+
+def add_file_entries_to_array(
+    project_name: str,
+    entries: List[Tuple[str, str, Dict[str, str]]]
+) -> bool:
+    """
+    Adds several (component_name, question_id, file_info) references with a
+    single read-modify-write of the project JSON, under project_json_lock and
+    with an atomic replace (write_project_json). Returns False if the project
+    or its active report does not exist.
+    """
     try:
         project_path = get_project_path(project_name)
 
@@ -213,42 +354,50 @@ def add_file_entry_to_array(
             logger.error(f"[FILE] Project file not found: {project_path}")
             return False
 
-        with open(project_path, "r+", encoding="utf-8") as f:
-            data = json.load(f)
+        with project_json_lock(project_name):
+            with open(project_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
 
-            # Ensure active_report and components structure exists
-            report = data.setdefault("active_report", {})
+            report = data.get("active_report")
+            if not report:
+                logger.error(f"[FILE] Aktif rapor yok, dosya referansı eklenemedi: {project_name}")
+                return False
             components = report.setdefault("components", {})
-            component = components.setdefault(component_name, {"answers": {}})
-            answers = component.setdefault("answers", {})
-
-            # Always keep the answer under question_id as a list
-            existing = answers.get(question_id)
-            if existing is None:
-                answers[question_id] = []
-            elif not isinstance(existing, list):
-                # Wrap single entry into a list, or reset if it's falsy
-                answers[question_id] = [existing] if existing else []
-
-            # Add timestamp
-            file_info = dict(file_info)  # copy to avoid mutating input
-            file_info["uploaded_at"] = datetime.datetime.now().isoformat()
-
-            # Check for duplicates by path
-            if any(
-                isinstance(entry, dict) and entry.get("path") == file_info.get("path")
-                for entry in answers[question_id]
-            ):
-                logger.info(f"File already present: {file_info.get('path')}")
+            uploaded_at = datetime.datetime.now().isoformat()
+            added = 0
+
+            for component_name, question_id, file_info in entries:
+                component = components.setdefault(component_name, {"answers": {}})
+                answers = component.setdefault("answers", {})
+
+                # Always keep the answer under question_id as a list
+                existing = answers.get(question_id)
+                if existing is None:
+                    answers[question_id] = []
+                elif not isinstance(existing, list):
+                    # Wrap single entry into a list, or reset if it's falsy
+                    answers[question_id] = [existing] if existing else []
+
+                # Add timestamp
+                file_info = dict(file_info)  # copy to avoid mutating input
+                file_info["uploaded_at"] = uploaded_at
+
+                # Check for duplicates by path
+                if any(
+                    isinstance(entry, dict) and entry.get("path") == file_info.get("path")
+                    for entry in answers[question_id]
+                ):
+                    logger.info(f"File already present: {file_info.get('path')}")
+                    continue
+
+                answers[question_id].append(file_info)
+                added += 1
+                logger.info(f"File added: {file_info.get('path')}")
+
+            if not added:
                 return True
 
-            # Append and write back
-            answers[question_id].append(file_info)
-            logger.info(f"File added: {file_info.get('path')}")
-
-            f.seek(0)
-            json.dump(data, f, ensure_ascii=False, indent=2)
-            f.truncate()
+            write_project_json(project_path, data)
 
         return True
 
@@ -264,18 +413,18 @@ def remove_file_entry_from_array(
 ) -> bool:
     """Proje JSON'undaki bir sorudan dosya referansını kaldırır."""
     try:
-        from api.data_storage import get_project_path
         project_path = get_project_path(project_name)
 
         if not project_path.exists():
             logger.error(f"[FILE] Proje dosyası bulunamadı: {project_path}")
             return False
 
-        with open(project_path, "r+", encoding="utf-8") as f:
-            data = json.load(f)
+        with project_json_lock(project_name):
+            with open(project_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
 
             # Navigate to the correct location in the JSON structure
-            if "active_report" not in data:
+            if not data.get("active_report"):
                 logger.warning("Aktif rapor bulunamadı.")
                 return False
                 
@@ -333,10 +482,7 @@ def remove_file_entry_from_array(
             answers[question_id] = new_file_list
             logger.info(f"Dosya kaldırıldı. Kalan dosya sayısı: {len(new_file_list)}")
 
-            # Write back to file
-            f.seek(0)
-            json.dump(data, f, ensure_ascii=False, indent=2)
-            f.truncate()
+            write_project_json(project_path, data)
 
         return True
         
@@ -3,17 +3,15 @@ import re
 import json
 import traceback
 import asyncio
-import httpx
 from typing import Dict, Any, Optional, List, Tuple
 import tempfile
 
-import pdfplumber
-import PyPDF2
-from fpdf import FPDF
+# pdfplumber, PyPDF2, fpdf, httpx ve openai yalnızca yorum satırındaki eski
+# fonksiyonlarda kullanılıyordu; bu fonksiyonlar geri açılırsa import'lar
+# açılışı yavaşlatmamak için fonksiyon içinde yapılmalı.
 from pydantic import BaseModel, validator, Field
 from fastapi import UploadFile, File, Form
 from datetime import datetime
-from openai import OpenAI
 
 from utils.pdf_utils import (
     save_pdf_content,
@@ -176,23 +174,10 @@ def create_content_chunks(sentences: List[str], max_chunk_size: int) -> List[str
     
     return chunks
 
-async def handle_rate_limit(func):
-    """Rate limiting için exponential backoff uygula"""
-    max_retries = 3
-    base_delay = 1
-    print(f"[LOG] handle_rate_limit fonksiyonu çağrıldı*************************************************")
-    for attempt in range(max_retries):
-        try:
-            return await func()
-        except Exception as e:
-            if "RateLimitError" in str(e) or "rate_limit" in str(e).lower():
-                if attempt == max_retries - 1:
-                    raise
-                delay = base_delay * (2 ** attempt)  # exponential backoff
-                print(f"Rate limit aşıldı. {delay} saniye bekleniyor...")
-                await asyncio.sleep(delay)
-            else:
-                raise
+async def handle_rate_limit(func, estimated_tokens: int = 0):
+    """Çağrıyı paylaşılan OpenAI hız sınırlayıcısı altında (jitter'lı yeniden deneme ile) çalıştır"""
+    from utils.rate_limiter import get_rate_limiter
+    return await get_rate_limiter().acall(func, estimated_tokens=estimated_tokens)
                 
 
 # async def process_text_request_async(content: str) -> str:
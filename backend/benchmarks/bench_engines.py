@@ -0,0 +1,214 @@
+"""
+PDF render motorlarının karşılaştırması: gecikme, bellek ve çıktı boyutu.
+
+Kayıtlı structured şablonlar (templates/reports.json, "mode": "structured")
+örnek bir içerikle render edilir ve her motor (playwright, weasyprint,
+reportlab) aynı iş üzerinde ölçülür. Her motor ayrı bir süreçte çalışır;
+böylece bellek ölçümü diğer motorların yüklediği modüllerden etkilenmez.
+Bellek, süreç ve alt süreçlerinin (Chromium) toplam RSS'inin tepe değeridir.
+Kurulu olmayan motorlar "skipped" olarak raporlanır.
+
+Kullanım (backend dizininden):
+    python -m benchmarks.bench_engines
+    python -m benchmarks.bench_engines --engines reportlab weasyprint --repeat 10 --sections 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_PROJECT = "V_Metroway"
+
+SAMPLE_PARAGRAPH = (
+    "Projede bu çeyrekte kaba inşaat işleri planlanan takvimin önünde ilerlemiş, cephe ve "
+    "mekanik tesisat çalışmalarına başlanmıştır. Kiralama tarafında ana kiracılarla görüşmeler "
+    "olumlu sürmekte; ziyaretçi sayısı ve ciro verileri yatırımcı beklentilerini karşılamaktadır."
+)
+_ERROR_LINE = re.compile(r"^[\w.]+(Error|Exception)\b")
+
+
+def sample_content(sections: int, image: Optional[str]) -> Dict[str, Any]:
+    """REPORT_CONTENT_SCHEMA'ya uyan, Türkçe karakterli örnek içerik."""
+    titles = ["İşletme", "Finans", "İnşaat", "Kurumsal İletişim", "Satış", "Kiralama", "Hukuk", "Sürdürülebilirlik"]
+    content = {"title": "", "period": "2026 3. Çeyrek", "sections": []}
+    for index in range(sections):
+        subsections = []
+        for sub in range(2):
+            subsections.append({
+                "heading": f"{titles[index % len(titles)]} Özeti {sub + 1}",
+                "paragraphs": [SAMPLE_PARAGRAPH] * 3,
+                "metrics": [
+                    {"label": "Doluluk oranı", "value": f"%{88 + index % 10}"},
+                    {"label": "Aylık ziyaretçi", "value": f"{1_250_000 + index * 10_000:,}".replace(",", ".")},
+                    {"label": "Kira geliri (₺)", "value": f"{42 + index},5 milyon"},
+                ],
+                "images": [{"file": image, "caption": "Şantiyeden genel görünüm"}] if image and sub == 0 else [],
+            })
+        content["sections"].append({"title": titles[index % len(titles)], "subsections": subsections})
+    return content
+
+
+def structured_topics() -> List[str]:
+    from utils.template_registry import get_template_registry
+
+    registry = get_template_registry()
+    return [topic for topic in registry.report_topics() if registry.report_entry(topic).mode == "structured"]
+
+
+class _RssSampler:
+    """Süreç ağacının RSS'ini arka planda örnekler ve tepe değeri tutar."""
+
+    def __init__(self, interval: float = 0.02):
+        from utils.memory_profiler import process_tree_rss
+
+        self._read = lambda: process_tree_rss(os.getpid())
+        self.interval = interval
+        self.peak = self._read() or 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self._read() or 0)
+
+    def __enter__(self) -> "_RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._read() or 0)
+
+
+def _page_count(pdf_path: Path) -> Optional[int]:
+    try:
+        import pypdfium2
+
+        document = pypdfium2.PdfDocument(str(pdf_path))
+        try:
+            return len(document)
+        finally:
+            document.close()
+    except Exception:
+        return None
+
+
+async def _measure(engine_name: str, template: str, project: str, sections: int, repeat: int) -> Dict[str, Any]:
+    """Alt süreçte çalışır: tek bir motoru ölçer."""
+    from utils.browser_pool import BrowserPool
+    from utils.memory_profiler import process_tree_rss
+    from utils.pdf_utils import load_project_assets, replace_image_references
+    from utils.render_engines import RenderJob, get_engine
+    from utils.structured_report import extract_report_metadata, render_structured_report
+
+    engine = get_engine(engine_name)
+    if not engine.available():
+        return {"status": "skipped", "reason": "not installed"}
+
+    images = load_project_assets(project)
+    image = next((name for name in images if name.endswith("_foto") and name != "kapak_foto"), None)
+    content = sample_content(sections, image)
+    html = render_structured_report(content, project, images, topic=template)
+    html, topic, embedded = extract_report_metadata(html)
+    html = replace_image_references(html, images)
+
+    baseline = process_tree_rss(os.getpid()) or 0
+    timings, size, pages = [], 0, None
+    with tempfile.TemporaryDirectory(prefix="bench_engines_") as tmp_dir, _RssSampler() as sampler:
+        # playwright için tek bağlamlı, süreç içi bir havuz (işçi süreçleri ölçüme karışmaz)
+        pool = BrowserPool(max_contexts=1) if engine.name == "playwright" else None
+        try:
+            for i in range(repeat + 1):
+                pdf_path = Path(tmp_dir) / f"run_{i}.pdf"
+                job = RenderJob(html=html, pdf_path=pdf_path, project_name=project, images=images,
+                                template=topic, content=embedded, use_page_cache=False, shards=1, pool=pool)
+                started = time.perf_counter()
+                await engine.render(job)
+                # İlk render ısınmadır (tarayıcı açılışı, font kaydı); süreye katılmaz
+                if i:
+                    timings.append(time.perf_counter() - started)
+            size = pdf_path.stat().st_size
+            pages = _page_count(pdf_path)
+        finally:
+            if pool is not None:
+                await pool.close()
+
+    return {
+        "status": "ok",
+        "median_ms": round(statistics.median(timings) * 1000, 1),
+        "min_ms": round(min(timings) * 1000, 1),
+        "max_ms": round(max(timings) * 1000, 1),
+        "baseline_rss_mb": round(baseline / (1024 * 1024), 1),
+        "peak_rss_mb": round(sampler.peak / (1024 * 1024), 1),
+        "pdf_bytes": size,
+        "pages": pages,
+    }
+
+
+def run_child(engine: str, template: str, project: str, sections: int, repeat: int) -> Dict[str, Any]:
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_engines", "--child", engine, "--templates", template,
+         "--project", project, "--sections", str(sections), "--repeat", str(repeat)],
+        cwd=BASE_DIR, capture_output=True, text=True, check=False,
+    )
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        errors = [line for line in lines if _ERROR_LINE.match(line)]
+        return {"status": "error", "error": (errors or lines or [f"exit code {completed.returncode}"])[-1]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    out = sys.stderr
+    print(f"{'template':<30} {'engine':<11} {'median ms':>10} {'peak MB':>9} {'KB':>8} {'pages':>6}", file=out)
+    for row in results:
+        if row["status"] != "ok":
+            detail = row.get("reason") or row.get("error") or ""
+            print(f"{row['template']:<30} {row['engine']:<11} {row['status']}: {detail}", file=out)
+            continue
+        print(f"{row['template']:<30} {row['engine']:<11} {row['median_ms']:>10.1f} {row['peak_rss_mb']:>9.1f} "
+              f"{row['pdf_bytes'] / 1024:>8.1f} {row['pages'] if row['pages'] is not None else '-':>6}", file=out)
+
+
+def main():
+    from utils.render_engines import ENGINES
+
+    parser = argparse.ArgumentParser(description="Compare PDF render engines on the structured report templates")
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument("--templates", nargs="+", help="reports.json konuları (varsayılan: tüm structured şablonlar)")
+    parser.add_argument("--project", default=DEFAULT_PROJECT, help="Asset'leri kullanılacak proje")
+    parser.add_argument("--sections", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=5, help="Ölçülen render sayısı (ısınma hariç)")
+    parser.add_argument("--child", choices=list(ENGINES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = asyncio.run(_measure(args.child, args.templates[0], args.project, args.sections, args.repeat))
+        print(json.dumps(result))
+        return
+
+    results = []
+    for template in args.templates or structured_topics():
+        for engine in args.engines:
+            print(f"[bench] {template} / {engine} ...", file=sys.stderr)
+            results.append({"template": template, "engine": engine,
+                            **run_child(engine, template, args.project, args.sections, args.repeat)})
+
+    print(json.dumps({"project": args.project, "sections": args.sections, "repeat": args.repeat,
+                      "results": results}, indent=2, ensure_ascii=False))
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
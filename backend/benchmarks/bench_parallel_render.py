@@ -0,0 +1,104 @@
+"""
+Paralel render ölçeklenme benchmark'ı.
+
+Sentetik 40 sayfalık, görsel ağırlıklı bir raporu 1, 2, 4 ve 8 parçaya bölerek
+render eder ve duvar saati sürelerini karşılaştırır. Sayfa önbelleği kapalıdır,
+böylece her koşu tüm sayfaları gerçekten render eder.
+
+Kullanım (backend dizininden):
+    python -m benchmarks.bench_parallel_render
+    python -m benchmarks.bench_parallel_render --pages 40 --shards 1 2 4 8 --repeat 3
+"""
+import argparse
+import asyncio
+import base64
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from utils.pdf_utils import render_html_to_pdf
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SAMPLE_IMAGE = BASE_DIR / "data" / "project_assets" / "V_Metroway" / "metroway_foto.jpg"
+
+PAGE_CSS = """
+  body { margin: 0; padding: 0; }
+  @page { size: A4; margin: 0; }
+  .page { width: 210mm; height: 297mm; position: relative; overflow: hidden; page-break-after: always; }
+  .content-inner { padding: 120px 40px; box-sizing: border-box; }
+  h2 { font: 700 32px/1 Arial, sans-serif; color: #1B3A6B; }
+  p { font-size: 16px; line-height: 1.7; color: #444; text-align: justify; }
+  figure img { max-width: 90%; border-radius: 8px; box-shadow: 0 2px 8px rgba(0,0,0,.1); }
+"""
+
+
+def build_synthetic_report(page_count: int) -> str:
+    """Her sayfasında gömülü bir fotoğraf bulunan sentetik bir rapor HTML'i üretir."""
+    image_uri = "data:image/jpeg;base64," + base64.b64encode(SAMPLE_IMAGE.read_bytes()).decode("utf-8")
+    paragraph = "Yatırımcı raporu örnek paragraf metni. " * 40
+    pages = []
+    for i in range(page_count):
+        pages.append(
+            f'<section class="page content-page">\n'
+            f'  <div class="content-inner">\n'
+            f'    <h2>Bölüm {i + 1}</h2>\n'
+            f'    <p>{paragraph}</p>\n'
+            f'    <figure><img src="{image_uri}" alt=""></figure>\n'
+            f'  </div>\n'
+            f'</section>'
+        )
+    return (
+        '<!DOCTYPE html>\n<html lang="tr">\n<head>\n<meta charset="UTF-8">\n'
+        f'<title>Benchmark</title>\n<style>{PAGE_CSS}</style>\n</head>\n<body>\n'
+        + "\n".join(pages)
+        + "\n</body>\n</html>"
+    )
+
+
+async def run_benchmark(page_count: int, shard_counts: List[int], repeat: int) -> List[Dict]:
+    html = build_synthetic_report(page_count)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for shards in shard_counts:
+            timings = []
+            for _ in range(repeat):
+                output = Path(tmp_dir) / f"bench_{shards}.pdf"
+                started = time.perf_counter()
+                await render_html_to_pdf(html, output, use_page_cache=False, shards=shards)
+                timings.append(time.perf_counter() - started)
+            results.append({
+                "shards": shards,
+                "pages": page_count,
+                "median_s": round(statistics.median(timings), 3),
+                "min_s": round(min(timings), 3),
+                "runs": repeat,
+            })
+    baseline = results[0]["median_s"]
+    for result in results:
+        result["speedup"] = round(baseline / result["median_s"], 2) if result["median_s"] else None
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel PDF rendering benchmark")
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", type=Path, help="Sonuçları JSON olarak bu dosyaya yaz")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args.pages, args.shards, args.repeat))
+
+    print(f"{'shards':>6} {'median (s)':>11} {'min (s)':>8} {'speedup':>8}")
+    for result in results:
+        print(f"{result['shards']:>6} {result['median_s']:>11.3f} {result['min_s']:>8.3f} {result['speedup']:>7.2f}x")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Uçtan uca üretim hattı benchmark'ı (ağ gerektirmez).
+
+generate_report_html -> generate_pdf_with_playwright hattını gerçek bir proje
+üzerinde çalıştırır; OpenAI çağrıları ya süreç içinde başlatılan sahte sunucuya
+(varsayılan) ya da kayıtlı fixture'lara (--replay) gider. Böylece her sürümde
+kendi ek yükümüz (prompt kurulumu, hash'leme, akış doğrulama, asset yeniden
+yazma, render) aynı koşullarda ölçülür.
+
+Vector store kaydı geçici bir dosyaya yönlendirilir ve LLM yanıt önbelleği
+kapatılır; her koşu aynı istek dizisini üretir ve gerçek önbellekleri kirletmez.
+
+Kullanım (backend dizininden):
+    python -m benchmarks.bench_pipeline --project "V Metroway" --mode html --repeat 3
+    python -m benchmarks.bench_pipeline --record benchmarks/fixtures/openai   # gerçek API, OPENAI_API_KEY gerekir
+    python -m benchmarks.bench_pipeline --replay benchmarks/fixtures/openai --latency-scale 0
+    python -m benchmarks.bench_pipeline --no-render
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SAMPLE_HTML = BASE_DIR / "debug_V_Metroway_playwright.html"
+
+SAMPLE_SECTION = {
+    "title": "Finansal Durum",
+    "subsections": [{
+        "heading": "Genel Görünüm",
+        "paragraphs": ["Dönem içinde gelirler planlanan seviyenin üzerinde gerçekleşmiştir. " * 6] * 2,
+        "metrics": [{"label": "Ciro", "value": "₺120M"}, {"label": "Doluluk", "value": "%94"}],
+        "images": [],
+    }],
+}
+
+
+def _sample_output(mode: str) -> str:
+    """Sahte sunucunun moda uygun döndüreceği model çıktısı."""
+    if mode == "sections":
+        return json.dumps(SAMPLE_SECTION, ensure_ascii=False)
+    if mode == "structured":
+        return json.dumps({"title": "", "period": "", "sections": [SAMPLE_SECTION] * 4}, ensure_ascii=False)
+    if SAMPLE_HTML.exists():
+        return SAMPLE_HTML.read_text(encoding="utf-8")
+    from benchmarks.bench_parallel_render import build_synthetic_report
+    return build_synthetic_report(12)
+
+
+def _configure_environment(args) -> Optional[Any]:
+    """
+    config modülü ortam değişkenlerini import anında okuduğu için bu fonksiyon
+    uygulama modülleri import edilmeden önce çağrılmalıdır.
+    """
+    os.environ["LLM_CACHE"] = "0"
+    if args.record:
+        os.environ.update(OPENAI_TRANSPORT_MODE="record", OPENAI_FIXTURES_DIR=str(args.record))
+        return None
+    if args.replay:
+        os.environ.update(OPENAI_TRANSPORT_MODE="replay", OPENAI_FIXTURES_DIR=str(args.replay),
+                          OPENAI_REPLAY_LATENCY_SCALE=str(args.latency_scale))
+        return None
+
+    from benchmarks.fake_openai import FakeOpenAIServer
+    server = FakeOpenAIServer(output_text=_sample_output(args.mode), latency=args.latency).start()
+    os.environ.update(OPENAI_BASE_URL=server.base_url, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY") or "bench")
+    os.environ.pop("OPENAI_TRANSPORT_MODE", None)
+    return server
+
+
+async def _run_once(project_name: str, mode: str, render: bool, pool) -> Dict[str, float]:
+    from utils.oai import generate_report_html
+    from utils.pdf_utils import generate_pdf_with_playwright
+
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    html = await asyncio.to_thread(generate_report_html, project_name, "", mode=mode)
+    timings["generate_s"] = time.perf_counter() - started
+
+    if render:
+        report_id = f"bench_{uuid.uuid4().hex[:8]}"
+        stage_started = time.perf_counter()
+        pdf_path = await generate_pdf_with_playwright(html, project_name, report_id, pool=pool)
+        timings["render_s"] = time.perf_counter() - stage_started
+        pdf_path.unlink(missing_ok=True)
+
+    timings["total_s"] = time.perf_counter() - started
+    return timings
+
+
+async def run_benchmark(project_name: str, mode: str, repeat: int, render: bool) -> Dict[str, Any]:
+    import utils.vector_store as vector_store
+
+    runs: List[Dict[str, float]] = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Her koşu boş bir kayıtla başlar: kayıt ve tekrar aynı istek dizisini görür
+        vector_store.VECTOR_STORE_REGISTRY_PATH = Path(tmp_dir) / "vector_stores.json"
+        if render:
+            from utils.browser_pool import BrowserPool
+            async with BrowserPool(max_contexts=4) as pool:
+                for _ in range(repeat):
+                    runs.append(await _run_once(project_name, mode, render, pool))
+        else:
+            for _ in range(repeat):
+                runs.append(await _run_once(project_name, mode, render, None))
+
+    summary = {
+        stage: round(statistics.median(run[stage] for run in runs), 3)
+        for stage in runs[0]
+    }
+    return {"project": project_name, "mode": mode, "runs": repeat, "median": summary}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end generation pipeline benchmark")
+    parser.add_argument("--project", default="V Metroway")
+    parser.add_argument("--mode", choices=["html", "structured", "sections"], default="html")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-render", action="store_true", help="PDF render aşamasını atla")
+    parser.add_argument("--latency", type=float, default=0.5, help="Sahte sunucu yanıt gecikmesi (saniye)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", type=Path, help="Gerçek API yanıtlarını bu dizine kaydet")
+    group.add_argument("--replay", type=Path, help="Yanıtları bu dizindeki fixture'lardan oynat")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Tekrarda kayıtlı sürelerin çarpanı")
+    args = parser.parse_args()
+
+    server = _configure_environment(args)
+    try:
+        result = asyncio.run(run_benchmark(args.project, args.mode, args.repeat, not args.no_render))
+    finally:
+        if server is not None:
+            server.stop()
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
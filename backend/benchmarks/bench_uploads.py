@@ -0,0 +1,150 @@
+"""
+Tekli ve toplu dosya yüklemenin karşılaştırması.
+
+Aynı N görsel önce dosya başına bir istekle (/upload-component-image), sonra
+tek bir çok parçalı istekle (/upload-files) yüklenir. Tekli yüklemede her dosya
+bir HTTP turu ve bir proje JSON yeniden yazımı öder; toplu yüklemede bu sabit
+maliyet N dosyaya bölünür. --rtt-ms ile istek başına ağ gecikmesi eklenebilir
+(yerelde tur süresi neredeyse sıfırdır). JSON yazım sayıları
+tests/test_batch_upload.py ile doğrulanır; bu betik yalnızca süreleri ölçer.
+
+Uygulama, load_test gibi backend dizininin geçici bir kopyasında ayrı bir
+süreç olarak başlatılır (gerçek data/ dizinine dokunulmaz); yükleme sonrası
+ön hazırlık (OpenAI çağrıları) kapalıdır.
+
+Kullanım (backend dizininden):
+    python -m benchmarks.bench_uploads
+    python -m benchmarks.bench_uploads --files 20 --repeat 5 --rtt-ms 40
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.load_test import BASE_DIR, SAMPLE_IMAGE, _COPY_IGNORE, _free_port, wait_until_ready
+
+PROJECT = "UploadBench"
+COMPONENT = "İnşaat"
+QUESTION_ID = "construction_images"
+
+
+def start_app(workdir: Path):
+    app_dir = workdir / "backend"
+    shutil.copytree(BASE_DIR, app_dir, ignore=_COPY_IGNORE)
+    port = _free_port()
+    log_path = workdir / "app.log"
+    env = {**os.environ, "PRESTAGE_ENABLED": "0", "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "bench")}
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--log-level", "warning"]
+    with open(log_path, "wb") as log:
+        process = subprocess.Popen(command, cwd=app_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    return process, f"http://127.0.0.1:{port}", log_path
+
+
+async def _post(client, url: str, rtt: float, **kwargs):
+    # İstemci ile sunucu arasındaki tur süresi (istek başına bir kez)
+    if rtt:
+        await asyncio.sleep(rtt)
+    response = await client.post(url, **kwargs)
+    response.raise_for_status()
+    return response
+
+
+async def upload_single(client, base_url: str, images: List[bytes], rtt: float) -> None:
+    for index, image in enumerate(images):
+        await _post(client, f"{base_url}/project/{PROJECT}/upload-component-image", rtt,
+                    data={"component_name": COMPONENT, "question_id": QUESTION_ID, "image_index": str(index)},
+                    files={"image": (f"foto-{index}.jpg", image, "image/jpeg")})
+
+
+async def upload_batch(client, base_url: str, images: List[bytes], rtt: float) -> None:
+    response = await _post(client, f"{base_url}/project/{PROJECT}/upload-files", rtt,
+                           data={"component": COMPONENT, "question_id": QUESTION_ID},
+                           files=[("files", (f"foto-{index}.jpg", image, "image/jpeg"))
+                                  for index, image in enumerate(images)])
+    if not response.json()["success"]:
+        raise RuntimeError(f"Batch upload failed: {response.json()['results']}")
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    import httpx
+
+    image = SAMPLE_IMAGE.read_bytes()
+    images = [image] * args.files
+    rtt = args.rtt_ms / 1000
+    timings: Dict[str, List[float]] = {"single": [], "batch": []}
+
+    with tempfile.TemporaryDirectory(prefix="bench_uploads_") as tmp_dir:
+        process, base_url, log_path = start_app(Path(tmp_dir))
+        try:
+            async with httpx.AsyncClient(timeout=120) as client:
+                await wait_until_ready(client, base_url, process)
+                await _post(client, f"{base_url}/project/create-report", 0, json={"project_name": PROJECT})
+                # İlk tur ısınmadır; sıralama etkisini azaltmak için modlar dönüşümlü ölçülür
+                for run in range(args.repeat + 1):
+                    for mode, upload in (("single", upload_single), ("batch", upload_batch)):
+                        started = time.perf_counter()
+                        await upload(client, base_url, images, rtt)
+                        if run:
+                            timings[mode].append(time.perf_counter() - started)
+        except Exception:
+            print(f"App log ({log_path}):\n" + log_path.read_text(encoding="utf-8", errors="replace")[-4000:],
+                  file=sys.stderr)
+            raise
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    results = {}
+    for mode, values in timings.items():
+        median = statistics.median(values)
+        results[mode] = {
+            "requests": args.files if mode == "single" else 1,
+            "json_writes": args.files if mode == "single" else 1,
+            "median_ms": round(median * 1000, 1),
+            "per_file_ms": round(median * 1000 / args.files, 2),
+        }
+    return {
+        "files": args.files,
+        "file_bytes": len(image),
+        "repeat": args.repeat,
+        "rtt_ms": args.rtt_ms,
+        "results": results,
+        "speedup": round(results["single"]["median_ms"] / results["batch"]["median_ms"], 2),
+    }
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    out = sys.stderr
+    print(f"{'mode':<8} {'requests':>9} {'median ms':>10} {'per file ms':>12}", file=out)
+    for mode, row in result["results"].items():
+        print(f"{mode:<8} {row['requests']:>9} {row['median_ms']:>10.1f} {row['per_file_ms']:>12.2f}", file=out)
+    print(f"batch speedup: {result['speedup']:.2f}x for {result['files']} files "
+          f"({result['file_bytes'] / 1024:.0f} KB each, rtt {result['rtt_ms']} ms)", file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-file uploads with a single batch upload")
+    parser.add_argument("--files", type=int, default=20, help="Tur başına yüklenen görsel sayısı")
+    parser.add_argument("--repeat", type=int, default=3, help="Ölçülen tur sayısı (ısınma hariç)")
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="İstek başına eklenen ağ gecikmesi (ms)")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_benchmark(args))
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    print_report(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+Yerel sahte OpenAI sunucusu.
+
+Gerçek API'nin kullandığımız alt kümesini taklit eder (/responses, /files,
+/vector_stores, /vector_stores/{id}/files) ve hız sınırı davranışını yeniden
+üretir: RPM/TPM bucket'ları aşıldığında retry-after ile 429 döner, ayrıca
+yapılandırılabilir oranda rastgele 429/500 enjekte eder. Her yanıtta
+x-ratelimit-* başlıkları bulunur. Dosyalar ve vector store'lar yalnızca bellekte
+tutulur; file_search içerik döndürmez.
+
+Kullanım (backend dizininden):
+    python -m benchmarks.fake_openai --port 8765 --rpm 120 --inject-429 0.1
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=test uvicorn main:app
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+
+class _Bucket:
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, amount: float) -> Tuple[bool, float]:
+        """(izin verildi mi, yeterli bakiye için kalan süre)"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True, 0.0
+        return False, (amount - self.tokens) / self.rate
+
+
+class FakeOpenAIState:
+    """Sunucunun hız sınırı durumu ve sayaçları."""
+
+    def __init__(self, rpm: int = 600, tpm: int = 200000, inject_429: float = 0.0,
+                 inject_500: float = 0.0, latency: float = 0.05, output_text: str = "ok"):
+        self.requests = _Bucket(rpm)
+        self.tokens = _Bucket(tpm)
+        self.inject_429 = inject_429
+        self.inject_500 = inject_500
+        self.latency = latency
+        self.output_text = output_text
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "ok": 0, "rate_limited": 0, "injected_429": 0, "injected_500": 0}
+        self.files: Dict[str, Dict] = {}
+        self.vector_stores: Dict[str, Dict] = {}
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.counters[key] += 1
+
+    def rate_limit_headers(self) -> Dict[str, str]:
+        return {
+            "x-ratelimit-limit-requests": str(int(self.requests.capacity)),
+            "x-ratelimit-remaining-requests": str(max(0, int(self.requests.tokens))),
+            "x-ratelimit-reset-requests": f"{1 / self.requests.rate:.3f}s",
+            "x-ratelimit-limit-tokens": str(int(self.tokens.capacity)),
+            "x-ratelimit-remaining-tokens": str(max(0, int(self.tokens.tokens))),
+            "x-ratelimit-reset-tokens": f"{1 / self.tokens.rate:.3f}s",
+        }
+
+
+def _estimate_request_tokens(body: Dict) -> int:
+    return len(json.dumps(body.get("input", ""))) // 4 + len(body.get("instructions") or "") // 4
+
+
+def build_response_object(body: Dict, text: str) -> Dict:
+    """Responses API biçiminde minimal bir yanıt gövdesi."""
+    input_tokens = _estimate_request_tokens(body)
+    output_tokens = len(text) // 4 + 1
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": body.get("model", "gpt-4.1"),
+        "status": "completed",
+        "output": [{
+            "type": "message",
+            "id": f"msg_{uuid.uuid4().hex}",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": body.get("tools", []),
+        "usage": {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": 0},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": input_tokens + output_tokens,
+        },
+    }
+
+
+def build_file_object(file_id: str, filename: str, size: int, purpose: str) -> Dict:
+    return {"id": file_id, "object": "file", "bytes": size, "created_at": int(time.time()),
+            "filename": filename, "purpose": purpose, "status": "processed"}
+
+
+def build_vector_store_object(store_id: str, name: Optional[str], file_ids) -> Dict:
+    now = int(time.time())
+    return {
+        "id": store_id, "object": "vector_store", "created_at": now, "name": name,
+        "usage_bytes": 0, "status": "completed", "last_active_at": now, "metadata": {},
+        "file_counts": {"in_progress": 0, "completed": len(file_ids), "failed": 0, "cancelled": 0,
+                        "total": len(file_ids)},
+    }
+
+
+_MULTIPART_FIELD_RE = re.compile(rb'name="([^"]+)"(?:; filename="([^"]*)")?\r\n(?:[^\r\n]+\r\n)*\r\n')
+_VECTOR_STORE_PATH_RE = re.compile(r"/vector_stores/([^/]+)(/files)?$")
+
+
+def _parse_multipart(body: bytes) -> Dict[str, Tuple[Optional[str], bytes]]:
+    """Basit multipart ayrıştırıcı: alan adı -> (dosya adı, içerik)."""
+    boundary = body.split(b"\r\n", 1)[0]
+    fields = {}
+    for part in body.split(boundary)[1:]:
+        match = _MULTIPART_FIELD_RE.search(part)
+        if not match:
+            continue
+        content = part[match.end():]
+        if content.endswith(b"\r\n"):
+            content = content[:-2]
+        filename = match.group(2).decode("utf-8", "replace") if match.group(2) is not None else None
+        fields[match.group(1).decode("utf-8")] = (filename, content)
+    return fields
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    state: FakeOpenAIState = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002 - BaseHTTPRequestHandler imzası
+        pass
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("content-length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _read_json(self, raw: Optional[bytes] = None) -> Dict:
+        raw = self._read_body() if raw is None else raw
+        try:
+            return json.loads(raw or b"{}")
+        except ValueError:
+            return {}
+
+    def _send_json(self, status: int, payload: Dict, extra_headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        for key, value in {**self.state.rate_limit_headers(), **(extra_headers or {})}.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: int, message: str, code: str, extra_headers: Optional[Dict[str, str]] = None):
+        self._send_json(status, {"error": {"message": message, "type": code, "code": code, "param": None}},
+                        extra_headers)
+
+    def _admit(self, token_cost: int) -> bool:
+        """Hız sınırı ve hata enjeksiyonunu uygular; isteğe izin verilmediyse yanıtı gönderir."""
+        state = self.state
+        state.count("requests")
+        with state.lock:
+            roll = random.random()
+            if roll < state.inject_500:
+                state.counters["injected_500"] += 1
+                injected = "500"
+            elif roll < state.inject_500 + state.inject_429:
+                state.counters["injected_429"] += 1
+                injected = "429"
+            else:
+                injected = None
+                allowed_requests, wait_requests = state.requests.take(1)
+                allowed_tokens, wait_tokens = state.tokens.take(token_cost) if allowed_requests else (False, 0.0)
+                if not allowed_tokens and allowed_requests:
+                    # İstek bucket'ından alınanı iade et
+                    state.requests.tokens += 1
+        if injected == "500":
+            self._send_error(500, "The server had an error while processing your request.", "server_error")
+            return False
+        if injected == "429":
+            self._send_error(429, "Rate limit reached (injected).", "rate_limit_exceeded")
+            return False
+        if not allowed_tokens:
+            state.count("rate_limited")
+            wait = max(wait_requests, wait_tokens)
+            self._send_error(429, "Rate limit reached.", "rate_limit_exceeded",
+                             {"retry-after-ms": str(int(wait * 1000) + 1)})
+            return False
+        return True
+
+    def _send_stream(self, body: Dict, text: str, chunk_size: int = 16) -> None:
+        """Responses API akış olaylarını server-sent events olarak gönderir."""
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("connection", "close")
+        for key, value in self.state.rate_limit_headers().items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.close_connection = True
+
+        response = build_response_object(body, text)
+        item_id = response["output"][0]["id"]
+        events = [{"type": "response.created", "response": {**response, "status": "in_progress", "output": []}}]
+        events += [
+            {"type": "response.output_text.delta", "item_id": item_id, "output_index": 0,
+             "content_index": 0, "delta": text[i:i + chunk_size]}
+            for i in range(0, len(text), chunk_size)
+        ]
+        events.append({"type": "response.completed", "response": response})
+        try:
+            for sequence_number, event in enumerate(events):
+                event["sequence_number"] = sequence_number
+                self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # İstemci akışı erken kesti
+            pass
+
+    def _path(self) -> str:
+        return self.path.split("?", 1)[0].rstrip("/")
+
+    def do_POST(self):
+        path = self._path()
+        if path.endswith("/responses"):
+            body = self._read_json()
+            if not self._admit(_estimate_request_tokens(body)):
+                return
+            time.sleep(self.state.latency)
+            self.state.count("ok")
+            if body.get("stream"):
+                self._send_stream(body, self.state.output_text)
+            else:
+                self._send_json(200, build_response_object(body, self.state.output_text))
+            return
+
+        if path.endswith("/files") and "/vector_stores/" not in path:
+            fields = _parse_multipart(self._read_body())
+            if not self._admit(1):
+                return
+            filename, content = fields.get("file", ("upload.bin", b""))
+            purpose = fields.get("purpose", (None, b"assistants"))[1].decode("utf-8")
+            file_object = build_file_object(f"file-{uuid.uuid4().hex[:24]}", filename or "upload.bin",
+                                            len(content), purpose)
+            with self.state.lock:
+                self.state.files[file_object["id"]] = file_object
+            self.state.count("ok")
+            self._send_json(200, file_object)
+            return
+
+        if path.endswith("/vector_stores"):
+            body = self._read_json()
+            if not self._admit(1):
+                return
+            store_id = f"vs_{uuid.uuid4().hex[:24]}"
+            with self.state.lock:
+                self.state.vector_stores[store_id] = {"name": body.get("name"), "file_ids": []}
+            self.state.count("ok")
+            self._send_json(200, build_vector_store_object(store_id, body.get("name"), []))
+            return
+
+        match = _VECTOR_STORE_PATH_RE.search(path)
+        if match and match.group(2):
+            body = self._read_json()
+            if not self._admit(1):
+                return
+            store_id, file_id = match.group(1), body.get("file_id")
+            with self.state.lock:
+                store = self.state.vector_stores.get(store_id)
+                if store is not None and file_id in self.state.files:
+                    store["file_ids"].append(file_id)
+            if store is None or file_id not in self.state.files:
+                self._send_error(404, f"No such vector store or file: {store_id}/{file_id}", "not_found")
+                return
+            self.state.count("ok")
+            self._send_json(200, {
+                "id": file_id, "object": "vector_store.file", "created_at": int(time.time()),
+                "vector_store_id": store_id, "status": "completed", "usage_bytes": 0, "last_error": None,
+                "attributes": body.get("attributes") or {},
+            })
+            return
+
+        self._send_error(404, f"Unknown endpoint: {self.path}", "not_found")
+
+    def do_GET(self):
+        match = _VECTOR_STORE_PATH_RE.search(self._path())
+        if match and not match.group(2):
+            if not self._admit(1):
+                return
+            with self.state.lock:
+                store = self.state.vector_stores.get(match.group(1))
+            if store is None:
+                self._send_error(404, f"No vector store found with id '{match.group(1)}'", "not_found")
+                return
+            self.state.count("ok")
+            self._send_json(200, build_vector_store_object(match.group(1), store["name"], store["file_ids"]))
+            return
+        self._send_error(404, f"Unknown endpoint: {self.path}", "not_found")
+
+
+class FakeOpenAIServer:
+    """Arka planda çalışan sahte sunucu; `with` bloğu ile kullanılabilir."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **state_kwargs):
+        self.state = FakeOpenAIState(**state_kwargs)
+        handler = type("BoundFakeOpenAIHandler", (FakeOpenAIHandler,), {"state": self.state})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fake OpenAI server with rate-limit injection")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rpm", type=int, default=600)
+    parser.add_argument("--tpm", type=int, default=200000)
+    parser.add_argument("--inject-429", type=float, default=0.0, help="Rastgele 429 oranı (0-1)")
+    parser.add_argument("--inject-500", type=float, default=0.0, help="Rastgele 500 oranı (0-1)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Yanıt gecikmesi (saniye)")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.host, args.port, rpm=args.rpm, tpm=args.tpm, inject_429=args.inject_429,
+                              inject_500=args.inject_500, latency=args.latency)
+    print(f"Fake OpenAI server listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
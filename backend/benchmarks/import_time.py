@@ -0,0 +1,203 @@
+"""
+API sürecinin açılış süresi: modül bazında import zaman çizelgesi ve bütçe kontrolü.
+
+`python -X importtime` çıktısını ayrı süreçlerde toplar (backend'in geçici bir
+kopyasında; data/ altındaki varsayılan proje dosyaları gerçek dizinde
+oluşmaz) ve şunları raporlar:
+- main'in doğrudan import ettiği modüllerin sırasıyla kümülatif süreleri
+  (açılış zaman çizelgesi),
+- kendi (self) süresi en yüksek modüller ve üst paket bazında toplamlar,
+- startup olaylarının (şablon derleme vb.) süresi.
+
+Bütçe: main'in import süresi (ölçümlerin medyanı) --budget-ms'i aşarsa veya
+ilk kullanıma ertelenmesi gereken ağır bağımlılıklardan biri (DEFERRED_MODULES)
+import sırasında yüklenirse çıkış kodu 1 olur; CI'da açılış gerilemelerini
+yakalamak için kullanılır. Aynı kontrol tests/test_import_budget.py ile
+pytest'te de çalışır.
+
+Kullanım (backend dizininden):
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --runs 5 --budget-ms 800 --top 30
+    python -m benchmarks.import_time --module api.batch_reports --output import.json
+"""
+import argparse
+import json
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_BUDGET_MS = 1000.0
+# İstek anında ilk kullanımda import edilmesi gereken ağır bağımlılıklar
+DEFERRED_MODULES = (
+    "openai", "playwright", "pdfplumber", "pandas", "numpy", "PyPDF2", "fpdf",
+    "jinja2", "tqdm", "pypdfium2", "reportlab", "weasyprint", "uvicorn",
+)
+
+_COPY_IGNORE = shutil.ignore_patterns("__pycache__", "cache", "uploads", "reports", "fixtures", "benchmarks")
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+# Alt süreçte çalışır: import ve startup olaylarının süresini stdout'a yazar
+_PROBE = """
+import asyncio, json, logging, sys, time
+logging.disable(logging.WARNING)
+started = time.perf_counter()
+module = __import__({module!r}, fromlist=["*"])
+imported = time.perf_counter()
+modules = sorted(sys.modules)
+startup_s = None
+app = getattr(module, "app", None)
+if app is not None and {startup!r}:
+    asyncio.run(app.router.startup())
+    startup_s = time.perf_counter() - imported
+print(json.dumps({{"import_s": imported - started, "startup_s": startup_s, "modules": modules}}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """-X importtime satırlarını (import sırasıyla) modül kayıtlarına çevirir."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({"module": name, "self_us": int(self_us), "cumulative_us": int(cumulative_us),
+                            "depth": len(indent) // 2})
+    return entries
+
+
+def run_probe(app_dir: Path, module: str, startup: bool) -> Dict[str, Any]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(module=module, startup=startup)],
+        cwd=app_dir, capture_output=True, text=True, check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-4000:]}")
+    probe = json.loads(completed.stdout.strip().splitlines()[-1])
+    probe["entries"] = parse_importtime(completed.stderr)
+    return probe
+
+
+def timeline(entries: List[Dict[str, Any]], module: str) -> List[Dict[str, Any]]:
+    """Hedef modülün doğrudan import ettikleri, import sırasıyla."""
+    target = next((e for e in reversed(entries) if e["module"] == module), None)
+    if target is None:
+        return []
+    # importtime çocukları ebeveynden önce ve bir seviye daha girintili yazar
+    index = entries.index(target)
+    children = []
+    for entry in reversed(entries[:index]):
+        if entry["depth"] <= target["depth"]:
+            break
+        if entry["depth"] == target["depth"] + 1:
+            children.append(entry)
+    children.reverse()
+    rows, elapsed = [], 0
+    for child in children:
+        elapsed += child["cumulative_us"]
+        rows.append({"module": child["module"], "cumulative_ms": round(child["cumulative_us"] / 1000, 2),
+                     "at_ms": round(elapsed / 1000, 2)})
+    return rows
+
+
+def summarize(probes: List[Dict[str, Any]], module: str, top: int) -> Dict[str, Any]:
+    # Ayrıntılar medyana en yakın koşudan alınır
+    totals = [probe["import_s"] for probe in probes]
+    median_total = statistics.median(totals)
+    probe = min(probes, key=lambda p: abs(p["import_s"] - median_total))
+    entries = probe["entries"]
+
+    by_package: Dict[str, int] = defaultdict(int)
+    for entry in entries:
+        by_package[entry["module"].split(".")[0]] += entry["self_us"]
+    startups = [p["startup_s"] for p in probes if p["startup_s"] is not None]
+
+    return {
+        "module": module,
+        "runs": len(probes),
+        "import_ms": {"median": round(median_total * 1000, 1), "min": round(min(totals) * 1000, 1),
+                      "max": round(max(totals) * 1000, 1)},
+        "startup_ms": round(statistics.median(startups) * 1000, 1) if startups else None,
+        "modules_loaded": len(probe["modules"]),
+        "timeline": timeline(entries, module),
+        "top_self": [{"module": e["module"], "self_ms": round(e["self_us"] / 1000, 2),
+                      "cumulative_ms": round(e["cumulative_us"] / 1000, 2)}
+                     for e in sorted(entries, key=lambda e: e["self_us"], reverse=True)[:top]],
+        "by_package": [{"package": name, "self_ms": round(us / 1000, 2)}
+                       for name, us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]],
+        "deferred_loaded": sorted(name for name in DEFERRED_MODULES
+                                  if any(m == name or m.startswith(name + ".") for m in probe["modules"])),
+    }
+
+
+def check_budget(result: Dict[str, Any], budget_ms: float) -> List[str]:
+    problems = []
+    if result["import_ms"]["median"] > budget_ms:
+        problems.append(f"import {result['module']} took {result['import_ms']['median']} ms "
+                        f"(budget {budget_ms:.0f} ms)")
+    for name in result["deferred_loaded"]:
+        problems.append(f"{name} is imported at startup; import it on first use instead")
+    return problems
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    out = sys.stderr
+    print(f"import {result['module']}: median {result['import_ms']['median']} ms "
+          f"(min {result['import_ms']['min']}, max {result['import_ms']['max']}, {result['runs']} runs), "
+          f"{result['modules_loaded']} modules", file=out)
+    if result["startup_ms"] is not None:
+        print(f"startup handlers: {result['startup_ms']} ms", file=out)
+    print("\ntimeline (direct imports):", file=out)
+    for row in result["timeline"]:
+        print(f"  {row['at_ms']:>9.1f} ms  +{row['cumulative_ms']:>8.1f}  {row['module']}", file=out)
+    print("\nheaviest modules (self time):", file=out)
+    for row in result["top_self"]:
+        print(f"  {row['self_ms']:>9.1f} ms  {row['module']}", file=out)
+    print("\nby top-level package (self time):", file=out)
+    for row in result["by_package"]:
+        print(f"  {row['self_ms']:>9.1f} ms  {row['package']}", file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time timeline and startup budget check")
+    parser.add_argument("--module", default="main", help="Ölçülecek modül (backend dizinine göre)")
+    parser.add_argument("--runs", type=int, default=3, help="Ölçüm koşusu sayısı (önce bir ısınma koşusu yapılır)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--no-startup", action="store_true", help="Startup olaylarını çalıştırma")
+    parser.add_argument("--output", type=Path, help="Sonuç JSON'unun yazılacağı dosya")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="import_time_") as tmp_dir:
+        app_dir = Path(tmp_dir) / "backend"
+        shutil.copytree(BASE_DIR, app_dir, ignore=_COPY_IGNORE)
+        # Isınma: .pyc dosyaları derlensin, ölçüme derleme süresi karışmasın
+        run_probe(app_dir, args.module, startup=False)
+        probes = [run_probe(app_dir, args.module, startup=not args.no_startup) for _ in range(args.runs)]
+
+    result = summarize(probes, args.module, args.top)
+    problems = check_budget(result, args.budget_ms)
+    result["budget_ms"] = args.budget_ms
+    result["problems"] = problems
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+    print(output)
+    print_report(result)
+
+    if problems:
+        print("\nFAIL:\n  " + "\n  ".join(problems), file=sys.stderr)
+        sys.exit(1)
+    print("\nOK: within import-time budget", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
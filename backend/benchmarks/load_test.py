@@ -0,0 +1,367 @@
+"""
+Yerel yük testi: gerçekçi kullanıcı akışlarını yerelde başlatılan uygulamaya karşı çalıştırır.
+
+Her sanal kullanıcı kendi projesinde şu akışı --iterations kez tekrarlar:
+rapor oluştur -> bileşen cevaplarını kaydet -> PDF ve görsel yükle -> raporu
+üret -> indir -> e-posta ile paylaş -> aktif raporu sil. Ayrıca --readers adet
+okuyucu, akışlar sürdükçe proje listesini ve proje detayını okur; bu okumalar
+o anda süren bir üretim varsa "[during generate]" etiketiyle ayrı raporlanır.
+
+Uygulama, backend dizininin geçici bir kopyasında ayrı bir süreç olarak
+başlatılır (gerçek data/ dizinine dokunulmaz). O süreçte:
+- OpenAI: sahte sunucu (benchmarks.fake_openai), --openai-latency gecikmeli
+- SMTP: mail_agent'ın kullandığı istemci, --smtp-latency gecikmeli sahte istemci
+- Playwright: --render real ise gerçek render, stub ise --render-latency kadar
+  bekleyip örnek PDF'i rapor yoluna kopyalayan sahte render
+
+Çıktı: uç nokta başına istek sayısı, hata sayısı, throughput (istek/sn) ve
+p50/p95/p99/max gecikme; JSON stdout'a, özet tablo stderr'e yazılır.
+
+Kullanım (backend dizininden):
+    python -m benchmarks.load_test --users 8 --iterations 2 --readers 4
+    python -m benchmarks.load_test --users 20 --openai-latency 5 --render stub --render-latency 3
+    python -m benchmarks.load_test --render real --mode sections --output load.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+SAMPLE_PDF = BASE_DIR / "data" / "uploads" / "active_report" / "v_metroway" / "pdfs" / "finans-1751377590.pdf"
+SAMPLE_IMAGE = BASE_DIR / "data" / "project_assets" / "V_Metroway" / "metroway_foto.jpg"
+
+COMPONENT_ANSWERS = {
+    "İşletme": {"business_revenue": "12.500.000", "business_expenses": "7.250.000"},
+    "Finans": {"currency_info": "1 USD = 32,5 TL"},
+    "İnşaat": {"construction_progress": "%85"},
+    "Kurumsal İletişim": {"corporate_events": "Yılbaşı etkinliği düzenlendi"},
+}
+
+# Geçici kopyaya alınmayan yollar (büyük veya çalışma sırasında yeniden üretilen)
+_COPY_IGNORE = shutil.ignore_patterns("__pycache__", "cache", "uploads", "reports", "fixtures")
+
+
+# --- Uygulama süreci (geçici kopyada çalışır) ---
+
+class FakeSMTP:
+    """smtplib.SMTP yerine geçen, gönderimde yalnızca bekleyen istemci."""
+    latency = 0.0
+    sent = 0
+
+    def __init__(self, host: str = "", port: int = 0, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def ehlo(self, *args, **kwargs):
+        return 250, b"ok"
+
+    def starttls(self, *args, **kwargs):
+        return 220, b"ok"
+
+    def login(self, *args, **kwargs):
+        return 235, b"ok"
+
+    def send_message(self, msg, *args, **kwargs):
+        time.sleep(FakeSMTP.latency)
+        FakeSMTP.sent += 1
+        return {}
+
+
+def _install_stubs(args) -> None:
+    import smtplib
+    import types
+
+    import api.mail_agent as mail_agent
+    import main
+
+    FakeSMTP.latency = args.smtp_latency
+    # Yalnızca mail_agent'ın gördüğü smtplib değiştirilir; istisna sınıfları aynı kalır
+    mail_agent.smtplib = types.SimpleNamespace(SMTP=FakeSMTP, SMTPAuthenticationError=smtplib.SMTPAuthenticationError)
+
+    if args.render == "stub":
+        from utils.pdf_utils import get_report_path
+
+        stub_pdf = Path(args.stub_pdf).read_bytes()
+
+        async def generate_pdf_stub(html_content: str, project_name: str, report_id: str, **kwargs) -> Path:
+            await asyncio.sleep(args.render_latency)
+            pdf_path = get_report_path(project_name, report_id)
+            pdf_path.parent.mkdir(parents=True, exist_ok=True)
+            await asyncio.to_thread(pdf_path.write_bytes, stub_pdf)
+            return pdf_path
+
+        main.generate_pdf_with_playwright = generate_pdf_stub
+
+
+def serve(args) -> None:
+    """Sahte OpenAI sunucusunu, SMTP ve render stub'larını kurup uygulamayı çalıştırır."""
+    # config modülü ortam değişkenlerini import anında okur
+    os.environ.setdefault("LLM_CACHE", "1" if args.llm_cache else "0")
+    os.environ.pop("OPENAI_TRANSPORT_MODE", None)
+
+    from benchmarks.bench_pipeline import _sample_output
+    from benchmarks.fake_openai import FakeOpenAIServer
+
+    fake_openai = FakeOpenAIServer(output_text=_sample_output(args.mode), latency=args.openai_latency,
+                                   rpm=args.openai_rpm, tpm=args.openai_rpm * 1000).start()
+    os.environ.update(OPENAI_BASE_URL=fake_openai.base_url, OPENAI_API_KEY="load-test")
+
+    import uvicorn
+    import main
+
+    _install_stubs(args)
+    uvicorn.run(main.app, host="127.0.0.1", port=args.serve_port, log_level="warning")
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(args, workdir: Path) -> Tuple[subprocess.Popen, str, Path]:
+    app_dir = workdir / "backend"
+    shutil.copytree(BASE_DIR, app_dir, ignore=_COPY_IGNORE)
+    port = _free_port()
+    log_path = workdir / "app.log"
+    command = [
+        sys.executable, "-m", "benchmarks.load_test", "--serve-port", str(port),
+        "--mode", args.mode, "--render", args.render, "--render-latency", str(args.render_latency),
+        "--openai-latency", str(args.openai_latency), "--openai-rpm", str(args.openai_rpm),
+        "--smtp-latency", str(args.smtp_latency), "--stub-pdf", str(SAMPLE_PDF),
+    ]
+    if args.llm_cache:
+        command.append("--llm-cache")
+    with open(log_path, "wb") as log:
+        process = subprocess.Popen(command, cwd=app_dir, stdout=log, stderr=subprocess.STDOUT)
+    return process, f"http://127.0.0.1:{port}", log_path
+
+
+async def wait_until_ready(client, base_url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App process exited with code {process.returncode}")
+        try:
+            if (await client.get(f"{base_url}/")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"App did not become ready within {timeout:.0f}s")
+
+
+# --- Yük üretici ---
+
+class Recorder:
+    """Uç nokta başına gecikme ve durum kodlarını toplar."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.first_errors: Dict[str, str] = {}
+        self.generating = 0
+
+    async def request(self, client, name: str, method: str, url: str, expect=(200,), **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            ok = response.status_code in expect
+            error = f"HTTP {response.status_code}: {response.text[:200]}"
+        except Exception as e:
+            response, ok, error = None, False, f"{type(e).__name__}: {e}"
+        self.samples[name].append(time.perf_counter() - started)
+        if not ok:
+            self.errors[name] += 1
+            # Her uç nokta için ilk hata örneği raporda gösterilir
+            self.first_errors.setdefault(name, error)
+        return response if ok else None
+
+
+def percentile(values: List[float], q: float) -> float:
+    """En yakın sıra (nearest-rank) yöntemiyle yüzdelik."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+async def user_flow(client, recorder: Recorder, base_url: str, user: int, args) -> None:
+    project = f"LoadTest_{user:03d}"
+    path = f"{base_url}/project/{project}"
+    pdf_bytes = SAMPLE_PDF.read_bytes()
+    image_bytes = SAMPLE_IMAGE.read_bytes()
+
+    for iteration in range(args.iterations):
+        created = await recorder.request(client, "POST /project/create-report", "POST",
+                                         f"{base_url}/project/create-report", json={"project_name": project})
+        if created is None:
+            continue
+        report_id = created.json()["report_id"]
+
+        for component, answers in COMPONENT_ANSWERS.items():
+            await recorder.request(client, "GET /component/{c}/questions", "GET",
+                                   f"{base_url}/component/{component}/questions")
+            await recorder.request(client, "POST /component/save-data", "POST", f"{base_url}/component/save-data",
+                                   json={"project_name": project, "component_name": component, "answers": answers})
+
+        await recorder.request(client, "POST /project/{p}/upload-pdf", "POST", f"{path}/upload-pdf",
+                               data={"component": "Finans", "question_id": "finance_report"},
+                               files={"file": (f"finans-{iteration}.pdf", pdf_bytes, "application/pdf")})
+        await recorder.request(client, "POST /project/{p}/upload-component-image", "POST",
+                               f"{path}/upload-component-image",
+                               data={"component_name": "İnşaat", "question_id": "construction_images",
+                                     "image_index": str(iteration)},
+                               files={"image": (f"foto-{iteration}.jpg", image_bytes, "image/jpeg")})
+
+        recorder.generating += 1
+        try:
+            generated = await recorder.request(client, "POST /project/{p}/generate-report", "POST",
+                                               f"{path}/generate-report", json={"mode": args.mode})
+        finally:
+            recorder.generating -= 1
+
+        if generated is not None:
+            await recorder.request(client, "GET /download-report/{p}", "GET", f"{base_url}/download-report/{project}")
+            await recorder.request(client, "POST /project/{p}/report/{id}/send-email", "POST",
+                                   f"{path}/report/{report_id}/send-email",
+                                   json={"project_name": project, "email_addresses": ["load-test@example.com"]})
+
+        await recorder.request(client, "DELETE /project/{p}/delete-report", "DELETE", f"{path}/delete-report")
+
+
+async def reader_flow(client, recorder: Recorder, base_url: str, users: int, stop: asyncio.Event,
+                      interval: float) -> None:
+    user = 0
+    while not stop.is_set():
+        suffix = " [during generate]" if recorder.generating else ""
+        await recorder.request(client, f"GET /projects{suffix}", "GET", f"{base_url}/projects")
+        suffix = " [during generate]" if recorder.generating else ""
+        await recorder.request(client, f"GET /project/{{p}}{suffix}", "GET",
+                               f"{base_url}/project/LoadTest_{user % users:03d}")
+        user += 1
+        await asyncio.sleep(interval)
+
+
+def summarize(recorder: Recorder, wall_time: float) -> Dict[str, Any]:
+    endpoints = {}
+    for name in sorted(recorder.samples):
+        values = recorder.samples[name]
+        endpoints[name] = {
+            "count": len(values),
+            "errors": recorder.errors.get(name, 0),
+            "throughput_rps": round(len(values) / wall_time, 3),
+            "p50_ms": round(percentile(values, 50) * 1000, 1),
+            "p95_ms": round(percentile(values, 95) * 1000, 1),
+            "p99_ms": round(percentile(values, 99) * 1000, 1),
+            "max_ms": round(max(values) * 1000, 1),
+        }
+        if name in recorder.first_errors:
+            endpoints[name]["first_error"] = recorder.first_errors[name]
+    total = sum(len(values) for values in recorder.samples.values())
+    return {
+        "wall_time_s": round(wall_time, 3),
+        "total_requests": total,
+        "total_errors": sum(recorder.errors.values()),
+        "throughput_rps": round(total / wall_time, 3) if wall_time else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+async def run_load_test(args) -> Dict[str, Any]:
+    import httpx
+
+    with tempfile.TemporaryDirectory(prefix="load_test_") as tmp_dir:
+        process, base_url, log_path = start_app(args, Path(tmp_dir))
+        try:
+            limits = httpx.Limits(max_connections=args.users + args.readers + 4)
+            async with httpx.AsyncClient(timeout=args.request_timeout, limits=limits) as client:
+                await wait_until_ready(client, base_url, process)
+                recorder = Recorder()
+                stop = asyncio.Event()
+                started = time.perf_counter()
+                readers = [asyncio.create_task(reader_flow(client, recorder, base_url, args.users, stop,
+                                                           args.reader_interval))
+                           for _ in range(args.readers)]
+                await asyncio.gather(*(user_flow(client, recorder, base_url, user, args)
+                                       for user in range(args.users)))
+                stop.set()
+                await asyncio.gather(*readers)
+                wall_time = time.perf_counter() - started
+        except Exception:
+            print(f"App log ({log_path}):\n" + log_path.read_text(encoding="utf-8", errors="replace")[-4000:],
+                  file=sys.stderr)
+            raise
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    result = summarize(recorder, wall_time)
+    result["config"] = {
+        "users": args.users, "iterations": args.iterations, "readers": args.readers, "mode": args.mode,
+        "render": args.render, "render_latency": args.render_latency, "openai_latency": args.openai_latency,
+        "smtp_latency": args.smtp_latency,
+    }
+    return result
+
+
+def print_table(result: Dict[str, Any]) -> None:
+    print(f"{'endpoint':<55} {'count':>6} {'err':>4} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}", file=sys.stderr)
+    for name, row in result["endpoints"].items():
+        print(f"{name:<55} {row['count']:>6} {row['errors']:>4} {row['throughput_rps']:>8.2f} "
+              f"{row['p50_ms']:>7.1f}ms {row['p95_ms']:>7.1f}ms {row['p99_ms']:>7.1f}ms", file=sys.stderr)
+    print(f"total: {result['total_requests']} requests, {result['total_errors']} errors, "
+          f"{result['throughput_rps']:.2f} req/s over {result['wall_time_s']:.1f}s", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local load test with stubbed OpenAI, SMTP and renderer")
+    parser.add_argument("--users", type=int, default=5, help="Eşzamanlı akış çalıştıran kullanıcı sayısı")
+    parser.add_argument("--iterations", type=int, default=1, help="Kullanıcı başına akış tekrarı")
+    parser.add_argument("--readers", type=int, default=2, help="Sürekli okuma yapan kullanıcı sayısı")
+    parser.add_argument("--reader-interval", type=float, default=0.1)
+    parser.add_argument("--mode", choices=["html", "structured", "sections"], default="html")
+    parser.add_argument("--render", choices=["stub", "real"], default="stub")
+    parser.add_argument("--render-latency", type=float, default=2.0, help="Sahte render süresi (saniye)")
+    parser.add_argument("--openai-latency", type=float, default=2.0, help="Sahte OpenAI yanıt gecikmesi (saniye)")
+    parser.add_argument("--openai-rpm", type=int, default=10000)
+    parser.add_argument("--smtp-latency", type=float, default=0.5, help="Sahte SMTP gönderim süresi (saniye)")
+    parser.add_argument("--llm-cache", action="store_true", help="LLM yanıt önbelleğini açık bırak")
+    parser.add_argument("--request-timeout", type=float, default=600.0)
+    parser.add_argument("--output", type=Path, help="Sonuç JSON'unun yazılacağı dosya")
+    # Dahili: uygulama sürecini başlatmak için kullanılır
+    parser.add_argument("--serve-port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--stub-pdf", default=str(SAMPLE_PDF), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_port:
+        serve(args)
+        return
+
+    result = asyncio.run(run_load_test(args))
+    output = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+    print(output)
+    print_table(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Hız sınırlayıcıyı sahte OpenAI sunucusuna karşı çalıştırır.
+
+Sunucu düşük bir RPM ile ve rastgele 429/500 enjekte ederek başlatılır. Aynı
+iş yükü önce SDK'nın sabit yeniden denemesiyle (limiter yok), sonra paylaşılan
+limiter ile gönderilir. Başarılı/başarısız istek sayıları, sunucunun döndürdüğü
+429'lar ve toplam süre karşılaştırılır. Limiter ile başarısız istek kalmamalıdır.
+
+Kullanım (backend dizininden):
+    python -m benchmarks.rate_limit_check
+    python -m benchmarks.rate_limit_check --requests 60 --threads 10 --rpm 120 --inject-429 0.1
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+from openai import OpenAI
+
+from benchmarks.fake_openai import FakeOpenAIServer
+
+
+def _run_workload(call, request_count: int, threads: int) -> Dict:
+    successes = failures = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [executor.submit(call, i) for i in range(request_count)]
+        for future in futures:
+            try:
+                future.result()
+                successes += 1
+            except Exception:
+                failures += 1
+    return {"ok": successes, "failed": failures, "wall_s": round(time.perf_counter() - started, 2)}
+
+
+def run_check(request_count: int, threads: int, rpm: int, inject_429: float, inject_500: float) -> Dict:
+    results = {}
+    server_kwargs = dict(rpm=rpm, tpm=rpm * 1000, inject_429=inject_429, inject_500=inject_500, latency=0.05)
+
+    with FakeOpenAIServer(**server_kwargs) as server:
+        naive_client = OpenAI(api_key="test", base_url=server.base_url)
+        results["without_limiter"] = _run_workload(
+            lambda i: naive_client.responses.create(model="gpt-4.1", input=f"request {i}"),
+            request_count, threads,
+        )
+        results["without_limiter"]["server"] = dict(server.state.counters)
+
+    with FakeOpenAIServer(**server_kwargs) as server:
+        # Paylaşılan istemci/limiter ortamdan yapılandırılır
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "test")
+        from utils.openai_client import get_client
+        from utils.rate_limiter import get_rate_limiter
+
+        client = get_client()
+        limiter = get_rate_limiter()
+        results["with_limiter"] = _run_workload(
+            lambda i: limiter.call(client.responses.create, model="gpt-4.1", input=f"request {i}",
+                                   estimated_tokens=10),
+            request_count, threads,
+        )
+        results["with_limiter"]["server"] = dict(server.state.counters)
+        results["with_limiter"]["limiter"] = limiter.stats()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the OpenAI rate limiter against a fake server")
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--threads", type=int, default=10)
+    parser.add_argument("--rpm", type=int, default=120)
+    parser.add_argument("--inject-429", type=float, default=0.1)
+    parser.add_argument("--inject-500", type=float, default=0.05)
+    args = parser.parse_args()
+
+    results = run_check(args.requests, args.threads, args.rpm, args.inject_429, args.inject_500)
+    print(json.dumps(results, indent=2))
+    # Limiter ile tüm istekler sonunda başarılı olmalı
+    sys.exit(0 if results["with_limiter"]["failed"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
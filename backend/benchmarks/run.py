@@ -0,0 +1,304 @@
+"""
+Backend sıcak yolları için benchmark paketi.
+
+Ölçülenler:
+- asset_rewrite_placeholders: replace_image_placeholders_in_html (592 KB debug HTML)
+- asset_rewrite_playwright: generate_pdf_with_playwright'ın kullandığı replace_image_references
+- pdf_text_extraction: extract_text_from_pdf (örnek PDF)
+- project_json_rmw: data_storage.save_component_data + get_project_data (geçici kopya üzerinde)
+- base64_encode_cold / base64_encode_warm: encode_image_to_base64 (önbelleksiz / önbellekli)
+- playwright_render: render_html_to_pdf (Playwright kuruluysa; sayfa önbelleği kapalı)
+
+Girdiler depoda bulunan dosyalardır; içerik hash'leri FIXTURES ile doğrulanır,
+değişmişlerse baseline karşılaştırması anlamsız olacağı için koşu durdurulur.
+Sonuçlar JSON olarak yazılır ve kayıtlı baseline ile karşılaştırılır; medyanı
+baseline'dan --threshold oranından fazla yavaş olan benchmark varsa komut 1
+koduyla çıkar. Baseline makineye özgüdür; --save-baseline ile yeniden üretilir.
+Baseline yoksa (ve --save-baseline verilmediyse) karşılaştırma yapılamayacağı
+için komut benchmark'ları çalıştırmadan 2 koduyla çıkar.
+
+Kullanım (backend dizininden):
+    python -m benchmarks.run
+    python -m benchmarks.run --only asset_rewrite_placeholders pdf_text_extraction --repeat 10
+    python -m benchmarks.run --save-baseline
+    python -m benchmarks.run --threshold 0.25 --output bench_results.json
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import inspect
+import io
+import json
+import logging
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# Benchmark girdileri ve beklenen SHA-256 değerleri
+FIXTURES: Dict[str, Dict[str, str]] = {
+    "debug_html": {
+        "path": "debug_V_Metroway_playwright.html",
+        "sha256": "2e2572666b28f72a844ac7d97aa28a1710bfa9b8290840942e7e24fbbc5d3bcd",
+    },
+    "sample_pdf": {
+        "path": "data/uploads/active_report/v_metroway/pdfs/finans-1751377590.pdf",
+        "sha256": "70457234af1149a66982083f8f91d916e853197aa83b8775cb42c11cda207c87",
+    },
+    "project_json": {
+        "path": "data/projects/V_Metroway.json",
+        "sha256": "fc9b8764d7e0329f18681ef2cb24ebb9aa7508748157fc3919b0ec6ff4c67da1",
+    },
+    "asset_jpg": {
+        "path": "data/project_assets/V_Metroway/metroway_foto.jpg",
+        "sha256": "efdab2ae407a9268ffa06cf70384f8e5d1b012a55cf2071f7e6af9d52eef36e3",
+    },
+    "asset_svg": {
+        "path": "data/project_assets/V_Metroway/kapak_foto.svg",
+        "sha256": "270d33d8638dcec630e1e4e2e904227b20e0a362175c67071484ddcd9a65309e",
+    },
+}
+
+ASSET_PROJECT = "V_Metroway"
+
+
+def fixture_path(name: str) -> Path:
+    return BASE_DIR / FIXTURES[name]["path"]
+
+
+def verify_fixtures() -> List[str]:
+    """İçeriği beklenen hash'ten farklı (veya eksik) fixture'ların listesi."""
+    problems = []
+    for name, spec in FIXTURES.items():
+        path = BASE_DIR / spec["path"]
+        if not path.exists():
+            problems.append(f"{name}: missing ({spec['path']})")
+        elif hashlib.sha256(path.read_bytes()).hexdigest() != spec["sha256"]:
+            problems.append(f"{name}: content changed ({spec['path']})")
+    return problems
+
+
+# --- Benchmark kurulumları: her biri ölçülecek argümansız bir çağrılabilir döndürür ---
+
+def bench_asset_rewrite_placeholders(workdir: Path) -> Callable[[], Any]:
+    from utils.pdf_utils import replace_image_placeholders_in_html
+
+    html = fixture_path("debug_html").read_text(encoding="utf-8")
+    return lambda: replace_image_placeholders_in_html(html, ASSET_PROJECT)
+
+
+def bench_asset_rewrite_playwright(workdir: Path) -> Callable[[], Any]:
+    from utils.pdf_utils import get_project_images_map, load_project_assets, replace_image_references
+
+    html = fixture_path("debug_html").read_text(encoding="utf-8")
+
+    def run():
+        all_images = {**get_project_images_map(ASSET_PROJECT), **load_project_assets(ASSET_PROJECT)}
+        return replace_image_references(html, all_images)
+    return run
+
+
+def bench_pdf_text_extraction(workdir: Path) -> Callable[[], Any]:
+    from utils.pdf_utils import extract_text_from_pdf
+
+    pdf_path = str(fixture_path("sample_pdf"))
+    return lambda: extract_text_from_pdf(pdf_path)
+
+
+def bench_project_json_rmw(workdir: Path) -> Callable[[], Any]:
+    import api.data_storage as data_storage
+
+    # Gerçek proje dosyalarına dokunmamak için geçici bir kopya kullanılır
+    projects_dir = workdir / "projects"
+    projects_dir.mkdir()
+    shutil.copy(fixture_path("project_json"), projects_dir / "V_Metroway.json")
+    original_dir = data_storage.PROJECTS_DIR
+    counter = {"i": 0}
+
+    def run():
+        data_storage.PROJECTS_DIR = projects_dir
+        try:
+            counter["i"] += 1
+            data_storage.save_component_data("V Metroway", "Finans", {"currency_info": f"{counter['i']} USD"})
+            return data_storage.get_project_data("V Metroway")
+        finally:
+            data_storage.PROJECTS_DIR = original_dir
+    return run
+
+
+def bench_base64_encode_cold(workdir: Path) -> Callable[[], Any]:
+    from utils import pdf_utils
+
+    paths = [fixture_path("asset_jpg"), fixture_path("asset_svg")]
+
+    def run():
+        pdf_utils._asset_cache = pdf_utils._EncodedAssetCache(pdf_utils.ASSET_CACHE_MAX_BYTES)
+        return [pdf_utils.encode_image_to_base64(path) for path in paths]
+    return run
+
+
+def bench_base64_encode_warm(workdir: Path) -> Callable[[], Any]:
+    from utils.pdf_utils import encode_image_to_base64
+
+    paths = [fixture_path("asset_jpg"), fixture_path("asset_svg")]
+    for path in paths:
+        encode_image_to_base64(path)
+    return lambda: [encode_image_to_base64(path) for path in paths]
+
+
+def bench_playwright_render(workdir: Path) -> Optional[Callable[[], Any]]:
+    try:
+        import playwright  # noqa: F401
+    except ImportError:
+        return None
+    from utils.pdf_utils import render_html_to_pdf
+
+    html = fixture_path("debug_html").read_text(encoding="utf-8")
+    counter = {"i": 0}
+
+    async def run():
+        counter["i"] += 1
+        await render_html_to_pdf(html, workdir / f"render_{counter['i']}.pdf", use_page_cache=False, shards=1)
+    return run
+
+
+BENCHMARKS: Dict[str, Callable[[Path], Optional[Callable[[], Any]]]] = {
+    "asset_rewrite_placeholders": bench_asset_rewrite_placeholders,
+    "asset_rewrite_playwright": bench_asset_rewrite_playwright,
+    "pdf_text_extraction": bench_pdf_text_extraction,
+    "project_json_rmw": bench_project_json_rmw,
+    "base64_encode_cold": bench_base64_encode_cold,
+    "base64_encode_warm": bench_base64_encode_warm,
+    "playwright_render": bench_playwright_render,
+}
+
+# Yavaş benchmark'lar için tekrar sayısı üst sınırı
+MAX_REPEAT = {"playwright_render": 3, "pdf_text_extraction": 3}
+
+
+def _time_call(func: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    result = func()
+    if inspect.isawaitable(result):
+        asyncio.run(result)
+    return time.perf_counter() - started
+
+
+def run_benchmark(name: str, repeat: int, warmup: int) -> Dict[str, Any]:
+    # Ölçülen kodun print çıktıları JSON sonucuna karışmasın
+    with tempfile.TemporaryDirectory() as tmp_dir, contextlib.redirect_stdout(io.StringIO()):
+        func = BENCHMARKS[name](Path(tmp_dir))
+        if func is None:
+            return {"status": "skipped", "reason": "dependency not installed"}
+        repeat = min(repeat, MAX_REPEAT.get(name, repeat))
+        try:
+            for _ in range(warmup):
+                _time_call(func)
+            timings = [_time_call(func) for _ in range(repeat)]
+        except Exception as e:
+            # Ör. Playwright paketi kurulu ama tarayıcı indirilmemiş
+            return {"status": "error", "reason": f"{type(e).__name__}: {str(e).splitlines()[0]}"}
+    return {
+        "status": "ok",
+        "runs": repeat,
+        "median_s": round(statistics.median(timings), 6),
+        "min_s": round(min(timings), 6),
+        "max_s": round(max(timings), 6),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_to_baseline(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Her benchmark için baseline'a göre oranı ve regresyon durumunu döndürür."""
+    rows = []
+    for name, result in results["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if result.get("status") != "ok" or not base or base.get("status") != "ok":
+            rows.append({"name": name, "ratio": None, "regression": False})
+            continue
+        ratio = result["median_s"] / base["median_s"] if base["median_s"] else None
+        rows.append({"name": name, "ratio": ratio, "regression": ratio is not None and ratio > 1 + threshold})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend hot path benchmarks")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Yalnızca bu benchmark'lar")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Sonuçları baseline olarak kaydet")
+    parser.add_argument("--threshold", type=float, default=0.2, help="İzin verilen göreli yavaşlama")
+    parser.add_argument("--output", type=Path, help="Sonuç JSON'unun yazılacağı dosya")
+    args = parser.parse_args()
+
+    # Sıcak yollardaki bilgi ve uyarı logları ölçümü bozmasın
+    logging.disable(logging.WARNING)
+
+    problems = verify_fixtures()
+    if problems:
+        print("Fixture check failed:\n  " + "\n  ".join(problems))
+        sys.exit(2)
+
+    # Baseline olmadan regresyon kapısı hiçbir zaman tetiklenemez; sessizce geçme
+    if not args.save_baseline and not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one", file=sys.stderr)
+        sys.exit(2)
+
+    names = args.only or list(BENCHMARKS)
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "benchmarks": {},
+    }
+    for name in names:
+        results["benchmarks"][name] = run_benchmark(name, args.repeat, args.warmup)
+        result = results["benchmarks"][name]
+        summary = f"{result['median_s'] * 1000:.2f} ms" if result["status"] == "ok" else result["status"]
+        print(f"{name:<28} {summary}", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+    print(output)
+
+    if args.save_baseline:
+        args.baseline.write_text(output + "\n", encoding="utf-8")
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+        return
+
+    rows = compare_to_baseline(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.threshold)
+    regressions = [row for row in rows if row["regression"]]
+    for row in rows:
+        ratio = f"{row['ratio']:.2f}x" if row["ratio"] is not None else "n/a"
+        print(f"{row['name']:<28} {ratio:>8}{'  REGRESSION' if row['regression'] else ''}", file=sys.stderr)
+    if regressions:
+        print(f"FAIL: {len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}",
+              file=sys.stderr)
+        sys.exit(1)
+    print("OK: no regressions beyond threshold", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
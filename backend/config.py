@@ -103,6 +103,149 @@ UPLOADS_DIR = DATA_DIR / "uploads"
 os.makedirs(REPORTS_DIR, exist_ok=True)
 os.makedirs(UPLOADS_DIR, exist_ok=True)
 
-
-
-
+# Önbellek dizini
+CACHE_DIR = DATA_DIR / "cache"
+os.makedirs(CACHE_DIR, exist_ok=True)
+
+# PDF render ayarları
+# Sayfa bazlı render önbelleği: yalnızca değişen `.page` blokları yeniden render edilir
+PDF_PAGE_CACHE_ENABLED = os.getenv("PDF_PAGE_CACHE", "1") != "0"
+PDF_PAGE_CACHE_DIR = CACHE_DIR / "render_pages"
+PDF_PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PDF_PAGE_CACHE_MAX_ENTRIES", "500"))
+
+# Paralel render: sayfalar ayrı tarayıcı bağlamlarında eşzamanlı render edilir
+PDF_RENDER_CONCURRENCY = int(os.getenv("PDF_RENDER_CONCURRENCY", str(os.cpu_count() or 1)))
+# Sayfa önbelleği kapalıyken belgenin bölüneceği parça sayısı (<= 1: tek parça render)
+PDF_RENDER_SHARDS = int(os.getenv("PDF_RENDER_SHARDS", "1"))
+
+# Base64'e çevrilmiş görsel/asset önbelleğinin bellek sınırı (bayt)
+ASSET_CACHE_MAX_BYTES = int(os.getenv("ASSET_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Toplu rapor üretimi: aynı anda çalışan LLM çağrısı sayısı
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "2"))
+BATCH_MANIFEST_DIR = REPORTS_DIR / "batch"
+
+# OpenAI istemci tarafı hız sınırlayıcı
+# Başlangıç kapasiteleri; ilk yanıttan itibaren x-ratelimit-* başlıklarına göre güncellenir
+OPENAI_RPM_LIMIT = int(os.getenv("OPENAI_RPM_LIMIT", "500"))
+OPENAI_TPM_LIMIT = int(os.getenv("OPENAI_TPM_LIMIT", "30000"))
+# Eşzamanlı istek sayısı 429/5xx yanıtlarına göre bu aralıkta uyarlanır (AIMD)
+OPENAI_MIN_CONCURRENCY = int(os.getenv("OPENAI_MIN_CONCURRENCY", "1"))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+
+# LLM çıktısını akış halinde al ve HTML'i gelirken doğrula
+LLM_STREAMING = os.getenv("LLM_STREAMING", "1") != "0"
+# Akış sırasında bozuk çıktı tespit edilirse toplam deneme sayısı
+LLM_STREAM_MAX_ATTEMPTS = int(os.getenv("LLM_STREAM_MAX_ATTEMPTS", "2"))
+
+# Render sırasında fontlar yerel kayıttan sunulur, diğer tüm dış istekler engellenir
+PDF_BLOCK_EXTERNAL_REQUESTS = os.getenv("PDF_BLOCK_EXTERNAL_REQUESTS", "1") != "0"
+FONT_SOURCE_DIR = Path(os.getenv("FONT_SOURCE_DIR", str(BASE_DIR.parent / "assets" / "fonts")))
+FONT_CACHE_DIR = CACHE_DIR / "fonts"
+
+# Rapor üretim modu: "html" (model tam HTML yazar), "structured"
+# (model JSON içerik döner, HTML yerel Jinja şablonu ile üretilir) veya
+# "sections" (her bileşen için ayrı, paralel structured çağrı)
+REPORT_GENERATION_MODE = os.getenv("REPORT_GENERATION_MODE", "html")
+STRUCTURED_REPORT_TEMPLATE = os.getenv("STRUCTURED_REPORT_TEMPLATE", "structured_investor_report")
+
+# Jinja şablon kaydı: derlenmiş bytecode önbelleği ve değişiklik kontrol aralığı (saniye, 0 = kapalı)
+TEMPLATE_CACHE_DIR = CACHE_DIR / "templates"
+TEMPLATE_RELOAD_INTERVAL = float(os.getenv("TEMPLATE_RELOAD_INTERVAL", "2"))
+
+# LLM talimat dosyaları ve proje -> prompt eşlemesi (prompts.json)
+PROMPTS_DIR = DATA_DIR / "prompts"
+
+# "sections" modunda başarısız olan bir bölüm için toplam deneme sayısı
+SECTION_MAX_ATTEMPTS = int(os.getenv("SECTION_MAX_ATTEMPTS", "2"))
+
+# LLM yanıt önbelleği (aynı girdilerle tekrarlanan üretimler için)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+LLM_CACHE_DIR = CACHE_DIR / "llm"
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Görsel analizinden yalnızca yanıt id'si saklanır; OpenAI yanıtları 30 gün tuttuğu için daha kısa tutulur
+LLM_CACHE_RESPONSE_ID_TTL = int(os.getenv("LLM_CACHE_RESPONSE_ID_TTL", str(25 * 24 * 3600)))
+
+# OpenAI kayıt/tekrar transport'u: "" (kapalı), "record" veya "replay"
+OPENAI_TRANSPORT_MODE = os.getenv("OPENAI_TRANSPORT_MODE", "")
+OPENAI_FIXTURES_DIR = Path(os.getenv("OPENAI_FIXTURES_DIR", str(BASE_DIR / "benchmarks" / "fixtures" / "openai")))
+# Tekrarda kayıttaki yanıt süresinin çarpanı (0 = gecikmesiz); OPENAI_REPLAY_LATENCY verilirse sabit gecikme
+OPENAI_REPLAY_LATENCY_SCALE = float(os.getenv("OPENAI_REPLAY_LATENCY_SCALE", "1.0"))
+OPENAI_REPLAY_LATENCY = float(os.environ["OPENAI_REPLAY_LATENCY"]) if os.getenv("OPENAI_REPLAY_LATENCY") else None
+
+# Yönetim uç noktaları (/admin/...) ve X-Profile için paylaşılan anahtar; boşsa bunlar kapalıdır
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Örnekleyici profiler: X-Profile başlığı veya yönetim anahtarı ile istek bazında açılır
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "0") != "0"
+# Bu süreyi (saniye) aşan istekler otomatik olarak kaydedilir (0 = kapalı)
+PROFILER_SLOW_REQUEST_SECONDS = float(os.getenv("PROFILER_SLOW_REQUEST_SECONDS", "0"))
+PROFILER_SAMPLE_INTERVAL = float(os.getenv("PROFILER_SAMPLE_INTERVAL", "0.01"))
+PROFILER_DIR = CACHE_DIR / "profiles"
+PROFILER_MAX_PROFILES = int(os.getenv("PROFILER_MAX_PROFILES", "50"))
+
+# Bellek profili: açıkken her üretim aşamasının öncesi/sonrası tracemalloc anlık görüntüsü alınır
+MEMORY_PROFILING = os.getenv("MEMORY_PROFILING", "0") != "0"
+# tracemalloc'un her ayırma için sakladığı çerçeve sayısı (fazlası daha yavaş, daha ayrıntılı)
+MEMORY_TRACE_FRAMES = int(os.getenv("MEMORY_TRACE_FRAMES", "10"))
+MEMORY_TOP_N = int(os.getenv("MEMORY_TOP_N", "20"))
+# İş başına tepe RSS için yoklama aralığı (saniye)
+MEMORY_RSS_POLL_INTERVAL = float(os.getenv("MEMORY_RSS_POLL_INTERVAL", "0.05"))
+
+# CORS: virgülle ayrılmış "şema://host[:port|port]" kuralları (bkz. utils/cors.py);
+# host tam ad, IP, CIDR aralığı, "*" veya bu makinenin adresi için "local-ip" olabilir
+CORS_ALLOWED_ORIGINS = os.getenv(
+    "CORS_ALLOWED_ORIGINS",
+    "http://localhost:3000|5173,http://127.0.0.1:3000|5173,http://local-ip:3000|5173,"
+    "http://192.168.0.0/23:3000|5173",
+)
+
+# Süreç dışı render: her biri kendi Chromium'unu çalıştıran işçi süreç sayısı (0 = API sürecinde render)
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+# İşçi başına eşzamanlı tarayıcı bağlamı (bir işin sayfaları paralel render edilir)
+RENDER_WORKER_CONTEXTS = int(os.getenv("RENDER_WORKER_CONTEXTS", "2"))
+# İş başına süre sınırı (saniye); aşılırsa işçi öldürülüp yeniden başlatılır
+RENDER_JOB_TIMEOUT = float(os.getenv("RENDER_JOB_TIMEOUT", "180"))
+# İşçi ve Chromium alt süreçlerinin toplam RSS sınırı (MB, 0 = sınırsız)
+RENDER_WORKER_MAX_RSS_MB = int(os.getenv("RENDER_WORKER_MAX_RSS_MB", "1536"))
+# Bu kadar işten sonra işçi sızıntılara karşı yenilenir (0 = hiç)
+RENDER_WORKER_MAX_JOBS = int(os.getenv("RENDER_WORKER_MAX_JOBS", "100"))
+# Boş işçi yokken bekleyebilecek iş sayısı; dolunca API 503 döner
+RENDER_QUEUE_MAX = int(os.getenv("RENDER_QUEUE_MAX", "8"))
+RENDER_SPOOL_DIR = CACHE_DIR / "render_spool"
+
+# PDF render motoru: "playwright" (Chromium), "weasyprint" (tarayıcısız HTML/CSS, kuruluysa) veya
+# "reportlab" (yalnızca structured şablonlar); reports.json'daki "engine" alanı şablon bazında geçersiz kılar
+PDF_RENDER_ENGINE = os.getenv("PDF_RENDER_ENGINE", "playwright")
+# Tarayıcı havuzu / render işçileri doluyken sırayla denenecek hafif motorlar, ör. "weasyprint,reportlab".
+# Varsayılan boş (devretme yok): hafif motorların çıktısı farklı görünür, reportlab şablon CSS'ini kullanmaz
+PDF_ENGINE_FALLBACK = os.getenv("PDF_ENGINE_FALLBACK", "")
+# reportlab motorunun fontları (Türkçe karakterleri içeren TTF; bulunamazsa Helvetica)
+REPORTLAB_FONT_PATH = Path(os.getenv("REPORTLAB_FONT_PATH", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"))
+REPORTLAB_BOLD_FONT_PATH = Path(os.getenv("REPORTLAB_BOLD_FONT_PATH",
+                                          "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"))
+
+# Rapor sayfa önizlemeleri: PDF içerik hash'ine göre önbelleklenen küçük resimler (bkz. utils/thumbnails.py)
+THUMBNAIL_CACHE_DIR = CACHE_DIR / "thumbnails"
+THUMBNAIL_WIDTH = int(os.getenv("THUMBNAIL_WIDTH", "320"))
+THUMBNAIL_MAX_WIDTH = int(os.getenv("THUMBNAIL_MAX_WIDTH", "1600"))
+# Varsayılan biçim: "webp" veya "png"
+THUMBNAIL_FORMAT = os.getenv("THUMBNAIL_FORMAT", "webp")
+# Her render'dan sonra önizlemesi hazırlanan ilk sayfa sayısı (0 = yalnızca istek anında)
+THUMBNAIL_PREWARM_PAGES = int(os.getenv("THUMBNAIL_PREWARM_PAGES", "1"))
+# Önizlemeleri tutulan en fazla PDF sayısı (en eski kullanılanlar silinir)
+THUMBNAIL_CACHE_MAX_PDFS = int(os.getenv("THUMBNAIL_CACHE_MAX_PDFS", "500"))
+
+# Yükleme anında ön hazırlık: yeni PDF'ler vector store'a eşitlenir, görseller analiz edilir (bkz. utils/prestage.py)
+PRESTAGE_ENABLED = os.getenv("PRESTAGE_ENABLED", "1") != "0"
+# Art arda yüklemeler tek bir hazırlıkta toplanır: son yüklemeden sonra beklenecek süre (saniye)
+PRESTAGE_DEBOUNCE_SECONDS = float(os.getenv("PRESTAGE_DEBOUNCE_SECONDS", "2"))
+# Rapor üretiminin bitmemiş hazırlıkları en fazla bekleyeceği süre (saniye); aşılırsa üretim kendisi hazırlar
+PRESTAGE_WAIT_TIMEOUT = float(os.getenv("PRESTAGE_WAIT_TIMEOUT", "600"))
+# Aynı anda hazırlanan proje sayısı
+PRESTAGE_WORKERS = int(os.getenv("PRESTAGE_WORKERS", "2"))
+
+# Toplu dosya yükleme (/project/{p}/upload-files): istek başına en fazla dosya ve aynı anda diske yazılan dosya sayısı
+UPLOAD_BATCH_MAX_FILES = int(os.getenv("UPLOAD_BATCH_MAX_FILES", "50"))
+UPLOAD_WRITE_CONCURRENCY = int(os.getenv("UPLOAD_WRITE_CONCURRENCY", "4"))
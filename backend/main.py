@@ -1,10 +1,7 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Body
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Body, Request, Header
 from typing import Dict, List, Optional, Any
-import uvicorn
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, PlainTextResponse, RedirectResponse
 import os
-import socket
 from pathlib import Path
 import smtplib
 from api.mail_agent import send_missing_info_request, get_department_email, send_report_email as mail_agent_send_report
@@ -13,21 +10,41 @@ from api.data_storage import (
     save_component_data, get_project_data, get_all_projects, 
     save_generated_report, delete_project_data, archive_project, 
     create_new_report, delete_report as delete_report_from_storage,
-    finalize_report, get_project_path,
-    reset_active_report_generation
+    finalize_report, get_project_path, project_json_lock, write_project_json,
+    reset_active_report_generation, get_report_html
 )
 
-from api.file_handler import save_uploaded_image, save_uploaded_pdf, clean_active_report, add_file_entry_to_array, remove_file_entry_from_array
+from api.file_handler import save_uploaded_image, save_uploaded_pdf, save_uploaded_files, clean_active_report, add_file_entry_to_array, remove_file_entry_from_array
 from fastapi.staticfiles import StaticFiles
 import json
 import datetime
 import tempfile
-from jinja2 import Environment, FileSystemLoader
-from openai import OpenAI
 import logging
 import sys
-
-from utils.oai import generate_full_html
+import asyncio
+import time
+
+from utils.oai import generate_report_html
+from utils.template_registry import get_template_registry
+from utils.job_status import start_job, update_job, finish_job, get_job
+from utils.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    EMAILS_IN_FLIGHT,
+    HTTP_DURATION,
+    HTTP_IN_FLIGHT,
+    HTTP_REQUESTS,
+    render_metrics,
+    track_stage,
+)
+from config import ADMIN_TOKEN, CORS_ALLOWED_ORIGINS, THUMBNAIL_FORMAT, THUMBNAIL_WIDTH, UPLOAD_BATCH_MAX_FILES
+from utils.cors import OriginMatcher, RuleBasedCORSMiddleware, parse_rules
+from utils.admin_auth import is_admin_token
+from utils.profiler import ProfilerMiddleware, get_profiler
+from utils.memory_profiler import get_memory_profiler
+from utils.prestage import get_prestager, shutdown_prestager
+from utils.render_workers import RenderQueueFull, peek_render_workers, shutdown_render_workers
+from utils.render_engines import engine_status, get_engine
+from utils.thumbnails import THUMBNAIL_FORMATS, get_thumbnail_cache, is_pdf_hash, preview_url
 from utils.pdf_utils import (
     extract_text_from_pdf,
     get_pdf_info,
@@ -42,13 +59,13 @@ from utils.pdf_utils import (
 from models.basemodels import (
     ProjectRequest, ComponentDataRequest, EmailRequest,
    DeleteProjectRequest,ArchiveProjectRequest, 
-   GenerateReportRequest, ShareReportRequest, DeleteFinalizedReportRequest
+   GenerateReportRequest, ShareReportRequest, DeleteFinalizedReportRequest,
+   BatchGenerateRequest, ProfilerToggleRequest, MemoryProfilingRequest,
+   RerenderReportRequest
 )
 
 project_root = Path(__file__).resolve().parent.parent
 
-template_dir = Path(__file__).parent / 'templates'
-env = Environment(loader=FileSystemLoader(template_dir))
 
 # Statik dosya yolu (görseller için)
 
@@ -62,43 +79,32 @@ if project_root_str not in sys.path:
 
 
 app = FastAPI(title="Yatırımcı Raporu API")
+# İlk eklenen middleware en içte kalır; profiler böylece endpoint ile aynı task'ta çalışır
+app.add_middleware(ProfilerMiddleware)
 
 
+@app.on_event("startup")
+async def load_templates():
+    """Rapor ve e-posta şablonlarını başlangıçta derler (yol hataları burada loglanır)."""
+    await asyncio.to_thread(get_template_registry)
+
+
+@app.on_event("shutdown")
+async def stop_render_workers():
+    """Render işçi süreçlerini (ve Chromium'larını) kapatır."""
+    await asyncio.to_thread(shutdown_render_workers)
+
+
+@app.on_event("shutdown")
+async def stop_prestaging():
+    """Bekleyen yükleme sonrası hazırlıkları iptal eder."""
+    shutdown_prestager()
+
 
-def get_allowed_origins():
-    """Generate allowed origins based on current network configuration"""
-    origins = [
-        "http://localhost:3000",
-        "http://127.0.0.1:3000",
-        "http://localhost:5173",
-        "http://127.0.0.1:5173",
-    ]
-    
-    # Add current machine's IP
-    try:
-        hostname = socket.gethostname()
-        local_ip = socket.gethostbyname(hostname)
-        origins.extend([
-            f"http://{local_ip}:3000",
-            f"http://{local_ip}:5173"
-        ])
-    except:
-        pass
-    
-    # Add common local network ranges
-    for i in range(1, 255):
-        origins.extend([
-            f"http://192.168.1.{i}:3000",
-            f"http://192.168.1.{i}:5173",
-            f"http://192.168.0.{i}:3000",
-            f"http://192.168.0.{i}:5173",
-        ])
-    
-    return origins
 
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=get_allowed_origins(),
+    RuleBasedCORSMiddleware,
+    matcher=OriginMatcher(parse_rules(CORS_ALLOWED_ORIGINS)),
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -108,6 +114,24 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 logger = logging.getLogger(__name__)
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Her isteğin süresini ve durum kodunu route şablonu (ör. /project/{project_name}) ile kaydeder."""
+    started = time.perf_counter()
+    status = 500
+    HTTP_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        # Eşleşmeyen yollar etiket sayısını şişirmesin
+        route_path = getattr(route, "path", "unmatched")
+        HTTP_DURATION.observe(time.perf_counter() - started, method=request.method, route=route_path)
+        HTTP_REQUESTS.inc(method=request.method, route=route_path, status=str(status))
+
 
 # Endpoints
 @app.get("/")
@@ -134,32 +158,32 @@ def get_default_projects():
 def get_project_details(project_name: str):
     """Belirli bir projenin detaylarını getirir."""
     try:
-        project_data = get_project_data(project_name)
-        if not project_data:
-            raise HTTPException(status_code=404, detail=f"Proje bulunamadı: {project_name}")
+        with project_json_lock(project_name):
+            project_data = get_project_data(project_name)
+            if not project_data:
+                raise HTTPException(status_code=404, detail=f"Proje bulunamadı: {project_name}")
             
-        # Eğer active_report varsa ve finalized ise, reports listesine taşı
-        active_report = project_data.get("active_report")
-        if active_report and active_report.get("is_finalized"):
-            # Reports listesi yoksa oluştur
-            if "reports" not in project_data:
-                project_data["reports"] = []
+            # Eğer active_report varsa ve finalized ise, reports listesine taşı
+            active_report = project_data.get("active_report")
+            if active_report and active_report.get("is_finalized"):
+                # Reports listesi yoksa oluştur
+                if "reports" not in project_data:
+                    project_data["reports"] = []
                 
-            # Finalized raporu listeye ekle
-            project_data["reports"].insert(0, active_report)
+                # Finalized raporu listeye ekle
+                project_data["reports"].insert(0, active_report)
             
-            # Active report'u temizle
-            project_data["active_report"] = None
+                # Active report'u temizle
+                project_data["active_report"] = None
             
-            # Değişiklikleri kaydet
-            try:
-                with open(get_project_path(project_name), 'w', encoding='utf-8') as f:
-                    json.dump(project_data, f, ensure_ascii=False, indent=2)
-                print(f"Finalized rapor {active_report.get('report_id')} active_report'tan reports listesine taşındı ve dosya güncellendi.")
-            except IOError as e:
-                print(f"HATA: Düzeltilmiş proje verisi ({project_name}) dosyaya kaydedilemedi: {str(e)}")
-                # Hata durumunda ne yapılacağına karar verilebilir. Şimdilik sadece logluyoruz.
-                # İsteğe bağlı olarak hatayı yeniden yükseltebilir veya farklı bir yanıt dönebiliriz.
+                # Değişiklikleri kaydet
+                try:
+                    write_project_json(get_project_path(project_name), project_data)
+                    print(f"Finalized rapor {active_report.get('report_id')} active_report'tan reports listesine taşındı ve dosya güncellendi.")
+                except IOError as e:
+                    print(f"HATA: Düzeltilmiş proje verisi ({project_name}) dosyaya kaydedilemedi: {str(e)}")
+                    # Hata durumunda ne yapılacağına karar verilebilir. Şimdilik sadece logluyoruz.
+                    # İsteğe bağlı olarak hatayı yeniden yükseltebilir veya farklı bir yanıt dönebiliriz.
         
         return project_data
     except FileNotFoundError:
@@ -465,7 +489,8 @@ def send_email(request: EmailRequest):
         logger.info(f"[API] Department email resolved to: {to_email}")
         
         # E-posta gönder
-        result = send_missing_info_request(to_email, request.project_name, request.component_name)
+        with EMAILS_IN_FLIGHT.track(), track_stage("email_send"):
+            result = send_missing_info_request(to_email, request.project_name, request.component_name)
         logger.info(f"[API] Email sent successfully: {result}")
         
         return {"message": result}
@@ -571,6 +596,73 @@ def download_specific_report(project_name: str, report_id: str):
         traceback.print_exc() # Genel hataları logla
         raise HTTPException(status_code=500, detail=f"Rapor indirilirken beklenmeyen bir hata oluştu: {str(e)}")
 
+def _generated_report_pdf(project_name: str, report_id: str) -> Path:
+    """Aktif veya sonlandırılmış bir raporun PDF yolu; rapor/PDF yoksa HTTPException."""
+    project_data = get_project_data(project_name)
+    if not project_data:
+        raise HTTPException(status_code=404, detail=f"Proje bulunamadı: {project_name}")
+    reports = [project_data.get("active_report") or {}] + project_data.get("reports", [])
+    target_report = next((report for report in reports if report.get("report_id") == report_id), None)
+    if not target_report:
+        raise HTTPException(status_code=404, detail=f"Belirtilen ID ({report_id}) ile rapor bulunamadı")
+    if not target_report.get("report_generated"):
+        raise HTTPException(status_code=400, detail="Rapor henüz PDF olarak oluşturulmamış")
+    pdf_path = get_report_path(project_name, report_id)
+    if not pdf_path.exists():
+        raise HTTPException(status_code=404, detail="Raporun PDF dosyası sunucuda bulunamadı")
+    return pdf_path
+
+@app.get("/project/{project_name}/report/{report_id}/preview")
+async def get_report_preview(project_name: str, report_id: str, page: int = 1,
+                             width: Optional[int] = None, format: Optional[str] = None):
+    """
+    Raporun bir sayfasının önizlemesi. PDF'in içerik hash'ini içeren ve süresiz
+    önbelleklenebilen /previews adresine yönlendirir; PDF yeniden üretildiğinde
+    yönlendirme de yeni önizlemeye gider.
+    """
+    fmt = format or THUMBNAIL_FORMAT
+    if fmt not in THUMBNAIL_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported thumbnail format: {fmt}")
+    pdf_path = _generated_report_pdf(project_name, report_id)
+    cache = get_thumbnail_cache()
+    pdf_hash = await asyncio.to_thread(cache.register, pdf_path)
+    return RedirectResponse(preview_url(pdf_hash, page, width or THUMBNAIL_WIDTH, fmt), status_code=307,
+                            headers={"Cache-Control": "no-cache"})
+
+@app.get("/project/{project_name}/report/{report_id}/pages", response_model=Dict[str, Any])
+async def get_report_pages(project_name: str, report_id: str, width: Optional[int] = None,
+                           format: Optional[str] = None):
+    """Raporun sayfa sayısı ve her sayfanın içerik adresli önizleme URL'i."""
+    fmt = format or THUMBNAIL_FORMAT
+    if fmt not in THUMBNAIL_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported thumbnail format: {fmt}")
+    pdf_path = _generated_report_pdf(project_name, report_id)
+    cache = get_thumbnail_cache()
+    pdf_hash = await asyncio.to_thread(cache.register, pdf_path)
+    page_count = await asyncio.to_thread(cache.page_count, pdf_hash)
+    return {
+        "report_id": report_id,
+        "pdf_sha256": pdf_hash,
+        "pdf_bytes": pdf_path.stat().st_size,
+        "page_count": page_count,
+        "pages": [{"page": page, "url": preview_url(pdf_hash, page, width or THUMBNAIL_WIDTH, fmt)}
+                  for page in range(1, page_count + 1)],
+    }
+
+@app.get("/previews/{pdf_hash}/{page}.{fmt}")
+async def get_preview_image(pdf_hash: str, page: int, fmt: str, width: Optional[int] = None):
+    """İçerik adresli sayfa önizlemesi; içerik hiç değişmediği için süresiz önbelleklenir."""
+    if not is_pdf_hash(pdf_hash) or fmt not in THUMBNAIL_FORMATS:
+        raise HTTPException(status_code=404, detail="Preview not found")
+    try:
+        path = await asyncio.to_thread(get_thumbnail_cache().get, pdf_hash, page, width or THUMBNAIL_WIDTH, fmt)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FileResponse(path, media_type=THUMBNAIL_FORMATS[fmt][1],
+                        headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
 # Statik dosyalar için (oluşturulan PDF'leri indirmek için)
 app.mount("/download", StaticFiles(directory="./"), name="download")
 
@@ -634,15 +726,15 @@ def delete_finalized_report(request: DeleteFinalizedReportRequest):
             else:
                 logger.warning(f"[MAIN] Silinecek finalized PDF dosyası bulunamadı (zaten yok): {pdf_path}")
             
-            # Finalized raporu proje verilerinden kaldır (using the found index)
+            # Finalized raporu proje verilerinden kaldır; aradaki değişiklikler kaybolmasın diye
+            # JSON kilit altında yeniden okunur ve rapor ID'siyle çıkarılır
             logger.info(f"[MAIN] Finalized rapor meta verisi kaldırılıyor: Proje={project_name}, Rapor ID={report_id}")
-            del project_data["reports"][found_report_index]
-            project_data["last_updated"] = datetime.datetime.now().isoformat()
-            
-            # Güncellenmiş proje verilerini kaydet (use r+ mode for safe update)
-            project_json_path = get_project_path(project_name)
-            with open(project_json_path, 'w', encoding='utf-8') as f:
-                json.dump(project_data, f, ensure_ascii=False, indent=2)
+            with project_json_lock(project_name):
+                project_data = get_project_data(project_name)
+                project_data["reports"] = [report for report in project_data.get("reports", [])
+                                           if report.get("report_id") != report_id]
+                project_data["last_updated"] = datetime.datetime.now().isoformat()
+                write_project_json(get_project_path(project_name), project_data)
             
             logger.info(f"[MAIN] Finalized rapor başarıyla silindi: Proje={project_name}, Rapor ID={report_id}")
             return {
@@ -705,7 +797,10 @@ async def send_report_email(project_name: str, report_id: str, email_request: Sh
     """Send a report to specified email addresses."""
     logger.info(f"[MAIN] Email report request received: Project={project_name}, ReportID={report_id}")
     try:
-        result = mail_agent_send_report(project_name, report_id, email_request.email_addresses)
+        # SMTP gönderimi bloklayıcıdır; event loop'u bekletmemesi için thread'de çalışır
+        with EMAILS_IN_FLIGHT.track(), track_stage("email_send"):
+            result = await asyncio.to_thread(mail_agent_send_report, project_name, report_id,
+                                             email_request.email_addresses)
         logger.info(f"[MAIN] Email report successful: Project={project_name}, ReportID={report_id}")
         return result
     except FileNotFoundError as e:
@@ -751,7 +846,9 @@ def reset_active_report_endpoint(project_name: str):
         raise HTTPException(status_code=500, detail=f"Aktif rapor sıfırlanırken beklenmeyen bir hata oluştu: {str(e)}")
 
 @app.post("/project/{project_name}/generate-report")
-async def generate_report(project_name: str, user_input: str = Body(None, embed=True)):
+async def generate_report(project_name: str, user_input: str = Body(None, embed=True),
+                          mode: Optional[str] = Body(None, embed=True),
+                          bypass_cache: bool = Body(False, embed=True)):
     """
     Report generation endpoint that:
     1. Calls OpenAI to generate HTML content
@@ -789,24 +886,33 @@ async def generate_report(project_name: str, user_input: str = Body(None, embed=
         
         # STEP 1: Generate HTML content using OpenAI
         logger.info(f"[REPORT] Step 1: Calling OpenAI to generate HTML for project: {project_name}")
+        start_job(project_name, report_id, stage="generating_html")
         
         try:
-            from utils.oai import generate_full_html
+            def on_progress(progress):
+                update_job(project_name, progress=progress, attempt=progress.get("attempt", 1))
             
-            # This returns HTML content as a string
-            html_content = generate_full_html(project_name,user_input)
-            print(html_content)
+            # This returns HTML content as a string; runs in a thread so the
+            # event loop can keep serving status polls while the model streams
+            # mode: "html" (model writes the document), "structured" (JSON content + local
+            # template) or "sections" (one concurrent structured call per component)
+            html_content = await asyncio.to_thread(generate_report_html, project_name, user_input,
+                                                   mode=mode, on_progress=on_progress,
+                                                   bypass_cache=bypass_cache)
             logger.info(f"[REPORT] OpenAI response received, Response: {len(html_content)} characters")
             
         except FileNotFoundError as e:
             logger.error(f"[REPORT] File not found error: {str(e)}")
+            finish_job(project_name, error=str(e))
             raise HTTPException(status_code=404, detail=str(e))
         except Exception as e:
             logger.error(f"[REPORT] OpenAI generation error: {str(e)}", exc_info=True)
+            finish_job(project_name, error=f"Failed to generate HTML content: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to generate HTML content: {str(e)}")
         
         # STEP 2: Generate PDF from HTML (with image replacement)
         logger.info(f"[REPORT] Step 2: Converting HTML to PDF for project: {project_name}")
+        update_job(project_name, stage="rendering_pdf")
         
         try:
             
@@ -816,34 +922,34 @@ async def generate_report(project_name: str, user_input: str = Body(None, embed=
             
             logger.info(f"[REPORT] PDF created successfully: {pdf_filename}")
             
+        except RenderQueueFull as e:
+            logger.warning(f"[REPORT] Render workers saturated, rejecting: {project_name}")
+            finish_job(project_name, error=str(e))
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "10"})
         except Exception as e:
             logger.error(f"[REPORT] PDF generation error: {str(e)}", exc_info=True)
+            finish_job(project_name, error=f"Failed to generate PDF: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to generate PDF: {str(e)}")
         
         # STEP 3: Update project data
         logger.info(f"[REPORT] Step 3: Updating project data for: {project_name}")
+        update_job(project_name, stage="saving")
         
         try:
-            # Update report status using save_generated_report
-            updated_report = save_generated_report(
-                project_name=project_name,
-                report_id=report_id,
-                report_content=html_content,
-                pdf_path=str(pdf_path)
-            )
-            
-            # Add the PDF filename to the report data
-            updated_report["pdfFileName"] = pdf_filename
-            
-            # Save the updated project data with the filename
-            project_data["active_report"] = updated_report
-            project_data["last_updated"] = datetime.datetime.now().isoformat()
-            
-            project_file_path = get_project_path(project_name)
-            with open(project_file_path, 'w', encoding='utf-8') as f:
-                json.dump(project_data, f, ensure_ascii=False, indent=2)
+            with track_stage("json_update"):
+                # Update report status using save_generated_report
+                # PDF dosya adı da aynı kilitli yazımda kaydedilir (üretim öncesi okunan
+                # project_data ile üzerine yazmak aradaki yüklemeleri kaybederdi)
+                updated_report = save_generated_report(
+                    project_name=project_name,
+                    report_id=report_id,
+                    report_content=html_content,
+                    pdf_path=str(pdf_path),
+                    pdf_file_name=pdf_filename
+                )
             
             logger.info(f"[REPORT] Report generation completed successfully for project: {project_name}")
+            finish_job(project_name)
             
             return {
                 "success": True,
@@ -857,14 +963,293 @@ async def generate_report(project_name: str, user_input: str = Body(None, embed=
             
         except Exception as e:
             logger.error(f"[REPORT] Error updating project data: {str(e)}", exc_info=True)
+            finish_job(project_name, error=f"Failed to update project data: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to update project data: {str(e)}")
             
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"[REPORT] Unexpected error during report generation: {str(e)}", exc_info=True)
+        finish_job(project_name, error=str(e))
         raise HTTPException(status_code=500, detail=f"Unexpected error during report generation: {str(e)}")
     
+@app.post("/project/{project_name}/report/rerender", response_model=Dict[str, Any])
+async def rerender_report(project_name: str, request: RerenderReportRequest = Body(RerenderReportRequest())):
+    """
+    Aktif raporun PDF'ini LLM'i çağırmadan yeniden üretir.
+    
+    Kayıtlı HTML (veya istenen revizyon ya da gönderilen düzenlenmiş HTML)
+    güncel görsel ve asset'lerle yeniden çözülüp render edilir; logo/görsel
+    değişikliği veya render ayarı değişikliği saniyeler içinde PDF'e yansır.
+    Düzenlenmiş HTML yeni bir revizyon olarak kaydedilir; PDF'in hangi
+    revizyondan üretildiği rapor verisindeki "renders" geçmişinde tutulur.
+    """
+    project_data = get_project_data(project_name)
+    if not project_data:
+        raise HTTPException(status_code=404, detail=f"Project not found: {project_name}")
+    active_report = project_data.get("active_report")
+    if not active_report or not active_report.get("report_id"):
+        raise HTTPException(status_code=400, detail="No active report found for this project")
+    if active_report.get("is_finalized"):
+        raise HTTPException(status_code=400, detail="Finalized reports cannot be re-rendered")
+    report_id = active_report["report_id"]
+    if request.engine:
+        try:
+            get_engine(request.engine)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    if request.html is not None:
+        if not request.html.strip():
+            raise HTTPException(status_code=400, detail="Edited HTML is empty")
+        html_content, source = request.html, "edit"
+    else:
+        try:
+            html_content, source = get_report_html(project_name, request.revision)["html"], "rerender"
+        except FileNotFoundError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+    
+    logger.info(f"[REPORT] Re-rendering report for project: {project_name} ({source}, revision={request.revision})")
+    start_job(project_name, report_id, stage="rendering_pdf")
+    started = time.perf_counter()
+    try:
+        pdf_path = await generate_pdf_with_playwright(html_content, project_name, report_id, engine=request.engine)
+    except RenderQueueFull as e:
+        finish_job(project_name, error=str(e))
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "10"})
+    except Exception as e:
+        logger.error(f"[REPORT] Re-render error: {str(e)}", exc_info=True)
+        finish_job(project_name, error=f"Failed to generate PDF: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to generate PDF: {str(e)}")
+    
+    update_job(project_name, stage="saving")
+    try:
+        with track_stage("json_update"):
+            updated_report = save_generated_report(
+                project_name=project_name,
+                report_id=report_id,
+                report_content=html_content,
+                pdf_path=str(pdf_path),
+                pdf_file_name=pdf_path.name,
+                source=source,
+            )
+    except Exception as e:
+        logger.error(f"[REPORT] Error updating project data: {str(e)}", exc_info=True)
+        finish_job(project_name, error=f"Failed to update project data: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to update project data: {str(e)}")
+    finish_job(project_name)
+    
+    return {
+        "success": True,
+        "message": "Report re-rendered successfully",
+        "project_name": project_name,
+        "report_id": report_id,
+        "html_revision": updated_report.get("html_revision"),
+        "render_s": round(time.perf_counter() - started, 3),
+        "pdf_path": str(pdf_path),
+        "pdf_filename": pdf_path.name,
+        "report_data": updated_report,
+    }
+
+@app.get("/project/{project_name}/report/revisions", response_model=Dict[str, Any])
+async def list_report_revisions(project_name: str):
+    """Aktif raporun HTML revizyonları ve hangi PDF'in hangi revizyondan üretildiği."""
+    project_data = get_project_data(project_name)
+    if not project_data:
+        raise HTTPException(status_code=404, detail=f"Project not found: {project_name}")
+    active_report = project_data.get("active_report")
+    if not active_report:
+        raise HTTPException(status_code=400, detail="No active report found for this project")
+    return {
+        "report_id": active_report.get("report_id"),
+        "html_revision": active_report.get("html_revision"),
+        "pdf_html_revision": active_report.get("pdf_html_revision"),
+        "revisions": active_report.get("html_revisions", []),
+        "renders": active_report.get("renders", []),
+    }
+
+@app.get("/project/{project_name}/report/revisions/{revision}")
+async def get_report_revision(project_name: str, revision: int):
+    """Bir HTML revizyonunun içeriği (düzenleyip rerender'a göndermek için)."""
+    try:
+        return PlainTextResponse(get_report_html(project_name, revision)["html"], media_type="text/html")
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/project/{project_name}/report/status", response_model=Dict[str, Any])
+async def get_report_generation_status(project_name: str):
+    """
+    Projenin son rapor üretim işinin durumunu döndürür (aşama, akış ilerlemesi,
+    deneme sayısı, hata).
+    """
+    job = get_job(project_name)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No report generation job found for project: {project_name}")
+    return job
+
+@app.get("/project/{project_name}/prestage", response_model=Dict[str, Any])
+async def get_prestage_status(project_name: str):
+    """
+    Yüklenen dosyaların ön hazırlık durumu: her dosya için vector store'a
+    eşitlenme / görsel analizi adımının pending, running, ready veya failed hali.
+    """
+    return get_prestager().status(project_name)
+
+@app.get("/llm/stats", response_model=Dict[str, Any])
+async def get_llm_stats():
+    """
+    OpenAI çağrı istatistikleri: hız sınırlayıcı durumu, prompt başına
+    sağlayıcı önbelleğinden gelen (cached) input token oranı ve yerel yanıt
+    önbelleğinin isabet/ıskalama sayıları.
+    """
+    from utils.llm_cache import get_llm_cache
+    from utils.prompt_registry import get_prompt_registry
+    from utils.rate_limiter import get_rate_limiter
+
+    return {
+        "rate_limiter": get_rate_limiter().stats(),
+        "prompts": get_prompt_registry().usage_stats(),
+        "response_cache": get_llm_cache().stats(),
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Prometheus metin biçiminde metrikler: aşama ve uç nokta süre
+    histogramları, süren render/LLM çağrısı/e-posta sayıları ve önbellek
+    isabet oranları.
+    """
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+def require_admin(token: Optional[str]) -> None:
+    """X-Admin-Token başlığını doğrular; ADMIN_TOKEN tanımlı değilse yönetim uç noktaları kapalıdır."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Yönetim uç noktaları kapalı (ADMIN_TOKEN tanımlı değil)")
+    if not is_admin_token(token):
+        raise HTTPException(status_code=403, detail="Geçersiz yönetici anahtarı")
+
+@app.get("/admin/profiler", response_model=Dict[str, Any])
+async def get_profiler_status(x_admin_token: Optional[str] = Header(None)):
+    """Profiler ayarları ve saklanan profil sayısı."""
+    require_admin(x_admin_token)
+    return get_profiler().status()
+
+@app.post("/admin/profiler", response_model=Dict[str, Any])
+async def update_profiler(request: ProfilerToggleRequest, x_admin_token: Optional[str] = Header(None)):
+    """
+    Profiler'ı açar/kapatır veya yavaş istek eşiğini (saniye, 0 = kapalı)
+    değiştirir. Açıkken her istek profillenir; eşik tanımlıysa yalnızca eşiği
+    aşan istekler saklanır.
+    """
+    require_admin(x_admin_token)
+    profiler = get_profiler()
+    if request.enabled is not None:
+        profiler.enabled = request.enabled
+    if request.slow_threshold is not None:
+        profiler.slow_threshold = max(0.0, request.slow_threshold)
+    logger.info(f"[PROFILER] enabled={profiler.enabled}, slow_threshold={profiler.slow_threshold}")
+    return profiler.status()
+
+@app.get("/admin/profiles", response_model=List[Dict[str, Any]])
+async def list_profiles(x_admin_token: Optional[str] = Header(None)):
+    """Saklanan profiller, en yenisi önce."""
+    require_admin(x_admin_token)
+    return await asyncio.to_thread(get_profiler().list_profiles)
+
+@app.get("/admin/profiles/{profile_name}")
+async def get_profile(profile_name: str, x_admin_token: Optional[str] = Header(None)):
+    """Collapsed-stack profil (flamegraph.pl / speedscope ile açılabilir)."""
+    require_admin(x_admin_token)
+    try:
+        content = await asyncio.to_thread(get_profiler().read_profile, profile_name)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Profil bulunamadı")
+    return PlainTextResponse(content)
+
+@app.get("/admin/memory", response_model=Dict[str, Any])
+async def get_memory_status(x_admin_token: Optional[str] = Header(None)):
+    """
+    Anlık/tepe RSS, son işlerin tepe RSS değerleri ve (tracemalloc açıksa)
+    her aşamanın son ölçümü.
+    """
+    require_admin(x_admin_token)
+    return get_memory_profiler().status()
+
+@app.post("/admin/memory", response_model=Dict[str, Any])
+async def update_memory_profiling(request: MemoryProfilingRequest, x_admin_token: Optional[str] = Header(None)):
+    """Aşama bazında tracemalloc ölçümünü açar/kapatır (açıkken üretim belirgin yavaşlar)."""
+    require_admin(x_admin_token)
+    profiler = get_memory_profiler()
+    if request.enabled:
+        profiler.enable()
+    else:
+        profiler.disable()
+    return profiler.status()
+
+@app.get("/admin/memory/top", response_model=List[Dict[str, Any]])
+async def get_memory_top(limit: Optional[int] = None, group_by: str = "lineno",
+                         x_admin_token: Optional[str] = Header(None)):
+    """Şu an ayakta olan en büyük ayırmalar (group_by: lineno, filename veya traceback)."""
+    require_admin(x_admin_token)
+    if group_by not in ("lineno", "filename", "traceback"):
+        raise HTTPException(status_code=400, detail="group_by lineno, filename veya traceback olmalı")
+    profiler = get_memory_profiler()
+    if not profiler.enabled:
+        raise HTTPException(status_code=409, detail="Bellek profili kapalı (POST /admin/memory)")
+    return await asyncio.to_thread(profiler.top_allocators, limit, group_by)
+
+@app.get("/admin/memory/stages/{stage}", response_model=Dict[str, Any])
+async def get_memory_stage(stage: str, x_admin_token: Optional[str] = Header(None)):
+    """Aşamanın son çalışmasında en çok bellek ayıran yerler."""
+    require_admin(x_admin_token)
+    try:
+        return get_memory_profiler().stage_report(stage)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"'{stage}' aşaması için ölçüm yok")
+
+@app.get("/admin/memory/diff", response_model=List[Dict[str, Any]])
+async def get_memory_diff(from_stage: str, to_stage: str, limit: Optional[int] = None,
+                          group_by: str = "lineno", x_admin_token: Optional[str] = Header(None)):
+    """İki aşamanın sonundaki bellek durumları arasındaki fark (ör. image_rewrite -> render)."""
+    require_admin(x_admin_token)
+    if group_by not in ("lineno", "filename", "traceback"):
+        raise HTTPException(status_code=400, detail="group_by lineno, filename veya traceback olmalı")
+    try:
+        return await asyncio.to_thread(get_memory_profiler().stage_diff, from_stage, to_stage, limit, group_by)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"{e.args[0]} aşaması için anlık görüntü yok")
+
+@app.get("/admin/render-workers", response_model=Dict[str, Any])
+async def get_render_worker_status(x_admin_token: Optional[str] = Header(None)):
+    """Render işçilerinin durumu, kuyruk doluluğu, RSS değerleri ve yeniden başlatma sayıları."""
+    require_admin(x_admin_token)
+    pool = peek_render_workers()
+    return pool.stats() if pool is not None else {"started": False}
+
+@app.get("/admin/render-engines", response_model=List[Dict[str, Any]])
+async def get_render_engine_status(x_admin_token: Optional[str] = Header(None)):
+    """PDF render motorlarının kurulu olup olmadığı, varsayılan motor ve devretme sırası."""
+    require_admin(x_admin_token)
+    return engine_status()
+
+@app.post("/reports/batch-generate", response_model=Dict[str, Any])
+async def batch_generate_reports(request: BatchGenerateRequest):
+    """
+    Birden çok proje (varsayılan: tümü) için raporları tek seferde üretir.
+    Tarayıcı havuzu ve önbellekler projeler arasında paylaşılır; proje bazında
+    durum ve süreleri içeren bir manifest döner.
+    """
+    from api.batch_reports import run_batch
+
+    try:
+        logger.info(f"[BATCH] Batch generation requested for: {request.project_names or 'all projects'}")
+        return await run_batch(request.project_names, request.user_input, mode=request.mode)
+    except Exception as e:
+        logger.error(f"[BATCH] Unexpected error during batch generation: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Batch report generation failed: {str(e)}")
+
 # Backend route for PDF deletion
 @app.delete('/api/project/{project_name}/delete-pdf')
 async def delete_pdf(project_name: str, path: str):
@@ -970,6 +1355,47 @@ async def view_pdf(project_name: str, path: str):
         logger.error(f"[PDF] PDF görüntüleme hatası: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"PDF görüntülenirken beklenmeyen hata: {str(e)}")
 
+@app.post('/project/{project_name}/upload-files', response_model=Dict[str, Any])
+async def upload_files(project_name: str, files: List[UploadFile] = File(...), component: str = Form(...),
+                       question_id: str = Form(...)):
+    """
+    Bir soruya ait birden çok PDF ve görseli tek istekte yükler.
+    Dosyalar eşzamanlı olarak diske yazılır ve proje JSON'u tek seferde güncellenir;
+    her dosya için ayrı sonuç döner (desteklenmeyen türler diğerlerini engellemez).
+    """
+    if not files:
+        raise HTTPException(status_code=400, detail="Dosya yok")
+    if len(files) > UPLOAD_BATCH_MAX_FILES:
+        raise HTTPException(status_code=400,
+                            detail=f"Tek istekte en fazla {UPLOAD_BATCH_MAX_FILES} dosya yüklenebilir")
+    if not component or not question_id:
+        raise HTTPException(status_code=400, detail="Eksik parametre")
+
+    project_file_path = get_project_path(project_name)
+    if not project_file_path.exists():
+        raise HTTPException(status_code=404, detail=f"Project not found: {project_name}")
+
+    try:
+        results = await save_uploaded_files(project_name, component, question_id, files)
+    except Exception as e:
+        logger.error(f"[UPLOAD] Toplu yükleme hatası: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Dosyalar yüklenirken beklenmeyen hata: {str(e)}")
+
+    saved = sum(1 for result in results if result["success"])
+    logger.info(f"[UPLOAD] {saved}/{len(results)} dosya kaydedildi: Proje={project_name}, Bileşen={component}")
+
+    with open(project_file_path, 'r', encoding='utf-8') as f:
+        project_data = json.load(f)
+    answers = (project_data.get("active_report") or {}).get("components", {}).get(component, {}).get("answers", {})
+
+    return {
+        'success': saved == len(results),
+        'saved': saved,
+        'failed': len(results) - saved,
+        'results': results,
+        'files': answers.get(question_id, []),
+    }
+
 # PDF storage functions are now handled by file_handler.py through save_uploaded_pdf and ensure_directory_structure
 
 def remove_pdf_reference(project_name: str, file_path: str) -> bool:
@@ -1078,6 +1504,9 @@ async def remove_file(
             if full_path.exists() and full_path.is_file():
                 os.remove(full_path)
                 logger.info(f"[REMOVE_FILE] Physical file removed: {full_path}")
+                # Store / görsel analizi silinen dosya olmadan arka planda yenilenir
+                kind = "pdf" if full_path.suffix.lower() == ".pdf" else "image"
+                get_prestager().notify_removed(project_name, kind, full_path.name, component)
             else:
                 logger.warning(f"[REMOVE_FILE] Physical file not found: {full_path}")
         except Exception as e:
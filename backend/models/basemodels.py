@@ -1,4 +1,4 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
 
 # Modeller
@@ -16,6 +16,11 @@ class ComponentDataRequest(BaseModel):
 class GenerateReportRequest(BaseModel):
     project_name: str
     components_data: Dict[str, Dict[str, Any]] = {}
+
+class BatchGenerateRequest(BaseModel):
+    project_names: Optional[List[str]] = None
+    user_input: Optional[str] = None
+    mode: Optional[str] = None
     
 
 class EmailRequest(BaseModel):
@@ -47,4 +52,16 @@ class DeleteProjectRequest(BaseModel):
     project_name: str
 
 class ArchiveProjectRequest(BaseModel):
-    project_name: str
\ No newline at end of file
+    project_name: str
+
+class ProfilerToggleRequest(BaseModel):
+    enabled: Optional[bool] = None
+    slow_threshold: Optional[float] = None
+
+class MemoryProfilingRequest(BaseModel):
+    enabled: bool
+
+class RerenderReportRequest(BaseModel):
+    html: Optional[str] = None        # Düzenlenmiş HTML (verilmezse kayıtlı HTML kullanılır)
+    revision: Optional[int] = None    # Yeniden render edilecek HTML revizyonu
+    engine: Optional[str] = None      # PDF render motoru (bkz. utils/render_engines.py)
@@ -0,0 +1,29 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Testler backend dizininden bağımsız çalıştırılabilsin (ör. depo kökünden pytest backend/tests)
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+PROJECTS_DIR = BACKEND_DIR / "data" / "projects"
+# api.data_storage import edilince eksik varsayılan proje JSON'ları oluşturulur;
+# testlerin oluşturdukları oturum sonunda silinir
+_EXISTING_PROJECT_FILES = set(PROJECTS_DIR.glob("*.json"))
+
+
+def pytest_sessionfinish(session, exitstatus):
+    for path in set(PROJECTS_DIR.glob("*.json")) - _EXISTING_PROJECT_FILES:
+        path.unlink(missing_ok=True)
+
+
+@pytest.fixture(scope="session")
+def main_app():
+    """main.app (lifespan olayları çalıştırılmadan)."""
+    os.environ.setdefault("OPENAI_API_KEY", "test")
+    import main
+
+    return main.app
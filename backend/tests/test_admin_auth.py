@@ -0,0 +1,108 @@
+"""Yönetim anahtarı tanımlı değilse X-Profile ve yönetim uç noktaları kapalı olmalı."""
+import asyncio
+
+import pytest
+
+from utils import admin_auth, profiler
+
+
+class StubProfiler:
+    enabled = False
+    slow_threshold = 0
+
+    def __init__(self):
+        self.started = []
+
+    def wants(self, forced):
+        return forced
+
+    def start(self, name, forced=False):
+        self.started.append(name)
+        return profiler.ProfileSession(name, forced=forced)
+
+    def stop(self, session):
+        return None
+
+
+async def _noop_app(scope, receive, send):
+    return None
+
+
+def _request(headers):
+    stub = StubProfiler()
+    middleware = profiler.ProfilerMiddleware(_noop_app)
+    scope = {"type": "http", "method": "GET", "path": "/health", "headers": headers}
+    original = profiler.get_profiler
+    profiler.get_profiler = lambda: stub
+    try:
+        asyncio.run(middleware(scope, None, None))
+    finally:
+        profiler.get_profiler = original
+    return stub.started
+
+
+@pytest.mark.parametrize("configured, token, expected", [
+    ("", None, False),
+    ("", "", False),
+    ("", "anything", False),
+    ("secret", None, False),
+    ("secret", "wrong", False),
+    ("secret", "secret", True),
+    ("secret", b"secret", True),
+])
+def test_is_admin_token_fails_closed(monkeypatch, configured, token, expected):
+    monkeypatch.setattr(admin_auth, "ADMIN_TOKEN", configured)
+    assert admin_auth.is_admin_token(token) is expected
+
+
+def test_x_profile_ignored_without_token(monkeypatch):
+    monkeypatch.setattr(admin_auth, "ADMIN_TOKEN", "")
+    assert _request([(b"x-profile", b"1")]) == []
+    assert _request([(b"x-profile", b"1"), (b"x-admin-token", b"")]) == []
+
+
+def test_x_profile_requires_valid_admin_token(monkeypatch):
+    monkeypatch.setattr(admin_auth, "ADMIN_TOKEN", "secret")
+    assert _request([(b"x-profile", b"1")]) == []
+    assert _request([(b"x-profile", b"1"), (b"x-admin-token", b"wrong")]) == []
+    assert _request([(b"x-profile", b"1"), (b"x-admin-token", b"secret")]) == ["GET /health"]
+
+
+MEMORY_ENDPOINTS = [
+    ("get", "/admin/memory", None),
+    ("post", "/admin/memory", {"enabled": True}),
+    ("get", "/admin/memory/top", None),
+    ("get", "/admin/memory/stages/render", None),
+    ("get", "/admin/memory/diff?from_stage=image_rewrite&to_stage=render", None),
+]
+
+
+@pytest.fixture
+def client(main_app):
+    from fastapi.testclient import TestClient
+
+    return TestClient(main_app)
+
+
+@pytest.mark.parametrize("method, path, body", MEMORY_ENDPOINTS)
+@pytest.mark.parametrize("configured, token", [("", None), ("", "guess"), ("secret", None), ("secret", "wrong")])
+def test_memory_endpoints_reject_without_valid_token(monkeypatch, client, method, path, body, configured, token):
+    import main
+    import tracemalloc
+
+    monkeypatch.setattr(admin_auth, "ADMIN_TOKEN", configured)
+    monkeypatch.setattr(main, "ADMIN_TOKEN", configured)
+    headers = {"X-Admin-Token": token} if token is not None else {}
+    response = getattr(client, method)(path, headers=headers, **({"json": body} if body else {}))
+    assert response.status_code == 403
+    # Yetkisiz çağrı tracemalloc'u başlatamamalı
+    assert not tracemalloc.is_tracing()
+
+
+def test_memory_status_with_valid_token(monkeypatch, client):
+    import main
+
+    monkeypatch.setattr(admin_auth, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    response = client.get("/admin/memory", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
@@ -0,0 +1,139 @@
+"""
+Toplu yükleme (/upload-files) N dosya için proje JSON'unu bir kez yazar;
+dosya başına yükleme (/upload-component-image) N kez yazar. Uygulama geçici
+bir data dizinine yönlendirilir.
+"""
+import itertools
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from api import data_storage, file_handler
+from utils import prestage
+
+PROJECT = "Upload Test"
+COMPONENT = "İnşaat"
+QUESTION_ID = "construction_images"
+FILES = 6
+IMAGE = b"\xff\xd8\xff\xe0" + b"\x00" * 512
+
+
+def _project_json(active_report):
+    return {"project_name": PROJECT, "created_at": "2025-01-01T00:00:00", "last_updated": "2025-01-01T00:00:00",
+            "active_report": active_report}
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    projects_dir = tmp_path / "projects"
+    projects_dir.mkdir()
+    monkeypatch.setattr(data_storage, "PROJECTS_DIR", projects_dir)
+    monkeypatch.setattr(file_handler, "UPLOADS_DIR", tmp_path / "uploads")
+    monkeypatch.setattr(file_handler, "ACTIVE_REPORT_DIR", tmp_path / "uploads" / "active_report")
+    monkeypatch.setattr(prestage, "PRESTAGE_ENABLED", False)
+    # Tekli yükleme dosya adını saniyeden üretir; her çağrı ayrı bir saniye görsün
+    seconds = itertools.count(1_700_000_000)
+    monkeypatch.setattr(file_handler, "time", SimpleNamespace(time=lambda: next(seconds)))
+    return tmp_path
+
+
+@pytest.fixture
+def json_writes(monkeypatch):
+    writes = []
+    original = file_handler.write_project_json
+
+    def counting(project_path, project_data):
+        writes.append(project_path)
+        original(project_path, project_data)
+
+    monkeypatch.setattr(file_handler, "write_project_json", counting)
+    return writes
+
+
+@pytest.fixture
+def client(main_app, data_dir):
+    from fastapi.testclient import TestClient
+
+    return TestClient(main_app)
+
+
+def _create_project(active_report):
+    path = data_storage.get_project_path(PROJECT)
+    path.write_text(json.dumps(_project_json(active_report)), encoding="utf-8")
+    return path
+
+
+def _active_report():
+    return {"report_id": "Upload_Test_20250101", "components": {}, "status": "in_progress",
+            "report_generated": False}
+
+
+def _stored_files(path):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return data["active_report"]["components"][COMPONENT]["answers"][QUESTION_ID]
+
+
+def _uploaded_files(data_dir):
+    return sorted(p.name for p in (data_dir / "uploads").rglob("*") if p.is_file())
+
+
+def test_batch_upload_writes_project_json_once(client, data_dir, json_writes):
+    path = _create_project(_active_report())
+    response = client.post(f"/project/{PROJECT}/upload-files",
+                           data={"component": COMPONENT, "question_id": QUESTION_ID},
+                           files=[("files", (f"foto-{i}.jpg", IMAGE, "image/jpeg")) for i in range(FILES)])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["success"] and body["saved"] == FILES
+    assert len(json_writes) == 1
+    assert len(_stored_files(path)) == FILES
+    assert len(_uploaded_files(data_dir)) == FILES
+
+
+def test_single_uploads_write_project_json_per_file(client, data_dir, json_writes):
+    path = _create_project(_active_report())
+    for i in range(FILES):
+        response = client.post(f"/project/{PROJECT}/upload-component-image",
+                               data={"component_name": COMPONENT, "question_id": QUESTION_ID, "image_index": str(i)},
+                               files={"image": (f"foto-{i}.jpg", IMAGE, "image/jpeg")})
+        assert response.status_code == 200
+
+    assert len(json_writes) == FILES
+    assert len(_stored_files(path)) == FILES
+
+
+def test_batch_upload_without_active_report_leaves_no_files(client, data_dir, json_writes):
+    _create_project(None)
+    response = client.post(f"/project/{PROJECT}/upload-files",
+                           data={"component": COMPONENT, "question_id": QUESTION_ID},
+                           files=[("files", (f"foto-{i}.jpg", IMAGE, "image/jpeg")) for i in range(FILES)])
+
+    assert response.status_code == 200
+    body = response.json()
+    assert not body["success"] and body["failed"] == FILES
+    assert all(result["error"] for result in body["results"])
+    assert json_writes == []
+    assert _uploaded_files(data_dir) == []
+
+
+def test_batch_upload_removes_files_when_json_update_raises(client, data_dir, monkeypatch):
+    _create_project(_active_report())
+
+    def broken(project_path, project_data):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(file_handler, "write_project_json", broken)
+    response = client.post(f"/project/{PROJECT}/upload-files",
+                           data={"component": COMPONENT, "question_id": QUESTION_ID},
+                           files=[("files", (f"foto-{i}.jpg", IMAGE, "image/jpeg")) for i in range(FILES)])
+
+    assert response.status_code == 200
+    assert all(not result["success"] and result["error"] for result in response.json()["results"])
+    assert _uploaded_files(data_dir) == []
+
+
+def test_project_json_lock_is_keyed_on_file_path(data_dir):
+    assert data_storage.project_json_lock("V Mall") is data_storage.project_json_lock("V_Mall")
+    assert data_storage.project_json_lock("V Mall") is not data_storage.project_json_lock("V Statü")
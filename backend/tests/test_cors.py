@@ -0,0 +1,34 @@
+"""IPv6 CORS kuralları: köşeli parantezli adres/aralık, varsayılan port ve doğrulama."""
+import pytest
+
+from utils.cors import OriginMatcher, parse_rule, parse_rules
+
+
+def test_bracketed_ipv6_rule_is_normalized():
+    rule = parse_rule("http://[0:0::1]:3000|5173")
+    assert rule.host == "::1"
+    assert rule.ports == frozenset({3000, 5173})
+
+
+def test_bracketed_ipv6_without_port_uses_scheme_default():
+    assert parse_rule("https://[2001:db8::1]").ports == frozenset({443})
+
+
+@pytest.mark.parametrize("origin, allowed", [
+    ("http://[::1]:3000", True),
+    ("http://[0:0:0:0:0:0:0:1]:3000", True),
+    ("http://[::1]:4000", False),
+    ("http://[fd00::42]:5173", True),
+    ("http://[fe80::1]:5173", False),
+    ("https://[2001:db8::1]", True),
+    ("https://[2001:db8::1]:443", True),
+])
+def test_ipv6_origins_match(origin, allowed):
+    matcher = OriginMatcher(parse_rules("http://[::1]:3000,http://[fd00::/8]:5173,https://[2001:db8::1]"))
+    assert matcher.is_allowed(origin) is allowed
+
+
+@pytest.mark.parametrize("rule", ["http://[::1", "http://[not-an-ip]:3000", "http://::1:3000", "http://[::1]3000"])
+def test_invalid_ipv6_rules_are_rejected(rule):
+    with pytest.raises(ValueError):
+        parse_rule(rule)
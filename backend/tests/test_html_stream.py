@@ -0,0 +1,116 @@
+"""StreamingHTMLValidator parça parça beslenen model çıktısını temizlemeli ve ihlalde erken kesmeli."""
+import pytest
+
+from utils import html_stream
+from utils.html_stream import HTMLStreamViolation, StreamingHTMLValidator
+
+STYLE = "<style>.page { width: 210mm; } .page { page-break-after: always; }</style>"
+DOCUMENT = (
+    "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">" + STYLE + "</head><body>"
+    "<div class=\"page\"><h1>Kapak</h1><p>Giriş</div>"
+    "<div class=\"page\"><table><tr><td>1</td></tr></table></div>"
+    "</body></html>"
+)
+
+
+def chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def feed_all(validator, parts):
+    for part in parts:
+        validator.feed(part)
+    return validator.finish()
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64])
+def test_fenced_output_is_stripped_to_document(size):
+    raw = "İşte rapor:\n```html\n" + DOCUMENT + "\n```\nBaşka bir şey?"
+    validator = StreamingHTMLValidator()
+
+    html = feed_all(validator, chunks(raw, size))
+
+    assert html == DOCUMENT
+    assert validator.page_count == 2
+    assert validator.received_chars == len(raw)
+
+
+def test_doctype_split_across_chunks():
+    validator = StreamingHTMLValidator()
+    parts = ["```html\n<!DOC", "TYPE ht", "ml>\n<html><body><div class=\"pa", "ge\">x</div></bo", "dy></html>```"]
+
+    html = feed_all(validator, parts)
+
+    assert html.startswith("<!DOCTYPE html>")
+    assert html.endswith("</html>")
+    assert validator.page_count == 1
+
+
+def test_unclosed_page_div_nests_following_pages():
+    # İlk `.page` kapanmadığı için ikincisi onun içinde kalır ve ayrı sayfa sayılmaz
+    raw = (
+        "<!DOCTYPE html><html><head>" + STYLE + "</head><body>"
+        "<div class=\"page\"><p>bir"
+        "<div class=\"page\"><p>iki</div>"
+        "</body></html>"
+    )
+    validator = StreamingHTMLValidator()
+
+    for part in chunks(raw, 5):
+        validator.feed(part)
+    assert validator.progress()["depth"] == 0
+    feed_all(validator, [])
+
+    assert validator.page_count == 1
+
+
+def test_extra_closing_page_div_is_counted_as_stray():
+    raw = "<!DOCTYPE html><html><body><div class=\"page\">x</div></div></div></body></html>"
+    validator = StreamingHTMLValidator()
+
+    feed_all(validator, chunks(raw, 4))
+
+    assert validator.stray_closing_tags == 2
+    assert validator.page_count == 1
+
+
+def test_missing_pages_abort_mid_stream(monkeypatch):
+    monkeypatch.setattr(html_stream, "BODY_WITHOUT_PAGE_LIMIT", 200)
+    head = "<!DOCTYPE html><html><head>" + STYLE + "</head><body>"
+    body = "<section><p>" + "sayfasız metin " * 100 + "</p></section>" * 10
+    parts = chunks(head + body + "</body></html>", 16)
+    validator = StreamingHTMLValidator()
+
+    fed = 0
+    with pytest.raises(HTMLStreamViolation, match=r"\.page"):
+        for part in parts:
+            validator.feed(part)
+            fed += 1
+
+    # İhlal belge bitmeden, akışın ortasında yakalanmalı
+    assert fed < len(parts) - 1
+    assert not validator.finished
+
+
+def test_stray_closing_tags_abort_mid_stream():
+    raw = "<!DOCTYPE html><html><body>" + "</span>" * (html_stream.MAX_STRAY_CLOSING_TAGS + 1) + "<p>devam"
+    validator = StreamingHTMLValidator()
+
+    with pytest.raises(HTMLStreamViolation, match="unmatched closing tags"):
+        for part in chunks(raw, 9):
+            validator.feed(part)
+
+
+def test_non_html_output_aborts_after_preamble_limit():
+    validator = StreamingHTMLValidator()
+
+    with pytest.raises(HTMLStreamViolation, match="DOCTYPE"):
+        for part in chunks("Üzgünüm, bu isteğe yardımcı olamam. " * 200, 50):
+            validator.feed(part)
+
+
+def test_truncated_output_fails_on_finish():
+    validator = StreamingHTMLValidator()
+
+    with pytest.raises(HTMLStreamViolation, match="truncated"):
+        feed_all(validator, chunks(DOCUMENT[:-20], 10))
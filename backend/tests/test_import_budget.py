@@ -0,0 +1,43 @@
+"""`import main` bütçe içinde kalmalı ve ağır bağımlılıkları açılışta yüklememeli."""
+import shutil
+
+import pytest
+
+from benchmarks.import_time import (
+    BASE_DIR,
+    DEFAULT_BUDGET_MS,
+    DEFERRED_MODULES,
+    _COPY_IGNORE,
+    check_budget,
+    run_probe,
+    summarize,
+)
+
+RUNS = 3
+
+
+@pytest.fixture(scope="module")
+def import_result(tmp_path_factory):
+    # Geçici kopyada ölçülür: import'un oluşturduğu proje dosyaları gerçek data/ dizinine yazılmaz
+    app_dir = tmp_path_factory.mktemp("import_budget") / "backend"
+    shutil.copytree(BASE_DIR, app_dir, ignore=_COPY_IGNORE)
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        # Isınma: .pyc derlemesi ölçüme karışmasın
+        run_probe(app_dir, "main", startup=False)
+        probes = [run_probe(app_dir, "main", startup=False) for _ in range(RUNS)]
+    return probes, summarize(probes, "main", top=10)
+
+
+def test_import_main_within_budget(import_result):
+    _, result = import_result
+    assert result["import_ms"]["median"] <= DEFAULT_BUDGET_MS, check_budget(result, DEFAULT_BUDGET_MS)
+
+
+def test_deferred_modules_not_loaded_at_import(import_result):
+    probes, result = import_result
+    assert result["deferred_loaded"] == []
+    # -X importtime çıktısında da görünmemeli (ölçülen her koşuda)
+    for probe in probes:
+        imported = {entry["module"].split(".")[0] for entry in probe["entries"]}
+        assert not imported & set(DEFERRED_MODULES)
@@ -0,0 +1,167 @@
+"""
+Render sırasında ağ kapalıymış gibi davranıldığını doğrular: raporun istediği
+her font yerel kayıttan sunulur ve hiçbir istek makineden çıkmaz.
+"""
+import asyncio
+import re
+from pathlib import Path
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+import pytest
+
+from utils import font_registry
+from utils.font_registry import (
+    FONT_FILE_HOST,
+    GOOGLE_FONTS_CSS_HOST,
+    FontRegistry,
+    families_from_google_fonts_url,
+    handle_render_request,
+)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+REPORT_HTML = BASE_DIR / "debug_V_Mall_playwright.html"
+LOCAL_SCHEMES = ("data", "blob", "about")
+_URL_RE = re.compile(r"""(?:href|src)\s*=\s*["']([^"']+)["']|url\(\s*["']?([^"')]+?)["']?\s*\)""")
+_CSS_FONT_URL_RE = re.compile(r"url\((https://[^)]+)\)")
+
+
+class RecordingRoute:
+    """Playwright Route yerine geçer; handler'ın kararını kaydeder."""
+
+    def __init__(self, url: str):
+        self.request = SimpleNamespace(url=url)
+        self.outcome = None
+        self.body = None
+
+    async def continue_(self, **kwargs):
+        self.outcome = "continue"
+
+    async def fulfill(self, status=200, content_type=None, headers=None, body=None, **kwargs):
+        self.outcome = "fulfill"
+        self.body = body
+
+    async def abort(self, error_code=None):
+        self.outcome = "abort"
+
+
+def _handle(url: str) -> RecordingRoute:
+    route = RecordingRoute(url)
+    asyncio.run(handle_render_request(route))
+    return route
+
+
+def _report_urls() -> list:
+    html = REPORT_HTML.read_text(encoding="utf-8")
+    return [next(group for group in match.groups() if group) for match in _URL_RE.finditer(html)]
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    registry = FontRegistry(cache_dir=tmp_path)
+    monkeypatch.setattr(font_registry, "_font_registry", registry)
+    return registry
+
+
+def test_every_report_font_is_served_locally(registry):
+    css_urls = [url for url in _report_urls() if urlparse(url).netloc == GOOGLE_FONTS_CSS_HOST]
+    assert css_urls, "report HTML should reference Google Fonts"
+
+    for css_url in css_urls:
+        families = families_from_google_fonts_url(css_url)
+        assert families
+        css_route = _handle(css_url)
+        assert css_route.outcome == "fulfill"
+        for family in families:
+            assert f"font-family: '{family}'" in css_route.body, f"{family} is not bundled in assets/fonts"
+
+        font_urls = _CSS_FONT_URL_RE.findall(css_route.body)
+        assert font_urls
+        for font_url in font_urls:
+            assert urlparse(font_url).netloc == FONT_FILE_HOST
+            font_route = _handle(font_url)
+            assert font_route.outcome == "fulfill"
+            assert font_route.body[:4] == b"wOF2"
+
+
+def test_no_request_leaves_the_machine(registry):
+    urls = [url for url in _report_urls() if urlparse(url).netloc != GOOGLE_FONTS_CSS_HOST] + [
+        "https://example.com/external.png",
+        "http://127.0.0.1:8000/project/V_Mall",
+        "file:///etc/passwd",
+        f"https://{FONT_FILE_HOST}/s/lora/v35/unknown.woff2",
+        f"https://{FONT_FILE_HOST}/s/local/unknown.woff2",
+    ]
+    for url in urls:
+        route = _handle(url)
+        if urlparse(url).scheme in LOCAL_SCHEMES:
+            assert route.outcome == "continue", url
+        else:
+            assert route.outcome == "abort", url
+
+    for url in ("data:image/png;base64,iVBORw0KGgo=", "about:blank"):
+        assert _handle(url).outcome == "continue"
+
+
+def test_weasyprint_fetcher_blocks_like_playwright(registry):
+    """WeasyPrint motorunun url_fetcher'ı da yerel dosya ve dış istekleri reddetmeli."""
+    from utils.render_engines import _local_url_fetcher
+
+    for url in ("file:///etc/passwd", "file:///root/package/backend/.env", "https://example.com/a.png",
+                "http://127.0.0.1:8000/project/V_Mall", f"https://{FONT_FILE_HOST}/s/local/unknown.woff2"):
+        with pytest.raises(ValueError):
+            _local_url_fetcher(url)
+
+    css_url = next(url for url in _report_urls() if urlparse(url).netloc == GOOGLE_FONTS_CSS_HOST)
+    css = _local_url_fetcher(css_url)
+    assert css["mime_type"] == "text/css"
+    font_url = _CSS_FONT_URL_RE.findall(css["string"])[0]
+    assert _local_url_fetcher(font_url)["string"][:4] == b"wOF2"
+
+
+def test_chromium_render_uses_only_local_resources(registry):
+    """Gerçek bir render: tüm istekler handler'dan geçer, fontlar yüklenir, hiçbiri ağa gitmez."""
+    playwright_api = pytest.importorskip("playwright.async_api")
+
+    async def render():
+        handled = []
+
+        async def recording_handler(route):
+            recorder = RecordingRoute(route.request.url)
+            await handle_render_request(recorder)
+            handled.append((route.request.url, recorder.outcome))
+            await handle_render_request(route)
+
+        async with playwright_api.async_playwright() as playwright:
+            try:
+                browser = await playwright.chromium.launch()
+            except playwright_api.Error as e:
+                pytest.skip(f"Chromium is not available: {str(e).splitlines()[0]}")
+            try:
+                context = await browser.new_context()
+                requested = []
+                context.on("request", lambda request: requested.append(request.url))
+                await context.route("**/*", recording_handler)
+                page = await context.new_page()
+                await page.set_content(REPORT_HTML.read_text(encoding="utf-8"), wait_until="networkidle")
+                await page.evaluate("document.fonts.ready")
+                fonts_loaded = {
+                    family: await page.evaluate(f"document.fonts.check(\"16px '{family}'\")")
+                    for url in _report_urls() if urlparse(url).netloc == GOOGLE_FONTS_CSS_HOST
+                    for family in families_from_google_fonts_url(url)
+                }
+                pdf = await page.pdf(format="A4", print_background=True)
+            finally:
+                await browser.close()
+        return handled, requested, fonts_loaded, pdf
+
+    handled, requested, fonts_loaded, pdf = asyncio.run(render())
+
+    assert pdf.startswith(b"%PDF")
+    assert fonts_loaded and all(fonts_loaded.values()), fonts_loaded
+    handled_urls = {url for url, _ in handled}
+    for url in requested:
+        if urlparse(url).scheme not in LOCAL_SCHEMES:
+            assert url in handled_urls, f"request bypassed the route handler: {url}"
+    for url, outcome in handled:
+        assert outcome in ("fulfill", "abort") or urlparse(url).scheme in LOCAL_SCHEMES, url
@@ -0,0 +1,52 @@
+"""Ön hazırlık turu biterken gelen yükleme sahipsiz kalmamalı."""
+import threading
+
+from utils import prestage
+from utils.prestage import UploadPrestager
+
+
+class RecordingExecutor:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args):
+        self.submitted.append((fn, args))
+
+    def shutdown(self, **kwargs):
+        pass
+
+
+class ReleaseHookCondition(threading.Condition):
+    """Kilit ilk kez bırakıldığında (tam o aralıkta) bir kez çalışan kanca."""
+
+    def __init__(self):
+        super().__init__()
+        self.on_release = None
+
+    def __exit__(self, *exc):
+        result = super().__exit__(*exc)
+        hook, self.on_release = self.on_release, None
+        if hook is not None:
+            hook()
+        return result
+
+
+def test_upload_landing_as_run_finishes_schedules_new_run(monkeypatch):
+    monkeypatch.setattr(prestage, "PRESTAGE_ENABLED", True)
+    monkeypatch.setattr(prestage, "_project_key", lambda name: name)
+    prestager = UploadPrestager(debounce=0)
+    prestager._executor = RecordingExecutor()
+    prestager._cond = ReleaseHookCondition()
+
+    # Çalışan bir turun son döngüsü: kirli adım kalmamış, proje hâlâ aktif
+    with prestager._cond:
+        state = prestager._state("V Mall")
+    state["active"] = True
+
+    # _run boş kontrolden sonra kilidi bırakır bırakmaz yeni bir görsel gelir
+    prestager._cond.on_release = lambda: prestager.notify_upload("V Mall", "image", "foto.jpg")
+    prestager._run(state)
+
+    assert state["dirty"] == {prestage.IMAGE_ANALYSIS_TASK: {None}}
+    assert state["active"] is True
+    assert [fn for fn, _ in prestager._executor.submitted] == [prestager._run]
@@ -0,0 +1,81 @@
+"""Limiter, 429 enjekte eden sahte sunucuya karşı senkron ve asenkron çağrılarda hatasız kalmalı."""
+import asyncio
+import threading
+
+from openai import AsyncOpenAI, OpenAI
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.rate_limit_check import _run_workload
+from utils.rate_limiter import OpenAIRateLimiter
+
+REQUESTS = 40
+THREADS = 8
+MAX_CONCURRENCY = 8
+
+
+def make_limiter():
+    limiter = OpenAIRateLimiter(rpm=6000, tpm=6_000_000, min_concurrency=1, max_concurrency=MAX_CONCURRENCY,
+                                max_retries=10, base_delay=0.02, max_delay=0.2)
+    limiter.concurrency.decrease_cooldown = 0.0
+    # Sınırın en düşük değerini yakalamak için her bırakışta kaydet
+    limits = []
+    release = limiter.concurrency.release
+
+    def recording_release(throttled=False):
+        release(throttled=throttled)
+        limits.append(limiter.concurrency.limit)
+
+    limiter.concurrency.release = recording_release
+    return limiter, limits
+
+
+async def run_async_workload(limiter, client, request_count):
+    results = await asyncio.gather(*(
+        limiter.acall(client.responses.create, model="gpt-4.1", input=f"async {i}", estimated_tokens=10)
+        for i in range(request_count)
+    ), return_exceptions=True)
+    await client.close()
+    return [result for result in results if isinstance(result, Exception)]
+
+
+def test_sync_and_async_calls_survive_injected_429s():
+    limiter, limits = make_limiter()
+
+    with FakeOpenAIServer(rpm=6000, tpm=6_000_000, inject_429=0.3, latency=0.01) as server:
+        # Yeniden denemeyi SDK değil limiter yapmalı
+        client = OpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+        async_client = AsyncOpenAI(api_key="test", base_url=server.base_url, max_retries=0)
+
+        async_failures = []
+        async_thread = threading.Thread(
+            target=lambda: async_failures.extend(asyncio.run(run_async_workload(limiter, async_client, REQUESTS))),
+        )
+        async_thread.start()
+        sync_result = _run_workload(
+            lambda i: limiter.call(client.responses.create, model="gpt-4.1", input=f"sync {i}",
+                                   estimated_tokens=10),
+            REQUESTS, THREADS,
+        )
+        async_thread.join(timeout=120)
+        assert not async_thread.is_alive()
+
+        injected = server.state.counters["injected_429"]
+        lowest_limit = min(limits)
+
+        # Enjeksiyon kapatıldıktan sonra başarılı yanıtlarla sınır eski değerine dönmeli
+        server.state.inject_429 = 0.0
+        for i in range(200):
+            if limiter.concurrency.limit >= MAX_CONCURRENCY:
+                break
+            limiter.call(client.responses.create, model="gpt-4.1", input=f"recover {i}", estimated_tokens=10)
+
+    stats = limiter.stats()
+    assert sync_result["failed"] == 0
+    assert sync_result["ok"] == REQUESTS
+    assert async_failures == []
+    assert stats["failures"] == 0
+    assert injected > 0
+    assert stats["retries"] >= injected
+    assert lowest_limit < MAX_CONCURRENCY
+    assert stats["concurrency_limit"] == MAX_CONCURRENCY
+    assert stats["in_flight"] == 0
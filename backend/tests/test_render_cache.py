@@ -0,0 +1,54 @@
+"""Sayfa önbelleği budaması: eşzamanlı silinen dosyalar ve yeniden tarama sıklığı."""
+import os
+from pathlib import Path
+
+from utils import render_cache
+from utils.render_cache import PageRenderCache
+
+
+def _fill(cache, count, start=0):
+    for index in range(start, start + count):
+        cache.put(f"{index:064x}", b"%PDF-1.4 page")
+
+
+def test_prune_skips_files_removed_by_another_process(tmp_path, monkeypatch):
+    cache = PageRenderCache(cache_dir=tmp_path, max_entries=10)
+    _fill(cache, 10)
+    vanished = tmp_path / f"{3:064x}.pdf"
+    original_stat = Path.stat
+
+    def racing_stat(self, *args, **kwargs):
+        # Diğer render süreci bu dosyayı glob ile stat arasında siler
+        if self == vanished:
+            os.unlink(self)
+            raise FileNotFoundError(self)
+        return original_stat(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "stat", racing_stat)
+    _fill(cache, 5, start=10)
+
+    assert len(list(tmp_path.glob("*.pdf"))) <= 10
+
+
+def test_put_rescans_only_past_max_entries(tmp_path, monkeypatch):
+    cache = PageRenderCache(cache_dir=tmp_path, max_entries=20)
+    scans = []
+    original_prune = cache.prune
+    monkeypatch.setattr(cache, "prune", lambda: scans.append(1) or original_prune())
+
+    _fill(cache, 20)
+    assert scans == []
+    _fill(cache, 1, start=20)
+    assert scans == [1]
+    # Budama max_entries'in altına indirir; sonraki birkaç yazım yeniden taramaz
+    assert len(list(tmp_path.glob("*.pdf"))) == int(20 * render_cache.PRUNE_TARGET_RATIO)
+    _fill(cache, 2, start=21)
+    assert scans == [1]
+
+
+def test_overwriting_an_entry_does_not_grow_the_count(tmp_path):
+    cache = PageRenderCache(cache_dir=tmp_path, max_entries=3)
+    for _ in range(10):
+        cache.put("a" * 64, b"%PDF-1.4 page")
+    _fill(cache, 2)
+    assert len(list(tmp_path.glob("*.pdf"))) == 3
@@ -0,0 +1,33 @@
+"""Dolu tarayıcı havuzunda motor devretme yalnızca açıkça istenirse yapılır."""
+import os
+from pathlib import Path
+
+import pytest
+
+import config
+from utils import render_engines
+from utils.render_engines import PlaywrightEngine, RenderJob, select_engine
+
+
+@pytest.mark.skipif("PDF_ENGINE_FALLBACK" in os.environ, reason="PDF_ENGINE_FALLBACK set in the environment")
+def test_fallback_is_opt_in_by_default():
+    assert config.PDF_ENGINE_FALLBACK == ""
+
+
+def test_saturated_engine_is_kept_without_fallback(monkeypatch):
+    monkeypatch.setattr(render_engines, "PDF_ENGINE_FALLBACK", "")
+    monkeypatch.setattr(render_engines, "PDF_RENDER_ENGINE", "playwright")
+    monkeypatch.setattr(PlaywrightEngine, "saturated", lambda self, job: True)
+
+    engine, reason = select_engine(RenderJob(html="<html></html>", pdf_path=Path("report.pdf")))
+    assert (engine.name, reason) == ("playwright", "default")
+
+
+def test_saturated_engine_falls_back_when_configured(monkeypatch):
+    monkeypatch.setattr(render_engines, "PDF_ENGINE_FALLBACK", "weasyprint")
+    monkeypatch.setattr(render_engines, "PDF_RENDER_ENGINE", "playwright")
+    monkeypatch.setattr(PlaywrightEngine, "saturated", lambda self, job: True)
+    monkeypatch.setattr(render_engines.WeasyPrintEngine, "available", lambda self: True)
+
+    engine, reason = select_engine(RenderJob(html="<html></html>", pdf_path=Path("report.pdf")))
+    assert (engine.name, reason) == ("weasyprint", "fallback")
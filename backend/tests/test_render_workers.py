@@ -0,0 +1,55 @@
+"""Kuyrukta yer bekleyen render isteği iptal edilirse kapasite kalıcı olarak azalmamalı."""
+import asyncio
+
+import pytest
+
+from utils import render_workers
+from utils.render_workers import RenderQueueFull, RenderWorkerPool
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(render_workers, "_POLL_INTERVAL", 0.01)
+    pool = RenderWorkerPool(workers=1, queue_max=1, spool_dir=tmp_path)
+    # İşçi süreçleri başlatılmaz; yalnızca kabul mantığı sınanır
+    monkeypatch.setattr(pool, "start", lambda: pool)
+    pool._pending = pool.capacity
+    return pool
+
+
+def test_full_queue_rejects_without_wait(pool, tmp_path):
+    with pytest.raises(RenderQueueFull):
+        asyncio.run(pool.render("<html></html>", tmp_path / "out.pdf"))
+    assert pool._pending == pool.capacity
+
+
+def test_cancelled_wait_does_not_hold_a_slot(pool, tmp_path):
+    async def scenario():
+        waiting = asyncio.create_task(pool.render("<html></html>", tmp_path / "out.pdf", wait=True))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        # İptalden sonra açılan yer boş kalmalı (iptal edilen istek almamalı)
+        pool.release()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert pool._pending == pool.capacity - 1
+    assert pool.jobs.qsize() == 0
+
+
+def test_waiting_request_is_admitted_when_a_slot_frees(pool, tmp_path):
+    async def scenario():
+        waiting = asyncio.create_task(pool.render("<html></html>", tmp_path / "out.pdf", wait=True))
+        await asyncio.sleep(0.05)
+        pool.release()
+        while pool.jobs.qsize() == 0:
+            await asyncio.sleep(0.01)
+        job = pool.jobs.get_nowait()
+        waiting.cancel()
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.html_path.exists()
+    assert pool._pending == pool.capacity
@@ -0,0 +1,106 @@
+"""
+structured ve sections modları da rapor önbelleğini kullanmalı ve
+bypass_cache bayrağını görsel analizine kadar iletmeli.
+"""
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from utils import oai
+from utils.llm_cache import LLMResponseCache
+from utils.prompt_registry import Prompt
+
+PROJECT = "Cache Test"
+SECTION = {"title": "İnşaat", "subsections": []}
+
+
+class FakeResponses:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        content = {"title": "", "period": "", "sections": [SECTION]}
+        return SimpleNamespace(output_text=json.dumps(content), usage=None)
+
+
+class FakeRateLimiter:
+    def call(self, fn, *args, estimated_tokens=0, **kwargs):
+        return fn(*args, **kwargs)
+
+
+class FakePromptRegistry:
+    def for_project(self, project_name, mode):
+        return Prompt(name=mode, text=f"{mode} instructions", version="test")
+
+    def record_usage(self, prompt, usage):
+        pass
+
+
+@pytest.fixture
+def generation(tmp_path, monkeypatch):
+    responses = FakeResponses()
+    prepared_calls = []
+    cache = LLMResponseCache(cache_dir=tmp_path / "cache", enabled=True)
+
+    def fake_prepare(project_name, user_input, with_vector_store=True, bypass_cache=False):
+        prepared_calls.append(bypass_cache)
+        return {"slug": oai.slugify(project_name), "assets": {}, "client": SimpleNamespace(responses=responses),
+                "vector_store": {"id": "vs_test"}, "previous_response_id": "resp_images", "input_text": "report"}
+
+    monkeypatch.setattr(oai, "ACTIVE_UPLOADS_PATH", tmp_path / "active_report")
+    monkeypatch.setattr(oai, "get_llm_cache", lambda: cache)
+    monkeypatch.setattr(oai, "_prepare_generation", fake_prepare)
+    monkeypatch.setattr(oai, "_load_assets", lambda slug: {})
+    monkeypatch.setattr(oai, "get_rate_limiter", lambda: FakeRateLimiter())
+    monkeypatch.setattr(oai, "get_prompt_registry", lambda: FakePromptRegistry())
+    monkeypatch.setattr(oai, "normalize_report_content", lambda content, image_names: content)
+    monkeypatch.setattr(oai, "render_structured_report",
+                        lambda content, project_name, assets, topic=None: f"<html>{len(content['sections'])}</html>")
+    monkeypatch.setattr(oai, "_component_answer_lines", lambda project_name: {"İnşaat": ["- ilerleme: %40"]})
+    monkeypatch.setattr(oai, "_generate_section", lambda prepared, prompt, *args: (responses.create(), SECTION)[1])
+    return SimpleNamespace(responses=responses, prepared_calls=prepared_calls)
+
+
+@pytest.mark.parametrize("mode", ["structured", "sections"])
+def test_cache_hit_skips_generation(generation, mode):
+    first = oai.generate_report_html(PROJECT, "", mode=mode)
+    progress = []
+    second = oai.generate_report_html(PROJECT, "", mode=mode, on_progress=progress.append)
+
+    assert first == second
+    assert generation.responses.calls == 1
+    assert generation.prepared_calls == [False]
+    assert progress == [{"cache": "hit"}]
+
+
+@pytest.mark.parametrize("mode", ["structured", "sections"])
+def test_bypass_cache_reaches_preparation(generation, mode):
+    oai.generate_report_html(PROJECT, "", mode=mode)
+    oai.generate_report_html(PROJECT, "", mode=mode, bypass_cache=True)
+
+    assert generation.responses.calls == 2
+    assert generation.prepared_calls == [False, True]
+
+
+def test_sections_cache_key_covers_answers(generation, monkeypatch):
+    oai.generate_report_html(PROJECT, "", mode="sections")
+    monkeypatch.setattr(oai, "_component_answer_lines", lambda project_name: {"İnşaat": ["- ilerleme: %60"]})
+    oai.generate_report_html(PROJECT, "", mode="sections")
+
+    assert generation.responses.calls == 2
+
+
+def test_prepare_generation_forwards_bypass_to_image_analysis(tmp_path, monkeypatch):
+    seen = []
+    (tmp_path / "cache_test" / "pdfs").mkdir(parents=True)
+    monkeypatch.setattr(oai, "ACTIVE_UPLOADS_PATH", tmp_path)
+    monkeypatch.setattr(oai, "_load_assets", lambda slug: {})
+    monkeypatch.setattr(oai, "get_prestager", lambda: SimpleNamespace(wait_until_ready=lambda name: None))
+    monkeypatch.setattr(oai, "get_client", lambda: None)
+    monkeypatch.setattr(oai, "generate_image_analysis_response",
+                        lambda project_name, user_text, bypass_cache=False: seen.append(bypass_cache) or "resp")
+
+    oai._prepare_generation(PROJECT, "", with_vector_store=False, bypass_cache=True)
+    assert seen == [True]
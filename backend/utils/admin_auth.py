@@ -0,0 +1,21 @@
+"""
+Yönetim (/admin/...) anahtarının doğrulanması.
+
+ADMIN_TOKEN boşsa hiçbir anahtar geçerli sayılmaz: yönetim uç noktaları ve
+X-Profile ile istek bazında profil açma kapalıdır (fail closed).
+"""
+import hmac
+from typing import Optional, Union
+
+from config import ADMIN_TOKEN
+
+ADMIN_TOKEN_HEADER = b"x-admin-token"
+
+
+def is_admin_token(token: Optional[Union[str, bytes]]) -> bool:
+    """Anahtar tanımlı ve verilen değerle (sabit sürede karşılaştırılarak) eşleşiyorsa True."""
+    if not ADMIN_TOKEN or not token:
+        return False
+    if isinstance(token, str):
+        token = token.encode("utf-8")
+    return hmac.compare_digest(token.strip(), ADMIN_TOKEN.encode("utf-8"))
@@ -11,5 +11,9 @@ def load_manifest() -> dict:
 def get_project_assets(project_slug: str) -> dict:
     manifest = load_manifest()
     if project_slug not in manifest:
-        raise KeyError(f"No assets defined for '{project_slug}' in manifest.json")
+        # Manifest keys are "V_Metroway" while slugs are lowercase ("v_metroway")
+        matches = [key for key in manifest if key.lower() == project_slug.lower()]
+        if not matches:
+            raise KeyError(f"No assets defined for '{project_slug}' in manifest.json")
+        project_slug = matches[0]
     return manifest[project_slug]
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""
+Paylaşılan Chromium tarayıcı havuzu.
+
+Tek bir Playwright/Chromium süreci açılır; her render kendi tarayıcı bağlamında
+(browser context) çalışır. Aynı anda açık bağlam sayısı bir semafor ile sınırlanır,
+böylece havuzu paylaşan tüm render'lar (ör. toplu rapor üretimi) toplamda
+PDF_RENDER_CONCURRENCY sınırını aşmaz.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+
+from config import PDF_BLOCK_EXTERNAL_REQUESTS, PDF_RENDER_CONCURRENCY
+from utils.font_registry import get_font_registry, handle_render_request
+from utils.metrics import track_stage
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserPool:
+    """Tek bir tarayıcı üzerinde sınırlı sayıda eşzamanlı bağlam sağlayan havuz."""
+
+    def __init__(self, max_contexts: int = PDF_RENDER_CONCURRENCY,
+                 block_external_requests: bool = PDF_BLOCK_EXTERNAL_REQUESTS,
+                 context_options: Optional[Dict[str, Any]] = None):
+        self.max_contexts = max(1, max_contexts)
+        self.block_external_requests = block_external_requests
+        self.context_options = context_options or {}
+        self._semaphore = asyncio.Semaphore(self.max_contexts)
+        self._playwright = None
+        self._browser = None
+        self._start_lock = asyncio.Lock()
+        self.in_flight = 0
+
+    @property
+    def saturated(self) -> bool:
+        """Tüm bağlam yuvaları doluysa True."""
+        return self.in_flight >= self.max_contexts
+
+    async def start(self) -> "BrowserPool":
+        async with self._start_lock:
+            if self._browser is None:
+                if self.block_external_requests:
+                    # Font alt kümeleri ilk kullanımda üretilir; event loop'u bekletmesin
+                    await asyncio.to_thread(get_font_registry().warm_up)
+                with track_stage("browser_launch"):
+                    from playwright.async_api import async_playwright
+
+                    self._playwright = await async_playwright().start()
+                    self._browser = await self._playwright.chromium.launch(
+                        headless=True,
+                        args=['--disable-dev-shm-usage']  # Helps with Docker/limited memory
+                    )
+                logger.info(f"[BROWSER] Chromium başlatıldı (max {self.max_contexts} bağlam)")
+        return self
+
+    async def close(self) -> None:
+        async with self._start_lock:
+            if self._browser is not None:
+                await self._browser.close()
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    async def __aenter__(self) -> "BrowserPool":
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    @asynccontextmanager
+    async def context(self):
+        """Bir bağlam yuvası bekler, yeni bir tarayıcı bağlamı açar ve iş bitince kapatır."""
+        await self.start()
+        async with self._semaphore:
+            self.in_flight += 1
+            context = await self._browser.new_context(**self.context_options)
+            if self.block_external_requests:
+                # Fontlar yerel kayıttan sunulur, diğer dış istekler engellenir
+                await context.route("**/*", handle_render_request)
+            try:
+                yield context
+            finally:
+                self.in_flight -= 1
+                await context.close()
+
+
+@asynccontextmanager
+async def browser_session(pool: Optional[BrowserPool] = None):
+    """
+    Verilen havuzu kullanır; havuz verilmemişse yalnızca bu iş için geçici
+    bir havuz açar ve iş bitince kapatır.
+    """
+    if pool is not None:
+        yield pool
+        return
+    async with BrowserPool() as temporary_pool:
+        yield temporary_pool
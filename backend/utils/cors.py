@@ -0,0 +1,212 @@
+"""
+CORS origin kuralları ve derlenmiş eşleyici.
+
+Kurallar CORS_ALLOWED_ORIGINS ortam değişkeninden okunur; virgülle ayrılmış
+"şema://host[:portlar]" biçimindedir:
+- host: tam ad (localhost), IP (10.0.0.5), CIDR aralığı (192.168.0.0/23),
+  "*" (her host) veya "local-ip" (bu makinenin ağ adresleri); IPv6 adres ve
+  aralıkları köşeli parantez içinde yazılır ([::1], [fd00::/8])
+- portlar: "|" ile ayrılmış liste (3000|5173) veya "*"; verilmezse şemanın
+  varsayılan portu
+
+Örnek: http://localhost:3000|5173,http://192.168.0.0/23:3000|5173,https://rapor.example.com
+
+Tam eşleşen kurallar tek bir küme aramasına, CIDR kuralları port bazında ağ
+listelerine derlenir; görülen origin'lerin sonucu sınırlı bir önbellekte
+tutulur, böylece her istekteki kontrol sabit zamanlıdır.
+"""
+import ipaddress
+import logging
+import socket
+import threading
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from starlette.middleware.cors import CORSMiddleware
+
+logger = logging.getLogger(__name__)
+
+LOCAL_IP_HOST = "local-ip"
+ANY = "*"
+DEFAULT_PORTS = {"http": 80, "https": 443}
+_MAX_CACHED_ORIGINS = 4096
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+@dataclass(frozen=True)
+class OriginRule:
+    """Tek bir kural: şema, host (ad, ağ veya joker) ve izin verilen portlar (None = hepsi)."""
+    scheme: str
+    host: str
+    network: Optional[IPNetwork]
+    ports: Optional[FrozenSet[int]]
+
+
+def parse_rule(rule: str) -> OriginRule:
+    """ "http://192.168.0.0/23:3000|5173" -> OriginRule; hatalı kuralda ValueError."""
+    scheme, sep, rest = rule.strip().partition("://")
+    if not sep or not scheme or not rest:
+        raise ValueError(f"Geçersiz CORS kuralı (şema://host[:port] bekleniyor): {rule!r}")
+    scheme = scheme.lower()
+    rest = rest.rstrip("/")
+    if rest.startswith("["):
+        # IPv6: [adres] veya [ağ/önek], ardından isteğe bağlı :portlar
+        host, bracket, after = rest[1:].partition("]")
+        if not bracket or (after and not after.startswith(":")):
+            raise ValueError(f"{rule!r}: IPv6 adresi [adres]:port biçiminde yazılmalı")
+        ports_text = after[1:]
+        try:
+            if "/" in host:
+                ipaddress.IPv6Network(host, strict=False)
+            else:
+                # urlsplit().hostname ile aynı (köşeli parantezsiz, kısaltılmış) biçim
+                host = ipaddress.IPv6Address(host).compressed
+        except ValueError:
+            raise ValueError(f"{rule!r}: geçersiz IPv6 adresi {host!r}") from None
+    else:
+        host, ports_text = rest, ""
+        if ":" in host:
+            host, _, ports_text = host.rpartition(":")
+        if ":" in host:
+            raise ValueError(f"{rule!r}: IPv6 adresleri köşeli parantez içinde yazılmalı (http://[::1]:3000)")
+    host = host.lower()
+
+    if not ports_text:
+        if scheme not in DEFAULT_PORTS:
+            raise ValueError(f"{rule!r}: '{scheme}' şeması için port belirtilmeli")
+        ports: Optional[FrozenSet[int]] = frozenset({DEFAULT_PORTS[scheme]})
+    elif ports_text == ANY:
+        ports = None
+    else:
+        try:
+            ports = frozenset(int(port) for port in ports_text.split("|"))
+        except ValueError:
+            raise ValueError(f"{rule!r}: geçersiz port listesi {ports_text!r}") from None
+
+    network = None
+    if "/" in host:
+        try:
+            network = ipaddress.ip_network(host, strict=False)
+        except ValueError:
+            raise ValueError(f"{rule!r}: geçersiz CIDR aralığı {host!r}") from None
+    return OriginRule(scheme=scheme, host=host, network=network, ports=ports)
+
+
+def parse_rules(text: str) -> List[OriginRule]:
+    return [parse_rule(part) for part in text.split(",") if part.strip()]
+
+
+def local_ip_addresses() -> List[str]:
+    """
+    Bu makinenin dışa dönük IPv4 adresi. DNS sorgusu yapılmaz: UDP soketi
+    "bağlanır" (paket gönderilmez) ve çekirdeğin seçtiği kaynak adres okunur.
+    """
+    addresses = []
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        try:
+            s.connect(("10.255.255.255", 1))
+            addresses.append(s.getsockname()[0])
+        except OSError:
+            pass
+    return addresses
+
+
+class OriginMatcher:
+    """Kuralları origin -> bool kontrolüne derler."""
+
+    def __init__(self, rules: Iterable[OriginRule]):
+        self.rules = list(rules)
+        # (şema, host, port) -> tam eşleşme; (şema, host) -> her port
+        self._exact: set = set()
+        self._exact_any_port: set = set()
+        self._networks: List[Tuple[str, IPNetwork, Optional[FrozenSet[int]]]] = []
+        self._wildcards: List[Tuple[str, Optional[FrozenSet[int]]]] = []
+        self._local_rules: List[OriginRule] = []
+        self._local_resolved = False
+        self._cache: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+        for rule in self.rules:
+            if rule.host == LOCAL_IP_HOST:
+                self._local_rules.append(rule)
+            else:
+                self._add(rule)
+
+    def _add(self, rule: OriginRule, host: Optional[str] = None) -> None:
+        host = host or rule.host
+        if rule.network is not None:
+            self._networks.append((rule.scheme, rule.network, rule.ports))
+        elif host == ANY:
+            self._wildcards.append((rule.scheme, rule.ports))
+        elif rule.ports is None:
+            self._exact_any_port.add((rule.scheme, host))
+        else:
+            self._exact.update((rule.scheme, host, port) for port in rule.ports)
+
+    def _resolve_local_rules(self) -> None:
+        """local-ip kuralları ilk ihtiyaçta (başlangıçta değil) çözülür."""
+        with self._lock:
+            if self._local_resolved:
+                return
+            addresses = local_ip_addresses() if self._local_rules else []
+            for rule in self._local_rules:
+                for address in addresses:
+                    self._add(rule, host=address)
+            self._local_resolved = True
+        if self._local_rules:
+            logger.info(f"[CORS] local-ip kuralları çözüldü: {addresses or 'adres bulunamadı'}")
+
+    def _match(self, origin: str) -> bool:
+        try:
+            parts = urlsplit(origin)
+            scheme, host, port = parts.scheme.lower(), (parts.hostname or "").lower(), parts.port
+        except ValueError:
+            return False
+        if not scheme or not host or parts.path not in ("", "/"):
+            return False
+        port = port if port is not None else DEFAULT_PORTS.get(scheme)
+        if ":" in host:
+            # IPv6 origin'i kuraldaki kısaltılmış biçime getirilir ([0:0::1] -> ::1)
+            try:
+                host = ipaddress.IPv6Address(host).compressed
+            except ValueError:
+                return False
+
+        if (scheme, host, port) in self._exact or (scheme, host) in self._exact_any_port:
+            return True
+        if any(scheme == s and (ports is None or port in ports) for s, ports in self._wildcards):
+            return True
+        if self._networks:
+            try:
+                address = ipaddress.ip_address(host)
+            except ValueError:
+                return False
+            return any(scheme == s and (ports is None or port in ports) and address in network
+                       for s, network, ports in self._networks)
+        return False
+
+    def is_allowed(self, origin: str) -> bool:
+        cached = self._cache.get(origin)
+        if cached is not None:
+            return cached
+        if not self._local_resolved:
+            self._resolve_local_rules()
+        allowed = self._match(origin)
+        # Rastgele Origin başlıkları önbelleği şişirmesin
+        if len(self._cache) >= _MAX_CACHED_ORIGINS:
+            self._cache.clear()
+        self._cache[origin] = allowed
+        return allowed
+
+
+class RuleBasedCORSMiddleware(CORSMiddleware):
+    """Origin kontrolünü liste üyeliği yerine OriginMatcher ile yapan CORS middleware'i."""
+
+    def __init__(self, app, matcher: OriginMatcher, **kwargs):
+        super().__init__(app, allow_origins=(), **kwargs)
+        self.matcher = matcher
+
+    def is_allowed_origin(self, origin: str) -> bool:
+        return self.matcher.is_allowed(origin)
@@ -0,0 +1,273 @@
+"""
+Render sırasında kullanılan yerel font kaydı ve ağ isteği yönlendirmesi.
+
+assets/fonts altındaki fontlar bir kez alt kümelenip (Latin + Türkçe karakterler)
+WOFF2 olarak data/cache/fonts altına yazılır. Render sırasında tarayıcı
+bağlamının tüm istekleri yakalanır:
+- Google Fonts CSS istekleri (fonts.googleapis.com) yerel fontlara işaret eden
+  @font-face kuralları ile yanıtlanır,
+- font dosyası istekleri (fonts.gstatic.com) kayıttan sunulur,
+- diğer tüm dış istekler engellenir; böylece bir render hiçbir zaman ağı beklemez.
+"""
+import hashlib
+import io
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from config import FONT_CACHE_DIR, FONT_SOURCE_DIR
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_FONTS_CSS_HOST = "fonts.googleapis.com"
+FONT_FILE_HOST = "fonts.gstatic.com"
+LOCAL_FONT_PATH_PREFIX = "/s/local/"
+
+# Alt kümeye dahil edilen karakterler: Basic Latin, Latin-1, Latin Extended-A
+# (ğ, ş, ı, İ), genel noktalama, para birimleri (₺, €) ve bazı semboller
+SUBSET_UNICODE_RANGES: List[Tuple[int, int]] = [
+    (0x0020, 0x007E),
+    (0x00A0, 0x00FF),
+    (0x0100, 0x017F),
+    (0x2000, 0x206F),
+    (0x20A0, 0x20CF),
+    (0x2100, 0x214F),
+    (0x2190, 0x21FF),
+    (0x2212, 0x2212),
+]
+# Alt küme ayarları değiştiğinde artırılmalı (önbellekteki WOFF2'leri geçersiz kılar)
+SUBSET_VERSION = "1"
+
+FONT_EXTENSIONS = {".ttf", ".otf", ".woff", ".woff2"}
+
+
+@dataclass
+class LocalFont:
+    """Kayıttaki tek bir font dosyası."""
+    family: str
+    weight: str          # "300" veya değişken fontlarda "100 900"
+    style: str
+    source: Path
+    key: str             # URL'de kullanılan dosya adı (ör. montserrat-3fa1c2d4.woff2)
+    data: Optional[bytes] = None
+
+    @property
+    def url(self) -> str:
+        return f"https://{FONT_FILE_HOST}{LOCAL_FONT_PATH_PREFIX}{self.key}"
+
+
+def _unicode_range_css() -> str:
+    return ", ".join(
+        f"U+{start:04X}" if start == end else f"U+{start:04X}-{end:04X}"
+        for start, end in SUBSET_UNICODE_RANGES
+    )
+
+
+def _read_font_metadata(path: Path) -> Tuple[str, str, str]:
+    """Font dosyasından (aile, ağırlık, stil) bilgisini okur."""
+    from fontTools.ttLib import TTFont
+
+    font = TTFont(path, lazy=True)
+    names = font["name"]
+    family = names.getDebugName(16) or names.getDebugName(1) or path.stem
+    style = "italic" if "italic" in (names.getDebugName(2) or "").lower() else "normal"
+    if "fvar" in font:
+        weight_axis = next((axis for axis in font["fvar"].axes if axis.axisTag == "wght"), None)
+        if weight_axis is not None:
+            return family, f"{int(weight_axis.minValue)} {int(weight_axis.maxValue)}", style
+    return family, str(font["OS/2"].usWeightClass), style
+
+
+def _subset_to_woff2(path: Path) -> bytes:
+    """Fontu SUBSET_UNICODE_RANGES ile alt kümeleyip WOFF2 olarak döndürür."""
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = ["*"]
+    options.name_IDs = ["*"]
+    options.notdef_outline = True
+
+    font = TTFont(path)
+    subsetter = subset.Subsetter(options=options)
+    subsetter.populate(unicodes=[
+        code for start, end in SUBSET_UNICODE_RANGES for code in range(start, end + 1)
+    ])
+    subsetter.subset(font)
+
+    buffer = io.BytesIO()
+    font.flavor = "woff2"
+    font.save(buffer)
+    return buffer.getvalue()
+
+
+class FontRegistry:
+    """Yerel fontları aile adına göre tutan ve istek üzerine WOFF2 sunan kayıt."""
+
+    def __init__(self, source_dir: Path = FONT_SOURCE_DIR, cache_dir: Path = FONT_CACHE_DIR):
+        self.source_dir = Path(source_dir)
+        self.cache_dir = Path(cache_dir)
+        self._fonts: Dict[str, LocalFont] = {}
+        self._families: Dict[str, List[LocalFont]] = {}
+        # Uyarısı verilmiş eksik aileler (her render'da tekrar loglanmasın)
+        self._missing: Set[str] = set()
+        self._lock = threading.Lock()
+        self._scan()
+
+    def _scan(self) -> None:
+        if not self.source_dir.exists():
+            logger.warning(f"[FONTS] Font dizini bulunamadı: {self.source_dir}")
+            return
+        for path in sorted(self.source_dir.iterdir()):
+            if path.suffix.lower() not in FONT_EXTENSIONS:
+                continue
+            try:
+                family, weight, style = _read_font_metadata(path)
+            except Exception as e:
+                logger.warning(f"[FONTS] Font okunamadı {path.name}: {e}")
+                continue
+            digest = hashlib.sha256(path.read_bytes() + SUBSET_VERSION.encode("utf-8")).hexdigest()[:12]
+            key = f"{path.stem.lower()}-{digest}.woff2"
+            font = LocalFont(family=family, weight=weight, style=style, source=path, key=key)
+            self._fonts[key] = font
+            self._families.setdefault(family.lower(), []).append(font)
+        logger.info(f"[FONTS] {len(self._fonts)} yerel font kaydedildi: "
+                    f"{sorted({font.family for font in self._fonts.values()})}")
+
+    @property
+    def families(self) -> List[str]:
+        return sorted({font.family for font in self._fonts.values()})
+
+    def font_bytes(self, key: str) -> Optional[bytes]:
+        """Alt kümelenmiş WOFF2 içeriğini döndürür; gerekirse üretip diske önbellekler."""
+        font = self._fonts.get(key)
+        if font is None:
+            return None
+        if font.data is not None:
+            return font.data
+        with self._lock:
+            if font.data is None:
+                cached = self.cache_dir / key
+                if cached.exists():
+                    font.data = cached.read_bytes()
+                else:
+                    font.data = _subset_to_woff2(font.source)
+                    self.cache_dir.mkdir(parents=True, exist_ok=True)
+                    tmp_path = cached.with_suffix(".tmp")
+                    tmp_path.write_bytes(font.data)
+                    tmp_path.replace(cached)
+                    logger.info(f"[FONTS] {font.source.name} alt kümelendi: "
+                                f"{font.source.stat().st_size} -> {len(font.data)} bayt")
+        return font.data
+
+    def warm_up(self) -> None:
+        """Tüm fontların WOFF2 alt kümelerini önceden hazırlar."""
+        for key in list(self._fonts):
+            self.font_bytes(key)
+
+    def font_face_css(self, families: List[str]) -> str:
+        """
+        Verilen ailelerden yerelde bulunanlar için @font-face kuralları üretir.
+        Bulunamayan aileler için (dış istekler engellendiğinden rapor yedek fonta
+        düşer) bir kez uyarı loglanır.
+        """
+        rules = []
+        unicode_range = _unicode_range_css()
+        for family in families:
+            fonts = self._families.get(family.strip().lower(), [])
+            if not fonts and family.strip().lower() not in self._missing:
+                self._missing.add(family.strip().lower())
+                logger.warning(f"[FONTS] '{family.strip()}' ailesi {self.source_dir} altında yok; "
+                               f"yedek fontla render edilecek")
+            for font in fonts:
+                rules.append(
+                    "@font-face {\n"
+                    f"  font-family: '{family.strip()}';\n"
+                    f"  font-style: {font.style};\n"
+                    f"  font-weight: {font.weight};\n"
+                    "  font-display: block;\n"
+                    f"  src: url({font.url}) format('woff2');\n"
+                    f"  unicode-range: {unicode_range};\n"
+                    "}"
+                )
+        return "\n".join(rules)
+
+
+def families_from_google_fonts_url(url: str) -> List[str]:
+    """
+    Google Fonts CSS URL'inden aile adlarını çıkarır.
+
+    Hem css2 (`family=Lora:wght@400;700&family=Montserrat`) hem de eski css
+    (`family=Lora:400,700|Montserrat`) biçimini destekler.
+    """
+    query = parse_qs(urlparse(url).query)
+    families = []
+    for value in query.get("family", []):
+        for part in value.split("|"):
+            name = part.split(":", 1)[0].replace("+", " ").strip()
+            if name:
+                families.append(name)
+    return families
+
+
+_font_registry: Optional[FontRegistry] = None
+_font_registry_lock = threading.Lock()
+
+
+def get_font_registry() -> FontRegistry:
+    """Süreç genelinde paylaşılan font kaydını döndürür."""
+    global _font_registry
+    with _font_registry_lock:
+        if _font_registry is None:
+            _font_registry = FontRegistry()
+        return _font_registry
+
+
+async def handle_render_request(route) -> None:
+    """
+    Playwright route handler: fontları yerelden sunar, diğer dış istekleri engeller.
+    """
+    url = route.request.url
+    parsed = urlparse(url)
+
+    if parsed.scheme in ("data", "blob", "about"):
+        await route.continue_()
+        return
+
+    registry = get_font_registry()
+
+    if parsed.netloc == GOOGLE_FONTS_CSS_HOST:
+        css = registry.font_face_css(families_from_google_fonts_url(url))
+        await route.fulfill(
+            status=200,
+            content_type="text/css; charset=utf-8",
+            headers={"access-control-allow-origin": "*"},
+            body=css,
+        )
+        return
+
+    if parsed.netloc == FONT_FILE_HOST and parsed.path.startswith(LOCAL_FONT_PATH_PREFIX):
+        data = registry.font_bytes(parsed.path[len(LOCAL_FONT_PATH_PREFIX):])
+        if data is not None:
+            await route.fulfill(
+                status=200,
+                content_type="font/woff2",
+                headers={"access-control-allow-origin": "*", "cache-control": "max-age=31536000"},
+                body=data,
+            )
+            return
+
+    logger.debug(f"[FONTS] Dış istek engellendi: {url[:200]}")
+    await route.abort("blockedbyclient")
+
+
+if __name__ == "__main__":
+    # Font alt kümelerini önceden üretir (ör. imaj oluşturulurken)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    registry = get_font_registry()
+    registry.warm_up()
+    print(f"{len(registry.families)} font ailesi hazır: {', '.join(registry.families)}")
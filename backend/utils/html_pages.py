@@ -0,0 +1,161 @@
+"""
+Rapor HTML'ini `.page` bloklarına ayıran ve yeniden birleştiren yardımcılar.
+
+Rapor şablonları (metroway_prompt.md sayfa yapısı, gazette_type_investor_report.html)
+body altında birbirinden bağımsız `.page` bloklarından oluşur. Bu modül, `.page`
+kuralı sayfa sonu zorlayan belgeleri
+ortak bir önek (doctype, head, stiller, body açılışı), sayfa blokları ve
+ortak bir sonek (body/html kapanışı) olarak ayırır; böylece her sayfa tek başına
+render edilebilir.
+"""
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+PAGE_CLASS = "page"
+
+# Yorumları, raw-text elementlerini ve etiketleri tek geçişte yakalar
+_TOKEN_RE = re.compile(
+    r'<!--.*?-->'
+    r'|<(script|style)\b[^>]*>.*?</\1\s*>'
+    r'|<(/?)([a-zA-Z][a-zA-Z0-9-]*)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>',
+    re.DOTALL | re.IGNORECASE,
+)
+_BODY_OPEN_RE = re.compile(r'<body\b[^>]*>', re.IGNORECASE)
+_CLASS_RE = re.compile(r'\bclass\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', re.IGNORECASE)
+_PAGE_BREAK_RE = re.compile(
+    r'\.page\s*(?:,[^{]*)?\{[^}]*(?:page-break-after|break-after)\s*:\s*(?:always|page)',
+    re.IGNORECASE,
+)
+
+VOID_ELEMENTS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+
+
+@dataclass
+class PageSplit:
+    """Sayfalara ayrılmış bir HTML belgesi."""
+    prefix: str
+    pages: List[str]
+    suffix: str
+
+    def document_for(self, pages: List[str]) -> str:
+        """Verilen sayfa bloklarından ortak önek/sonek ile tam bir belge oluşturur."""
+        return self.prefix + "\n".join(pages) + self.suffix
+
+    def full_document(self) -> str:
+        return self.document_for(self.pages)
+
+
+def has_page_class(attrs: str) -> bool:
+    match = _CLASS_RE.search(attrs or "")
+    if not match:
+        return False
+    classes = next(group for group in match.groups() if group is not None)
+    return PAGE_CLASS in classes.split()
+
+
+def _has_forced_page_breaks(head: str) -> bool:
+    """`.page` kuralının her sayfadan sonra sayfa sonu zorlayıp zorlamadığını kontrol eder."""
+    return bool(_PAGE_BREAK_RE.search(head))
+
+
+def split_html_pages(html: str) -> Optional[PageSplit]:
+    """
+    HTML belgesini body'nin doğrudan çocukları olan `.page` bloklarına ayırır.
+
+    Sayfalar arasındaki sayfa dışı içerik (yorumlar, alt bilgiler vb.) bir önceki
+    sayfaya eklenir; böylece belge akışındaki sıra korunur. Yalnızca `.page`
+    kuralı sayfa sonu zorlayan belgeler bölünür; aksi halde sayfa sayfa render
+    tek parça render ile aynı çıktıyı vermeyeceği için None döner.
+
+    Args:
+        html: Tam HTML belgesi
+
+    Returns:
+        PageSplit veya belge sayfalara ayrılamıyorsa None
+    """
+    body_match = _BODY_OPEN_RE.search(html)
+    if not body_match or not _has_forced_page_breaks(html[:body_match.start()]):
+        return None
+
+    starts = []
+    body_close = None
+    stack: List[str] = []
+
+    for token in _TOKEN_RE.finditer(html, body_match.end()):
+        if token.group(1) is not None or token.group(3) is None:
+            # Yorum veya script/style bloğu - derinliği etkilemez
+            continue
+
+        is_closing = token.group(2) == "/"
+        tag = token.group(3).lower()
+        attrs = token.group(4) or ""
+
+        if not is_closing:
+            if tag in VOID_ELEMENTS or attrs.rstrip().endswith("/"):
+                continue
+            if not stack and has_page_class(attrs):
+                starts.append(token.start())
+            stack.append(tag)
+            continue
+
+        if tag in ("body", "html") and not stack:
+            body_close = token.start()
+            break
+        if tag not in stack:
+            # Eşleşmeyen kapanış etiketi, toleranslı davran
+            continue
+        while stack:
+            if stack.pop() == tag:
+                break
+
+    if not starts or stack or body_close is None:
+        return None
+
+    boundaries = starts[1:] + [body_close]
+    pages = [html[start:end].rstrip() for start, end in zip(starts, boundaries)]
+    # İlk sayfadan önceki içerik ilk sayfaya aittir
+    leading = html[body_match.end():starts[0]]
+    if leading.strip():
+        pages[0] = leading.strip() + "\n" + pages[0]
+
+    return PageSplit(
+        prefix=html[:body_match.end()] + "\n",
+        pages=pages,
+        suffix="\n" + html[body_close:],
+    )
+
+
+def shard_pages(pages: List[str], shard_count: int) -> List[List[str]]:
+    """
+    Sayfaları sırayı koruyarak, HTML boyutuna göre dengelenmiş ardışık parçalara böler.
+
+    Görsel ağırlıklı sayfalar (gömülü base64) daha büyük olduğundan, sayfa sayısı
+    yerine boyut dengelenir.
+
+    Args:
+        pages: Sıralı sayfa blokları
+        shard_count: İstenen parça sayısı
+
+    Returns:
+        Boş olmayan, sıralı sayfa grupları
+    """
+    shard_count = max(1, min(shard_count, len(pages)))
+    total = sum(len(page) for page in pages)
+    shards: List[List[str]] = [[]]
+    filled = 0
+
+    for index, page in enumerate(pages):
+        remaining_pages = len(pages) - index
+        remaining_shards = shard_count - len(shards)
+        target = total * len(shards) / shard_count
+        # Kalan her parçaya en az bir sayfa kalacak şekilde yeni parçaya geç
+        if shards[-1] and remaining_shards > 0 and (filled >= target or remaining_pages <= remaining_shards):
+            shards.append([])
+        shards[-1].append(page)
+        filled += len(page)
+
+    return shards
@@ -0,0 +1,239 @@
+"""
+LLM'den akış halinde gelen HTML için artımlı doğrulayıcı.
+
+Model çıktısı parça parça beslenir:
+- `<!DOCTYPE` / `<html` öncesindeki her şey (markdown çiti, açıklama metni) atılır,
+  `</html>` sonrasındaki her şey kesilir.
+- Etiket dengesi ve `.page` yapısı tamamlanan etiketler üzerinden anlık izlenir.
+- Açık bir ihlal (belge hiç başlamıyor, kapanış etiketleri dengesiz, sayfa yapısı
+  yok vb.) tespit edildiğinde HTMLStreamViolation fırlatılır; çağıran akışı
+  keserek erken yeniden deneyebilir.
+"""
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from utils.html_pages import VOID_ELEMENTS, has_page_class
+
+# Belge başlangıcı bu kadar karakter içinde gelmezse çıktı HTML değildir
+PREAMBLE_LIMIT = 4000
+# Eşleşmeyen kapanış etiketi sayısı bu sınırı aşarsa markup bozuktur
+MAX_STRAY_CLOSING_TAGS = 20
+MAX_DEPTH = 256
+# Stiller `.page` tanımlıyorsa body'de bu kadar karakter içinde ilk sayfa açılmalı
+BODY_WITHOUT_PAGE_LIMIT = 30000
+# Tamamlanmamış bir etiket için beklenecek en fazla karakter
+MAX_PENDING_TAG = 8192
+# İlerleme bildirimleri arasındaki en kısa süre (saniye)
+PROGRESS_INTERVAL = 1.0
+
+_DOC_START_RE = re.compile(r'<!doctype\s+html|<html\b', re.IGNORECASE)
+_TAG_RE = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9-]*)((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>')
+_TAG_START_RE = re.compile(r'</?[a-zA-Z!]')
+_PAGE_RULE_RE = re.compile(r'\.page\s*[,{]')
+
+
+class HTMLStreamViolation(Exception):
+    """Akış sırasında belgenin kullanılamayacağı anlaşıldığında fırlatılır."""
+
+
+class StreamingHTMLValidator:
+    """
+    Akış halindeki HTML çıktısını temizler ve yapısını artımlı olarak doğrular.
+
+    Args:
+        on_progress: İlerleme sözlüğü ile çağrılan fonksiyon (en fazla saniyede bir)
+    """
+
+    def __init__(self, on_progress: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.on_progress = on_progress
+        self.received_chars = 0
+        self.page_count = 0
+        self.stray_closing_tags = 0
+        self.finished = False
+        self._preamble = ""
+        self._started = False
+        # Taranmış kısım parçalar halinde tutulur; yalnızca taranmamış kuyruk yeniden aranır
+        self._done: List[str] = []
+        self._done_chars = 0
+        self._tail = ""
+        self._stack: List[str] = []
+        # Yığındaki her elementin bir `.page` bloğu olup olmadığı
+        self._page_stack: List[bool] = []
+        self._raw_tag: Optional[str] = None
+        self._in_body = False
+        self._body_start: Optional[int] = None
+        self._expects_pages = False
+        self._started_at = time.monotonic()
+        self._last_progress = 0.0
+
+    @property
+    def html(self) -> str:
+        """Şu ana kadar alınmış, temizlenmiş HTML."""
+        return "".join(self._done) + self._tail
+
+    def feed(self, delta: str) -> None:
+        """Yeni bir çıktı parçasını işler."""
+        self.received_chars += len(delta)
+        if self.finished:
+            return
+
+        if not self._started:
+            self._preamble += delta
+            match = _DOC_START_RE.search(self._preamble)
+            if not match:
+                if len(self._preamble) > PREAMBLE_LIMIT:
+                    raise HTMLStreamViolation(
+                        f"No <!DOCTYPE html> within the first {PREAMBLE_LIMIT} characters"
+                    )
+                return
+            self._started = True
+            self._tail = self._preamble[match.start():]
+            self._preamble = ""
+        else:
+            self._tail += delta
+
+        self._scan()
+        self._report_progress()
+
+    def _consume(self, length: int) -> None:
+        """Kuyruğun ilk `length` karakterini taranmış kısma taşır."""
+        if length <= 0:
+            return
+        self._done.append(self._tail[:length])
+        self._done_chars += length
+        self._tail = self._tail[length:]
+
+    def _scan(self) -> None:
+        while not self.finished:
+            tail = self._tail
+            if self._raw_tag:
+                close = re.compile(rf'</{self._raw_tag}\s*>', re.IGNORECASE).search(tail)
+                if not close:
+                    return
+                if self._raw_tag == "style" and not self._in_body and _PAGE_RULE_RE.search(tail, 0, close.start()):
+                    self._expects_pages = True
+                self._consume(close.end())
+                self._raw_tag = None
+                self._stack.pop()
+                self._page_stack.pop()
+                continue
+
+            lt = tail.find('<')
+            if lt < 0:
+                self._consume(len(tail))
+                return
+
+            if tail.startswith('<!--', lt):
+                end = tail.find('-->', lt + 4)
+                if end < 0:
+                    self._consume(lt)
+                    return
+                self._consume(end + 3)
+                continue
+
+            if tail.startswith('<!', lt):
+                end = tail.find('>', lt)
+                if end < 0:
+                    self._consume(lt)
+                    return
+                self._consume(end + 1)
+                continue
+
+            tag_match = _TAG_RE.match(tail, lt)
+            if not tag_match:
+                pending = len(tail) - lt
+                if tail[lt:] in ("<", "</") or (_TAG_START_RE.match(tail, lt) and pending < MAX_PENDING_TAG):
+                    # Etiket henüz tamamlanmamış olabilir, sonraki parçayı bekle
+                    self._consume(lt)
+                    return
+                # Metin içindeki tekil '<'
+                self._consume(lt + 1)
+                continue
+
+            self._consume(tag_match.end())
+            self._handle_tag(tag_match.group(1) == "/", tag_match.group(2).lower(), tag_match.group(3) or "")
+
+    def _handle_tag(self, is_closing: bool, tag: str, attrs: str) -> None:
+        if not is_closing:
+            if tag in VOID_ELEMENTS or attrs.rstrip().endswith("/"):
+                return
+            is_page = False
+            if tag == "body":
+                self._in_body = True
+                self._body_start = self._done_chars
+            elif self._in_body and has_page_class(attrs):
+                is_page = True
+                # İç içe `.page` blokları tek sayfa sayılır
+                if not any(self._page_stack):
+                    self.page_count += 1
+            self._stack.append(tag)
+            self._page_stack.append(is_page)
+            if len(self._stack) > MAX_DEPTH:
+                raise HTMLStreamViolation(f"Element nesting deeper than {MAX_DEPTH}")
+            if tag in ("script", "style"):
+                self._raw_tag = tag
+            self._check_page_structure()
+            return
+
+        if tag not in self._stack:
+            self.stray_closing_tags += 1
+            if self.stray_closing_tags > MAX_STRAY_CLOSING_TAGS:
+                raise HTMLStreamViolation(
+                    f"More than {MAX_STRAY_CLOSING_TAGS} unmatched closing tags"
+                )
+            return
+        # Kapatılmayan iç elementler örtük olarak kapanır (ör. </p> atlanmışsa)
+        while self._stack:
+            self._page_stack.pop()
+            if self._stack.pop() == tag:
+                break
+        if tag == "html":
+            # </html> sonrası (ör. kapanış markdown çiti) atılır
+            self._tail = ""
+            self.finished = True
+        self._check_page_structure()
+
+    def _check_page_structure(self) -> None:
+        if not self._expects_pages or self.page_count or self._body_start is None:
+            return
+        if self._done_chars - self._body_start > BODY_WITHOUT_PAGE_LIMIT:
+            raise HTMLStreamViolation(
+                f"Stylesheet defines .page but no page block within {BODY_WITHOUT_PAGE_LIMIT} characters of <body>"
+            )
+
+    def _report_progress(self, force: bool = False) -> None:
+        if not self.on_progress:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_progress < PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+        self.on_progress(self.progress())
+
+    def progress(self) -> Dict[str, Any]:
+        return {
+            "received_chars": self.received_chars,
+            "html_chars": self._done_chars + len(self._tail),
+            "pages": self.page_count,
+            "depth": len(self._stack),
+            "document_started": self._started,
+            "finished": self.finished,
+            "elapsed_s": round(time.monotonic() - self._started_at, 2),
+        }
+
+    def finish(self) -> str:
+        """
+        Akış bittiğinde son kontrolleri yapar ve temizlenmiş HTML'i döndürür.
+
+        Raises:
+            HTMLStreamViolation: Belge başlamadıysa veya </html> ile kapanmadıysa
+        """
+        if not self._started:
+            raise HTMLStreamViolation("Response did not contain an HTML document")
+        if not self.finished:
+            raise HTMLStreamViolation("Response ended before </html> (truncated output)")
+        if self._expects_pages and not self.page_count:
+            raise HTMLStreamViolation("Stylesheet defines .page but the document has no page blocks")
+        self._report_progress(force=True)
+        return self.html
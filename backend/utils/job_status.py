@@ -0,0 +1,72 @@
+"""
+Rapor üretim işlerinin anlık durumu.
+
+Her projenin tek bir aktif raporu olduğu için işler proje adına göre tutulur.
+Durum süreç içi bellekte saklanır ve iş parçacıklarından (LLM akışı) güvenle
+güncellenebilir; ön yüz ilerlemeyi durum endpoint'i üzerinden sorgular.
+"""
+import datetime
+import threading
+from typing import Any, Dict, Optional
+
+from utils.memory_profiler import get_memory_profiler
+
+_jobs: Dict[str, Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat()
+
+
+def start_job(project_name: str, report_id: Optional[str] = None, stage: str = "queued") -> Dict[str, Any]:
+    """Proje için yeni bir iş kaydı başlatır (öncekinin yerine geçer)."""
+    job = {
+        "project_name": project_name,
+        "report_id": report_id,
+        "status": "running",
+        "stage": stage,
+        "progress": {},
+        "attempt": 1,
+        "error": None,
+        "started_at": _now(),
+        "updated_at": _now(),
+    }
+    with _lock:
+        _jobs[project_name] = job
+    get_memory_profiler().job_started(project_name)
+    return dict(job)
+
+
+def update_job(project_name: str, stage: Optional[str] = None,
+               progress: Optional[Dict[str, Any]] = None, **fields) -> None:
+    """İşin aşamasını, ilerleme bilgisini veya diğer alanlarını günceller."""
+    with _lock:
+        job = _jobs.get(project_name)
+        if job is None:
+            return
+        if stage is not None:
+            job["stage"] = stage
+        if progress is not None:
+            job["progress"] = progress
+        job.update(fields)
+        job["updated_at"] = _now()
+
+
+def finish_job(project_name: str, error: Optional[str] = None) -> None:
+    """İşi başarılı ya da hatalı olarak sonlandırır; işin tepe RSS özeti "memory" alanına yazılır."""
+    update_job(
+        project_name,
+        memory=get_memory_profiler().job_finished(project_name),
+        stage="done" if error is None else "failed",
+        status="completed" if error is None else "failed",
+        error=error,
+        finished_at=_now(),
+    )
+
+
+def get_job(project_name: str) -> Optional[Dict[str, Any]]:
+    """İşin güncel durumunun bir kopyasını döndürür."""
+    with _lock:
+        job = _jobs.get(project_name)
+        return None if job is None else {**job, "progress": dict(job["progress"])}
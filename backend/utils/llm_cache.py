@@ -0,0 +1,170 @@
+"""
+LLM yanıt önbelleği.
+
+Aynı girdilerle tekrarlanan üretimler (ör. "oluştur" butonuna iki kez basılması)
+OpenAI'ye yeniden gitmez. Anahtar; model ve örnekleme ayarları, prompt
+sürümü, kullanıcı isteği ve projenin active_report klasöründeki tüm PDF ve
+görsellerin içerik hash'lerinden üretilir. Girdiler diskte JSON olarak tutulur,
+toplam boyut LLM_CACHE_MAX_BYTES ile sınırlıdır ve en eski erişilen girdiler
+silinir (LRU).
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from config import LLM_CACHE_DIR, LLM_CACHE_ENABLED, LLM_CACHE_MAX_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Anahtar biçimi veya saklanan değerin anlamı değiştiğinde artırılmalı
+LLM_CACHE_VERSION = "1"
+
+
+class LLMResponseCache:
+    """Namespace + girdi hash'ine göre LLM çıktılarını diskte saklayan önbellek."""
+
+    def __init__(self, cache_dir: Path = LLM_CACHE_DIR, max_bytes: int = LLM_CACHE_MAX_BYTES,
+                 enabled: bool = LLM_CACHE_ENABLED):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._file_hashes: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _count(self, namespace: str, key: str) -> None:
+        with self._lock:
+            counters = self._stats.setdefault(namespace, {"hits": 0, "misses": 0, "bypassed": 0, "stores": 0})
+            counters[key] += 1
+
+    def file_hash(self, path: Path) -> str:
+        """Dosya içeriğinin SHA-256'sı; (yol, boyut, mtime) aynı kaldıkça yeniden okunmaz."""
+        stat = path.stat()
+        memo_key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._file_hashes.get(memo_key)
+        if cached is not None:
+            return cached
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        value = digest.hexdigest()
+        with self._lock:
+            self._file_hashes[memo_key] = value
+        return value
+
+    def folder_hashes(self, folder: Path, suffixes: Iterable[str]) -> Dict[str, str]:
+        """Klasördeki verilen uzantılı dosyaların {ad: içerik hash'i} eşlemesi."""
+        if not folder.exists():
+            return {}
+        suffixes = {suffix.lower() for suffix in suffixes}
+        return {
+            path.name: self.file_hash(path)
+            for path in sorted(folder.iterdir())
+            if path.is_file() and path.suffix.lower() in suffixes
+        }
+
+    def key_for(self, namespace: str, inputs: Dict[str, Any]) -> str:
+        """Girdilerin kararlı (sıralı JSON) temsilinden SHA-256 anahtarı üretir."""
+        payload = json.dumps({"version": LLM_CACHE_VERSION, "namespace": namespace, "inputs": inputs},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path_for(self, namespace: str, key: str) -> Path:
+        return self.cache_dir / f"{namespace}-{key}.json"
+
+    def get(self, namespace: str, key: str, bypass: bool = False,
+            max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Önbellekteki değeri döndürür.
+
+        Args:
+            namespace: Çağrı türü (ör. "full_html", "image_analysis")
+            key: key_for ile üretilen anahtar
+            bypass: True ise önbellek okunmaz (sonuç yine de put ile yazılabilir)
+            max_age: Saniye; daha eski girdiler yok sayılır
+        """
+        if bypass or not self.enabled:
+            self._count(namespace, "bypassed")
+            return None
+        path = self._path_for(namespace, key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self._count(namespace, "misses")
+            return None
+        if max_age is not None and time.time() - entry.get("created_at", 0) > max_age:
+            self._count(namespace, "misses")
+            return None
+        # LRU sıralaması için erişim zamanını güncelle
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        self._count(namespace, "hits")
+        logger.info(f"[LLM_CACHE] {namespace} önbellekten: {key[:12]}")
+        return entry["value"]
+
+    def put(self, namespace: str, key: str, value: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        path = self._path_for(namespace, key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"created_at": time.time(), "value": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"[LLM_CACHE] Yanıt önbelleğe yazılamadı: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        self._count(namespace, "stores")
+        self.prune()
+
+    def prune(self) -> None:
+        """En eski erişilen girdileri silerek toplam boyutu max_bytes ile sınırlar."""
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        entries.sort()
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        logger.info(f"[LLM_CACHE] Önbellekten {removed} girdi silindi")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            namespaces = {namespace: dict(counters) for namespace, counters in self._stats.items()}
+        return {"enabled": self.enabled, "namespaces": namespaces}
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Süreç genelinde paylaşılan LLM yanıt önbelleğini döndürür."""
+    global _llm_cache
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            _llm_cache = LLMResponseCache()
+        return _llm_cache
@@ -0,0 +1,332 @@
+"""
+Üretim hattının bellek profili.
+
+İki katman vardır:
+- İş başına tepe RSS (her zaman açık, ucuz): start_job/finish_job arasında
+  bir arka plan thread'i /proc/self/statm'i yoklar ve işin başlangıç RSS'i,
+  tepe RSS'i ve artışı iş kaydına yazılır. Konteyner boyutlandırması için
+  asıl bakılacak değer budur.
+- Aşama bazında tracemalloc (MEMORY_PROFILING veya POST /admin/memory ile
+  açılır, yavaştır): track_stage ile sarılmış her aşamanın öncesi ve sonrası
+  anlık görüntü alınır; aşamanın en çok bellek ayıran satırları ve aşama
+  sonu görüntüleri arasındaki fark yönetim uç noktalarından okunur. Bu uç
+  noktalar geçerli X-Admin-Token ister; ADMIN_TOKEN boşsa kapalıdır.
+
+tracemalloc süreç geneli çalışır; eşzamanlı işler varken bir aşamanın farkına
+diğer işlerin ayırmaları da karışır. Kesin ölçüm için tek iş çalıştırılmalıdır.
+"""
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from config import (
+    MEMORY_PROFILING,
+    MEMORY_RSS_POLL_INTERVAL,
+    MEMORY_TOP_N,
+    MEMORY_TRACE_FRAMES,
+)
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+_MB = 1024 * 1024
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+# tracemalloc'un kendi ayırmaları sonuçları kirletmesin
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, __file__),
+]
+
+
+def current_rss() -> Optional[int]:
+    """Sürecin anlık yerleşik belleği (bayt); /proc yoksa None."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _child_pids(pid: int) -> List[int]:
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children", "rb") as f:
+                children.extend(int(child) for child in f.read().split())
+    except FileNotFoundError:
+        # Çekirdek children dosyasını sunmuyorsa (CONFIG_PROC_CHILDREN) tüm süreçler taranır
+        return _scan_child_pids(pid)
+    except (OSError, ValueError):
+        pass
+    return children
+
+
+def _scan_child_pids(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                # "pid (comm) state ppid ..."; comm boşluk içerebilir
+                fields = f.read().rsplit(b")", 1)[1].split()
+            if int(fields[1]) == pid:
+                children.append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return children
+
+
+def process_tree_rss(pid: int) -> Optional[int]:
+    """Sürecin ve tüm alt süreçlerinin (ör. Chromium) toplam RSS'i (bayt); /proc yoksa None."""
+    total, pending, seen = 0, [pid], set()
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        try:
+            with open(f"/proc/{current}/statm", "rb") as f:
+                total += int(f.read().split()[1]) * _PAGE_SIZE
+        except (OSError, IndexError, ValueError):
+            if current == pid:
+                return None
+            continue
+        pending.extend(_child_pids(current))
+    return total
+
+
+def max_rss() -> Optional[int]:
+    """Süreç başından beri görülen tepe RSS (bayt)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux'ta KiB, macOS'ta bayt
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def _mb(value: Optional[int]) -> Optional[float]:
+    return None if value is None else round(value / _MB, 2)
+
+
+def _location(frame: tracemalloc.Frame) -> str:
+    path = Path(frame.filename)
+    try:
+        filename = str(path.resolve().relative_to(BASE_DIR))
+    except ValueError:
+        filename = path.name if "site-packages" not in frame.filename else frame.filename.split("site-packages/")[-1]
+    return f"{filename}:{frame.lineno}"
+
+
+def _stat_entry(stat) -> Dict[str, Any]:
+    entry = {
+        "location": _location(stat.traceback[0]),
+        "size_mb": _mb(stat.size),
+        "count": stat.count,
+        # En içteki çerçeve çoğu zaman kütüphane kodudur; kendi kodumuza kadar yığını göster
+        "traceback": [_location(frame) for frame in stat.traceback],
+    }
+    if hasattr(stat, "size_diff"):
+        entry["size_diff_mb"] = _mb(stat.size_diff)
+        entry["count_diff"] = stat.count_diff
+    return entry
+
+
+class MemoryProfiler:
+    """İş başına tepe RSS ve aşama bazında tracemalloc kayıtları."""
+
+    def __init__(self, enabled: bool = MEMORY_PROFILING, top_n: int = MEMORY_TOP_N,
+                 poll_interval: float = MEMORY_RSS_POLL_INTERVAL, trace_frames: int = MEMORY_TRACE_FRAMES):
+        self.top_n = top_n
+        self.poll_interval = poll_interval
+        self.trace_frames = trace_frames
+        self._lock = threading.Lock()
+        # Her aşamanın son ölçümü ve aşama sonundaki anlık görüntü (aşamalar arası fark için)
+        self._stages: Dict[str, Dict[str, Any]] = {}
+        self._stage_snapshots: Dict[str, tracemalloc.Snapshot] = {}
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._recent_jobs: Deque[Dict[str, Any]] = deque(maxlen=50)
+        self._poller: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self.enabled = False
+        if enabled:
+            self.enable()
+
+    # --- tracemalloc ---
+
+    def enable(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+        self.enabled = True
+        logger.info(f"[MEMORY] tracemalloc açıldı ({self.trace_frames} çerçeve)")
+
+    def disable(self) -> None:
+        self.enabled = False
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        with self._lock:
+            self._stage_snapshots.clear()
+        logger.info("[MEMORY] tracemalloc kapatıldı")
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+    @contextmanager
+    def track(self, stage: str):
+        """Profil açıkken aşamanın öncesi/sonrası anlık görüntü alır ve farkı saklar."""
+        if not self.enabled or not tracemalloc.is_tracing():
+            yield
+            return
+        before = self._snapshot()
+        rss_before = current_rss()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            try:
+                self._record_stage(stage, before, rss_before, time.perf_counter() - started)
+            except Exception as e:
+                # Profil hatası üretimi bozmamalı
+                logger.warning(f"[MEMORY] {stage} aşaması ölçülemedi: {e}")
+
+    def _record_stage(self, stage: str, before: tracemalloc.Snapshot,
+                      rss_before: Optional[int], duration: float) -> None:
+        after = self._snapshot()
+        diff = after.compare_to(before, "traceback")
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        rss_after = current_rss()
+        record = {
+            "stage": stage,
+            "at": datetime.now().isoformat(),
+            "duration_s": round(duration, 3),
+            "allocated_mb": _mb(sum(stat.size_diff for stat in diff)),
+            "traced_mb": _mb(traced),
+            "traced_peak_mb": _mb(traced_peak),
+            "rss_before_mb": _mb(rss_before),
+            "rss_after_mb": _mb(rss_after),
+            "top": [_stat_entry(stat) for stat in diff[:self.top_n]],
+        }
+        with self._lock:
+            self._stages[stage] = record
+            self._stage_snapshots[stage] = after
+        logger.info(f"[MEMORY] {stage}: {record['allocated_mb']} MB ayrıldı, "
+                    f"traced={record['traced_mb']} MB, rss={record['rss_after_mb']} MB")
+
+    def top_allocators(self, limit: Optional[int] = None, group_by: str = "lineno") -> List[Dict[str, Any]]:
+        """Şu an ayakta olan en büyük ayırmalar."""
+        if not tracemalloc.is_tracing():
+            return []
+        stats = self._snapshot().statistics(group_by)
+        return [_stat_entry(stat) for stat in stats[:limit or self.top_n]]
+
+    def stage_diff(self, from_stage: str, to_stage: str, limit: Optional[int] = None,
+                   group_by: str = "lineno") -> List[Dict[str, Any]]:
+        """İki aşamanın sonundaki anlık görüntüler arasındaki fark."""
+        with self._lock:
+            before = self._stage_snapshots.get(from_stage)
+            after = self._stage_snapshots.get(to_stage)
+        if before is None or after is None:
+            missing = from_stage if before is None else to_stage
+            raise KeyError(missing)
+        return [_stat_entry(stat) for stat in after.compare_to(before, group_by)[:limit or self.top_n]]
+
+    # --- iş başına tepe RSS ---
+
+    def job_started(self, key: str) -> None:
+        rss = current_rss()
+        with self._lock:
+            self._jobs[key] = {"rss_start": rss, "rss_peak": rss, "started": time.perf_counter()}
+            if rss is not None and (self._poller is None or not self._poller.is_alive()):
+                self._poller = threading.Thread(target=self._poll_rss, name="rss-poller", daemon=True)
+                self._poller.start()
+        self._wake.set()
+
+    def job_finished(self, key: str) -> Dict[str, Any]:
+        """İşin bellek özetini döndürür (iş kaydına eklenir)."""
+        rss = current_rss()
+        with self._lock:
+            job = self._jobs.pop(key, None)
+        if job is None or job["rss_start"] is None:
+            return {"process_peak_rss_mb": _mb(max_rss())}
+        peak = max(job["rss_peak"], rss or 0)
+        summary = {
+            "rss_start_mb": _mb(job["rss_start"]),
+            "rss_end_mb": _mb(rss),
+            "peak_rss_mb": _mb(peak),
+            "peak_rss_delta_mb": _mb(peak - job["rss_start"]),
+            "process_peak_rss_mb": _mb(max_rss()),
+        }
+        with self._lock:
+            self._recent_jobs.append({"job": key, "finished_at": datetime.now().isoformat(),
+                                      "duration_s": round(time.perf_counter() - job["started"], 3), **summary})
+        return summary
+
+    def _poll_rss(self) -> None:
+        while True:
+            with self._lock:
+                idle = not self._jobs
+            if idle:
+                self._wake.clear()
+                self._wake.wait()
+                continue
+            rss = current_rss()
+            if rss is not None:
+                with self._lock:
+                    for job in self._jobs.values():
+                        if rss > job["rss_peak"]:
+                            job["rss_peak"] = rss
+            time.sleep(self.poll_interval)
+
+    # --- özet ---
+
+    def status(self) -> Dict[str, Any]:
+        traced, traced_peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (None, None)
+        with self._lock:
+            stages = [{k: v for k, v in record.items() if k != "top"} for record in self._stages.values()]
+            running = {key: {"rss_start_mb": _mb(job["rss_start"]), "peak_rss_mb": _mb(job["rss_peak"])}
+                       for key, job in self._jobs.items()}
+            recent = list(self._recent_jobs)
+        return {
+            "tracemalloc_enabled": self.enabled,
+            "traced_mb": _mb(traced),
+            "traced_peak_mb": _mb(traced_peak),
+            "rss_mb": _mb(current_rss()),
+            "process_peak_rss_mb": _mb(max_rss()),
+            "stages": stages,
+            "running_jobs": running,
+            "recent_jobs": recent,
+        }
+
+    def stage_report(self, stage: str) -> Dict[str, Any]:
+        with self._lock:
+            record = self._stages.get(stage)
+        if record is None:
+            raise KeyError(stage)
+        return record
+
+
+_memory_profiler: Optional[MemoryProfiler] = None
+_memory_profiler_lock = threading.Lock()
+
+
+def get_memory_profiler() -> MemoryProfiler:
+    """Süreç genelinde paylaşılan bellek profilini döndürür."""
+    global _memory_profiler
+    with _memory_profiler_lock:
+        if _memory_profiler is None:
+            _memory_profiler = MemoryProfiler()
+        return _memory_profiler
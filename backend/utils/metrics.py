@@ -0,0 +1,353 @@
+"""
+Süreç içi metrikler ve Prometheus metin biçimi.
+
+Sayaç (counter), gösterge (gauge) ve histogramlar bellekte tutulur; /metrics
+uç noktası bunları Prometheus text exposition (0.0.4) biçiminde döndürür.
+Sıcak yoldaki maliyet bir perf_counter çağrısı, bir kilit ve histogramda bir
+bisect'ten ibarettir. Önbellek isabet oranları gibi zaten başka modüllerde
+tutulan değerler, kayıt sırasında değil okuma (scrape) anında collector'lar
+ile toplanır.
+
+Kullanım:
+    with track_stage("llm_call"), LLM_CALLS_IN_FLIGHT.track():
+        ...
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Saniye; HTTP isteklerinden dakikalar süren LLM çağrılarına kadar
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# (metrik adı, tür, açıklama, [(etiketler, değer), ...])
+CollectedFamily = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Yalnızca artan sayaç."""
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Etiketsiz metrikler ilk scrape'te de 0 olarak görünür
+        self._values: Dict[Tuple[str, ...], float] = {} if self.labelnames else {(): 0.0}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name + "_total", self._labels(key), value) for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """Artıp azalabilen değer (ör. süren render sayısı)."""
+    type_name = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Etiketsiz metrikler ilk scrape'te de 0 olarak görünür
+        self._values: Dict[Tuple[str, ...], float] = {} if self.labelnames else {(): 0.0}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track(self, **labels):
+        """Blok süresince göstergeyi bir artırır."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    """Sabit kovalı (bucket) süre dağılımı."""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # etiketler -> [kova sayıları..., toplam, adet]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 3)
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = {key: list(state) for key, state in self._values.items()}
+        samples = []
+        for key, state in values.items():
+            labels = self._labels(key)
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-2]):
+                cumulative += count
+                samples.append((self.name + "_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append((self.name + "_sum", labels, state[-2]))
+            samples.append((self.name + "_count", labels, state[-1]))
+        return samples
+
+
+class MetricsRegistry:
+    """Metrikleri ve scrape anında çalışan collector'ları tutan kayıt."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[CollectedFamily]]] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Callable[[], Iterable[CollectedFamily]]) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Tüm metrikleri Prometheus metin biçiminde döndürür."""
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for collector in collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                # Bir collector'ın hatası tüm scrape'i bozmasın
+                logger.warning(f"[METRICS] Collector hatası ({getattr(collector, '__name__', collector)}): {e}")
+                continue
+            for name, type_name, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {type_name}")
+                sample_name = name + "_total" if type_name == "counter" else name
+                for labels, value in samples:
+                    lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_DURATION = REGISTRY.histogram(
+    "report_stage_duration_seconds", "Duration of report pipeline stages", ("stage",))
+STAGE_ERRORS = REGISTRY.counter(
+    "report_stage_errors", "Report pipeline stages that raised an exception", ("stage",))
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests", "HTTP requests by route and status", ("method", "route", "status"))
+HTTP_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "HTTP requests currently being served")
+RENDERS_IN_FLIGHT = REGISTRY.gauge("pdf_renders_in_flight", "PDF renders currently running")
+PDF_RENDERS = REGISTRY.counter(
+    "pdf_renders", "PDF renders by engine and why the engine was chosen", ("engine", "reason"))
+LLM_CALLS_IN_FLIGHT = REGISTRY.gauge("llm_calls_in_flight", "Report LLM calls currently running")
+EMAILS_IN_FLIGHT = REGISTRY.gauge("emails_in_flight", "E-mails waiting for or being sent over SMTP")
+
+
+@contextmanager
+def track_stage(stage: str):
+    """
+    Bloğun süresini stage etiketiyle kaydeder; istisnada hata sayacını artırır.
+    Bellek profili açıksa aşamanın tracemalloc farkı da alınır (süreye dahil edilmez).
+    """
+    from utils.memory_profiler import get_memory_profiler
+
+    with get_memory_profiler().track(stage):
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            STAGE_ERRORS.inc(stage=stage)
+            raise
+        finally:
+            STAGE_DURATION.observe(time.perf_counter() - started, stage=stage)
+
+
+def _cache_families(caches: Dict[str, Tuple[float, float]]) -> List[CollectedFamily]:
+    """{önbellek: (isabet, ıskalama)} -> hit/miss sayaçları ve isabet oranı."""
+    hits = [({"cache": name}, hit) for name, (hit, _) in caches.items()]
+    misses = [({"cache": name}, miss) for name, (_, miss) in caches.items()]
+    ratios = [({"cache": name}, hit / (hit + miss) if hit + miss else 0.0) for name, (hit, miss) in caches.items()]
+    return [
+        ("cache_hits", "counter", "Cache hits", hits),
+        ("cache_misses", "counter", "Cache misses", misses),
+        ("cache_hit_ratio", "gauge", "Cache hits / (hits + misses) since process start", ratios),
+    ]
+
+
+def collect_cache_metrics() -> List[CollectedFamily]:
+    """LLM yanıt, sayfa render, asset ve önizleme önbelleklerinin sayaçlarını okur."""
+    from utils.llm_cache import get_llm_cache
+    from utils.pdf_utils import get_asset_cache_stats
+    from utils.render_cache import get_page_cache
+    from utils.thumbnails import get_thumbnail_cache
+
+    caches: Dict[str, Tuple[float, float]] = {}
+    for namespace, counters in get_llm_cache().stats()["namespaces"].items():
+        caches[f"llm_{namespace}"] = (counters["hits"], counters["misses"])
+    page_stats = get_page_cache().stats()
+    caches["pdf_pages"] = (page_stats["hits"], page_stats["misses"])
+    asset_stats = get_asset_cache_stats()
+    caches["encoded_assets"] = (asset_stats["hits"], asset_stats["misses"])
+    thumbnail_stats = get_thumbnail_cache().stats()
+    caches["thumbnails"] = (thumbnail_stats["hits"], thumbnail_stats["misses"])
+    return _cache_families(caches)
+
+
+def collect_openai_metrics() -> List[CollectedFamily]:
+    """Paylaşılan OpenAI hız sınırlayıcısının sayaçları ve eşzamanlılık sınırı."""
+    from utils.rate_limiter import get_rate_limiter
+
+    stats = get_rate_limiter().stats()
+    counters = [({"result": key}, stats[key]) for key in ("calls", "retries", "throttled", "server_errors", "failures")
+                if key in stats]
+    families = [("openai_requests", "counter", "OpenAI calls through the shared rate limiter", counters)]
+    if "concurrency_limit" in stats:
+        families.append(("openai_concurrency_limit", "gauge", "Current adaptive OpenAI concurrency limit",
+                         [({}, stats["concurrency_limit"])]))
+    return families
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+def collect_memory_metrics() -> List[CollectedFamily]:
+    """Sürecin anlık ve tepe RSS değeri."""
+    from utils.memory_profiler import current_rss, max_rss
+
+    families = []
+    rss = current_rss()
+    if rss is not None:
+        families.append(("process_resident_memory_bytes", "gauge", "Resident set size", [({}, rss)]))
+    peak = max_rss()
+    if peak is not None:
+        families.append(("process_peak_resident_memory_bytes", "gauge",
+                         "Peak resident set size since process start", [({}, peak)]))
+    return families
+
+
+def collect_render_worker_metrics() -> List[CollectedFamily]:
+    """Render işçi havuzunun meşgul/kuyruk durumu ve olay sayaçları (havuz başlatılmadıysa boş)."""
+    from utils.render_workers import peek_render_workers
+
+    pool = peek_render_workers()
+    if pool is None:
+        return []
+    stats = pool.stats()
+    return [
+        ("render_workers_busy", "gauge", "Render workers currently running a job", [({}, stats["busy"])]),
+        ("render_queue_depth", "gauge", "Render jobs waiting for a worker", [({}, stats["queued"])]),
+        ("render_worker_events", "counter", "Render worker job outcomes and restarts",
+         [({"event": name}, value) for name, value in sorted(stats["counts"].items())]),
+    ]
+
+
+REGISTRY.register_collector(collect_cache_metrics)
+REGISTRY.register_collector(collect_openai_metrics)
+REGISTRY.register_collector(collect_memory_metrics)
+REGISTRY.register_collector(collect_render_worker_metrics)
@@ -1,20 +1,58 @@
 import base64
+import json
 import mimetypes
 import re
 import logging
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from openai import OpenAI
+from typing import Any, Callable, Dict, List, Optional
 from .assets import get_project_assets
 import os
-from .vector_store import create_vector_store, upload_pdf_files_to_vector_store
+from config import (
+    LLM_CACHE_RESPONSE_ID_TTL,
+    LLM_STREAMING,
+    LLM_STREAM_MAX_ATTEMPTS,
+    REPORT_GENERATION_MODE,
+    SECTION_MAX_ATTEMPTS,
+    STRUCTURED_REPORT_TEMPLATE,
+)
+from .html_stream import HTMLStreamViolation, StreamingHTMLValidator
+from .llm_cache import get_llm_cache
+from .metrics import LLM_CALLS_IN_FLIGHT, track_stage
+from .openai_client import get_client
+from .prestage import get_prestager
+from .prompt_registry import Prompt, build_request_input, get_prompt_registry
+from .rate_limiter import get_rate_limiter, estimate_tokens
+from .structured_report import (
+    REPORT_CONTENT_FORMAT,
+    SECTION_CONTENT_FORMAT,
+    list_image_names,
+    normalize_report_content,
+    render_structured_report,
+)
+from .vector_store import get_or_create_project_vector_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Tahmini çıktı token'ları (TPM bütçesi için; gerçek kullanım yanıttan düzeltilir)
+IMAGE_ANALYSIS_OUTPUT_TOKENS = 1000
+FULL_HTML_OUTPUT_TOKENS = 16000
+STRUCTURED_OUTPUT_TOKENS = 4000
+SECTION_OUTPUT_TOKENS = 1500
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".webp")
+# Ortak örnekleme ayarları (önbellek anahtarının da parçası)
+REPORT_MODEL = "gpt-4.1-2025-04-14"
+REPORT_SAMPLING = {"temperature": 0.7, "top_p": 0.9}
+IMAGE_ANALYSIS_MODEL = "gpt-4.1"
+# Görsel açıklama isteği (yükleme sonrası ön hazırlık da aynı metni kullanır ki önbellek anahtarı eşleşsin)
+IMAGE_ANALYSIS_PROMPT = ("Please analyze each image and give a one-sentence description. Start each with the "
+                         "given filename exactly. Example: image_1.png - A child holding an umbrella")
 
 
 # Path definitions
@@ -47,12 +85,24 @@ def get_image_inputs_for_project(project_name: str) -> list:
             })
     return image_inputs
 
-def generate_image_analysis_response(project_name: str, user_text: str) -> str:
+def generate_image_analysis_response(project_name: str, user_text: str, bypass_cache: bool = False) -> str:
     slug = slugify(project_name)
     image_folder = ACTIVE_UPLOADS_PATH / slug / "images"
     if not image_folder.exists():
         return "No images found."
 
+    # Yalnızca yanıt id'si saklanır (sonraki çağrıda previous_response_id olarak kullanılır)
+    cache = get_llm_cache()
+    cache_key = cache.key_for("image_analysis", {
+        "model": IMAGE_ANALYSIS_MODEL,
+        "detail": "low",
+        "user_text": user_text,
+        "images": cache.folder_hashes(image_folder, IMAGE_SUFFIXES),
+    })
+    cached = cache.get("image_analysis", cache_key, bypass=bypass_cache, max_age=LLM_CACHE_RESPONSE_ID_TTL)
+    if cached is not None:
+        return cached["response_id"]
+
     input_blocks = [{"type": "input_text", "text": user_text}]
 
     for image_path in sorted(image_folder.glob("*")):
@@ -80,88 +130,460 @@ def generate_image_analysis_response(project_name: str, user_text: str) -> str:
             "detail": "low"
         })
 
-    response = client.responses.create(
-        model="gpt-4.1",
+    # Low-detail images cost a fixed ~85 tokens each
+    image_count = sum(1 for block in input_blocks if block["type"] == "input_image")
+    response = get_rate_limiter().call(
+        get_client().responses.create,
+        model=IMAGE_ANALYSIS_MODEL,
         input=[{
             "role": "user",
             "content": input_blocks
-        }]
+        }],
+        estimated_tokens=estimate_tokens(user_text, max_output_tokens=IMAGE_ANALYSIS_OUTPUT_TOKENS) + 85 * image_count,
     )
     logger.info(f"Generated response: {response.output_text}")
+    cache.put("image_analysis", cache_key, {"response_id": response.id})
     return response.id
 
 # Example usage:
 
-def generate_full_html(project_name: str,user_input:str) -> str:
-    """Generates a full HTML response for the given project."""
-    slug = slugify(project_name)
-    
+def _load_assets(slug: str) -> Dict[str, str]:
     # Try to get assets but don't fail if they're not available
     try:
-        assets = get_project_assets(slug)
+        return get_project_assets(slug)
     except Exception as e:
         print(f"Warning: Could not load assets: {e}")
-        assets = {}  # Use empty dict as fallback
+        return {}  # Use empty dict as fallback
+
+
+def _prepare_generation(project_name: str, user_input: str, with_vector_store: bool = True,
+                        bypass_cache: bool = False) -> Dict[str, Any]:
+    """
+    Shared preparation for every generation mode: project assets, image
+    analysis (previous response id), the project's vector store and the user
+    request text. The sections mode builds per-component stores instead
+    (with_vector_store=False).
+    """
+    slug = slugify(project_name)
+    assets = _load_assets(slug)
 
     pdf_folder = ACTIVE_UPLOADS_PATH / slug / "pdfs"
     if not pdf_folder.exists():
         raise FileNotFoundError(f"No PDFs found for project {project_name}")
+
+    # Yükleme anında başlatılan hazırlıklardan (vector store, görsel analizi) yalnızca
+    # bitmemiş olanlar beklenir; ardından aşağıdaki çağrılar önbellekten döner
+    with track_stage("prestage_wait"):
+        get_prestager().wait_until_ready(project_name)
    
-    # Rest of the function remains the same...
     # Optionally, get the previous response ID from image analysis
-    previous_response_id = generate_image_analysis_response(
-        project_name=project_name,
-        user_text="Please analyze each image and give a one-sentence description. Start each with the given filename exactly. Example: image_1.png - A child holding an umbrella"
-    )
+    with track_stage("image_analysis"):
+        previous_response_id = generate_image_analysis_response(
+            project_name=project_name,
+            user_text=IMAGE_ANALYSIS_PROMPT,
+            bypass_cache=bypass_cache,
+        )
 
     logger.info(f"user prompt: {user_input}")
 
+    # Reuse the project's vector store when its PDFs have not changed
+    client = get_client()
+    vector_store = None
+    if with_vector_store:
+        with track_stage("vector_store"):
+            vector_store = get_or_create_project_vector_store(slug, dir_pdfs=str(pdf_folder), client=client)
 
-
-    # Create a new vector store for this project
-    vector_store = create_vector_store(project_name, client=client)
-
-    # Upload all PDF files to the vector store
-    upload_stats = upload_pdf_files_to_vector_store(vector_store["id"], dir_pdfs=pdf_folder, client=client)
-    print(upload_stats)
-    
-
-    metroway_prompt = BASE_DIR / "data" / "prompts" / "metroway_prompt.md"
-    generic_prompt = BASE_DIR / "data" / "prompts" / "htmlprompt.md"
-    # Prepare the prompt for the response
-    def read_prompt_from_md(md_path) -> str:
-        with open(md_path, "r", encoding="utf-8") as f:
-            return f.read()
-
-    if(project_name == "V_Metroway"):
-        prompt = read_prompt_from_md(metroway_prompt)
-        # Add the assets to the prompt
-        if assets:
-            prompt += "\n\nAssets:\n"
-            for key, value in assets.items():
-                prompt += f"{key}: {value}\n"
-    else:
-        prompt = read_prompt_from_md(generic_prompt) 
-
+    # Kullanıcıya özgü metin en sona gelir (bkz. prompt_registry.build_request_input)
     if(user_input):
         input_text = f"I would like you to create a good report for the {project_name}. It would be great if you could pay special attention to the following points while preparing the report:{user_input}"
     else:
         input_text = f"I would like you to create a good report for the {project_name}."
+
+    return {
+        "slug": slug,
+        "assets": assets,
+        "client": client,
+        "vector_store": vector_store,
+        "previous_response_id": previous_response_id,
+        "input_text": input_text,
+    }
+
+
+def generate_report_html(project_name: str, user_input: str, mode: Optional[str] = None,
+                         on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                         bypass_cache: bool = False) -> str:
+    """
+    Generates the report HTML using the given mode ("html", "structured" or
+    "sections"). Defaults to REPORT_GENERATION_MODE. bypass_cache skips the LLM
+    response cache lookups (fresh results are still stored).
+    """
+    mode = mode or REPORT_GENERATION_MODE
+    if mode == "structured":
+        return generate_structured_html(project_name, user_input, on_progress=on_progress, bypass_cache=bypass_cache)
+    if mode == "sections":
+        return generate_sectioned_html(project_name, user_input, on_progress=on_progress, bypass_cache=bypass_cache)
+    if mode != "html":
+        raise ValueError(f"Unknown report generation mode: {mode}")
+    return generate_full_html(project_name, user_input, on_progress=on_progress, bypass_cache=bypass_cache)
+
+
+def generate_structured_html(project_name: str, user_input: str,
+                             template_topic: str = STRUCTURED_REPORT_TEMPLATE,
+                             on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                             bypass_cache: bool = False) -> str:
+    """
+    Asks the model for compact JSON report content (REPORT_CONTENT_SCHEMA) and
+    renders it locally with the registered Jinja template. The content is
+    cached like generate_full_html's HTML; a cache hit goes straight to
+    rendering unless bypass_cache is set.
+    """
+    prompt = get_prompt_registry().for_project(project_name, mode="structured")
+    cache = get_llm_cache()
+    assets = _load_assets(slugify(project_name))
+    cache_key = _report_cache_key(project_name, user_input, prompt, "structured", assets)
+    cached = cache.get("structured", cache_key, bypass=bypass_cache)
+    if cached is not None:
+        if on_progress:
+            on_progress({"cache": "hit"})
+        return render_structured_report(cached["content"], project_name, assets, topic=template_topic)
+
+    prepared = _prepare_generation(project_name, user_input, bypass_cache=bypass_cache)
+    image_names = list_image_names(ACTIVE_UPLOADS_PATH / prepared["slug"] / "images")
+
+    input_text = build_request_input(prompt, prepared["input_text"], prepared["assets"], image_names)
+
+    with track_stage("llm_call"), LLM_CALLS_IN_FLIGHT.track():
+        response = get_rate_limiter().call(
+            prepared["client"].responses.create,
+            estimated_tokens=estimate_tokens(prompt.text, input_text, max_output_tokens=STRUCTURED_OUTPUT_TOKENS),
+            model=REPORT_MODEL,
+            input=input_text,
+            instructions=prompt.text,
+            tools=[{
+                "type": "file_search",
+                "vector_store_ids": [prepared["vector_store"]['id']],
+            }],
+            previous_response_id=prepared["previous_response_id"],
+            text=REPORT_CONTENT_FORMAT,
+            **REPORT_SAMPLING,
+        )
+
+    get_prompt_registry().record_usage(prompt, response.usage)
+    content = normalize_report_content(json.loads(response.output_text), image_names)
+    cache.put("structured", cache_key, {"content": content})
+    html = render_structured_report(content, project_name, prepared["assets"], topic=template_topic)
+    logger.info(f"[LLM] Structured content rendered: {len(content['sections'])} sections, "
+                f"{len(response.output_text)} JSON chars -> {len(html)} HTML chars")
+    return html
+
+
+def _normalize_name(value: str) -> str:
+    return unicodedata.normalize("NFC", value)
+
+
+def component_pdf_files(pdf_folder: Path, component_name: str) -> List[Path]:
+    """Bileşenin PDF'leri (save_uploaded_pdf'in "<bileşen>-<zaman>.pdf" adlandırmasına göre)."""
+    prefix = _normalize_name(component_name.lower().replace(" ", "_") + "-")
+    return sorted(path for path in pdf_folder.glob("*.pdf") if _normalize_name(path.name).startswith(prefix))
+
+
+def component_image_names(image_names: List[str], component_name: str) -> List[str]:
+    """Bileşenin görselleri (save_uploaded_image'in adlandırmasına göre)."""
+    cleaned = component_name.lower().replace(" ", "_").replace("ı", "i").replace("ğ", "g").replace("ü", "u") \
+        .replace("ş", "s").replace("ç", "c").replace("ö", "o")
+    prefix = _normalize_name(cleaned + "-")
+    return [name for name in image_names if _normalize_name(name).startswith(prefix)]
+
+
+def _component_answer_lines(project_name: str) -> Dict[str, List[str]]:
+    """Aktif rapordaki metin cevaplarını bileşen bazında "- soru: cevap" satırları olarak döndürür."""
+    from api.data_storage import get_project_data
+    from api.questions_handler import COMPONENT_QUESTIONS
+
+    active_report = (get_project_data(project_name) or {}).get("active_report") or {}
+    lines: Dict[str, List[str]] = {}
+    for component_name, component in (active_report.get("components") or {}).items():
+        question_texts = {q["id"]: q["text"] for q in COMPONENT_QUESTIONS.get(component_name, [])}
+        for question_id, answer in (component.get("answers") or {}).items():
+            if isinstance(answer, str) and answer.strip():
+                label = question_texts.get(question_id, question_id).rstrip(":")
+                lines.setdefault(component_name, []).append(f"- {label}: {answer.strip()}")
+    return lines
+
+
+def _generate_section(prepared: Dict[str, Any], prompt: Prompt, component_name: str,
+                      pdf_files: List[Path], answer_lines: List[str], image_names: List[str]) -> Dict[str, Any]:
+    """Tek bir bileşenin bölümünü üretir; yalnızca o bileşenin PDF'leri ve cevapları kullanılır."""
+    client = prepared["client"]
+    slug = prepared["slug"]
+
+    tools = []
+    if pdf_files:
+        with track_stage("vector_store"):
+            vector_store = get_or_create_project_vector_store(
+                f"{slug}:{component_name}",
+                dir_pdfs=str(ACTIVE_UPLOADS_PATH / slug / "pdfs"),
+                client=client,
+                pdf_files=[str(path) for path in pdf_files],
+            )
+        tools.append({"type": "file_search", "vector_store_ids": [vector_store["id"]]})
+
+    request_text = f"Component: {component_name}"
+    if answer_lines:
+        request_text += "\nAnswers for this component:\n" + "\n".join(answer_lines)
+    input_text = build_request_input(prompt, f"{request_text}\n\n{prepared['input_text']}", image_names=image_names)
+
+    with track_stage("llm_call"), LLM_CALLS_IN_FLIGHT.track():
+        response = get_rate_limiter().call(
+            client.responses.create,
+            estimated_tokens=estimate_tokens(prompt.text, input_text, max_output_tokens=SECTION_OUTPUT_TOKENS),
+            model=REPORT_MODEL,
+            input=input_text,
+            instructions=prompt.text,
+            tools=tools,
+            previous_response_id=prepared["previous_response_id"],
+            text=SECTION_CONTENT_FORMAT,
+            **REPORT_SAMPLING,
+        )
+    get_prompt_registry().record_usage(prompt, response.usage)
+
+    # Boş bölüm ValueError ile reddedilir ve yeniden denenir
+    section = normalize_report_content(
+        {"title": "", "period": "", "sections": [json.loads(response.output_text)]}, image_names
+    )["sections"][0]
+    section["title"] = section["title"] or component_name
+    return section
+
+
+def generate_sectioned_html(project_name: str, user_input: str,
+                            on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                            template_topic: str = STRUCTURED_REPORT_TEMPLATE,
+                            bypass_cache: bool = False) -> str:
+    """
+    Generates one section per component (COMPONENT_QUESTIONS order) with
+    concurrent LLM calls, each scoped to that component's PDFs and answers, and
+    renders them in a fixed order with the structured report template.
+
+    A failing section is retried on its own (SECTION_MAX_ATTEMPTS attempts in
+    total); the other sections are kept. The generated sections are cached
+    (the key also covers the component answers); a cache hit goes straight to
+    rendering unless bypass_cache is set.
+    """
+    from api.questions_handler import COMPONENT_QUESTIONS
+
+    slug = slugify(project_name)
+    answers = _component_answer_lines(project_name)
+    prompt = get_prompt_registry().for_project(project_name, mode="sections")
+    cache = get_llm_cache()
+    assets = _load_assets(slug)
+    cache_key = _report_cache_key(project_name, user_input, prompt, "sections", assets, extra={"answers": answers})
+    cached = cache.get("sections", cache_key, bypass=bypass_cache)
+    if cached is not None:
+        if on_progress:
+            on_progress({"cache": "hit"})
+        content = {"title": "", "period": "", "sections": cached["sections"]}
+        return render_structured_report(content, project_name, assets, topic=template_topic)
+
+    prepared = _prepare_generation(project_name, user_input, with_vector_store=False, bypass_cache=bypass_cache)
+    pdf_folder = ACTIVE_UPLOADS_PATH / slug / "pdfs"
+    image_names = list_image_names(ACTIVE_UPLOADS_PATH / slug / "images")
+
+    jobs = []
+    for component_name in COMPONENT_QUESTIONS:
+        pdf_files = component_pdf_files(pdf_folder, component_name)
+        answer_lines = answers.get(component_name, [])
+        if not pdf_files and not answer_lines:
+            logger.info(f"[SECTIONS] {component_name}: PDF veya cevap yok, bölüm atlandı")
+            continue
+        jobs.append((component_name, pdf_files, answer_lines, component_image_names(image_names, component_name)))
+    if not jobs:
+        raise FileNotFoundError(f"No component PDFs or answers found for project {project_name}")
+
+    status = {component_name: "pending" for component_name, *_ in jobs}
+    status_lock = threading.Lock()
+
+    def set_status(component_name: str, value: str) -> None:
+        with status_lock:
+            status[component_name] = value
+            snapshot = dict(status)
+        if on_progress:
+            on_progress({"sections": snapshot})
+
+    def run(component_name, pdf_files, answer_lines, component_images) -> Dict[str, Any]:
+        for attempt in range(1, SECTION_MAX_ATTEMPTS + 1):
+            started = time.perf_counter()
+            set_status(component_name, "running" if attempt == 1 else f"retrying ({attempt})")
+            try:
+                section = _generate_section(prepared, prompt, component_name, pdf_files, answer_lines,
+                                            component_images)
+                logger.info(f"[SECTIONS] {component_name} hazır: {len(section['subsections'])} alt bölüm, "
+                            f"{time.perf_counter() - started:.1f}s (deneme {attempt})")
+                set_status(component_name, "done")
+                return section
+            except Exception as e:
+                logger.warning(f"[SECTIONS] {component_name} başarısız "
+                               f"(deneme {attempt}/{SECTION_MAX_ATTEMPTS}): {e}")
+                if attempt == SECTION_MAX_ATTEMPTS:
+                    set_status(component_name, "failed")
+                    raise
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(jobs), thread_name_prefix="section") as executor:
+        futures = [(job[0], executor.submit(run, *job)) for job in jobs]
+        sections, failed = [], {}
+        for component_name, future in futures:
+            try:
+                sections.append(future.result())
+            except Exception as e:
+                failed[component_name] = str(e)
+    if failed:
+        raise RuntimeError(f"Report sections failed: {failed}")
+    cache.put("sections", cache_key, {"sections": sections})
+
+    content = {"title": "", "period": "", "sections": sections}
+    html = render_structured_report(content, project_name, prepared["assets"], topic=template_topic)
+    logger.info(f"[SECTIONS] {len(sections)} bölüm {time.perf_counter() - started:.1f}s içinde üretildi "
+                f"-> {len(html)} HTML chars")
+    return html
+
+
+def _report_cache_key(project_name: str, user_input: str, prompt: Prompt, mode: str,
+                      assets: Dict[str, str], extra: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Tam üretim girdilerinin (model, ayarlar, prompt sürümü, istek, dosya içerikleri)
+    anahtarı; extra moda özgü ek girdileri (ör. bileşen cevapları) içerir.
+    """
+    cache = get_llm_cache()
+    project_folder = ACTIVE_UPLOADS_PATH / slugify(project_name)
+    inputs = {
+        "project": slugify(project_name),
+        "model": REPORT_MODEL,
+        "sampling": REPORT_SAMPLING,
+        "prompt": f"{prompt.name}@{prompt.version}",
+        "user_input": user_input or "",
+        "assets": assets,
+        "pdfs": cache.folder_hashes(project_folder / "pdfs", (".pdf",)),
+        "images": cache.folder_hashes(project_folder / "images", IMAGE_SUFFIXES),
+    }
+    if extra:
+        inputs["extra"] = extra
+    return cache.key_for(mode, inputs)
+
+
+def generate_full_html(project_name: str, user_input: str, stream: bool = LLM_STREAMING,
+                       on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                       bypass_cache: bool = False) -> str:
+    """
+    Generates a full HTML response for the given project.
+
+    With stream=True the output is consumed incrementally and validated as it
+    arrives (see stream_validated_html); on_progress receives partial progress.
+    When the same inputs were generated before, the cached HTML is returned
+    without calling OpenAI unless bypass_cache is set.
+    """
+    # Talimatlar sabit önektir; projeye özgü asset listesi input'a eklenir
+    prompt = get_prompt_registry().for_project(project_name, mode="html")
+    cache = get_llm_cache()
+    cache_key = _report_cache_key(project_name, user_input, prompt, "full_html", _load_assets(slugify(project_name)))
+    cached = cache.get("full_html", cache_key, bypass=bypass_cache)
+    if cached is not None:
+        if on_progress:
+            on_progress({"cache": "hit", "received_chars": len(cached["html"])})
+        return cached["html"]
+
+    prepared = _prepare_generation(project_name, user_input, bypass_cache=bypass_cache)
+    assets = prepared["assets"]
+    client = prepared["client"]
+    vector_store = prepared["vector_store"]
+    previous_response_id = prepared["previous_response_id"]
+    input_text = build_request_input(prompt, prepared["input_text"], assets)
     
-    response = client.responses.create(
-        model="gpt-4.1-2025-04-14",
+    request = dict(
+        model=REPORT_MODEL,
         input=input_text,
-        instructions=prompt,
+        instructions=prompt.text,
         tools=[{
             "type": "file_search",
             "vector_store_ids": [vector_store['id']],
         }],
         previous_response_id=previous_response_id,
-        temperature=0.7,
-        top_p=0.9,
+        **REPORT_SAMPLING,
     )
+    estimated_tokens = estimate_tokens(prompt.text, input_text, max_output_tokens=FULL_HTML_OUTPUT_TOKENS)
+
+    with track_stage("llm_call"), LLM_CALLS_IN_FLIGHT.track():
+        if stream:
+            html = stream_validated_html(client, request, estimated_tokens, on_progress=on_progress, prompt=prompt)
+        else:
+            response = get_rate_limiter().call(client.responses.create, estimated_tokens=estimated_tokens, **request)
+            get_prompt_registry().record_usage(prompt, response.usage)
+            html = response.output_text
+
+    cache.put("full_html", cache_key, {"html": html})
+    return html
+
+
+def stream_validated_html(client, request: Dict[str, Any], estimated_tokens: int,
+                          on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                          prompt: Optional[Prompt] = None) -> str:
+    """
+    Streams a Responses API call and validates the HTML while it arrives.
+
+    Text before <!DOCTYPE and after </html> is dropped. On a clear structural
+    violation the stream is closed immediately and the request is retried, up to
+    LLM_STREAM_MAX_ATTEMPTS attempts in total. The rate limiter slot is held
+    until the stream is drained, and the token budget is reconciled from the
+    usage in the final response.completed event (also recorded for the prompt
+    when one is given).
+
+    Returns:
+        The cleaned HTML document
+
+    Raises:
+        HTMLStreamViolation: If every attempt produced unusable HTML
+    """
+    last_error: Optional[HTMLStreamViolation] = None
+
+    for attempt in range(1, LLM_STREAM_MAX_ATTEMPTS + 1):
+        def report(progress: Dict[str, Any], attempt=attempt) -> None:
+            if on_progress:
+                on_progress({**progress, "attempt": attempt})
+
+        validator = StreamingHTMLValidator(on_progress=report)
+        # Yuva akış tüketilene kadar tutulur; bütçe response.completed kullanımıyla düzeltilir
+        with get_rate_limiter().stream(
+            client.responses.create, stream=True, estimated_tokens=estimated_tokens, **request
+        ) as lease:
+            response_stream = lease.stream
+            try:
+                for event in response_stream:
+                    if event.type == "response.output_text.delta":
+                        # Nothing after </html> is used; the stream is still drained
+                        # for the usage in response.completed
+                        if not validator.finished:
+                            validator.feed(event.delta)
+                    elif event.type == "response.completed":
+                        lease.record_usage(event.response.usage)
+                        if prompt is not None:
+                            get_prompt_registry().record_usage(prompt, event.response.usage)
+                    elif event.type == "response.failed":
+                        error = getattr(event.response, "error", None)
+                        raise RuntimeError(f"Response failed: {getattr(error, 'message', error)}")
+                    elif event.type == "error":
+                        raise RuntimeError(f"Response stream error: {event.message}")
+                html = validator.finish()
+                logger.info(f"[LLM] Streamed HTML accepted: {len(html)} chars, {validator.page_count} pages "
+                            f"(attempt {attempt})")
+                return html
+            except HTMLStreamViolation as e:
+                last_error = e
+                logger.warning(f"[LLM] HTML stream rejected after {validator.received_chars} chars "
+                               f"(attempt {attempt}/{LLM_STREAM_MAX_ATTEMPTS}): {e}")
+                report({**validator.progress(), "violation": str(e)})
+            finally:
+                response_stream.close()
 
-    return response.output_text
+    raise HTMLStreamViolation(f"Model output rejected after {LLM_STREAM_MAX_ATTEMPTS} attempts: {last_error}")
 
 if __name__ == "__main__":
     result = generate_full_html(
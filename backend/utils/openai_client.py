@@ -0,0 +1,76 @@
+"""
+Paylaşılan OpenAI istemcileri.
+
+İstemciler ilk kullanımda oluşturulur. Her yanıtın x-ratelimit-* başlıkları
+httpx olay kancası ile paylaşılan hız sınırlayıcıya aktarılır. SDK'nın kendi
+yeniden deneme mekanizması kapatılır; yeniden denemeler limiter tarafından yapılır.
+OPENAI_BASE_URL ortam değişkeni ile istemci yerel bir sahte sunucuya yönlendirilebilir;
+OPENAI_TRANSPORT_MODE=record/replay ile yanıtlar kaydedilip ağ olmadan tekrar
+oynatılabilir (bkz. utils/openai_transport.py).
+
+openai paketi yalnızca ilk istemci oluşturulurken import edilir; paketin
+import maliyeti API sürecinin açılışına yansımaz.
+"""
+import os
+import threading
+from typing import TYPE_CHECKING, Optional
+
+from config import OPENAI_TRANSPORT_MODE
+from utils.rate_limiter import get_rate_limiter
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+_client: Optional["OpenAI"] = None
+_async_client: Optional["AsyncOpenAI"] = None
+_lock = threading.Lock()
+
+
+def _record_rate_limits(response) -> None:
+    get_rate_limiter().update_from_headers(response.headers)
+
+
+async def _arecord_rate_limits(response) -> None:
+    get_rate_limiter().update_from_headers(response.headers)
+
+
+def _transport_kwargs(asynchronous: bool) -> dict:
+    if not OPENAI_TRANSPORT_MODE:
+        return {}
+    from utils.openai_transport import AsyncRecordReplayTransport, RecordReplayTransport
+
+    transport_class = AsyncRecordReplayTransport if asynchronous else RecordReplayTransport
+    return {"transport": transport_class(OPENAI_TRANSPORT_MODE)}
+
+
+def get_client() -> "OpenAI":
+    """Senkron OpenAI istemcisini döndürür."""
+    global _client
+    with _lock:
+        if _client is None:
+            import openai
+
+            _client = openai.OpenAI(
+                # Tekrar modunda gerçek anahtar gerekmez
+                api_key=os.getenv('OPENAI_API_KEY') or ("replay" if OPENAI_TRANSPORT_MODE == "replay" else None),
+                max_retries=0,
+                http_client=openai.DefaultHttpxClient(event_hooks={"response": [_record_rate_limits]},
+                                                      **_transport_kwargs(asynchronous=False)),
+            )
+        return _client
+
+
+def get_async_client() -> "AsyncOpenAI":
+    """Asenkron OpenAI istemcisini döndürür."""
+    global _async_client
+    with _lock:
+        if _async_client is None:
+            import openai
+
+            _async_client = openai.AsyncOpenAI(
+                api_key=os.getenv('OPENAI_API_KEY') or ("replay" if OPENAI_TRANSPORT_MODE == "replay" else None),
+                max_retries=0,
+                http_client=openai.DefaultAsyncHttpxClient(event_hooks={"response": [_arecord_rate_limits]},
+                                                           **_transport_kwargs(asynchronous=True)),
+            )
+        return _async_client
@@ -0,0 +1,206 @@
+"""
+OpenAI istemcisi için kayıt/tekrar (record/replay) httpx transport'u.
+
+- record: İstekler gerçek API'ye gider; her yanıt (durum, başlıklar, gövde ve
+  süre) fixture dizinine yazılır.
+- replay: Ağ kullanılmaz; yanıtlar fixture'lardan, kayıttaki süre
+  OPENAI_REPLAY_LATENCY_SCALE ile ölçeklenerek (veya OPENAI_REPLAY_LATENCY ile
+  sabit) gecikmeli sunulur.
+
+İstekler yöntem, yol ve normalize edilmiş gövdeye göre eşlenir (multipart
+sınır dizgileri sabitlenir). Aynı istek birden çok kez kaydedildiyse (ör. 429
+sonrası yeniden deneme) yanıtlar kayıt sırasıyla döner; liste bitince son yanıt
+tekrarlanır. Böylece üretim hattı ağ olmadan, tekrarlanabilir şekilde
+çalıştırılıp kendi ek yükümüz (render, I/O, asset işleme) ölçülebilir.
+
+Kullanım:
+    OPENAI_TRANSPORT_MODE=record OPENAI_FIXTURES_DIR=benchmarks/fixtures/openai python -m ...
+    OPENAI_TRANSPORT_MODE=replay OPENAI_FIXTURES_DIR=benchmarks/fixtures/openai python -m ...
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from config import (
+    OPENAI_FIXTURES_DIR,
+    OPENAI_REPLAY_LATENCY,
+    OPENAI_REPLAY_LATENCY_SCALE,
+)
+
+logger = logging.getLogger(__name__)
+
+TRANSPORT_MODES = ("record", "replay")
+
+# Kayıtta saklanmayan başlıklar (gövde yeniden oluşturulduğu için geçersiz kalırlar)
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "set-cookie"}
+_BOUNDARY_RE = re.compile(rb"boundary=([^;\s]+)")
+
+
+def request_key(request: httpx.Request, body: bytes) -> str:
+    """Yöntem, yol ve normalize edilmiş gövdeden fixture anahtarı üretir."""
+    content_type = request.headers.get("content-type", "")
+    match = _BOUNDARY_RE.search(content_type.encode("latin-1"))
+    if match:
+        body = body.replace(match.group(1), b"BOUNDARY")
+    elif "json" in content_type and body:
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True).encode("utf-8")
+        except ValueError:
+            pass
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.url.path}?{request.url.query.decode('ascii')}\n".encode("utf-8"))
+    digest.update(body)
+    return digest.hexdigest()[:32]
+
+
+class FixtureStore:
+    """İstek anahtarı -> kayıtlı yanıt listesi; dosyalar JSON olarak tutulur."""
+
+    def __init__(self, fixtures_dir: Path):
+        self.fixtures_dir = Path(fixtures_dir)
+        self._replay_positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _path_for(self, key: str) -> Path:
+        return self.fixtures_dir / f"{key}.json"
+
+    def append(self, key: str, request: httpx.Request, record: Dict[str, Any]) -> None:
+        self.fixtures_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path_for(key)
+        with self._lock:
+            try:
+                fixture = json.loads(path.read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                fixture = {"request": {"method": request.method, "path": request.url.path}, "responses": []}
+            fixture["responses"].append(record)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(fixture, ensure_ascii=False, indent=1), encoding="utf-8")
+            tmp_path.replace(path)
+
+    def next_response(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path_for(key)
+        try:
+            responses: List[Dict[str, Any]] = json.loads(path.read_text(encoding="utf-8"))["responses"]
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            position = self._replay_positions.get(key, 0)
+            self._replay_positions[key] = position + 1
+        return responses[min(position, len(responses) - 1)]
+
+
+def _encode_body(content: bytes) -> Dict[str, str]:
+    try:
+        return {"body": content.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body_b64": base64.b64encode(content).decode("ascii")}
+
+
+def _decode_body(record: Dict[str, Any]) -> bytes:
+    if "body_b64" in record:
+        return base64.b64decode(record["body_b64"])
+    return record.get("body", "").encode("utf-8")
+
+
+def _to_record(response: httpx.Response, content: bytes, elapsed: float) -> Dict[str, Any]:
+    headers = [[k, v] for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS]
+    return {"status": response.status_code, "headers": headers, "elapsed": round(elapsed, 4), **_encode_body(content)}
+
+
+def _missing_fixture_response(request: httpx.Request, key: str) -> httpx.Response:
+    # 404: SDK bunu yeniden denenmeyen bir hata olarak yükseltir
+    message = f"No recorded OpenAI fixture for {request.method} {request.url.path} (key {key})"
+    logger.error(f"[REPLAY] {message}")
+    return httpx.Response(404, json={"error": {"message": message, "type": "fixture_missing",
+                                               "code": "fixture_missing", "param": None}}, request=request)
+
+
+class _RecordReplayBase:
+    def __init__(self, mode: str, fixtures_dir: Path = OPENAI_FIXTURES_DIR,
+                 latency_scale: float = OPENAI_REPLAY_LATENCY_SCALE,
+                 latency: Optional[float] = OPENAI_REPLAY_LATENCY):
+        if mode not in TRANSPORT_MODES:
+            raise ValueError(f"Unknown OpenAI transport mode: {mode}")
+        self.mode = mode
+        self.store = FixtureStore(fixtures_dir)
+        self.latency_scale = latency_scale
+        self.latency = latency
+
+    def _replay_delay(self, record: Dict[str, Any]) -> float:
+        if self.latency is not None:
+            return self.latency
+        return record.get("elapsed", 0.0) * self.latency_scale
+
+    def _build_response(self, request: httpx.Request, record: Dict[str, Any]) -> httpx.Response:
+        return httpx.Response(record["status"], headers=record["headers"], content=_decode_body(record),
+                              request=request)
+
+
+class RecordReplayTransport(_RecordReplayBase, httpx.BaseTransport):
+    """Senkron istemci (OpenAI) için kayıt/tekrar transport'u."""
+
+    def __init__(self, mode: str, inner: Optional[httpx.BaseTransport] = None, **kwargs):
+        super().__init__(mode, **kwargs)
+        self.inner = inner or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        body = request.read()
+        key = request_key(request, body)
+
+        if self.mode == "replay":
+            record = self.store.next_response(key)
+            if record is None:
+                return _missing_fixture_response(request, key)
+            time.sleep(self._replay_delay(record))
+            return self._build_response(request, record)
+
+        started = time.perf_counter()
+        response = self.inner.handle_request(request)
+        # Akış (SSE) yanıtları dahil gövde tamamen okunup kaydedilir
+        content = response.read()
+        response.close()
+        record = _to_record(response, content, time.perf_counter() - started)
+        self.store.append(key, request, record)
+        return self._build_response(request, record)
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class AsyncRecordReplayTransport(_RecordReplayBase, httpx.AsyncBaseTransport):
+    """Asenkron istemci (AsyncOpenAI) için kayıt/tekrar transport'u."""
+
+    def __init__(self, mode: str, inner: Optional[httpx.AsyncBaseTransport] = None, **kwargs):
+        super().__init__(mode, **kwargs)
+        self.inner = inner or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        key = request_key(request, body)
+
+        if self.mode == "replay":
+            record = self.store.next_response(key)
+            if record is None:
+                return _missing_fixture_response(request, key)
+            await asyncio.sleep(self._replay_delay(record))
+            return self._build_response(request, record)
+
+        started = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        content = await response.aread()
+        await response.aclose()
+        record = _to_record(response, content, time.perf_counter() - started)
+        await asyncio.to_thread(self.store.append, key, request, record)
+        return self._build_response(request, record)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
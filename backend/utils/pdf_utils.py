@@ -5,16 +5,44 @@ import base64
 from pathlib import Path
 from datetime import datetime
 import tempfile
-import pdfplumber
 import re
 import shutil
 import json
 from uuid import uuid4
-from playwright.async_api import async_playwright
 import asyncio
+import threading
+from collections import OrderedDict
+
+from config import (
+    ASSET_CACHE_MAX_BYTES,
+    PDF_BLOCK_EXTERNAL_REQUESTS,
+    PDF_PAGE_CACHE_ENABLED,
+    PDF_RENDER_SHARDS,
+    THUMBNAIL_PREWARM_PAGES,
+)
+from utils.browser_pool import BrowserPool, browser_session
+from utils.html_pages import PageSplit, shard_pages, split_html_pages
+from utils.metrics import RENDERS_IN_FLIGHT, track_stage
+from utils.render_cache import get_page_cache, merge_pdf_chunks
+from utils.render_engines import RenderJob, render_job
+from utils.structured_report import extract_report_metadata
+from utils.thumbnails import get_thumbnail_cache
 
 logger = logging.getLogger(__name__)
 
+# Playwright page.pdf() ayarları (sayfa önbelleği anahtarının da parçası)
+PDF_RENDER_OPTIONS = {
+    'format': 'A4',
+    'print_background': True,
+    'margin': {
+        'top': '0',
+        'right': '0',
+        'bottom': '0',
+        'left': '0'
+    },
+    'prefer_css_page_size': True
+}
+
 
 
 
@@ -288,6 +316,8 @@ def extract_text_from_pdf(filepath: str) -> Optional[str]:
             logger.error(f"PDF dosyası bulunamadı: {filepath}")
             return None
             
+        import pdfplumber
+
         # PDF'ten metin çıkar
         with pdfplumber.open(filepath) as pdf:
             text_content = ""
@@ -346,6 +376,8 @@ def get_pdf_info(pdf_path: Path) -> Optional[dict]:
         file_size = pdf_path.stat().st_size
         created_time = datetime.fromtimestamp(pdf_path.stat().st_ctime)
         
+        import pdfplumber
+
         with pdfplumber.open(pdf_path) as pdf:
             page_count = len(pdf.pages)
             
@@ -367,6 +399,10 @@ def encode_image_to_base64(image_path: Path) -> Optional[str]:
     """
     Encode an image file to base64 data URI.
     
+    Encoded results are kept in a size-bounded in-memory cache keyed by path,
+    modification time and size, so repeated renders (and batch runs sharing
+    the same logos/backgrounds) do not re-read and re-encode unchanged files.
+    
     Args:
         image_path: Path to the image file
         
@@ -374,6 +410,12 @@ def encode_image_to_base64(image_path: Path) -> Optional[str]:
         Base64 data URI string or None if error
     """
     try:
+        stat = os.stat(image_path)
+        cache_key = (str(Path(image_path).resolve()), stat.st_mtime_ns, stat.st_size)
+        cached = _asset_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         # Determine MIME type based on file extension
         mime_types = {
             '.jpg': 'image/jpeg',
@@ -386,19 +428,63 @@ def encode_image_to_base64(image_path: Path) -> Optional[str]:
             '.tiff': 'image/tiff'
         }
         
-        suffix = image_path.suffix.lower()
+        suffix = Path(image_path).suffix.lower()
         mime_type = mime_types.get(suffix, 'image/jpeg')
         
         # Read and encode the image
         with open(image_path, 'rb') as img_file:
             encoded = base64.b64encode(img_file.read()).decode('utf-8')
-            
-        return f"data:{mime_type};base64,{encoded}"
+        
+        data_uri = f"data:{mime_type};base64,{encoded}"
+        _asset_cache.put(cache_key, data_uri)
+        return data_uri
         
     except Exception as e:
         logger.error(f"Error encoding image {image_path}: {str(e)}")
         return None
 
+
+class _EncodedAssetCache:
+    """Thread-safe LRU cache of base64 data URIs bounded by total size."""
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, str]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: tuple) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return value
+    
+    def put(self, key: tuple, value: str) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+_asset_cache = _EncodedAssetCache(ASSET_CACHE_MAX_BYTES)
+
+
+def get_asset_cache_stats() -> Dict[str, int]:
+    """Base64 asset önbelleğinin isabet/ıskalama sayıları ve boyutu."""
+    return {"hits": _asset_cache.hits, "misses": _asset_cache.misses, "bytes": _asset_cache._size}
+
 def get_project_images_map(project_name: str) -> Dict[str, str]:
     """
     Create a mapping of image filenames to their base64 data URIs.
@@ -603,117 +689,6 @@ def replace_image_placeholders_in_html(html_content: str, project_name: str) ->
     
     return modified_html
 
-# Example of how to integrate this into your existing generate_pdf_from_html function:
-# def generate_pdf_from_html_with_images(html_content: str, project_name: str, report_id: str) -> Path:
-#     """
-#     Enhanced version that better handles SVG and image replacement for WeasyPrint.
-#     """
-#     from weasyprint import HTML, CSS
-#     from weasyprint.text.fonts import FontConfiguration
-#     import re
-    
-#     logger.info(f"[PDF] Starting PDF generation for project: {project_name}")
-    
-#     # Get all available images and assets
-#     images_map = get_project_images_map(project_name)
-#     assets_map = load_project_assets(project_name)
-#     all_images = {**images_map, **assets_map}
-    
-#     logger.info(f"[PDF] Available assets: {list(all_images.keys())}")
-    
-#     # Enhanced replacement function that handles img tags
-#     def replace_all_image_references(html: str) -> str:
-#         """Replace all image references with base64 data URIs"""
-        
-#         # Pattern for img src attributes
-#         img_pattern = r'<img\s+([^>]*?)src\s*=\s*["\']?([^"\'\s>]+)["\']?([^>]*?)>'
-        
-#         def replace_img(match):
-#             before = match.group(1) or ''
-#             src = match.group(2)
-#             after = match.group(3) or ''
-            
-#             # Clean the src to get just the filename
-#             filename = src.split('/')[-1].split('.')[0]
-            
-#             if filename in all_images:
-#                 logger.info(f"[PDF] Replacing image: {filename}")
-#                 return f'<img {before}src="{all_images[filename]}"{after}>'
-#             else:
-#                 logger.warning(f"[PDF] Image not found: {filename} (from src: {src})")
-#                 # Try to find a close match
-#                 for key in all_images.keys():
-#                     if key.lower() in filename.lower() or filename.lower() in key.lower():
-#                         logger.info(f"[PDF] Using close match: {key} for {filename}")
-#                         return f'<img {before}src="{all_images[key]}"{after}>'
-#                 return match.group(0)
-        
-#         html = re.sub(img_pattern, replace_img, html, flags=re.IGNORECASE | re.DOTALL)
-        
-#         return html
-    
-#     # Replace all image references
-#     html_with_images = replace_all_image_references(html_content)
-    
-#     # Additional CSS for better PDF rendering
-#     additional_css = """
-#     <style>
-#         /* Ensure images don't break across pages */
-#         img { 
-#             page-break-inside: avoid; 
-#             max-width: 100%;
-#             height: auto;
-#         }
-#         .page { 
-#             page-break-after: always;
-#             page-break-inside: avoid;
-#         }
-#         /* Better print rendering */
-#         @media print {
-#             .page {
-#                 margin: 0;
-#                 padding: 0;
-#             }
-#         }
-#     </style>
-#     """
-    
-#     # Insert additional CSS before closing head tag
-#     if '</head>' in html_with_images:
-#         html_with_images = html_with_images.replace('</head>', additional_css + '</head>')
-    
-#     # Save debug HTML
-#     debug_path = Path(f"debug_{project_name}_final.html")
-#     with open(debug_path, 'w', encoding='utf-8') as f:
-#         f.write(html_with_images)
-#     logger.info(f"[PDF] Debug HTML saved to: {debug_path}")
-    
-#     # Get PDF output path
-#     pdf_path = get_report_path(project_name, report_id)
-#     pdf_path.parent.mkdir(parents=True, exist_ok=True)
-    
-#     try:
-#         # Configure fonts
-#         font_config = FontConfiguration()
-        
-#         # Create PDF with specific options for better rendering
-#         HTML(
-#             string=html_with_images,
-#             base_url=str(Path(__file__).parent.parent)
-#         ).write_pdf(
-#             str(pdf_path),
-#             font_config=font_config,
-#             presentational_hints=True,  # Better CSS support
-#             optimize_images=True,       # Optimize embedded images
-#         )
-        
-#         logger.info(f"[PDF] PDF generated successfully: {pdf_path}")
-#         return pdf_path
-        
-#     except Exception as e:
-#         logger.error(f"[PDF] Error generating PDF: {str(e)}", exc_info=True)
-#         raise Exception(f"Failed to generate PDF: {str(e)}")
-
 def replace_image_placeholders_in_html(html_content: str, project_name: str) -> str:
     """
     Replace image filename placeholders in HTML with base64 encoded images.
@@ -853,68 +828,97 @@ def debug_html_content(html_content: str, project_name: str):
 
 logger = logging.getLogger(__name__)
 
-async def generate_pdf_with_playwright(html_content: str, project_name: str, report_id: str) -> Path:
+def replace_image_references(html: str, all_images: Dict[str, str]) -> str:
     """
-    Generate PDF using Playwright with async API.
-    This will render the HTML exactly as a browser would see it.
+    Replace <img src> and CSS background-image references with the matching
+    data URIs from all_images (uploaded images + project assets).
     """
-    logger.info(f"[PDF] Starting Playwright PDF generation for project: {project_name}")
-    
-    # Get all available images and assets
-    images_map = get_project_images_map(project_name)
-    assets_map = load_project_assets(project_name)
-    all_images = {**images_map, **assets_map}
+    # Handle img src
+    img_pattern = r'<img\s+([^>]*?)src\s*=\s*["\']?([^"\'\s>]+)["\']?([^>]*?)>'
     
-    # Function to replace image references with base64
-    def replace_image_references(html: str) -> str:
-        # Handle img src
-        img_pattern = r'<img\s+([^>]*?)src\s*=\s*["\']?([^"\'\s>]+)["\']?([^>]*?)>'
+    def replace_img(match):
+        before = match.group(1) or ''
+        src = match.group(2)
+        after = match.group(3) or ''
         
-        def replace_img(match):
-            before = match.group(1) or ''
-            src = match.group(2)
-            after = match.group(3) or ''
-            
-            # Clean the src to get just the filename
-            filename = src.split('/')[-1].split('.')[0]
-            
-            # Try to find the image with various normalizations
-            for key in all_images.keys():
-                if (key == filename or 
-                    key.split('.')[0] == filename or
-                    key.lower() == filename.lower() or
-                    key.replace('İ', 'I').replace('ı', 'i').replace('ş', 's').replace('ğ', 'g') == filename):
-                    logger.info(f"[PDF] Replacing image: {filename} -> {key}")
-                    return f'<img {before}src="{all_images[key]}"{after}>'
-            
-            logger.warning(f"[PDF] Image not found: {filename}")
-            return match.group(0)
-        
-        html = re.sub(img_pattern, replace_img, html, flags=re.IGNORECASE | re.DOTALL)
+        # Clean the src to get just the filename
+        filename = src.split('/')[-1].split('.')[0]
         
-        # Handle CSS background-image
-        bg_pattern = r'background-image:\s*url\(["\']?([^"\')]+)["\']?\)'
+        # Try to find the image with various normalizations
+        for key in all_images.keys():
+            if (key == filename or 
+                key.split('.')[0] == filename or
+                key.lower() == filename.lower() or
+                key.replace('İ', 'I').replace('ı', 'i').replace('ş', 's').replace('ğ', 'g') == filename):
+                logger.info(f"[PDF] Replacing image: {filename} -> {key}")
+                return f'<img {before}src="{all_images[key]}"{after}>'
         
-        def replace_bg(match):
-            bg_url = match.group(1)
-            filename = bg_url.split('/')[-1].split('.')[0]
-            
-            for key in all_images.keys():
-                if (key == filename or 
-                    key.split('.')[0] == filename or
-                    key.lower() == filename.lower()):
-                    logger.info(f"[PDF] Replacing background: {filename} -> {key}")
-                    return f'background-image: url({all_images[key]})'
-            
-            logger.warning(f"[PDF] Background image not found: {filename}")
-            return match.group(0)
+        logger.warning(f"[PDF] Image not found: {filename}")
+        return match.group(0)
+    
+    html = re.sub(img_pattern, replace_img, html, flags=re.IGNORECASE | re.DOTALL)
+    
+    # Handle CSS background-image
+    bg_pattern = r'background-image:\s*url\(["\']?([^"\')]+)["\']?\)'
+    
+    def replace_bg(match):
+        bg_url = match.group(1)
+        filename = bg_url.split('/')[-1].split('.')[0]
         
-        html = re.sub(bg_pattern, replace_bg, html, flags=re.IGNORECASE)
+        for key in all_images.keys():
+            if (key == filename or 
+                key.split('.')[0] == filename or
+                key.lower() == filename.lower()):
+                logger.info(f"[PDF] Replacing background: {filename} -> {key}")
+                return f'background-image: url({all_images[key]})'
         
-        return html
+        logger.warning(f"[PDF] Background image not found: {filename}")
+        return match.group(0)
+    
+    html = re.sub(bg_pattern, replace_bg, html, flags=re.IGNORECASE)
+    
+    return html
+
+
+async def generate_pdf_with_playwright(html_content: str, project_name: str, report_id: str,
+                                       use_page_cache: bool = PDF_PAGE_CACHE_ENABLED,
+                                       shards: int = PDF_RENDER_SHARDS,
+                                       pool: Optional[BrowserPool] = None,
+                                       wait_for_worker: bool = False,
+                                       engine: Optional[str] = None) -> Path:
+    """
+    Generate the report PDF. By default this renders the HTML exactly as a
+    browser would see it (Playwright).
+    
+    When the document is built from `.page` blocks with forced page breaks,
+    each page is rendered separately and cached by content hash, so editing
+    one section only re-renders that section's page. Pages that need
+    rendering are rendered concurrently in separate browser contexts.
     
-    # Replace all image references with base64
-    html_with_images = replace_image_references(html_content)
+    Without a pool and with RENDER_WORKERS > 0 the render runs in an
+    out-of-process worker; RenderQueueFull is raised when all workers are
+    busy and the queue is full, unless wait_for_worker is set.
+    
+    The engine is chosen per call (engine), per template (reports.json) or by
+    PDF_RENDER_ENGINE; when the browser is saturated the job falls back to a
+    lighter engine (see utils/render_engines.py).
+    
+    Thumbnails of the first THUMBNAIL_PREWARM_PAGES pages are produced as a
+    by-product (see utils/thumbnails.py); failures there never fail the render.
+    """
+    logger.info(f"[PDF] Starting PDF generation for project: {project_name}")
+    
+    # Structured raporlar şablon adını ve içeriği gömülü taşır; Chromium'a gitmez
+    html_content, template, content = extract_report_metadata(html_content)
+    
+    with track_stage("image_rewrite"):
+        # Get all available images and assets
+        images_map = get_project_images_map(project_name)
+        assets_map = load_project_assets(project_name)
+        all_images = {**images_map, **assets_map}
+        
+        # Replace all image references with base64
+        html_with_images = replace_image_references(html_content, all_images)
     
     # Save debug HTML
     debug_path = Path(f"debug_{project_name}_playwright.html")
@@ -922,49 +926,131 @@ async def generate_pdf_with_playwright(html_content: str, project_name: str, rep
         f.write(html_with_images)
     logger.info(f"[PDF] Debug HTML saved to: {debug_path}")
     
-    # Generate PDF with Playwright
     pdf_path = get_report_path(project_name, report_id)
     pdf_path.parent.mkdir(parents=True, exist_ok=True)
     
-    async with async_playwright() as p:
-        # Launch browser
-        browser = await p.chromium.launch(
-            headless=True,
-            args=['--disable-dev-shm-usage']  # Helps with Docker/limited memory
-        )
-        
+    job = RenderJob(html=html_with_images, pdf_path=pdf_path, project_name=project_name, images=all_images,
+                    template=template, content=content, use_page_cache=use_page_cache, shards=shards,
+                    pool=pool, wait_for_worker=wait_for_worker)
+    with track_stage("render"), RENDERS_IN_FLIGHT.track():
+        pdf_path = await render_job(job, engine)
+    
+    if THUMBNAIL_PREWARM_PAGES > 0:
         try:
-            # Create page
-            page = await browser.new_page()
-            
-            # Set viewport to A4 size
-            await page.set_viewport_size({"width": 794, "height": 1123})
-            
+            with track_stage("thumbnails"):
+                await asyncio.to_thread(get_thumbnail_cache().prewarm, pdf_path)
+        except Exception as e:
+            logger.warning(f"[PDF] Önizleme üretilemedi: {pdf_path} ({e})")
+    return pdf_path
+
+
+async def render_html_to_pdf(html: str, pdf_path: Path,
+                             use_page_cache: bool = PDF_PAGE_CACHE_ENABLED,
+                             shards: int = PDF_RENDER_SHARDS,
+                             pool: Optional[BrowserPool] = None) -> Path:
+    """
+    Render a ready-to-print HTML document (images already inlined) to a PDF file.
+    
+    Args:
+        html: Complete HTML document
+        pdf_path: Output PDF path
+        use_page_cache: Render `.page` blocks separately and reuse cached pages
+        shards: Without the page cache, split the pages into this many shards
+            and render them concurrently in separate browser contexts (<= 1 disables)
+        pool: Shared browser pool; a temporary browser is launched when omitted
+    
+    Returns:
+        Path of the written PDF
+    """
+    split = split_html_pages(html) if (use_page_cache or shards > 1) else None
+    
+    # Sayfa bazlı render: yalnızca değişen sayfalar Chromium'a gönderilir
+    if split is not None and use_page_cache:
+        return await _render_pages_incremental(split, pdf_path, pool)
+    
+    if split is not None and shards > 1:
+        documents = [split.document_for(shard) for shard in shard_pages(split.pages, shards)]
+    else:
+        documents = [html]
+    
+    async with browser_session(pool) as session:
+        chunks = await _render_documents(session, documents)
+    
+    if len(chunks) == 1:
+        with open(pdf_path, 'wb') as f:
+            f.write(chunks[0])
+    else:
+        merge_pdf_chunks(chunks, pdf_path)
+    
+    logger.info(f"[PDF] PDF generated successfully: {pdf_path} ({len(documents)} shard(s))")
+    return pdf_path
+
+
+async def _render_document_pdf(context, html: str) -> bytes:
+    """Render a complete HTML document to PDF bytes on a fresh page of a browser context."""
+    page = await context.new_page()
+    
+    try:
+        # Set viewport to A4 size
+        await page.set_viewport_size({"width": 794, "height": 1123})
+        
+        if PDF_BLOCK_EXTERNAL_REQUESTS:
+            # All requests are served locally or blocked, so there is nothing to
+            # wait for on the network; only fonts need to finish loading
+            await page.set_content(html, wait_until='load')
+            await page.evaluate("document.fonts.ready.then(() => true)")
+        else:
             # Load the HTML content
-            await page.set_content(html_with_images, wait_until='networkidle')
+            await page.set_content(html, wait_until='networkidle')
             
             # Wait a bit for any async rendering
             await page.wait_for_timeout(1000)
-            
-            # Generate PDF
-            await page.pdf(
-                path=str(pdf_path),
-                format='A4',
-                print_background=True,
-                margin={
-                    'top': '0',
-                    'right': '0',
-                    'bottom': '0',
-                    'left': '0'
-                },
-                prefer_css_page_size=True
-            )
-            
-            logger.info(f"[PDF] PDF generated successfully: {pdf_path}")
-            
-        finally:
-            await browser.close()
+        
+        # Generate PDF
+        with track_stage("page_pdf"):
+            return await page.pdf(**PDF_RENDER_OPTIONS)
+    finally:
+        await page.close()
+
+
+async def _render_documents(pool: BrowserPool, documents: List[str]) -> List[bytes]:
+    """
+    Render several HTML documents concurrently, each in its own browser context.
+    The pool bounds how many renders are in flight. Results keep the input order.
+    """
+    async def render_in_context(html: str) -> bytes:
+        async with pool.context() as context:
+            return await _render_document_pdf(context, html)
     
+    return list(await asyncio.gather(*(render_in_context(doc) for doc in documents)))
+
+
+async def _render_pages_incremental(split: PageSplit, pdf_path: Path,
+                                    pool: Optional[BrowserPool] = None) -> Path:
+    """
+    Render only the pages missing from the page cache and merge all page PDFs.
+    The browser is not launched at all when every page is already cached.
+    """
+    cache = get_page_cache()
+    keys = [cache.key_for(split, page_html, PDF_RENDER_OPTIONS) for page_html in split.pages]
+    chunks = [cache.get(key) for key in keys]
+    missing = [i for i, chunk in enumerate(chunks) if chunk is None]
+    
+    logger.info(
+        f"[PDF] Page cache: {len(chunks) - len(missing)}/{len(chunks)} pages cached, "
+        f"rendering {len(missing)} page(s)"
+    )
+    
+    if missing:
+        documents = [split.document_for([split.pages[i]]) for i in missing]
+        async with browser_session(pool) as session:
+            rendered = await _render_documents(session, documents)
+        for i, chunk in zip(missing, rendered):
+            chunks[i] = chunk
+            cache.put(keys[i], chunk)
+    
+    merge_pdf_chunks(chunks, pdf_path)
+    logger.info(f"[PDF] PDF generated successfully: {pdf_path}")
     return pdf_path
 
 
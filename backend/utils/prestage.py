@@ -0,0 +1,271 @@
+"""
+Yükleme anında LLM girdilerinin ön hazırlığı.
+
+Rapor üretimindeki pahalı hazırlık adımları (PDF'lerin vector store'a
+yüklenmesi ve indekslenmesi, görsellerin analiz edilmesi) kullanıcı "üret"e
+bastığında değil, dosyalar yüklendiği anda arka planda başlatılır:
+
+    PDF yüklendi    -> projenin vector store'u yeni dosyayla eşitlenir
+    Görsel yüklendi -> görsel analizi (önbelleklenen yanıt id'si) yenilenir
+
+Her iki adım da üretimin kullandığı fonksiyonları aynı girdilerle çağırır;
+sonuçlar vector store kaydına ve LLM önbelleğine yazıldığı için üretim
+sırasındaki çağrılar anında döner. Üretim (_prepare_generation) yalnızca
+henüz bitmemiş hazırlıkları bekler.
+
+Art arda gelen yüklemeler PRESTAGE_DEBOUNCE_SECONDS içinde birleştirilir ve
+proje başına tek bir hazırlık çalışır; hazırlık sırasında gelen yüklemeler bir
+sonraki turda işlenir. Dosya bazında hazır olma durumu bellekte tutulur.
+"sections" modunda (REPORT_GENERATION_MODE) bileşen bazlı store'lar eşitlenir.
+"""
+import datetime
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Set
+
+from config import (
+    PRESTAGE_DEBOUNCE_SECONDS,
+    PRESTAGE_ENABLED,
+    PRESTAGE_WAIT_TIMEOUT,
+    PRESTAGE_WORKERS,
+    REPORT_GENERATION_MODE,
+)
+from utils.metrics import track_stage
+
+logger = logging.getLogger(__name__)
+
+VECTOR_STORE_TASK = "vector_store"
+IMAGE_ANALYSIS_TASK = "image_analysis"
+# Yüklenen dosya türü -> hazırlık adımı
+UPLOAD_TASKS = {"pdf": VECTOR_STORE_TASK, "image": IMAGE_ANALYSIS_TASK}
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat()
+
+
+def _project_key(project_name: str) -> str:
+    from utils.oai import slugify
+
+    return slugify(project_name)
+
+
+def _sync_vector_store(project_name: str, components: Set[Optional[str]]) -> None:
+    """Üretimin kullanacağı vector store'ları (proje veya bileşen bazlı) klasördeki PDF'lerle eşitler."""
+    from utils.oai import ACTIVE_UPLOADS_PATH, component_pdf_files, slugify
+    from utils.openai_client import get_client
+    from utils.vector_store import get_or_create_project_vector_store
+
+    slug = slugify(project_name)
+    pdf_folder = ACTIVE_UPLOADS_PATH / slug / "pdfs"
+    if not pdf_folder.exists() or not any(pdf_folder.glob("*.pdf")):
+        logger.info(f"[PRESTAGE] {project_name}: eşitlenecek PDF yok")
+        return
+
+    client = get_client()
+    if REPORT_GENERATION_MODE == "sections":
+        for component_name in sorted(name for name in components if name):
+            pdf_files = component_pdf_files(pdf_folder, component_name)
+            if pdf_files:
+                get_or_create_project_vector_store(f"{slug}:{component_name}", dir_pdfs=str(pdf_folder),
+                                                   client=client, pdf_files=[str(path) for path in pdf_files])
+    else:
+        get_or_create_project_vector_store(slug, dir_pdfs=str(pdf_folder), client=client)
+
+
+def _analyze_images(project_name: str) -> None:
+    """Görsel analizini üretimle aynı istekle çalıştırır; yanıt id'si LLM önbelleğine yazılır."""
+    from utils.oai import IMAGE_ANALYSIS_PROMPT, generate_image_analysis_response
+
+    generate_image_analysis_response(project_name=project_name, user_text=IMAGE_ANALYSIS_PROMPT)
+
+
+class UploadPrestager:
+    """Yükleme olaylarını proje bazında toplayıp hazırlık adımlarını arka planda çalıştırır."""
+
+    def __init__(self, workers: int = PRESTAGE_WORKERS, debounce: float = PRESTAGE_DEBOUNCE_SECONDS):
+        self.debounce = debounce
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="prestage")
+        # proje anahtarı -> {"project_name", "files", "dirty", "active", "urgent", "last_event"}
+        self._projects: Dict[str, Dict[str, Any]] = {}
+        self._cond = threading.Condition()
+
+    def _state(self, project_name: str) -> Dict[str, Any]:
+        return self._projects.setdefault(_project_key(project_name), {
+            "project_name": project_name,
+            "files": {},
+            # adım -> değişen bileşenler (proje bazlı store için None)
+            "dirty": {},
+            "active": False,
+            "urgent": False,
+            "last_event": 0.0,
+        })
+
+    def _schedule(self, state: Dict[str, Any], task: str, component_name: Optional[str]) -> None:
+        """Çağıran _cond'u tutar. Adımı kirli işaretler; proje için hazırlık çalışmıyorsa başlatır."""
+        state["dirty"].setdefault(task, set()).add(component_name)
+        state["last_event"] = time.monotonic()
+        if not state["active"]:
+            state["active"] = True
+            self._executor.submit(self._run, state)
+        self._cond.notify_all()
+
+    def notify_upload(self, project_name: str, kind: str, filename: str,
+                      component_name: Optional[str] = None) -> None:
+        """
+        Yeni yüklenen bir dosyayı bildirir (save_uploaded_pdf / save_uploaded_image).
+
+        Args:
+            project_name: Proje adı
+            kind: "pdf" veya "image"
+            filename: Kaydedilen dosya adı
+            component_name: Dosyanın bileşeni ("sections" modunda store seçimi için)
+        """
+        if not PRESTAGE_ENABLED:
+            return
+        task = UPLOAD_TASKS[kind]
+        with self._cond:
+            state = self._state(project_name)
+            state["files"][filename] = {
+                "kind": kind,
+                "task": task,
+                "component": component_name,
+                "status": "pending",
+                "error": None,
+                "uploaded_at": _now(),
+                "ready_at": None,
+            }
+            self._schedule(state, task, component_name)
+        logger.info(f"[PRESTAGE] {project_name}: {filename} için {task} hazırlığı sıraya alındı")
+
+    def notify_removed(self, project_name: str, kind: str, filename: str,
+                       component_name: Optional[str] = None) -> None:
+        """Silinen bir dosyayı bildirir; ilgili store/analiz dosyasız haliyle yenilenir."""
+        if not PRESTAGE_ENABLED or kind not in UPLOAD_TASKS:
+            return
+        with self._cond:
+            state = self._state(project_name)
+            state["files"].pop(filename, None)
+            self._schedule(state, UPLOAD_TASKS[kind], component_name)
+
+    def forget(self, project_name: str) -> None:
+        """Aktif rapor temizlendiğinde projenin dosya durumlarını siler (çalışan hazırlık tamamlanır)."""
+        with self._cond:
+            state = self._projects.get(_project_key(project_name))
+            if state is not None and not state["active"]:
+                self._projects.pop(_project_key(project_name), None)
+
+    def _run(self, state: Dict[str, Any]) -> None:
+        """Kirli adımlar bitene kadar: son yüklemeden sonra debounce kadar bekle, adımları çalıştır."""
+        project_name = state["project_name"]
+        try:
+            while True:
+                with self._cond:
+                    while not state["urgent"]:
+                        remaining = state["last_event"] + self.debounce - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    tasks, state["dirty"] = state["dirty"], {}
+                    if not tasks:
+                        # Boşluk kontrolüyle aynı kritik bölümde kapatılır; sonra gelen
+                        # yükleme active=False görür ve yeni bir tur başlatır
+                        self._finish(state)
+                        return
+                    for info in state["files"].values():
+                        if info["task"] in tasks and info["status"] != "ready":
+                            info["status"] = "running"
+
+                for task, components in tasks.items():
+                    error = None
+                    started = time.perf_counter()
+                    try:
+                        with track_stage(f"prestage_{task}"):
+                            if task == VECTOR_STORE_TASK:
+                                _sync_vector_store(project_name, components)
+                            else:
+                                _analyze_images(project_name)
+                        logger.info(f"[PRESTAGE] {project_name}: {task} hazır "
+                                    f"({time.perf_counter() - started:.1f}s)")
+                    except Exception as e:
+                        error = str(e)
+                        logger.warning(f"[PRESTAGE] {project_name}: {task} hazırlığı başarısız, "
+                                       f"üretim sırasında yeniden denenecek: {e}")
+                    with self._cond:
+                        for info in state["files"].values():
+                            # Hazırlık sürerken yeniden yüklenenler (pending) bir sonraki turu bekler
+                            if info["task"] == task and info["status"] == "running":
+                                info.update(status="failed" if error else "ready", error=error,
+                                            ready_at=None if error else _now())
+        except BaseException:
+            with self._cond:
+                self._finish(state)
+            raise
+
+    def _finish(self, state: Dict[str, Any]) -> None:
+        """Çağıran _cond'u tutar. Projenin hazırlığını bitmiş işaretler ve bekleyenleri uyandırır."""
+        state["active"] = False
+        state["urgent"] = False
+        self._cond.notify_all()
+
+    def wait_until_ready(self, project_name: str, timeout: float = PRESTAGE_WAIT_TIMEOUT) -> Dict[str, Any]:
+        """
+        Projenin bekleyen hazırlıklarını (debounce beklemeden) başlatır ve bitmesini bekler.
+        Süre aşılırsa beklemeden döner; üretim eksik kalan adımları kendisi yapar.
+        """
+        with self._cond:
+            state = self._projects.get(_project_key(project_name))
+            if state is not None and state["active"]:
+                state["urgent"] = True
+                self._cond.notify_all()
+                started = time.perf_counter()
+                if not self._cond.wait_for(lambda: not state["active"], timeout):
+                    logger.warning(f"[PRESTAGE] {project_name}: hazırlık {timeout:.0f}s içinde bitmedi, "
+                                   "üretim beklemeden devam ediyor")
+                else:
+                    logger.info(f"[PRESTAGE] {project_name}: bitmemiş hazırlıklar "
+                                f"{time.perf_counter() - started:.1f}s beklendi")
+        return self.status(project_name)
+
+    def status(self, project_name: str) -> Dict[str, Any]:
+        """Dosya bazında hazır olma durumu."""
+        with self._cond:
+            state = self._projects.get(_project_key(project_name))
+            files = {name: dict(info) for name, info in (state or {}).get("files", {}).items()}
+            active = bool(state and state["active"])
+        counts: Dict[str, int] = {}
+        for info in files.values():
+            counts[info["status"]] = counts.get(info["status"], 0) + 1
+        return {
+            "project_name": project_name,
+            "enabled": PRESTAGE_ENABLED,
+            "active": active,
+            "ready": not active and not counts.get("pending") and not counts.get("running"),
+            "counts": counts,
+            "files": files,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_prestager: Optional[UploadPrestager] = None
+_prestager_lock = threading.Lock()
+
+
+def get_prestager() -> UploadPrestager:
+    """Süreç genelinde paylaşılan ön hazırlık yöneticisini döndürür."""
+    global _prestager
+    with _prestager_lock:
+        if _prestager is None:
+            _prestager = UploadPrestager()
+        return _prestager
+
+
+def shutdown_prestager() -> None:
+    """Bekleyen hazırlıkları iptal eder (uygulama kapanırken)."""
+    with _prestager_lock:
+        if _prestager is not None:
+            _prestager.shutdown()
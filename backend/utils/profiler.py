@@ -0,0 +1,323 @@
+"""
+İstek bazında örnekleyici (sampling) profiler.
+
+Profil oturumu şu durumlarda açılır:
+- istekte X-Profile: 1 başlığı geçerli bir X-Admin-Token ile birlikte varsa
+  (ADMIN_TOKEN boşsa başlık yok sayılır),
+- yönetim anahtarı açıksa (PROFILER_ENABLED, POST /admin/profiler) her istek için,
+- PROFILER_SLOW_REQUEST_SECONDS > 0 ise her istek için; bu durumda profil
+  yalnızca istek eşiği aştıysa saklanır.
+
+Tek bir arka plan thread'i PROFILER_SAMPLE_INTERVAL aralıkla tüm açık
+oturumları örnekler. Async farkındalık: isteğin asyncio task'ı o anda
+çalışıyorsa event loop thread'inin gerçek yığını, bekliyorsa coroutine
+zinciri (cr_await) örneklenir ve yaprakta "<await>" işaretlenir; böylece
+beklenen süre de bekleyen koda yazılır. asyncio.to_thread/run_in_threadpool
+ile çalışan senkron kod, thread'in contextvars bağlamındaki oturum üzerinden
+aynı isteğe bağlanır ("[thread ...]" kökü altında).
+
+Çıktı collapsed-stack biçimindedir (flamegraph.pl, speedscope ve inferno
+doğrudan okur) ve PROFILER_DIR altında en fazla PROFILER_MAX_PROFILES dosya
+tutulur.
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import thread as futures_thread
+from datetime import datetime
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Any, Dict, List, Optional
+
+from config import (
+    PROFILER_DIR,
+    PROFILER_ENABLED,
+    PROFILER_MAX_PROFILES,
+    PROFILER_SAMPLE_INTERVAL,
+    PROFILER_SLOW_REQUEST_SECONDS,
+)
+from utils.admin_auth import ADMIN_TOKEN_HEADER, is_admin_token
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PROFILE_HEADER = b"x-profile"
+PROFILE_SUFFIX = ".folded"
+
+_current_session: contextvars.ContextVar[Optional["ProfileSession"]] = contextvars.ContextVar(
+    "profile_session", default=None)
+
+# Worker thread'lerinin çalıştırdığı işin contextvars bağlamını tutan çerçeveler
+_WORK_ITEM_CODE = futures_thread._WorkItem.run.__code__
+try:
+    from anyio._backends._asyncio import WorkerThread as _AnyioWorkerThread
+    _ANYIO_WORKER_CODE: Optional[CodeType] = _AnyioWorkerThread.run.__code__
+except (ImportError, AttributeError):
+    _ANYIO_WORKER_CODE = None
+
+_labels: Dict[CodeType, str] = {}
+
+
+def _label(code: CodeType) -> str:
+    label = _labels.get(code)
+    if label is None:
+        path = Path(code.co_filename)
+        try:
+            filename = str(path.resolve().relative_to(BASE_DIR))
+        except ValueError:
+            filename = path.name
+        label = _labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+    return label
+
+
+def _thread_stack(frame: Optional[FrameType], root_code: Optional[CodeType] = None) -> List[str]:
+    """Çerçeve zincirini kökten yaprağa etiket listesine çevirir; root_code verilirse oradan başlar."""
+    codes = []
+    while frame is not None:
+        codes.append(frame.f_code)
+        frame = frame.f_back
+    codes.reverse()
+    if root_code is not None and root_code in codes:
+        codes = codes[codes.index(root_code):]
+    return [_label(code) for code in codes]
+
+
+def _task_stack(task: asyncio.Task, depth: int = 0) -> List[str]:
+    """Askıdaki bir task'ın await zinciri; başka bir task'ı bekliyorsa onun içine iner."""
+    labels = []
+    coro: Any = task.get_coro()
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        labels.append(_label(frame.f_code))
+        awaited = getattr(coro, "cr_await", None)
+        coro = awaited if awaited is not None else getattr(coro, "gi_yieldfrom", None)
+        if coro is not None and not hasattr(coro, "cr_frame") and not hasattr(coro, "gi_frame"):
+            break
+    waiter = getattr(task, "_fut_waiter", None)
+    if isinstance(waiter, asyncio.Task) and depth < 8:
+        return labels + _task_stack(waiter, depth + 1)
+    return labels + ["<await>"]
+
+
+def _context_of_worker(frame: Optional[FrameType]) -> Optional[contextvars.Context]:
+    """Worker thread'inin yığınında işin çalıştığı contextvars bağlamını bulur."""
+    while frame is not None:
+        code = frame.f_code
+        if code is _ANYIO_WORKER_CODE:
+            context = frame.f_locals.get("context")
+            return context if isinstance(context, contextvars.Context) else None
+        if code is _WORK_ITEM_CODE:
+            fn = getattr(frame.f_locals.get("self"), "fn", None)
+            if isinstance(fn, functools.partial):
+                fn = fn.func
+            context = getattr(fn, "__self__", None)
+            return context if isinstance(context, contextvars.Context) else None
+        frame = frame.f_back
+    return None
+
+
+class ProfileSession:
+    """Tek bir isteğin örnekleri."""
+
+    def __init__(self, name: str, forced: bool):
+        self.id = uuid.uuid4().hex[:8]
+        self.name = name
+        self.forced = forced
+        self.started = time.perf_counter()
+        self.task = asyncio.current_task()
+        self.loop_thread = threading.get_ident()
+        self.samples: Counter = Counter()
+        self.duration = 0.0
+
+    def sample(self, frames: Dict[int, FrameType], worker_sessions: Dict[int, "ProfileSession"]) -> None:
+        task = self.task
+        if task is not None and not task.done():
+            current_tasks = getattr(asyncio.tasks, "_current_tasks", {})
+            if current_tasks.get(task.get_loop()) is task:
+                stack = ["[task]"] + _thread_stack(frames.get(self.loop_thread), task.get_coro().cr_code)
+            else:
+                stack = ["[task]"] + _task_stack(task)
+            self.samples[";".join(stack)] += 1
+
+        for thread_id, session in worker_sessions.items():
+            if session is self and thread_id in frames:
+                name = _thread_names.get(thread_id, str(thread_id))
+                stack = [f"[thread {name}]"] + _thread_stack(frames[thread_id])
+                self.samples[";".join(stack)] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+_thread_names: Dict[int, str] = {}
+
+
+class SamplingProfiler:
+    """Açık oturumları tek bir arka plan thread'i ile örnekleyen profiler."""
+
+    def __init__(self, profiles_dir: Path = PROFILER_DIR, interval: float = PROFILER_SAMPLE_INTERVAL,
+                 enabled: bool = PROFILER_ENABLED, slow_threshold: float = PROFILER_SLOW_REQUEST_SECONDS,
+                 max_profiles: int = PROFILER_MAX_PROFILES):
+        self.profiles_dir = Path(profiles_dir)
+        self.interval = interval
+        self.enabled = enabled
+        self.slow_threshold = slow_threshold
+        self.max_profiles = max_profiles
+        self._sessions: Dict[str, ProfileSession] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --- oturumlar ---
+
+    def wants(self, forced: bool) -> bool:
+        return forced or self.enabled or self.slow_threshold > 0
+
+    def start(self, name: str, forced: bool = False) -> ProfileSession:
+        session = ProfileSession(name, forced=forced or self.enabled)
+        _current_session.set(session)
+        with self._lock:
+            self._sessions[session.id] = session
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return session
+
+    def stop(self, session: ProfileSession) -> Optional[Path]:
+        """Oturumu kapatır; zorunlu veya eşiği aşan istekler için profil dosyasını yazar."""
+        session.duration = time.perf_counter() - session.started
+        with self._lock:
+            self._sessions.pop(session.id, None)
+        slow = self.slow_threshold > 0 and session.duration >= self.slow_threshold
+        if not (session.forced or slow) or not session.samples:
+            return None
+        return self._save(session)
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                sessions = list(self._sessions.values())
+            if not sessions:
+                self._wake.clear()
+                self._wake.wait()
+                continue
+            frames = sys._current_frames()
+            frames.pop(own_id, None)
+            loop_threads = {session.loop_thread for session in sessions}
+            # Worker thread'leri, çalıştırdıkları işin bağlamındaki oturuma bağlanır
+            worker_sessions = {}
+            for thread_id, frame in frames.items():
+                if thread_id in loop_threads:
+                    continue
+                context = _context_of_worker(frame)
+                session = context.get(_current_session) if context is not None else None
+                if session is not None:
+                    worker_sessions[thread_id] = session
+            if worker_sessions:
+                _thread_names.update((t.ident, t.name) for t in threading.enumerate() if t.ident in worker_sessions)
+            for session in sessions:
+                try:
+                    session.sample(frames, worker_sessions)
+                except Exception as e:
+                    logger.debug(f"[PROFILER] Örnek alınamadı: {e}")
+            del frames
+            time.sleep(self.interval)
+
+    # --- saklama ---
+
+    def _save(self, session: ProfileSession) -> Path:
+        self.profiles_dir.mkdir(parents=True, exist_ok=True)
+        slug = re.sub(r"[^\w]+", "_", session.name).strip("_")[:80]
+        filename = (f"{datetime.now().strftime('%Y%m%d-%H%M%S')}_{slug}_"
+                    f"{int(session.duration * 1000)}ms_{session.id}{PROFILE_SUFFIX}")
+        path = self.profiles_dir / filename
+        path.write_text(session.collapsed(), encoding="utf-8")
+        logger.info(f"[PROFILER] {session.name} {session.duration:.2f}s, "
+                    f"{sum(session.samples.values())} örnek -> {path.name}")
+        self.prune()
+        return path
+
+    def prune(self) -> None:
+        profiles = sorted(self.profiles_dir.glob(f"*{PROFILE_SUFFIX}"), key=lambda p: p.stat().st_mtime)
+        for path in profiles[:max(0, len(profiles) - self.max_profiles)]:
+            path.unlink(missing_ok=True)
+
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        if not self.profiles_dir.exists():
+            return []
+        profiles = sorted(self.profiles_dir.glob(f"*{PROFILE_SUFFIX}"), key=lambda p: p.stat().st_mtime,
+                          reverse=True)
+        return [{"name": path.name, "bytes": path.stat().st_size,
+                 "created_at": datetime.fromtimestamp(path.stat().st_mtime).isoformat()} for path in profiles]
+
+    def read_profile(self, name: str) -> str:
+        path = self.profiles_dir / Path(name).name
+        if path.suffix != PROFILE_SUFFIX or not path.exists():
+            raise FileNotFoundError(name)
+        return path.read_text(encoding="utf-8")
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            active = len(self._sessions)
+        return {
+            "enabled": self.enabled,
+            "slow_threshold": self.slow_threshold,
+            "interval": self.interval,
+            "active_sessions": active,
+            "stored_profiles": len(self.list_profiles()),
+            "max_profiles": self.max_profiles,
+        }
+
+
+class ProfilerMiddleware:
+    """
+    Saf ASGI middleware: endpoint ile aynı task'ta çalışsın diye
+    BaseHTTPMiddleware yerine doğrudan ASGI arayüzü kullanılır.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        profiler = get_profiler()
+        headers = dict(scope.get("headers") or [])
+        # X-Profile yalnızca yönetim anahtarıyla birlikte dikkate alınır
+        forced = (headers.get(PROFILE_HEADER, b"").strip() in (b"1", b"true", b"yes")
+                  and is_admin_token(headers.get(ADMIN_TOKEN_HEADER)))
+        if not profiler.wants(forced):
+            return await self.app(scope, receive, send)
+
+        session = profiler.start(f"{scope['method']} {scope['path']}", forced=forced)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                session.name = f"{scope['method']} {route.path}"
+            await asyncio.to_thread(profiler.stop, session)
+
+
+_profiler: Optional[SamplingProfiler] = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> SamplingProfiler:
+    """Süreç genelinde paylaşılan profiler'ı döndürür."""
+    global _profiler
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = SamplingProfiler()
+        return _profiler
@@ -0,0 +1,169 @@
+"""
+LLM sistem talimatları (prompt) kaydı.
+
+Prompt dosyaları data/prompts altında, hangi projenin hangi prompt'u kullanacağı
+data/prompts/prompts.json'da tanımlıdır. Dosyalar bir kez okunur ve içerik
+hash'i ile sürümlenir.
+
+İstekler sağlayıcı tarafı prompt önbelleğine uygun kurulur: büyük ve sabit
+talimatlar `instructions` alanında bayt bayt aynı kalır; projeye özgü veriler
+(asset listesi, görsel adları) ve çalıştırmaya özgü kullanıcı isteği `input`
+içinde, sabit önekten sonra yer alır. Yanıtlardaki
+usage.input_tokens_details.cached_tokens prompt başına toplanır ve isabet
+oranı loglanır.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from config import PROMPTS_DIR
+
+logger = logging.getLogger(__name__)
+
+PROMPTS_MANIFEST = PROMPTS_DIR / "prompts.json"
+
+
+def _project_key(project_name: str) -> str:
+    return re.sub(r"[^\w]+", "_", project_name.lower()).strip("_")
+
+
+@dataclass(frozen=True)
+class Prompt:
+    """Yüklenmiş ve sürümlenmiş tek bir prompt."""
+    name: str
+    text: str
+    version: str         # İçeriğin sha256 özetinin ilk 12 karakteri
+    include_assets: bool = False
+
+
+@dataclass
+class _UsageStats:
+    calls: int = 0
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    versions: Dict[str, int] = field(default_factory=dict)
+
+
+class PromptRegistry:
+    """prompts.json'daki prompt'ları bir kez yükleyip projelere eşleyen kayıt."""
+
+    def __init__(self, manifest_path: Path = PROMPTS_MANIFEST):
+        self.manifest_path = Path(manifest_path)
+        self._prompts: Dict[str, Prompt] = {}
+        self._defaults: Dict[str, str] = {}
+        self._projects: Dict[str, Dict[str, str]] = {}
+        self._usage: Dict[str, _UsageStats] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self) -> None:
+        """Manifest'i ve prompt dosyalarını (yeniden) yükler."""
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        prompts = {}
+        for name, spec in manifest.get("prompts", {}).items():
+            path = self.manifest_path.parent / spec["file"]
+            text = path.read_text(encoding="utf-8")
+            prompts[name] = Prompt(
+                name=name,
+                text=text,
+                version=hashlib.sha256(text.encode("utf-8")).hexdigest()[:12],
+                include_assets=bool(spec.get("include_assets", False)),
+            )
+
+        defaults = manifest.get("defaults", {})
+        projects = {_project_key(project): modes for project, modes in manifest.get("projects", {}).items()}
+        for mapping in [defaults, *projects.values()]:
+            for mode, prompt_name in mapping.items():
+                if prompt_name not in prompts:
+                    raise KeyError(f"prompts.json refers to unknown prompt '{prompt_name}' for mode '{mode}'")
+
+        with self._lock:
+            self._prompts, self._defaults, self._projects = prompts, defaults, projects
+        logger.info("[PROMPTS] " + ", ".join(f"{p.name}@{p.version}" for p in prompts.values()))
+
+    def get(self, name: str) -> Prompt:
+        prompt = self._prompts.get(name)
+        if prompt is None:
+            raise KeyError(f"Unknown prompt '{name}'")
+        return prompt
+
+    def for_project(self, project_name: str, mode: str = "html") -> Prompt:
+        """
+        Projenin verilen mod için kullanacağı prompt'u döndürür.
+
+        Proje adları slug biçiminde karşılaştırılır ("V Metroway" == "V_Metroway").
+        """
+        name = self._projects.get(_project_key(project_name), {}).get(mode) or self._defaults.get(mode)
+        if name is None:
+            raise KeyError(f"No prompt configured for mode '{mode}'")
+        return self.get(name)
+
+    def record_usage(self, prompt: Prompt, usage: Any) -> None:
+        """Yanıtın usage bilgisinden önbelleğe alınmış token sayısını kaydeder."""
+        if usage is None:
+            return
+        input_tokens = getattr(usage, "input_tokens", 0) or 0
+        details = getattr(usage, "input_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", 0) or 0
+        with self._lock:
+            stats = self._usage.setdefault(prompt.name, _UsageStats())
+            stats.calls += 1
+            stats.input_tokens += input_tokens
+            stats.cached_tokens += cached_tokens
+            stats.output_tokens += getattr(usage, "output_tokens", 0) or 0
+            stats.versions[prompt.version] = stats.versions.get(prompt.version, 0) + 1
+        hit_rate = cached_tokens / input_tokens if input_tokens else 0.0
+        logger.info(f"[PROMPTS] {prompt.name}@{prompt.version}: {cached_tokens}/{input_tokens} "
+                    f"input token önbellekten ({hit_rate:.0%})")
+
+    def usage_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                name: {
+                    "calls": stats.calls,
+                    "input_tokens": stats.input_tokens,
+                    "cached_tokens": stats.cached_tokens,
+                    "output_tokens": stats.output_tokens,
+                    "cached_ratio": round(stats.cached_tokens / stats.input_tokens, 3) if stats.input_tokens else 0.0,
+                    "versions": dict(stats.versions),
+                }
+                for name, stats in self._usage.items()
+            }
+
+
+def build_request_input(prompt: Prompt, request_text: str, assets: Optional[Dict[str, str]] = None,
+                        image_names: Optional[Iterable[str]] = None) -> str:
+    """
+    Kullanıcı mesajını kurar: önce projeye özgü bağlam, en sonda çalıştırmaya
+    özgü istek. Böylece aynı projenin ardışık çalıştırmaları da mümkün olan en
+    uzun ortak öneki paylaşır.
+    """
+    parts = []
+    if prompt.include_assets and assets:
+        parts.append("Assets:\n" + "\n".join(f"{key}: {value}" for key, value in sorted(assets.items())))
+    image_names = list(image_names or [])
+    if image_names:
+        parts.append("Uploaded image filenames: " + ", ".join(image_names))
+    parts.append(request_text)
+    return "\n\n".join(parts)
+
+
+_prompt_registry: Optional[PromptRegistry] = None
+_prompt_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Süreç genelinde paylaşılan prompt kaydını döndürür."""
+    global _prompt_registry
+    with _prompt_registry_lock:
+        if _prompt_registry is None:
+            _prompt_registry = PromptRegistry()
+        return _prompt_registry
@@ -0,0 +1,381 @@
+"""
+OpenAI çağrıları için istemci tarafı hız sınırlayıcı.
+
+- İstek/dakika (RPM) ve token/dakika (TPM) için iki token bucket tutulur; kapasiteler
+  yanıtlardaki x-ratelimit-* başlıklarına göre güncellenir.
+- Eşzamanlı istek sayısı AIMD ile uyarlanır: başarılı her yanıtta yavaşça artar,
+  429/5xx yanıtlarında yarıya iner.
+- 429, 5xx ve bağlantı hataları tam jitter'lı üstel bekleme ile yeniden denenir;
+  retry-after başlığı varsa ona uyulur.
+
+Senkron (`call`) ve asenkron (`acall`) sarmalayıcılar aynı limiter durumunu paylaşır,
+böylece iş parçacıklarından ve event loop'tan yapılan tüm çağrılar aynı bütçeden düşer.
+Akışlı yanıtlar için `stream` bağlam yöneticisi kullanılır: eşzamanlılık yuvası akış
+tüketilene kadar tutulur ve token bütçesi response.completed'daki kullanımla düzeltilir.
+"""
+import asyncio
+import logging
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional
+
+from config import (
+    OPENAI_MAX_CONCURRENCY,
+    OPENAI_MAX_RETRIES,
+    OPENAI_MIN_CONCURRENCY,
+    OPENAI_RPM_LIMIT,
+    OPENAI_TPM_LIMIT,
+)
+
+logger = logging.getLogger(__name__)
+
+_DURATION_RE = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+# Async bekleyişlerde yuva kontrol aralığı (saniye)
+_ASYNC_POLL_INTERVAL = 0.05
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """OpenAI'ın "6m0s", "1.5s", "20ms" biçimindeki sürelerini saniyeye çevirir."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def estimate_tokens(*texts: Optional[str], max_output_tokens: int = 0) -> int:
+    """Yaklaşık token sayısı (4 karakter ≈ 1 token) + beklenen çıktı tokenları."""
+    return sum(len(text) for text in texts if text) // 4 + max_output_tokens
+
+
+class TokenBucket:
+    """
+    Rezervasyon tabanlı token bucket. Bakiye eksiye düşebilir; çağıran, dönen
+    bekleme süresi kadar uyuyarak sırasını bekler. Böylece aynı bucket hem
+    senkron hem asenkron kodda kullanılabilir.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.period = period
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Verilen miktarı bakiyeden düşer.
+
+        Returns:
+            Rezervasyonun karşılanması için beklenmesi gereken süre (saniye)
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Tek bir istek kapasiteden büyükse sonsuza kadar beklemesin
+            self.tokens -= min(float(amount), self.capacity)
+            if self.tokens >= 0 or self.rate <= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def credit(self, amount: float) -> None:
+        """Tahmin edilenden az harcanan tokenları iade eder (negatif değer ek harcamadır)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def sync_to_server(self, limit: Optional[float], remaining: Optional[float]) -> None:
+        """Kapasiteyi sunucunun bildirdiği limite, bakiyeyi kalan miktara göre günceller."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if limit:
+                self.capacity = float(limit)
+            if remaining is not None:
+                self.tokens = min(self.tokens, float(remaining))
+
+
+class AdaptiveConcurrency:
+    """AIMD ile uyarlanan eşzamanlı istek sınırı."""
+
+    def __init__(self, minimum: int = OPENAI_MIN_CONCURRENCY, maximum: int = OPENAI_MAX_CONCURRENCY,
+                 decrease_cooldown: float = 1.0):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        self.decrease_cooldown = decrease_cooldown
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        with self._condition:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self) -> None:
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, throttled: bool = False) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                # Aynı patlamadaki birden çok 429 sınırı art arda çökertmesin
+                if now - self._last_decrease >= self.decrease_cooldown:
+                    self.limit = max(float(self.minimum), self.limit / 2)
+                    self._last_decrease = now
+                    logger.warning(f"[RATE] Eşzamanlılık sınırı düşürüldü: {int(self.limit)}")
+            else:
+                self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+
+class StreamLease:
+    """`OpenAIRateLimiter.stream` içinde açılan akış ve (biliniyorsa) gerçek kullanımı."""
+
+    def __init__(self, stream: Any):
+        self.stream = stream
+        self.usage: Any = None
+
+    def record_usage(self, usage: Any) -> None:
+        """response.completed olayındaki kullanımı kaydeder; yuva bırakılırken bütçe buna göre düzeltilir."""
+        self.usage = usage
+
+
+class OpenAIRateLimiter:
+    """RPM/TPM bucket'ları, uyarlanır eşzamanlılık ve yeniden denemeyi birleştirir."""
+
+    def __init__(self, rpm: int = OPENAI_RPM_LIMIT, tpm: int = OPENAI_TPM_LIMIT,
+                 min_concurrency: int = OPENAI_MIN_CONCURRENCY,
+                 max_concurrency: int = OPENAI_MAX_CONCURRENCY,
+                 max_retries: int = OPENAI_MAX_RETRIES,
+                 base_delay: float = 1.0, max_delay: float = 60.0):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.concurrency = AdaptiveConcurrency(min_concurrency, max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "retries": 0, "throttled": 0, "server_errors": 0, "failures": 0}
+
+    # --- başlıklar ve istatistikler ---
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """x-ratelimit-* başlıklarından bucket kapasitelerini ve bakiyelerini günceller."""
+        for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            limit = headers.get(f"x-ratelimit-limit-{kind}")
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if limit is None and remaining is None:
+                continue
+            try:
+                bucket.sync_to_server(
+                    float(limit) if limit is not None else None,
+                    float(remaining) if remaining is not None else None,
+                )
+            except ValueError:
+                logger.debug(f"[RATE] Geçersiz rate limit başlığı: {kind}={limit}/{remaining}")
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats.update(
+            concurrency_limit=int(self.concurrency.limit),
+            in_flight=self.concurrency.in_flight,
+            rpm_capacity=self.requests.capacity,
+            tpm_capacity=self.tokens.capacity,
+        )
+        return stats
+
+    # --- yeniden deneme kararı ---
+
+    def _classify(self, exc: Exception) -> Optional[str]:
+        """Yeniden denenebilir hatalar için "throttled"/"server_error", diğerleri için None."""
+        import openai
+
+        if isinstance(exc, openai.RateLimitError):
+            # Kota bitmişse beklemek işe yaramaz
+            if getattr(exc, "code", None) == "insufficient_quota":
+                return None
+            return "throttled"
+        if isinstance(exc, openai.APIStatusError):
+            return "server_error" if exc.status_code >= 500 else None
+        if isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError)):
+            return "server_error"
+        return None
+
+    def _retry_delay(self, exc: Exception, attempt: int) -> float:
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        response = getattr(exc, "response", None)
+        if response is None:
+            return backoff
+        retry_after_ms = response.headers.get("retry-after-ms")
+        if retry_after_ms:
+            try:
+                return float(retry_after_ms) / 1000 + random.uniform(0, self.base_delay)
+            except ValueError:
+                pass
+        retry_after = parse_duration(response.headers.get("retry-after"))
+        if retry_after is not None:
+            return min(self.max_delay, retry_after) + random.uniform(0, self.base_delay)
+        return backoff
+
+    def _reconcile(self, result: Any, estimated_tokens: int) -> None:
+        usage = getattr(result, "usage", None)
+        actual = getattr(usage, "total_tokens", None)
+        if isinstance(actual, int):
+            self.tokens.credit(estimated_tokens - actual)
+
+    def _on_error(self, exc: Exception, attempt: int, estimated_tokens: int) -> Optional[float]:
+        """Hata sonrası bekleme süresini döndürür; yeniden denenmeyecekse None."""
+        kind = self._classify(exc)
+        # Başarısız istek token harcamadı sayılır
+        self.tokens.credit(estimated_tokens)
+        if kind is None or attempt >= self.max_retries:
+            self._count("failures")
+            return None
+        self._count("throttled" if kind == "throttled" else "server_errors")
+        self._count("retries")
+        delay = self._retry_delay(exc, attempt)
+        logger.warning(f"[RATE] {type(exc).__name__}, {delay:.1f}s sonra yeniden denenecek "
+                       f"({attempt + 1}/{self.max_retries})")
+        return delay
+
+    # --- sarmalayıcılar ---
+
+    def call(self, fn: Callable, *args, estimated_tokens: int = 0, **kwargs) -> Any:
+        """
+        Senkron bir OpenAI çağrısını limiter altında çalıştırır.
+
+        Args:
+            fn: Çağrılacak fonksiyon (ör. client.responses.create)
+            estimated_tokens: TPM bütçesinden düşülecek tahmini token sayısı
+
+        Returns:
+            fn'in dönüş değeri
+        """
+        attempt = 0
+        while True:
+            wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+            if wait > 0:
+                time.sleep(wait)
+            self.concurrency.acquire()
+            self._count("calls")
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                self.concurrency.release(throttled=self._classify(exc) is not None)
+                delay = self._on_error(exc, attempt, estimated_tokens)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.concurrency.release()
+            self._reconcile(result, estimated_tokens)
+            return result
+
+    @contextmanager
+    def stream(self, fn: Callable, *args, estimated_tokens: int = 0, **kwargs) -> Iterator[StreamLease]:
+        """
+        Akışlı bir OpenAI çağrısını (fn(..., stream=True)) limiter altında açar.
+
+        Açılış `call` gibi yeniden denenir; eşzamanlılık yuvası ise blok bitene,
+        yani akış tüketilene kadar tutulur. Blok içinde lease.record_usage ile
+        verilen kullanım varsa tahmini token'lar ona göre düzeltilir, yoksa tahmin
+        bütçeden düşülmüş kalır.
+        """
+        attempt = 0
+        while True:
+            wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+            if wait > 0:
+                time.sleep(wait)
+            self.concurrency.acquire()
+            self._count("calls")
+            try:
+                response_stream = fn(*args, **kwargs)
+                break
+            except Exception as exc:
+                self.concurrency.release(throttled=self._classify(exc) is not None)
+                delay = self._on_error(exc, attempt, estimated_tokens)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+
+        lease = StreamLease(response_stream)
+        throttled = False
+        try:
+            yield lease
+        except Exception as exc:
+            throttled = self._classify(exc) is not None
+            raise
+        finally:
+            self.concurrency.release(throttled=throttled)
+            self._reconcile(lease, estimated_tokens)
+
+    async def acall(self, fn: Callable, *args, estimated_tokens: int = 0, **kwargs) -> Any:
+        """
+        Asenkron bir OpenAI çağrısını (awaitable döndüren fn) limiter altında çalıştırır.
+        """
+        attempt = 0
+        while True:
+            wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+            if wait > 0:
+                await asyncio.sleep(wait)
+            while not self.concurrency.try_acquire():
+                await asyncio.sleep(_ASYNC_POLL_INTERVAL)
+            self._count("calls")
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as exc:
+                self.concurrency.release(throttled=self._classify(exc) is not None)
+                delay = self._on_error(exc, attempt, estimated_tokens)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self.concurrency.release()
+            self._reconcile(result, estimated_tokens)
+            return result
+
+
+_rate_limiter: Optional[OpenAIRateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> OpenAIRateLimiter:
+    """Süreç genelinde paylaşılan limiter'ı döndürür."""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = OpenAIRateLimiter()
+        return _rate_limiter
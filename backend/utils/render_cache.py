@@ -0,0 +1,159 @@
+"""
+Sayfa bazlı PDF render önbelleği.
+
+Her `.page` bloğu, belgenin ortak öneki (head + stiller) ve render ayarlarıyla
+birlikte hash'lenir. Görseller render öncesinde base64 olarak HTML'e gömüldüğü
+için hash, sayfanın kullandığı asset içeriklerini de kapsar. Aynı hash'e sahip
+sayfanın PDF'i diskte tutulur ve yeniden render edilmeden birleştirilir.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import PDF_PAGE_CACHE_DIR, PDF_PAGE_CACHE_MAX_ENTRIES
+from utils.html_pages import PageSplit
+
+logger = logging.getLogger(__name__)
+
+# Render çıktısını etkileyen bir değişiklik yapıldığında artırılmalı
+RENDER_CACHE_VERSION = "2"
+# Budama girdi sayısını max_entries'in bu oranına indirir; her yeni sayfada yeniden taranmaz
+PRUNE_TARGET_RATIO = 0.9
+
+
+class PageRenderCache:
+    """Sayfa PDF'lerini içerik hash'ine göre diskte saklayan önbellek."""
+
+    def __init__(self, cache_dir: Path = PDF_PAGE_CACHE_DIR, max_entries: int = PDF_PAGE_CACHE_MAX_ENTRIES):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Dizindeki girdi sayısının yaklaşık değeri (diğer render süreçleri de yazar);
+        # ilk yazımda bir kez sayılır, budamada gerçek değerle düzeltilir
+        self._entries: Optional[int] = None
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key_for(self, split: PageSplit, page_html: str, render_options: Dict) -> str:
+        """
+        Bir sayfanın önbellek anahtarını hesaplar.
+
+        Args:
+            split: Sayfanın ait olduğu belge (ortak önek/sonek için)
+            page_html: Sayfa bloğunun HTML'i (gömülü görsellerle birlikte)
+            render_options: page.pdf() ayarları
+
+        Returns:
+            SHA-256 hex anahtarı
+        """
+        digest = hashlib.sha256()
+        digest.update(RENDER_CACHE_VERSION.encode("utf-8"))
+        digest.update(json.dumps(render_options, sort_keys=True).encode("utf-8"))
+        for part in (split.prefix, page_html, split.suffix):
+            digest.update(b"\0")
+            digest.update(part.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path_for(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pdf"
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path_for(key)
+        try:
+            content = path.read_bytes()
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        # LRU sıralaması için erişim zamanını güncelle
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return content
+
+    def put(self, key: str, pdf_bytes: bytes) -> None:
+        path = self._path_for(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        is_new = not path.exists()
+        try:
+            tmp_path.write_bytes(pdf_bytes)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"[CACHE] Sayfa PDF'i önbelleğe yazılamadı: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        with self._lock:
+            if self._entries is None:
+                self._entries = sum(1 for _ in self.cache_dir.glob("*.pdf"))
+            elif is_new:
+                self._entries += 1
+            over_limit = self._entries > self.max_entries
+        if over_limit:
+            self.prune()
+
+    def prune(self) -> None:
+        """
+        En eski erişilen girdileri silerek önbelleği max_entries'in altına
+        (PRUNE_TARGET_RATIO) indirir. Aynı dizini budayan diğer süreçlerin
+        sildiği dosyalar atlanır.
+        """
+        entries = []
+        for path in self.cache_dir.glob("*.pdf"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue
+        target = int(self.max_entries * PRUNE_TARGET_RATIO)
+        overflow = len(entries) - target if len(entries) > self.max_entries else 0
+        if overflow > 0:
+            entries.sort()
+            for _, path in entries[:overflow]:
+                path.unlink(missing_ok=True)
+            logger.info(f"[CACHE] Sayfa önbelleğinden {overflow} girdi silindi")
+        with self._lock:
+            self._entries = len(entries) - max(overflow, 0)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def merge_pdf_chunks(chunks: List[bytes], output_path: Path) -> Path:
+    """
+    Sayfa PDF'lerini sırasıyla tek bir PDF dosyasında birleştirir.
+
+    Args:
+        chunks: Sıralı PDF içerikleri
+        output_path: Birleştirilmiş PDF'in yazılacağı yol
+
+    Returns:
+        Yazılan PDF dosyasının yolu
+    """
+    from PyPDF2 import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    for chunk in chunks:
+        writer.append(PdfReader(io.BytesIO(chunk)))
+
+    with open(output_path, "wb") as f:
+        writer.write(f)
+    return output_path
+
+
+_page_cache: Optional[PageRenderCache] = None
+
+
+def get_page_cache() -> PageRenderCache:
+    """Süreç genelinde paylaşılan sayfa önbelleğini döndürür."""
+    global _page_cache
+    if _page_cache is None:
+        _page_cache = PageRenderCache()
+    return _page_cache
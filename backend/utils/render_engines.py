@@ -0,0 +1,437 @@
+"""
+Değiştirilebilir PDF render motorları.
+
+- playwright: Chromium ile birebir render (render işçileri veya API süreci)
+- weasyprint: tarayıcısız HTML/CSS render; paket kurulu değilse devre dışıdır
+- reportlab: structured şablonların içeriğini (REPORT_CONTENT_SCHEMA) HTML/CSS
+  yorumlamadan doğrudan PDF'e dizer; en hafif ve en hızlı yol, ancak yalnızca
+  gömülü içeriği olan raporlar için (bkz. structured_report.embed_report_metadata)
+
+Seçim sırası: çağıranın istediği motor > reports.json'daki şablonun "engine"
+alanı > PDF_RENDER_ENGINE. Seçilen motor playwright iken tarayıcı havuzu veya
+render işçileri doluysa iş, PDF_ENGINE_FALLBACK sırasıyla işi destekleyen ilk
+kullanılabilir motora devredilir. Devretme isteğe bağlıdır (varsayılan boş):
+hafif motorların çıktısı farklı görünür. wait_for_worker=True olan işler (toplu
+üretim) devredilmez; sıra bekler, çıktı görünümü değişmez.
+"""
+import asyncio
+import base64
+import binascii
+import importlib.util
+import io
+import logging
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from xml.sax.saxutils import escape
+
+from config import (
+    BASE_DIR,
+    PDF_BLOCK_EXTERNAL_REQUESTS,
+    PDF_ENGINE_FALLBACK,
+    PDF_PAGE_CACHE_ENABLED,
+    PDF_RENDER_ENGINE,
+    PDF_RENDER_SHARDS,
+    REPORTLAB_BOLD_FONT_PATH,
+    REPORTLAB_FONT_PATH,
+)
+from utils.browser_pool import BrowserPool
+from utils.metrics import PDF_RENDERS
+from utils.render_workers import RenderQueueFull, get_render_workers, peek_render_workers, render_workers_enabled
+from utils.template_registry import get_template_registry
+
+logger = logging.getLogger(__name__)
+
+# Raster olmayan görseller (SVG) reportlab motorunda atlanır
+_RASTER_MIME_TYPES = ("image/png", "image/jpeg", "image/jpg", "image/gif", "image/webp", "image/bmp")
+
+
+@dataclass
+class RenderJob:
+    """Tek bir PDF render işi; motorlar yalnızca ihtiyaç duydukları alanları kullanır."""
+    html: str                                   # Görselleri gömülü, meta bloğu çıkarılmış HTML
+    pdf_path: Path
+    project_name: str = ""
+    images: Dict[str, str] = field(default_factory=dict)   # ad -> data URI
+    template: Optional[str] = None              # reports.json konusu (structured raporlar)
+    content: Optional[Dict[str, Any]] = None    # REPORT_CONTENT_SCHEMA içeriği
+    use_page_cache: bool = PDF_PAGE_CACHE_ENABLED
+    shards: int = PDF_RENDER_SHARDS
+    pool: Optional[BrowserPool] = None
+    wait_for_worker: bool = False
+
+
+class RenderEngine:
+    """Render motoru arayüzü."""
+    name = ""
+
+    def available(self) -> bool:
+        """Motorun bağımlılıkları bu ortamda kurulu mu."""
+        return True
+
+    def supports(self, job: RenderJob) -> bool:
+        """Motor bu işi render edebilir mi."""
+        return True
+
+    def saturated(self, job: RenderJob) -> bool:
+        """Motor şu an yeni iş alamayacak kadar dolu mu."""
+        return False
+
+    async def render(self, job: RenderJob) -> Path:
+        raise NotImplementedError
+
+
+class PlaywrightEngine(RenderEngine):
+    """Chromium ile render: havuz verilmediyse ve işçiler açıksa ayrı süreçte."""
+    name = "playwright"
+
+    def available(self) -> bool:
+        return importlib.util.find_spec("playwright") is not None
+
+    def saturated(self, job: RenderJob) -> bool:
+        if job.pool is not None:
+            return job.pool.saturated
+        if render_workers_enabled():
+            workers = peek_render_workers()
+            return workers is not None and workers.saturated
+        # İşçisiz modda her iş kendi tarayıcısını açar; sınır yoktur
+        return False
+
+    async def render(self, job: RenderJob) -> Path:
+        if job.pool is None and render_workers_enabled():
+            return await get_render_workers().render(job.html, job.pdf_path, use_page_cache=job.use_page_cache,
+                                                     shards=job.shards, wait=job.wait_for_worker)
+        from utils.pdf_utils import render_html_to_pdf
+
+        return await render_html_to_pdf(job.html, job.pdf_path, use_page_cache=job.use_page_cache,
+                                        shards=job.shards, pool=job.pool)
+
+
+class WeasyPrintEngine(RenderEngine):
+    """
+    Tarayıcısız HTML/CSS render. Flexbox ve bazı modern CSS özellikleri Chromium
+    kadar desteklenmez; düzen farkları olabilir.
+    """
+    name = "weasyprint"
+
+    def available(self) -> bool:
+        return importlib.util.find_spec("weasyprint") is not None
+
+    async def render(self, job: RenderJob) -> Path:
+        return await asyncio.to_thread(self._write_pdf, job.html, Path(job.pdf_path))
+
+    def _write_pdf(self, html: str, pdf_path: Path) -> Path:
+        from weasyprint import HTML
+
+        # Engelleme kapalıysa WeasyPrint'in kendi varsayılan fetcher'ı kullanılır
+        options = {"url_fetcher": _local_url_fetcher} if PDF_BLOCK_EXTERNAL_REQUESTS else {}
+        document = HTML(string=html, base_url=str(BASE_DIR), **options)
+        document.write_pdf(str(pdf_path), presentational_hints=True)
+        logger.info(f"[PDF] WeasyPrint ile üretildi: {pdf_path}")
+        return pdf_path
+
+
+def _local_url_fetcher(url: str) -> Dict[str, Any]:
+    """
+    WeasyPrint url_fetcher: fontlar yerel kayıttan sunulur, diğer istekler
+    engellenir. Playwright'taki handle_render_request gibi yalnızca data:
+    URL'lerine izin verilir; file:// da engellenir (LLM'in ürettiği HTML yerel
+    dosya okuyamasın).
+    """
+    from utils.font_registry import (
+        FONT_FILE_HOST,
+        GOOGLE_FONTS_CSS_HOST,
+        LOCAL_FONT_PATH_PREFIX,
+        families_from_google_fonts_url,
+        get_font_registry,
+    )
+
+    parsed = urlparse(url)
+    if parsed.scheme == "data":
+        from weasyprint import default_url_fetcher
+
+        return default_url_fetcher(url)
+    registry = get_font_registry()
+    if parsed.netloc == GOOGLE_FONTS_CSS_HOST:
+        css = registry.font_face_css(families_from_google_fonts_url(url))
+        return {"string": css, "mime_type": "text/css", "encoding": "utf-8"}
+    if parsed.netloc == FONT_FILE_HOST and parsed.path.startswith(LOCAL_FONT_PATH_PREFIX):
+        data = registry.font_bytes(parsed.path[len(LOCAL_FONT_PATH_PREFIX):])
+        if data is not None:
+            return {"string": data, "mime_type": "font/woff2"}
+    raise ValueError(f"Dış istek engellendi: {url[:200]}")
+
+
+class ReportLabEngine(RenderEngine):
+    """
+    Structured rapor içeriğini reportlab platypus ile dizer. Şablonun CSS'i
+    kullanılmaz; kapak, bölüm başlıkları, paragraflar, metrik tabloları ve
+    görseller sade bir A4 düzeninde yerleştirilir.
+    """
+    name = "reportlab"
+
+    def __init__(self):
+        self._fonts: Optional[Tuple[str, str]] = None
+        self._fonts_lock = threading.Lock()
+
+    def available(self) -> bool:
+        return importlib.util.find_spec("reportlab") is not None
+
+    def supports(self, job: RenderJob) -> bool:
+        return bool(job.content and job.content.get("sections"))
+
+    async def render(self, job: RenderJob) -> Path:
+        return await asyncio.to_thread(self._build, job)
+
+    def _register_fonts(self) -> Tuple[str, str]:
+        """Türkçe karakterleri içeren TTF'leri bir kez kaydeder; yoksa Helvetica'ya düşer."""
+        with self._fonts_lock:
+            if self._fonts is None:
+                from reportlab.pdfbase import pdfmetrics
+                from reportlab.pdfbase.ttfonts import TTFont
+
+                try:
+                    pdfmetrics.registerFont(TTFont("ReportSans", str(REPORTLAB_FONT_PATH)))
+                    bold_path = REPORTLAB_BOLD_FONT_PATH if REPORTLAB_BOLD_FONT_PATH.is_file() else REPORTLAB_FONT_PATH
+                    pdfmetrics.registerFont(TTFont("ReportSans-Bold", str(bold_path)))
+                    self._fonts = ("ReportSans", "ReportSans-Bold")
+                except Exception as e:
+                    logger.warning(f"[PDF] reportlab fontu yüklenemedi ({REPORTLAB_FONT_PATH}): {e}; "
+                                   f"Helvetica kullanılıyor (Türkçe karakterler eksik çıkabilir)")
+                    self._fonts = ("Helvetica", "Helvetica-Bold")
+            return self._fonts
+
+    def _build(self, job: RenderJob) -> Path:
+        from reportlab.lib import colors
+        from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import ParagraphStyle
+        from reportlab.lib.units import mm
+        from reportlab.platypus import (
+            Image,
+            KeepTogether,
+            PageBreak,
+            Paragraph,
+            SimpleDocTemplate,
+            Spacer,
+            Table,
+            TableStyle,
+        )
+
+        regular, bold = self._register_fonts()
+        accent = colors.HexColor("#1B3A6B")
+        text = colors.HexColor("#444444")
+        styles = {
+            "cover_title": ParagraphStyle("cover_title", fontName=bold, fontSize=28, leading=34,
+                                          textColor=accent, alignment=TA_CENTER, spaceAfter=8 * mm),
+            "cover_sub": ParagraphStyle("cover_sub", fontName=regular, fontSize=14, leading=20,
+                                        textColor=text, alignment=TA_CENTER),
+            "h1": ParagraphStyle("h1", fontName=bold, fontSize=22, leading=28, textColor=accent,
+                                 spaceBefore=4 * mm, spaceAfter=6 * mm),
+            "h2": ParagraphStyle("h2", fontName=bold, fontSize=15, leading=20, textColor=accent,
+                                 spaceBefore=4 * mm, spaceAfter=3 * mm),
+            "body": ParagraphStyle("body", fontName=regular, fontSize=10.5, leading=16, textColor=text,
+                                   alignment=TA_JUSTIFY, spaceAfter=3 * mm),
+            "caption": ParagraphStyle("caption", fontName=regular, fontSize=9, leading=12,
+                                      textColor=colors.HexColor("#666666"), alignment=TA_CENTER,
+                                      spaceAfter=5 * mm),
+        }
+
+        pdf_path = Path(job.pdf_path)
+        doc = SimpleDocTemplate(str(pdf_path), pagesize=A4, leftMargin=20 * mm, rightMargin=20 * mm,
+                                topMargin=22 * mm, bottomMargin=22 * mm, title=job.content.get("title") or "",
+                                author=job.project_name)
+        max_width, max_height = doc.width, 110 * mm
+
+        def image_flowable(name: str, height_limit: float):
+            data = _decode_image(_find_image(job.images, name))
+            if data is None:
+                return None
+            from reportlab.lib.utils import ImageReader
+
+            try:
+                width, height = ImageReader(io.BytesIO(data)).getSize()
+            except Exception as e:
+                logger.warning(f"[PDF] Görsel okunamadı, atlandı: {name} ({e})")
+                return None
+            scale = min(max_width / width, height_limit / height, 1.0)
+            return Image(io.BytesIO(data), width=width * scale, height=height * scale)
+
+        content = job.content
+        title = content.get("title") or f"{job.project_name} Yatırımcı Raporu"
+        story: List[Any] = [Spacer(1, 45 * mm), Paragraph(escape(title), styles["cover_title"])]
+        if job.project_name:
+            story.append(Paragraph(escape(job.project_name), styles["cover_sub"]))
+        if content.get("period"):
+            story.append(Paragraph(escape(content["period"]), styles["cover_sub"]))
+        cover_name = next((name for name in job.images
+                           if name.split(".")[0].endswith("_foto") and name.split(".")[0] != "kapak_foto"), None)
+        cover = image_flowable(cover_name, 120 * mm) if cover_name else None
+        if cover is not None:
+            story += [Spacer(1, 12 * mm), cover]
+        story.append(PageBreak())
+
+        metric_style = TableStyle([
+            ("FONTNAME", (0, 0), (-1, -1), regular),
+            ("FONTNAME", (1, 0), (1, -1), bold),
+            ("FONTSIZE", (0, 0), (-1, -1), 10),
+            ("TEXTCOLOR", (0, 0), (-1, -1), text),
+            ("TEXTCOLOR", (1, 0), (1, -1), accent),
+            ("ROWBACKGROUNDS", (0, 0), (-1, -1), [colors.HexColor("#F3F6FA"), colors.white]),
+            ("LINEBELOW", (0, 0), (-1, -1), 0.25, colors.HexColor("#D5DDE8")),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ("TOPPADDING", (0, 0), (-1, -1), 4),
+            ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+        ])
+
+        for index, section in enumerate(content["sections"]):
+            if index:
+                story.append(PageBreak())
+            story.append(Paragraph(escape(section.get("title") or ""), styles["h1"]))
+            for subsection in section.get("subsections") or []:
+                block: List[Any] = []
+                if subsection.get("heading"):
+                    block.append(Paragraph(escape(subsection["heading"]), styles["h2"]))
+                for paragraph in subsection.get("paragraphs") or []:
+                    block.append(Paragraph(escape(paragraph), styles["body"]))
+                # Başlık ilk paragraftan ayrı sayfaya düşmesin
+                story.append(KeepTogether(block[:2]))
+                story.extend(block[2:])
+                metrics = subsection.get("metrics") or []
+                if metrics:
+                    rows = [[Paragraph(escape(m["label"]), styles["body"]), escape(m["value"])] for m in metrics]
+                    table = Table(rows, colWidths=[max_width * 0.62, max_width * 0.38], hAlign="LEFT")
+                    table.setStyle(metric_style)
+                    story += [table, Spacer(1, 5 * mm)]
+                for image in subsection.get("images") or []:
+                    flowable = image_flowable(image.get("file", ""), max_height)
+                    if flowable is None:
+                        continue
+                    figure = [flowable]
+                    if image.get("caption"):
+                        figure.append(Paragraph(escape(image["caption"]), styles["caption"]))
+                    else:
+                        figure.append(Spacer(1, 5 * mm))
+                    story.append(KeepTogether(figure))
+
+        footer = escape(title)
+
+        def draw_footer(canvas, document):
+            canvas.saveState()
+            canvas.setFont(regular, 8)
+            canvas.setFillColor(colors.HexColor("#888888"))
+            canvas.drawString(document.leftMargin, 12 * mm, footer)
+            canvas.drawRightString(document.leftMargin + document.width, 12 * mm, str(document.page))
+            canvas.restoreState()
+
+        doc.build(story, onLaterPages=draw_footer)
+        logger.info(f"[PDF] reportlab ile üretildi: {pdf_path} ({len(content['sections'])} bölüm)")
+        return pdf_path
+
+
+def _find_image(images: Dict[str, str], name: Optional[str]) -> Optional[str]:
+    """Görsel adını (uzantılı veya uzantısız) data URI'ye çözer."""
+    if not name:
+        return None
+    return images.get(name) or images.get(name.rsplit(".", 1)[0])
+
+
+def _decode_image(data_uri: Optional[str]) -> Optional[bytes]:
+    """Raster bir data URI'yi baytlara çevirir; SVG ve bozuk veride None."""
+    if not data_uri or not data_uri.startswith("data:"):
+        return None
+    header, _, payload = data_uri.partition(",")
+    mime_type = header[5:].split(";", 1)[0].lower()
+    if mime_type not in _RASTER_MIME_TYPES or ";base64" not in header:
+        return None
+    try:
+        return base64.b64decode(payload)
+    except (binascii.Error, ValueError):
+        return None
+
+
+ENGINES: Dict[str, RenderEngine] = {
+    engine.name: engine for engine in (PlaywrightEngine(), WeasyPrintEngine(), ReportLabEngine())
+}
+DEFAULT_ENGINE = "playwright"
+
+
+def get_engine(name: str) -> RenderEngine:
+    """
+    Raises:
+        ValueError: Motor adı bilinmiyorsa
+    """
+    engine = ENGINES.get((name or "").strip().lower())
+    if engine is None:
+        raise ValueError(f"Unknown PDF render engine '{name}' (expected one of: {', '.join(ENGINES)})")
+    return engine
+
+
+def fallback_engines() -> List[RenderEngine]:
+    return [get_engine(name) for name in PDF_ENGINE_FALLBACK.split(",") if name.strip()]
+
+
+def _fallback_for(job: RenderJob, current: RenderEngine) -> Optional[RenderEngine]:
+    return next((engine for engine in fallback_engines()
+                 if engine is not current and engine.available() and engine.supports(job)), None)
+
+
+def select_engine(job: RenderJob, requested: Optional[str] = None) -> Tuple[RenderEngine, str]:
+    """
+    İş için motoru ve seçim gerekçesini döndürür.
+
+    Gerekçe: "requested", "template", "default", "fallback" (doluluk) veya
+    "unsupported" (seçilen motor kurulu değil ya da işi desteklemiyor).
+    """
+    name, reason = requested, "requested"
+    if not name and job.template:
+        try:
+            name, reason = get_template_registry().report_entry(job.template).engine, "template"
+        except KeyError:
+            name = None
+    if not name:
+        name, reason = PDF_RENDER_ENGINE, "default"
+
+    engine = get_engine(name)
+    if not engine.available() or not engine.supports(job):
+        logger.warning(f"[PDF] '{engine.name}' motoru bu işi render edemiyor, {DEFAULT_ENGINE} kullanılıyor")
+        engine, reason = get_engine(DEFAULT_ENGINE), "unsupported"
+
+    if engine.saturated(job) and not job.wait_for_worker:
+        fallback = _fallback_for(job, engine)
+        if fallback is not None:
+            return fallback, "fallback"
+    return engine, reason
+
+
+async def render_job(job: RenderJob, engine: Optional[str] = None) -> Path:
+    """İşi seçilen motorla render eder; motor dolu olduğunu sonradan bildirirse hafif motora devreder."""
+    selected, reason = select_engine(job, engine)
+    logger.info(f"[PDF] Render motoru: {selected.name} ({reason})")
+    try:
+        path = await selected.render(job)
+    except RenderQueueFull:
+        fallback = None if job.wait_for_worker else _fallback_for(job, selected)
+        if fallback is None:
+            raise
+        logger.warning(f"[PDF] Render kuyruğu dolu, {fallback.name} motoruna devredildi")
+        selected, reason = fallback, "fallback"
+        path = await selected.render(job)
+    PDF_RENDERS.inc(engine=selected.name, reason=reason)
+    return path
+
+
+def engine_status() -> List[Dict[str, Any]]:
+    """Motorların kurulu olup olmadığını ve varsayılan/devretme ayarlarını listeler."""
+    fallback_names = [engine.name for engine in fallback_engines()]
+    return [
+        {
+            "name": engine.name,
+            "available": engine.available(),
+            "default": engine.name == get_engine(PDF_RENDER_ENGINE).name,
+            "fallback_order": fallback_names.index(engine.name) if engine.name in fallback_names else None,
+        }
+        for engine in ENGINES.values()
+    ]
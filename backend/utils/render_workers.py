@@ -0,0 +1,478 @@
+"""
+Süreç dışı PDF render işçileri.
+
+RENDER_WORKERS adet işçi süreci açılır; her biri kendi Chromium'unu (BrowserPool)
+çalıştırır ve aynı anda tek bir iş alır (işin sayfaları işçi içinde
+RENDER_WORKER_CONTEXTS bağlamda paralel render edilir). API sürecinde her işçi
+için bir gözetmen (supervisor) thread'i vardır:
+
+- Kabul edilen iş sayısı (çalışan + bekleyen) RENDER_WORKERS + RENDER_QUEUE_MAX
+  ile sınırlıdır. Sınır doluysa render() RenderQueueFull fırlatır; API bunu
+  503 + Retry-After olarak döndürür (backpressure).
+- HTML, pipe yerine spool dizinindeki bir dosya üzerinden aktarılır; çok
+  megabaytlık base64 gömülü belgeler iki kez pickle edilmez.
+- İş RENDER_JOB_TIMEOUT'u aşarsa, işçi + Chromium ağacının RSS'i
+  RENDER_WORKER_MAX_RSS_MB'ı aşarsa veya işçi çökerse işçinin süreç grubu
+  öldürülür, iş hata ile sonlanır ve işçi yeniden başlatılır. Art arda çöken
+  işçiler artan beklemeyle yeniden başlatılır.
+- İşçiler RENDER_WORKER_MAX_JOBS işten sonra sızıntılara karşı yenilenir.
+
+RLIMIT_AS kullanılmaz: V8/Chromium büyük sanal adres alanı ayırır ve bu sınır
+altında hemen çöker; bunun yerine gerçek RSS izlenir.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import (
+    PDF_PAGE_CACHE_ENABLED,
+    PDF_RENDER_SHARDS,
+    RENDER_JOB_TIMEOUT,
+    RENDER_QUEUE_MAX,
+    RENDER_SPOOL_DIR,
+    RENDER_WORKER_CONTEXTS,
+    RENDER_WORKER_MAX_JOBS,
+    RENDER_WORKER_MAX_RSS_MB,
+    RENDER_WORKERS,
+)
+from utils.memory_profiler import process_tree_rss
+
+logger = logging.getLogger(__name__)
+
+_POLL_INTERVAL = 0.25
+_RSS_CHECK_INTERVAL = 1.0
+_MAX_RESTART_BACKOFF = 30.0
+
+
+class RenderWorkerError(Exception):
+    """İşçi tarafında render başarısız oldu."""
+
+
+class RenderQueueFull(RenderWorkerError):
+    """Tüm işçiler meşgul ve bekleme kuyruğu dolu."""
+
+
+class RenderTimeout(RenderWorkerError):
+    """İş süre sınırını aştı; işçi yeniden başlatıldı."""
+
+
+class RenderWorkerCrashed(RenderWorkerError):
+    """İşçi iş sırasında çöktü veya bellek sınırını aştığı için öldürüldü."""
+
+
+# --- İşçi süreci ---
+
+def _worker_main(conn, max_contexts: int) -> None:
+    """İşçi sürecinin giriş noktası (spawn ile başlatılır)."""
+    # Kendi süreç grubunu kurar; gözetmen tüm Chromium ağacını tek sinyalle öldürebilir
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    logging.basicConfig(level=logging.INFO,
+                        format=f"%(asctime)s - %(levelname)s - [render-worker {os.getpid()}] %(message)s")
+    try:
+        asyncio.run(_worker_loop(conn, max_contexts))
+    except (EOFError, KeyboardInterrupt):
+        pass
+
+
+async def _worker_loop(conn, max_contexts: int) -> None:
+    from utils.browser_pool import BrowserPool
+    from utils.pdf_utils import render_html_to_pdf
+
+    # Tarayıcı ilk işte açılır; Playwright kurulu değilse işçi çökmez, iş hata döner
+    pool = BrowserPool(max_contexts=max_contexts)
+    try:
+        while True:
+            job = await asyncio.to_thread(conn.recv)
+            if job is None:
+                break
+            try:
+                html = Path(job["html_path"]).read_text(encoding="utf-8")
+                await render_html_to_pdf(html, Path(job["pdf_path"]), use_page_cache=job["use_page_cache"],
+                                         shards=job["shards"], pool=pool)
+                del html
+                conn.send({"id": job["id"], "ok": True})
+            except Exception as e:
+                logger.error(f"[RENDER_WORKER] {job['id']} başarısız: {e}", exc_info=True)
+                conn.send({"id": job["id"], "ok": False, "error": f"{type(e).__name__}: {e}"})
+    finally:
+        await pool.close()
+
+
+# --- API süreci ---
+
+@dataclass
+class _Job:
+    id: str
+    html_path: Path
+    pdf_path: Path
+    use_page_cache: bool
+    shards: int
+    loop: asyncio.AbstractEventLoop
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+    def resolve(self, error: Optional[Exception] = None) -> None:
+        def _set():
+            if self.future.done():
+                return
+            if error is None:
+                self.future.set_result(self.pdf_path)
+            else:
+                self.future.set_exception(error)
+        self.loop.call_soon_threadsafe(_set)
+
+
+class _WorkerSlot:
+    """Tek bir işçi süreci ve onu yöneten gözetmen thread'i."""
+
+    def __init__(self, manager: "RenderWorkerPool", index: int):
+        self.manager = manager
+        self.index = index
+        self.process: Optional[multiprocessing.Process] = None
+        self.conn = None
+        self.state = "starting"
+        self.jobs_done = 0
+        self.restarts = 0
+        self.current_job: Optional[str] = None
+        self._consecutive_failures = 0
+        self.thread = threading.Thread(target=self._run, name=f"render-supervisor-{index}", daemon=True)
+
+    # süreç yönetimi
+
+    def _spawn(self) -> None:
+        parent_conn, child_conn = self.manager.context.Pipe()
+        process = self.manager.context.Process(
+            target=_worker_main, args=(child_conn, self.manager.contexts_per_worker),
+            name=f"render-worker-{self.index}", daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        self.process, self.conn, self.jobs_done = process, parent_conn, 0
+        logger.info(f"[RENDER_WORKER] İşçi {self.index} başlatıldı (pid {process.pid})")
+
+    def _kill(self) -> None:
+        process = self.process
+        if process is None:
+            return
+        if process.is_alive():
+            try:
+                # İşçi kendi süreç grubunun lideridir; Chromium alt süreçleri de ölür
+                os.killpg(process.pid, signal.SIGKILL)
+            except (AttributeError, ProcessLookupError, PermissionError):
+                process.kill()
+        process.join(timeout=5)
+        if self.conn is not None:
+            self.conn.close()
+        self.process, self.conn = None, None
+
+    def _stop(self) -> None:
+        """İşçiyi nazikçe kapatır (tarayıcıyı kapatması için kısa süre tanınır)."""
+        if self.process is None:
+            return
+        try:
+            self.conn.send(None)
+            self.process.join(timeout=10)
+        except (OSError, BrokenPipeError):
+            pass
+        self._kill()
+
+    def _restart(self, reason: str) -> None:
+        self._kill()
+        self.restarts += 1
+        self.manager.count(f"restarts_{reason}")
+        if reason in ("crash", "timeout", "memory"):
+            self._consecutive_failures += 1
+            backoff = min(_MAX_RESTART_BACKOFF, 0.5 * 2 ** (self._consecutive_failures - 1))
+            logger.warning(f"[RENDER_WORKER] İşçi {self.index} yeniden başlatılıyor ({reason}), "
+                           f"{backoff:.1f}s sonra")
+            if self.manager.closing.wait(backoff):
+                return
+        self._spawn()
+
+    # gözetmen döngüsü
+
+    def _run(self) -> None:
+        self._spawn()
+        while not self.manager.closing.is_set():
+            self.state = "idle"
+            try:
+                job = self.manager.jobs.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                if self.process is not None and not self.process.is_alive():
+                    self._restart("crash")
+                continue
+            if job is None:
+                break
+            self.state, self.current_job = "busy", job.id
+            try:
+                self._execute(job)
+            finally:
+                self.state, self.current_job = "idle", None
+                job.html_path.unlink(missing_ok=True)
+                self.manager.release()
+            if self.manager.max_jobs and self.jobs_done >= self.manager.max_jobs:
+                logger.info(f"[RENDER_WORKER] İşçi {self.index} {self.jobs_done} işten sonra yenileniyor")
+                self._stop()
+                self.restarts += 1
+                self.manager.count("restarts_recycle")
+                self._spawn()
+        self.state = "stopped"
+        self._stop()
+
+    def _execute(self, job: _Job) -> None:
+        manager = self.manager
+        if self.process is None or not self.process.is_alive():
+            self._restart("crash")
+            if self.process is None:
+                job.resolve(RenderWorkerError("Render işçileri kapatıldı"))
+                return
+        try:
+            self.conn.send({"id": job.id, "html_path": str(job.html_path), "pdf_path": str(job.pdf_path),
+                            "use_page_cache": job.use_page_cache, "shards": job.shards})
+        except (OSError, BrokenPipeError) as e:
+            manager.count("failed")
+            job.resolve(RenderWorkerCrashed(f"İşçiye iş gönderilemedi: {e}"))
+            self._restart("crash")
+            return
+
+        deadline = time.monotonic() + manager.job_timeout
+        next_rss_check = time.monotonic() + _RSS_CHECK_INTERVAL
+        while True:
+            try:
+                ready = self.conn.poll(_POLL_INTERVAL)
+            except (OSError, EOFError):
+                ready = False
+            if ready:
+                try:
+                    result = self.conn.recv()
+                except (OSError, EOFError):
+                    result = None
+                if result is not None:
+                    self.jobs_done += 1
+                    self._consecutive_failures = 0
+                    if result["ok"]:
+                        manager.count("completed")
+                        job.resolve()
+                    else:
+                        manager.count("failed")
+                        job.resolve(RenderWorkerError(result["error"]))
+                    return
+
+            now = time.monotonic()
+            if manager.closing.is_set():
+                job.resolve(RenderWorkerError("Render işçileri kapatıldı"))
+                self._kill()
+                return
+            if not self.process.is_alive():
+                manager.count("crashes")
+                job.resolve(RenderWorkerCrashed(
+                    f"Render işçisi iş sırasında çöktü (çıkış kodu {self.process.exitcode})"))
+                self._restart("crash")
+                return
+            if now >= deadline:
+                manager.count("timeouts")
+                logger.error(f"[RENDER_WORKER] {job.id} {manager.job_timeout:.0f}s içinde bitmedi, "
+                             f"işçi {self.index} öldürülüyor")
+                job.resolve(RenderTimeout(f"Render {manager.job_timeout:.0f} saniyede tamamlanmadı"))
+                self._restart("timeout")
+                return
+            if manager.max_rss_bytes and now >= next_rss_check:
+                next_rss_check = now + _RSS_CHECK_INTERVAL
+                rss = process_tree_rss(self.process.pid)
+                if rss is not None and rss > manager.max_rss_bytes:
+                    manager.count("memory_kills")
+                    logger.error(f"[RENDER_WORKER] İşçi {self.index} bellek sınırını aştı "
+                                 f"({rss // (1024 * 1024)} MB > {manager.max_rss_bytes // (1024 * 1024)} MB)")
+                    job.resolve(RenderWorkerCrashed(
+                        f"Render bellek sınırını aştı ({rss // (1024 * 1024)} MB)"))
+                    self._restart("memory")
+                    return
+
+    def info(self) -> Dict[str, Any]:
+        process = self.process
+        rss = process_tree_rss(process.pid) if process is not None and process.is_alive() else None
+        return {
+            "index": self.index,
+            "pid": process.pid if process is not None else None,
+            "state": self.state,
+            "current_job": self.current_job,
+            "jobs_since_start": self.jobs_done,
+            "restarts": self.restarts,
+            "rss_mb": None if rss is None else round(rss / (1024 * 1024), 1),
+        }
+
+
+class RenderWorkerPool:
+    """İşçi süreçlerini ve sınırlı iş kuyruğunu yöneten havuz."""
+
+    def __init__(self, workers: int = RENDER_WORKERS, contexts_per_worker: int = RENDER_WORKER_CONTEXTS,
+                 job_timeout: float = RENDER_JOB_TIMEOUT, max_rss_mb: int = RENDER_WORKER_MAX_RSS_MB,
+                 max_jobs: int = RENDER_WORKER_MAX_JOBS, queue_max: int = RENDER_QUEUE_MAX,
+                 spool_dir: Path = RENDER_SPOOL_DIR):
+        self.workers = max(1, workers)
+        self.contexts_per_worker = max(1, contexts_per_worker)
+        self.job_timeout = job_timeout
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024
+        self.max_jobs = max_jobs
+        self.spool_dir = Path(spool_dir)
+        # fork, API sürecinin thread'lerini ve event loop'unu kopyalar; spawn temiz başlar
+        self.context = multiprocessing.get_context("spawn")
+        self.jobs: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        # Kabul edilmiş (bekleyen + çalışan) iş sayısı; sınır işçi sayısı + kuyruk uzunluğu
+        self.capacity = self.workers + max(0, queue_max)
+        self._pending = 0
+        self._admission = threading.Lock()
+        self.closing = threading.Event()
+        self._counts: Dict[str, int] = {}
+        self._counts_lock = threading.Lock()
+        self._slots: List[_WorkerSlot] = []
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def count(self, name: str) -> None:
+        with self._counts_lock:
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def start(self) -> "RenderWorkerPool":
+        with self._start_lock:
+            if not self._started:
+                self.spool_dir.mkdir(parents=True, exist_ok=True)
+                # Önceki süreçten kalan (ör. kill -9) spool dosyaları
+                for stale in self.spool_dir.glob("*.html"):
+                    stale.unlink(missing_ok=True)
+                self._slots = [_WorkerSlot(self, i) for i in range(self.workers)]
+                for slot in self._slots:
+                    slot.thread.start()
+                self._started = True
+                logger.info(f"[RENDER_WORKER] {self.workers} işçi, işçi başına "
+                            f"{self.contexts_per_worker} bağlam, en fazla {self.capacity} iş")
+        return self
+
+    @property
+    def saturated(self) -> bool:
+        """Boş işçi yok ve kuyruk dolu."""
+        return self._pending >= self.capacity
+
+    def _admit(self) -> bool:
+        with self._admission:
+            if self._pending >= self.capacity:
+                return False
+            self._pending += 1
+            return True
+
+    async def _admit_waiting(self) -> bool:
+        """
+        Kuyrukta yer açılana kadar event loop üzerinde bekler. Yer yalnızca
+        _admit başarılı olduğunda (await olmadan) alınır; bekleyen görev iptal
+        edilirse (toplu iş durduruldu, istemci gitti) hiçbir yer tutulmaz.
+        """
+        while not self._admit():
+            if self.closing.is_set():
+                return False
+            await asyncio.sleep(_POLL_INTERVAL)
+        return True
+
+    def release(self) -> None:
+        with self._admission:
+            self._pending -= 1
+
+    async def render(self, html: str, pdf_path: Path, use_page_cache: bool = PDF_PAGE_CACHE_ENABLED,
+                     shards: int = PDF_RENDER_SHARDS, wait: bool = False) -> Path:
+        """
+        HTML'i bir işçide PDF'e çevirir. Kuyruk doluysa hemen RenderQueueFull
+        fırlatır; wait=True ise (ör. toplu üretim) kuyrukta yer açılmasını bekler.
+        """
+        if self.closing.is_set():
+            raise RenderWorkerError("Render işçileri kapatılıyor")
+        self.start()
+        admitted = self._admit() or (wait and await self._admit_waiting())
+        if not admitted:
+            self.count("rejected")
+            raise RenderQueueFull("Tüm render işçileri meşgul, lütfen biraz sonra tekrar deneyin")
+
+        job_id = uuid.uuid4().hex[:12]
+        html_path = self.spool_dir / f"{job_id}.html"
+        try:
+            await asyncio.to_thread(html_path.write_text, html, encoding="utf-8")
+        except BaseException:
+            self.release()
+            raise
+        loop = asyncio.get_running_loop()
+        job = _Job(id=job_id, html_path=html_path, pdf_path=Path(pdf_path).resolve(),
+                   use_page_cache=use_page_cache, shards=shards, loop=loop, future=loop.create_future())
+        self.jobs.put(job)
+        return await job.future
+
+    def stats(self) -> Dict[str, Any]:
+        with self._counts_lock:
+            counts = dict(self._counts)
+        return {
+            "workers": self.workers,
+            "started": self._started,
+            "busy": sum(1 for slot in self._slots if slot.state == "busy"),
+            "queued": self.jobs.qsize(),
+            "accepted": self._pending,
+            "capacity": self.capacity,
+            "job_timeout_s": self.job_timeout,
+            "max_rss_mb": self.max_rss_bytes // (1024 * 1024),
+            "counts": counts,
+            "slots": [slot.info() for slot in self._slots],
+        }
+
+    def close(self) -> None:
+        """İşçileri durdurur; bekleyen işler hata ile sonlanır."""
+        if not self._started:
+            return
+        self.closing.set()
+        while True:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job.html_path.unlink(missing_ok=True)
+                job.resolve(RenderWorkerError("Render işçileri kapatıldı"))
+                self.release()
+        for slot in self._slots:
+            slot.thread.join(timeout=15)
+        logger.info("[RENDER_WORKER] İşçiler durduruldu")
+
+
+_render_workers: Optional[RenderWorkerPool] = None
+_render_workers_lock = threading.Lock()
+
+
+def render_workers_enabled() -> bool:
+    return RENDER_WORKERS > 0
+
+
+def get_render_workers() -> RenderWorkerPool:
+    """Süreç genelinde paylaşılan render işçi havuzunu döndürür (işçiler ilk işte başlar)."""
+    global _render_workers
+    with _render_workers_lock:
+        if _render_workers is None:
+            _render_workers = RenderWorkerPool()
+        return _render_workers
+
+
+def shutdown_render_workers() -> None:
+    global _render_workers
+    with _render_workers_lock:
+        pool, _render_workers = _render_workers, None
+    if pool is not None:
+        pool.close()
+
+
+def peek_render_workers() -> Optional[RenderWorkerPool]:
+    """Havuz oluşturulduysa döndürür (metrikler havuzu başlatmasın diye)."""
+    return _render_workers
@@ -0,0 +1,246 @@
+"""
+Yapılandırılmış rapor içeriği ve yerel Jinja render'ı.
+
+"structured" modunda model tam HTML yerine REPORT_CONTENT_SCHEMA'ya uyan kompakt
+bir JSON döner (bölümler, alt bölümler, paragraflar, görsel referansları,
+metrikler). HTML, templates/reports.json'da "mode": "structured" ile kayıtlı
+Jinja şablonlarından yerel olarak üretilir; sayfa iskeleti ve CSS modele
+yazdırılmadığı için çıktı token'ları ve üretim süresi belirgin şekilde düşer.
+"""
+import datetime
+import html
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import STRUCTURED_REPORT_TEMPLATE
+from utils.template_registry import get_template_registry
+
+logger = logging.getLogger(__name__)
+
+# Structured raporların HTML'ine gömülen şablon adı ve içerik (bkz. embed_report_metadata)
+_TEMPLATE_META_RE = re.compile(r'\s*<meta name="report-template" content="([^"]*)">', re.IGNORECASE)
+_CONTENT_SCRIPT_RE = re.compile(
+    r'\s*<script type="application/json" id="report-content">(.*?)</script>', re.IGNORECASE | re.DOTALL)
+
+# Responses API structured output şeması (strict modda tüm alanlar zorunludur)
+REPORT_CONTENT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "additionalProperties": False,
+    "required": ["title", "period", "sections"],
+    "properties": {
+        "title": {"type": "string"},
+        "period": {"type": "string"},
+        "sections": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "additionalProperties": False,
+                "required": ["title", "subsections"],
+                "properties": {
+                    "title": {"type": "string"},
+                    "subsections": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "additionalProperties": False,
+                            "required": ["heading", "paragraphs", "metrics", "images"],
+                            "properties": {
+                                "heading": {"type": "string"},
+                                "paragraphs": {"type": "array", "items": {"type": "string"}},
+                                "metrics": {
+                                    "type": "array",
+                                    "items": {
+                                        "type": "object",
+                                        "additionalProperties": False,
+                                        "required": ["label", "value"],
+                                        "properties": {
+                                            "label": {"type": "string"},
+                                            "value": {"type": "string"},
+                                        },
+                                    },
+                                },
+                                "images": {
+                                    "type": "array",
+                                    "items": {
+                                        "type": "object",
+                                        "additionalProperties": False,
+                                        "required": ["file", "caption"],
+                                        "properties": {
+                                            "file": {"type": "string"},
+                                            "caption": {"type": "string"},
+                                        },
+                                    },
+                                },
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    },
+}
+
+# responses.create(text=...) için hazır format tanımı
+REPORT_CONTENT_FORMAT: Dict[str, Any] = {
+    "format": {
+        "type": "json_schema",
+        "name": "investor_report_content",
+        "schema": REPORT_CONTENT_SCHEMA,
+        "strict": True,
+    }
+}
+
+# Bileşen bazlı ("sections") üretimde her çağrı yalnızca tek bir bölüm döner
+SECTION_CONTENT_FORMAT: Dict[str, Any] = {
+    "format": {
+        "type": "json_schema",
+        "name": "investor_report_section",
+        "schema": REPORT_CONTENT_SCHEMA["properties"]["sections"]["items"],
+        "strict": True,
+    }
+}
+
+
+def get_structured_template_file(topic: str) -> str:
+    """
+    reports.json'da "structured" olarak kayıtlı bir şablonun kayıttaki adını döndürür.
+
+    Raises:
+        KeyError: Konu kayıtlı değilse veya structured modda değilse
+    """
+    try:
+        entry = get_template_registry().report_entry(topic)
+    except KeyError:
+        entry = None
+    if entry is None or entry.mode != "structured":
+        raise KeyError(f"No structured report template registered for topic '{topic}'")
+    return entry.name
+
+
+def normalize_report_content(content: Dict[str, Any], known_images: Iterable[str]) -> Dict[str, Any]:
+    """
+    Model çıktısını şablonun beklediği biçime getirir.
+
+    Boş paragrafları ve alt bölümleri atar, bilinmeyen görsel dosya adlarını
+    (modelin uydurduğu adlar) çıkarır.
+
+    Args:
+        content: REPORT_CONTENT_SCHEMA'ya uyan sözlük
+        known_images: Projede gerçekten bulunan görsel dosya adları
+
+    Returns:
+        Temizlenmiş içerik
+    """
+    known = set(known_images)
+    sections = []
+    for section in content.get("sections") or []:
+        subsections = []
+        for subsection in section.get("subsections") or []:
+            paragraphs = [p.strip() for p in subsection.get("paragraphs") or [] if p and p.strip()]
+            images = []
+            for image in subsection.get("images") or []:
+                if image.get("file") in known:
+                    images.append({"file": image["file"], "caption": image.get("caption") or ""})
+                else:
+                    logger.warning(f"[STRUCTURED] Bilinmeyen görsel atlandı: {image.get('file')}")
+            metrics = [m for m in subsection.get("metrics") or [] if m.get("label") and m.get("value")]
+            if paragraphs or images or metrics:
+                subsections.append({
+                    "heading": (subsection.get("heading") or "").strip(),
+                    "paragraphs": paragraphs,
+                    "metrics": metrics,
+                    "images": images,
+                })
+        if subsections:
+            sections.append({"title": (section.get("title") or "").strip(), "subsections": subsections})
+
+    if not sections:
+        raise ValueError("Structured report content has no sections")
+
+    return {
+        "title": (content.get("title") or "").strip(),
+        "period": (content.get("period") or "").strip(),
+        "sections": sections,
+    }
+
+
+def render_structured_report(content: Dict[str, Any], project_name: str, assets: Dict[str, str],
+                             topic: str = STRUCTURED_REPORT_TEMPLATE) -> str:
+    """
+    Yapılandırılmış içeriği kayıtlı Jinja şablonu ile HTML'e çevirir.
+
+    Args:
+        content: normalize_report_content çıktısı
+        project_name: Proje adı
+        assets: Projenin manifest'teki asset'leri (ad -> yol)
+        topic: reports.json'daki şablon konusu
+
+    Returns:
+        Tam HTML belgesi (görseller ad ile referanslı)
+    """
+    template = get_template_registry().get(get_structured_template_file(topic))
+    cover_image = next(
+        (name for name in assets if name.endswith("_foto") and name != "kapak_foto"),
+        None,
+    )
+    report = {**content, "title": content["title"] or f"{project_name} Yatırımcı Raporu"}
+    rendered = template.render(
+        report=report,
+        project_name=project_name,
+        assets=assets,
+        cover_image=cover_image,
+        year=datetime.datetime.now().year,
+    )
+    return embed_report_metadata(rendered, topic, report)
+
+
+def embed_report_metadata(document: str, topic: str, content: Dict[str, Any]) -> str:
+    """
+    Şablon adını ve yapılandırılmış içeriği HTML'in <head>'ine gömer.
+
+    Kaydedilen rapor HTML'i böylece tarayıcısız motorlarla (bkz.
+    utils/render_engines.py) içerikten yeniden render edilebilir. Blok render
+    öncesinde extract_report_metadata ile çıkarılır.
+    """
+    payload = json.dumps(content, ensure_ascii=False).replace("</", "<\\/")
+    block = (f'<meta name="report-template" content="{html.escape(topic)}">\n'
+             f'<script type="application/json" id="report-content">{payload}</script>\n')
+    head_end = document.lower().find("</head>")
+    if head_end < 0:
+        return block + document
+    return document[:head_end] + block + document[head_end:]
+
+
+def extract_report_metadata(document: str) -> Tuple[str, Optional[str], Optional[Dict[str, Any]]]:
+    """
+    embed_report_metadata'nın gömdüğü bloğu çıkarır.
+
+    Returns:
+        (bloksuz HTML, şablon konusu, içerik); blok yoksa (HTML, None, None)
+    """
+    topic = content = None
+    match = _TEMPLATE_META_RE.search(document)
+    if match:
+        topic = html.unescape(match.group(1))
+        document = document[:match.start()] + document[match.end():]
+    match = _CONTENT_SCRIPT_RE.search(document)
+    if match:
+        try:
+            content = json.loads(match.group(1))
+        except ValueError:
+            logger.warning("[STRUCTURED] Gömülü rapor içeriği okunamadı")
+        document = document[:match.start()] + document[match.end():]
+    return document, topic, content
+
+
+def list_image_names(image_folder: Path) -> List[str]:
+    """Klasördeki görsel dosya adlarını döndürür."""
+    if not image_folder.exists():
+        return []
+    return sorted(
+        path.name for path in image_folder.iterdir()
+        if path.suffix.lower() in (".jpg", ".jpeg", ".png", ".webp")
+    )
@@ -0,0 +1,213 @@
+"""
+Rapor ve e-posta şablonları için ortak kayıt.
+
+Tüm şablonlar (templates/reports.json'daki rapor şablonları ve templates/email
+altındaki e-posta şablonları) başlangıçta bir kez yüklenir, yolları doğrulanır
+ve Jinja ile derlenir. Derlenmiş bytecode data/cache/templates altında tutulur;
+böylece yeniden başlatmalarda şablonlar tekrar derlenmez.
+
+Sıcak yolda disk erişimi yoktur: render, bellekteki derlenmiş şablonu kullanır.
+Dosya değişiklikleri en fazla TEMPLATE_RELOAD_INTERVAL saniyede bir mtime
+kontrolü ile algılanır ve yalnızca değişen şablon yeniden derlenir.
+"""
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from config import BASE_DIR, TEMPLATE_CACHE_DIR, TEMPLATE_RELOAD_INTERVAL, TEMPLATES_DIR
+
+if TYPE_CHECKING:
+    from jinja2 import Template
+
+logger = logging.getLogger(__name__)
+
+REPORTS_MANIFEST = TEMPLATES_DIR / "reports.json"
+EMAIL_TEMPLATES_DIR = TEMPLATES_DIR / "email"
+EMAIL_TEMPLATE_EXTENSIONS = (".html", ".txt")
+
+
+@dataclass
+class ReportTemplateEntry:
+    """reports.json'daki tek bir rapor şablonu."""
+    topic: str
+    name: str            # TEMPLATES_DIR'e göre yol (ör. report_html/finance_basic.html)
+    mode: str = "html"
+    engine: Optional[str] = None   # PDF render motoru (verilmezse PDF_RENDER_ENGINE)
+
+
+@dataclass
+class _LoadedTemplate:
+    template: "Template"
+    path: Path
+    mtime_ns: int
+
+
+class TemplateRegistry:
+    """Derlenmiş şablonları ada göre tutan, değişen dosyaları yeniden yükleyen kayıt."""
+
+    def __init__(self, templates_dir: Path = TEMPLATES_DIR, cache_dir: Path = TEMPLATE_CACHE_DIR,
+                 reload_interval: float = TEMPLATE_RELOAD_INTERVAL):
+        self.templates_dir = Path(templates_dir)
+        self.reload_interval = reload_interval
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        # Derlenmiş şablonlar kayıtta tutulur; Jinja'nın kendi önbelleği kapalıdır
+        # (cache_size=0), böylece yeniden derleme her zaman dosyanın güncel halini okur.
+        # Bytecode önbelleği kaynak içeriğine göre anahtarlandığından değişmeyen
+        # şablonlar yeniden başlatmada derlenmeden yüklenir.
+        from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+        self.env = Environment(
+            loader=FileSystemLoader(str(self.templates_dir)),
+            bytecode_cache=FileSystemBytecodeCache(str(cache_dir)),
+            autoescape=select_autoescape(["html"]),
+            cache_size=0,
+            auto_reload=False,
+        )
+        self._templates: Dict[str, _LoadedTemplate] = {}
+        self._reports: Dict[str, ReportTemplateEntry] = {}
+        self._manifest_mtime_ns = 0
+        self._last_check = 0.0
+        self._lock = threading.RLock()
+        self.load_all()
+
+    def _path_for(self, name: str) -> Path:
+        return self.templates_dir / name
+
+    def _compile(self, name: str) -> None:
+        path = self._path_for(name)
+        mtime_ns = path.stat().st_mtime_ns
+        template = self.env.get_template(name)
+        self._templates[name] = _LoadedTemplate(template=template, path=path, mtime_ns=mtime_ns)
+
+    def _load_manifest(self) -> Dict[str, ReportTemplateEntry]:
+        """reports.json'ı okur ve her girişin yolunu doğrular."""
+        with open(REPORTS_MANIFEST, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self._manifest_mtime_ns = REPORTS_MANIFEST.stat().st_mtime_ns
+
+        reports = {}
+        for entry in manifest.get("templates", []):
+            topic = entry.get("topic")
+            # Yollar depo köküne göre yazılır (backend/templates/...)
+            path = (BASE_DIR.parent / entry.get("path", "")).resolve()
+            try:
+                name = path.relative_to(self.templates_dir.resolve()).as_posix()
+            except ValueError:
+                logger.error(f"[TEMPLATES] '{topic}' şablonu templates dizini dışında: {entry.get('path')}")
+                continue
+            if not path.is_file():
+                logger.error(f"[TEMPLATES] '{topic}' şablonu bulunamadı: {entry.get('path')}")
+                continue
+            reports[topic] = ReportTemplateEntry(topic=topic, name=name, mode=entry.get("mode", "html"),
+                                                 engine=entry.get("engine"))
+        return reports
+
+    def _email_template_names(self) -> List[str]:
+        if not EMAIL_TEMPLATES_DIR.exists():
+            return []
+        return sorted(
+            path.relative_to(self.templates_dir).as_posix()
+            for path in EMAIL_TEMPLATES_DIR.iterdir()
+            if path.suffix in EMAIL_TEMPLATE_EXTENSIONS
+        )
+
+    def load_all(self) -> None:
+        """Manifest'i ve tüm şablonları yükleyip derler."""
+        started = time.perf_counter()
+        with self._lock:
+            self._reports = self._load_manifest()
+            names = [entry.name for entry in self._reports.values()] + self._email_template_names()
+            self._templates = {}
+            for name in names:
+                try:
+                    self._compile(name)
+                except Exception as e:
+                    logger.error(f"[TEMPLATES] {name} derlenemedi: {e}")
+            self._last_check = time.monotonic()
+        logger.info(f"[TEMPLATES] {len(self._templates)} şablon yüklendi "
+                    f"({(time.perf_counter() - started) * 1000:.1f} ms)")
+
+    def _reload_changed(self) -> None:
+        """Son kontrolden bu yana değişen dosyaları yeniden derler (aralıkla sınırlı)."""
+        if self.reload_interval <= 0:
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        with self._lock:
+            if now - self._last_check < self.reload_interval:
+                return
+            self._last_check = now
+            try:
+                if REPORTS_MANIFEST.stat().st_mtime_ns != self._manifest_mtime_ns:
+                    logger.info("[TEMPLATES] reports.json değişti, tüm şablonlar yeniden yükleniyor")
+                    self.load_all()
+                    return
+            except Exception as e:
+                logger.error(f"[TEMPLATES] reports.json yeniden yüklenemedi: {e}")
+                return
+            for name, loaded in list(self._templates.items()):
+                try:
+                    mtime_ns = loaded.path.stat().st_mtime_ns
+                except OSError:
+                    continue
+                if mtime_ns != loaded.mtime_ns:
+                    try:
+                        self._compile(name)
+                        logger.info(f"[TEMPLATES] {name} yeniden yüklendi")
+                    except Exception as e:
+                        # Bozuk düzenlemede eski derlenmiş şablon kullanılmaya devam eder
+                        loaded.mtime_ns = mtime_ns
+                        logger.error(f"[TEMPLATES] {name} yeniden derlenemedi: {e}")
+
+    def get(self, name: str) -> "Template":
+        """
+        TEMPLATES_DIR'e göre adı verilen derlenmiş şablonu döndürür.
+
+        Raises:
+            FileNotFoundError: Şablon kayıtlı değilse
+        """
+        self._reload_changed()
+        loaded = self._templates.get(name)
+        if loaded is None:
+            raise FileNotFoundError(f"Template bulunamadı: {name}")
+        return loaded.template
+
+    def render(self, name: str, **context: Any) -> str:
+        return self.get(name).render(**context)
+
+    def report_entry(self, topic: str) -> ReportTemplateEntry:
+        """
+        reports.json'daki bir rapor şablonunun kaydını döndürür.
+
+        Raises:
+            KeyError: Konu kayıtlı değilse
+        """
+        self._reload_changed()
+        entry = self._reports.get(topic)
+        if entry is None:
+            raise KeyError(f"No report template registered for topic '{topic}'")
+        return entry
+
+    def report_topics(self) -> List[str]:
+        return sorted(self._reports)
+
+    def render_report(self, topic: str, **context: Any) -> str:
+        return self.render(self.report_entry(topic).name, **context)
+
+
+_template_registry: Optional[TemplateRegistry] = None
+_template_registry_lock = threading.Lock()
+
+
+def get_template_registry() -> TemplateRegistry:
+    """Süreç genelinde paylaşılan şablon kaydını döndürür."""
+    global _template_registry
+    with _template_registry_lock:
+        if _template_registry is None:
+            _template_registry = TemplateRegistry()
+        return _template_registry
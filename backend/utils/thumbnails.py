@@ -0,0 +1,224 @@
+"""
+Rapor PDF'leri için sayfa önizlemeleri (küçük resimler).
+
+Sayfalar pypdfium2 ile PNG/WebP'ye çevrilir ve PDF'in içerik hash'ine
+(SHA-256) göre data/cache/thumbnails altında saklanır:
+
+    <hash>/source           önizlemelerin üretildiği PDF'in yolu
+    <hash>/p<sayfa>_w<genişlik>.<biçim>
+
+PDF değişince hash ve dolayısıyla önizleme URL'i de değişir; bu yüzden içerik
+adresli URL'ler süresiz önbelleklenebilir (Cache-Control: immutable). Render
+hattı her PDF'ten sonra ilk THUMBNAIL_PREWARM_PAGES sayfanın önizlemesini
+varsayılan ayarlarla hazırlar; liste sayfaları PDF'i hiç indirmeden önizleme
+gösterebilir.
+"""
+import hashlib
+import io
+import logging
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import (
+    THUMBNAIL_CACHE_DIR,
+    THUMBNAIL_CACHE_MAX_PDFS,
+    THUMBNAIL_FORMAT,
+    THUMBNAIL_MAX_WIDTH,
+    THUMBNAIL_PREWARM_PAGES,
+    THUMBNAIL_WIDTH,
+)
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_FORMATS = {"png": ("PNG", "image/png"), "webp": ("WEBP", "image/webp")}
+_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+_HASH_CHUNK = 1024 * 1024
+
+# pdfium iş parçacığı güvenli değildir; tüm çağrılar tek kilitle sıralanır
+_pdfium_lock = threading.Lock()
+
+
+def is_pdf_hash(value: str) -> bool:
+    return bool(_HASH_RE.match(value or ""))
+
+
+def clamp_width(width: Optional[int]) -> int:
+    return max(32, min(int(width or THUMBNAIL_WIDTH), THUMBNAIL_MAX_WIDTH))
+
+
+class ThumbnailCache:
+    """PDF içerik hash'ine göre anahtarlanmış sayfa önizleme önbelleği."""
+
+    def __init__(self, cache_dir: Path = THUMBNAIL_CACHE_DIR, max_pdfs: int = THUMBNAIL_CACHE_MAX_PDFS):
+        self.cache_dir = Path(cache_dir)
+        self.max_pdfs = max_pdfs
+        self.hits = 0
+        self.misses = 0
+        # (yol, mtime_ns, boyut) -> hash; aynı PDF her istekte yeniden hash'lenmez
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+        self._page_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def pdf_hash(self, pdf_path: Path) -> str:
+        """PDF'in SHA-256'sı (dosya değişmedikçe bellekten)."""
+        path = Path(pdf_path).resolve()
+        stat = path.stat()
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        cached = self._hashes.get(key)
+        if cached is not None:
+            return cached
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+                digest.update(chunk)
+        value = digest.hexdigest()
+        with self._lock:
+            self._hashes[key] = value
+        return value
+
+    def register(self, pdf_path: Path) -> str:
+        """PDF'i hash'ine kaydeder (önizlemeler sonradan hash ile istenebilir) ve hash'i döndürür."""
+        path = Path(pdf_path).resolve()
+        pdf_hash = self.pdf_hash(path)
+        entry_dir = self.cache_dir / pdf_hash
+        source = entry_dir / "source"
+        if not source.exists() or source.read_text(encoding="utf-8") != str(path):
+            entry_dir.mkdir(parents=True, exist_ok=True)
+            source.write_text(str(path), encoding="utf-8")
+            self.prune()
+        return pdf_hash
+
+    def _source_for(self, pdf_hash: str) -> Path:
+        """Hash'in PDF'ini bulur; PDF o zamandan beri değiştiyse FileNotFoundError."""
+        try:
+            path = Path((self.cache_dir / pdf_hash / "source").read_text(encoding="utf-8"))
+        except OSError:
+            raise FileNotFoundError(f"Önizleme bulunamadı: {pdf_hash}") from None
+        if not path.exists() or self.pdf_hash(path) != pdf_hash:
+            raise FileNotFoundError(f"Önizlemenin PDF'i artık mevcut değil: {pdf_hash}")
+        return path
+
+    def page_count(self, pdf_hash: str) -> int:
+        count = self._page_counts.get(pdf_hash)
+        if count is None:
+            import pypdfium2
+
+            path = self._source_for(pdf_hash)
+            with _pdfium_lock:
+                document = pypdfium2.PdfDocument(str(path))
+                try:
+                    count = len(document)
+                finally:
+                    document.close()
+            self._page_counts[pdf_hash] = count
+        return count
+
+    def _path_for(self, pdf_hash: str, page: int, width: int, fmt: str) -> Path:
+        return self.cache_dir / pdf_hash / f"p{page}_w{width}.{fmt}"
+
+    def get(self, pdf_hash: str, page: int = 1, width: int = THUMBNAIL_WIDTH,
+            fmt: str = THUMBNAIL_FORMAT) -> Path:
+        """
+        Sayfa önizlemesinin dosya yolunu döndürür; yoksa üretir.
+
+        Raises:
+            FileNotFoundError: Hash bilinmiyorsa veya PDF değiştiyse
+            ValueError: Geçersiz sayfa veya biçim
+        """
+        if fmt not in THUMBNAIL_FORMATS:
+            raise ValueError(f"Unsupported thumbnail format '{fmt}' (expected: {', '.join(THUMBNAIL_FORMATS)})")
+        width = clamp_width(width)
+        path = self._path_for(pdf_hash, page, width, fmt)
+        if path.exists():
+            with self._lock:
+                self.hits += 1
+            return path
+        self.render_pages(pdf_hash, [page], width, fmt)
+        with self._lock:
+            self.misses += 1
+        return path
+
+    def render_pages(self, pdf_hash: str, pages: List[int], width: int = THUMBNAIL_WIDTH,
+                     fmt: str = THUMBNAIL_FORMAT) -> List[Path]:
+        """Verilen sayfaları (1'den başlar) tek seferde açılan PDF'ten üretir; var olanları atlar."""
+        import pypdfium2
+
+        width = clamp_width(width)
+        pil_format, _ = THUMBNAIL_FORMATS[fmt]
+        source = self._source_for(pdf_hash)
+        written = []
+        with _pdfium_lock:
+            document = pypdfium2.PdfDocument(str(source))
+            try:
+                self._page_counts[pdf_hash] = len(document)
+                for page in pages:
+                    if not 1 <= page <= len(document):
+                        raise ValueError(f"Page {page} out of range (1-{len(document)})")
+                    path = self._path_for(pdf_hash, page, width, fmt)
+                    if path.exists():
+                        written.append(path)
+                        continue
+                    pdf_page = document[page - 1]
+                    image = pdf_page.render(scale=width / pdf_page.get_width()).to_pil()
+                    buffer = io.BytesIO()
+                    if fmt == "webp":
+                        image.save(buffer, format=pil_format, quality=80, method=4)
+                    else:
+                        image.save(buffer, format=pil_format, optimize=True)
+                    tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                    tmp_path.write_bytes(buffer.getvalue())
+                    os.replace(tmp_path, path)
+                    written.append(path)
+            finally:
+                document.close()
+        # LRU sıralaması için dizin zamanını güncelle
+        try:
+            os.utime(self.cache_dir / pdf_hash, None)
+        except OSError:
+            pass
+        return written
+
+    def prewarm(self, pdf_path: Path, pages: int = THUMBNAIL_PREWARM_PAGES) -> str:
+        """Render sonrası: PDF'i kaydeder ve ilk sayfaların varsayılan önizlemelerini üretir."""
+        pdf_hash = self.register(pdf_path)
+        count = self.page_count(pdf_hash)
+        self.render_pages(pdf_hash, list(range(1, min(pages, count) + 1)))
+        return pdf_hash
+
+    def prune(self) -> None:
+        """En eski kullanılan PDF'lerin önizlemelerini silerek önbelleği max_pdfs ile sınırlar."""
+        entries = [path for path in self.cache_dir.iterdir() if path.is_dir()]
+        overflow = len(entries) - self.max_pdfs
+        if overflow <= 0:
+            return
+        entries.sort(key=lambda p: p.stat().st_mtime)
+        for path in entries[:overflow]:
+            shutil.rmtree(path, ignore_errors=True)
+            self._page_counts.pop(path.name, None)
+        logger.info(f"[THUMBNAILS] Önbellekten {overflow} PDF'in önizlemeleri silindi")
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+_thumbnail_cache: Optional[ThumbnailCache] = None
+_thumbnail_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """Süreç genelinde paylaşılan önizleme önbelleğini döndürür."""
+    global _thumbnail_cache
+    with _thumbnail_cache_lock:
+        if _thumbnail_cache is None:
+            _thumbnail_cache = ThumbnailCache()
+        return _thumbnail_cache
+
+
+def preview_url(pdf_hash: str, page: int = 1, width: int = THUMBNAIL_WIDTH, fmt: str = THUMBNAIL_FORMAT) -> str:
+    """İçerik adresli (süresiz önbelleklenebilir) önizleme URL'i."""
+    return f"/previews/{pdf_hash}/{page}.{fmt}?width={clamp_width(width)}"
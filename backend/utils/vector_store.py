@@ -1,37 +1,68 @@
-from openai import OpenAI
 from concurrent.futures import ThreadPoolExecutor
-from tqdm import tqdm
+from typing import TYPE_CHECKING
 import concurrent
 import os
-import pandas as pd
+import hashlib
+import json
+import logging
+import threading
 
+from config import CACHE_DIR, OPENAI_MAX_CONCURRENCY
+from utils.metrics import track_stage
+from utils.rate_limiter import get_rate_limiter
 
+if TYPE_CHECKING:
+    from openai import OpenAI
 
-def upload_single_pdf(file_path: str, vector_store_id: str, client: OpenAI) -> dict:
+logger = logging.getLogger(__name__)
+
+# Proje -> (PDF parmak izi, vector store id) kayıtları
+VECTOR_STORE_REGISTRY_PATH = CACHE_DIR / "vector_stores.json"
+_registry_lock = threading.Lock()
+# Aynı store'un eşzamanlı eşitlenmesini önler (ör. yükleme sonrası ön hazırlık ile rapor üretimi)
+_store_locks: dict = {}
+
+
+
+def upload_single_pdf(file_path: str, vector_store_id: str, client: "OpenAI") -> dict:
     file_name = os.path.basename(file_path)
     try:
-        file_response = client.files.create(file=open(file_path, 'rb'), purpose="assistants")
-        attach_response = client.vector_stores.files.create(
+        limiter = get_rate_limiter()
+        # Bayt olarak gönderilir ki yeniden denemede dosya imleci sorun olmasın
+        with open(file_path, 'rb') as f:
+            file_content = f.read()
+        file_response = limiter.call(client.files.create, file=(file_name, file_content), purpose="assistants")
+        attach_response = limiter.call(
+            client.vector_stores.files.create,
             vector_store_id=vector_store_id,
             file_id=file_response.id
         )
-        return {"file": file_name, "status": "success"}
+        return {"file": file_name, "status": "success", "file_id": file_response.id}
     except Exception as e:
         print(f"Error with {file_name}: {str(e)}")
         return {"file": file_name, "status": "failed", "error": str(e)}
 
-def upload_pdf_files_to_vector_store(vector_store_id: str, dir_pdfs: str,client = OpenAI ) -> dict:
-    pdf_files = [os.path.join(dir_pdfs, f) for f in os.listdir(dir_pdfs)]
-    stats = {"total_files": len(pdf_files), "successful_uploads": 0, "failed_uploads": 0, "errors": []}
+def upload_pdf_files_to_vector_store(vector_store_id: str, dir_pdfs: str, client: "OpenAI" = None, pdf_files: list = None) -> dict:
+    from tqdm import tqdm
+
+    if client is None:
+        from utils.openai_client import get_client
+        client = get_client()
+    if pdf_files is None:
+        pdf_files = [os.path.join(dir_pdfs, f) for f in os.listdir(dir_pdfs)]
+    stats = {"total_files": len(pdf_files), "successful_uploads": 0, "failed_uploads": 0, "errors": [],
+             "file_ids": {}}
     
     print(f"{len(pdf_files)} PDF files to process. Uploading in parallel...")
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
+    # Asıl eşzamanlılık paylaşılan limiter tarafından uyarlanır; havuz yalnızca üst sınırdır
+    with concurrent.futures.ThreadPoolExecutor(max_workers=OPENAI_MAX_CONCURRENCY) as executor:
         futures = {executor.submit(upload_single_pdf, file_path, vector_store_id,client): file_path for file_path in pdf_files}
         for future in tqdm(concurrent.futures.as_completed(futures), total=len(pdf_files)):
             result = future.result()
             if result["status"] == "success":
                 stats["successful_uploads"] += 1
+                stats["file_ids"][result["file"]] = result["file_id"]
             else:
                 stats["failed_uploads"] += 1
                 stats["errors"].append(result)
@@ -40,7 +71,7 @@ def upload_pdf_files_to_vector_store(vector_store_id: str, dir_pdfs: str,client
 
 def create_vector_store(project_name: str,client) -> dict:
     try:
-        vector_store = client.vector_stores.create(name=project_name)
+        vector_store = get_rate_limiter().call(client.vector_stores.create, name=project_name)
         details = {
             "id": vector_store.id,
             "name": vector_store.name,
@@ -54,9 +85,161 @@ def create_vector_store(project_name: str,client) -> dict:
         return {}
 
 
-def summarize_vector_store(vector_store_details,client = OpenAI) -> dict:
+def pdf_folder_fingerprint(dir_pdfs: str, pdf_files: list = None) -> str:
+    """
+    Klasördeki (veya verilen) PDF'lerin ad, boyut ve değişiklik zamanlarından
+    bir parmak izi üretir.
+    """
+    if pdf_files is None:
+        pdf_files = [os.path.join(dir_pdfs, f) for f in os.listdir(dir_pdfs)]
+    digest = hashlib.sha256()
+    for file_path in sorted(pdf_files, key=os.path.basename):
+        stat = os.stat(file_path)
+        digest.update(f"{os.path.basename(file_path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def pdf_file_signature(file_path: str) -> str:
+    """Tek bir PDF'in boyut ve değişiklik zamanından imzası (pdf_folder_fingerprint ile aynı girdiler)."""
+    stat = os.stat(file_path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _load_registry() -> dict:
+    try:
+        with open(VECTOR_STORE_REGISTRY_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_registry(registry: dict) -> None:
+    tmp_path = f"{VECTOR_STORE_REGISTRY_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(registry, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, VECTOR_STORE_REGISTRY_PATH)
+
+
+def _remove_store_file(vector_store_id: str, file_id: str, client) -> None:
+    """Dosyayı store'dan ve OpenAI dosyalarından kaldırır (başarısızlık yalnızca loglanır)."""
+    limiter = get_rate_limiter()
+    try:
+        limiter.call(client.vector_stores.files.delete, file_id, vector_store_id=vector_store_id)
+        limiter.call(client.files.delete, file_id)
+    except Exception as e:
+        logger.warning(f"[VECTOR] {file_id} store'dan kaldırılamadı: {e}")
+
+
+def _sync_vector_store(project_name: str, entry: dict, pdf_files: list, client) -> dict:
+    """
+    Kayıtlı store'u klasördeki PDF'lerle eşitler: yalnızca yeni/değişen dosyalar
+    yüklenir, silinen/değişen dosyaların eski kopyaları store'dan kaldırılır.
+
+    Returns:
+        dict: Güncel dosya kayıtları ({ad: {"signature", "file_id"}}) ve yükleme istatistikleri
+    """
+    current = {os.path.basename(path): path for path in pdf_files}
+    known = dict(entry.get("files") or {})
+    stale = [name for name, info in known.items()
+             if name not in current or info.get("signature") != pdf_file_signature(current[name])]
+    added = [path for name, path in current.items()
+             if name not in known or name in stale]
+
+    for name in stale:
+        _remove_store_file(entry["id"], known.pop(name)["file_id"], client)
+
+    stats = {"failed_uploads": 0}
+    if added:
+        with track_stage("vector_store_upload"):
+            stats = upload_pdf_files_to_vector_store(entry["id"], dir_pdfs=None, client=client, pdf_files=added)
+        for path in added:
+            name = os.path.basename(path)
+            if name in stats["file_ids"]:
+                known[name] = {"signature": pdf_file_signature(path), "file_id": stats["file_ids"][name]}
+    logger.info(f"[VECTOR] {project_name} store eşitlendi: +{len(added)} / -{len(stale)} dosya")
+    return {"files": known, "failed_uploads": stats["failed_uploads"]}
+
+
+def get_or_create_project_vector_store(project_name: str, dir_pdfs: str, client, pdf_files: list = None) -> dict:
+    """
+    Projenin PDF'leri değişmediyse daha önce oluşturulan vector store'u yeniden kullanır.
+    PDF'ler değiştiyse kayıtlı store yalnızca farklarla güncellenir (bkz. _sync_vector_store);
+    kayıtlı store yoksa veya erişilemiyorsa yeni bir store oluşturup PDF'leri yükler.
+
+    Args:
+        project_name: Proje adı (kayıt anahtarı)
+        dir_pdfs: Projenin PDF klasörü
+        client: OpenAI istemcisi
+        pdf_files: Yalnızca bu dosyalar yüklenir (ör. tek bir bileşenin PDF'leri);
+            verilmezse klasördeki tüm dosyalar
+
+    Returns:
+        dict: Vector store detayları ("reused" alanı ile)
+    """
+    with _registry_lock:
+        store_lock = _store_locks.setdefault(project_name, threading.Lock())
+    with store_lock:
+        return _get_or_create_locked(project_name, dir_pdfs, client, pdf_files)
+
+
+def _get_or_create_locked(project_name: str, dir_pdfs: str, client, pdf_files: list = None) -> dict:
+    if pdf_files is None:
+        pdf_files = [os.path.join(dir_pdfs, f) for f in os.listdir(dir_pdfs)]
+    fingerprint = pdf_folder_fingerprint(dir_pdfs, pdf_files)
+
+    with _registry_lock:
+        entry = _load_registry().get(project_name)
+
+    if entry:
+        try:
+            get_rate_limiter().call(client.vector_stores.retrieve, entry["id"])
+        except Exception as e:
+            logger.warning(f"[VECTOR] Kayıtlı vector store bulunamadı, yeniden oluşturulacak: {e}")
+            entry = None
+
+    if entry and entry.get("fingerprint") == fingerprint:
+        logger.info(f"[VECTOR] {project_name} için mevcut vector store kullanılıyor: {entry['id']}")
+        return {**entry, "reused": True}
+
+    # Dosya kayıtları olmayan eski girdiler artımlı güncellenemez; yeniden oluşturulur
+    if entry and "files" in entry:
+        synced = _sync_vector_store(project_name, entry, pdf_files, client)
+        entry = {**entry, "files": synced["files"], "fingerprint": fingerprint}
+        failed_uploads = synced["failed_uploads"]
+    else:
+        vector_store = create_vector_store(project_name, client=client)
+        if not vector_store:
+            raise RuntimeError(f"Vector store could not be created for project {project_name}")
+
+        with track_stage("vector_store_upload"):
+            upload_stats = upload_pdf_files_to_vector_store(vector_store["id"], dir_pdfs=dir_pdfs, client=client,
+                                                            pdf_files=pdf_files)
+        logger.info(f"[VECTOR] {project_name} yükleme sonucu: {upload_stats['successful_uploads']}/"
+                    f"{upload_stats['total_files']} dosya, hatalar: {upload_stats['errors']}")
+        files = {
+            os.path.basename(path): {"signature": pdf_file_signature(path),
+                                     "file_id": upload_stats["file_ids"][os.path.basename(path)]}
+            for path in pdf_files if os.path.basename(path) in upload_stats["file_ids"]
+        }
+        entry = {"id": vector_store["id"], "name": vector_store["name"], "fingerprint": fingerprint, "files": files}
+        failed_uploads = upload_stats["failed_uploads"]
+
+    # Yüklemesi başarısız olan dosya varsa parmak izini kaydetme, bir sonraki çağrı eksikleri yeniden denesin
+    with _registry_lock:
+        registry = _load_registry()
+        registry[project_name] = entry if failed_uploads == 0 else {**entry, "fingerprint": None}
+        _save_registry(registry)
+
+    return {**entry, "reused": False}
+
+
+def summarize_vector_store(vector_store_details, client: "OpenAI" = None) -> dict:
+    if client is None:
+        from utils.openai_client import get_client
+        client = get_client()
     query = "Can you summarize with one line for each document what the documents are about in this vector store and their names?"
-    response = client.responses.create(
+    response = get_rate_limiter().call(
+        client.responses.create,
         input= query,
         model="gpt-4o-mini",
         tools=[{